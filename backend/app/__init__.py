@@ -2,11 +2,15 @@
 from flask import Flask
 from flask_cors import CORS
 
+from app.config import settings
+from app.json_provider import FastJSONProvider
+
 from app.routers.system_routes import system_bp
 from app.routers.chat_routes import chat_bp
 from app.routers.webhook_routes import webhook_bp
 from app.routers.calendar_routes import calendar_bp
 from app.routers.static_routes import static_bp
+from app.routers.aprende_routes import aprende_bp
 
 from app.routers.error_handlers import register_error_handlers
 from app.routers.task_router import task_bp
@@ -14,6 +18,7 @@ from app.routers.task_router import task_bp
 
 def create_app():
     app = Flask(__name__)
+    app.json = FastJSONProvider(app)
     CORS(app)
     import logging
     import sys
@@ -30,8 +35,32 @@ def create_app():
     app.register_blueprint(webhook_bp)
     app.register_blueprint(calendar_bp)
     app.register_blueprint(static_bp)
+    app.register_blueprint(aprende_bp)
     app.register_blueprint(task_bp, url_prefix="/api")
     # Error handlers centralizados
     register_error_handlers(app)
 
+    # Tareas: recuperar del journal durable y arrancar el write-behind
+    from app.stores.task_store import init_task_persistence
+
+    init_task_persistence()
+
+    if not settings.CALENDAR_FEED_SECRET:
+        logging.getLogger(__name__).warning(
+            "⚠️ CALENDAR_FEED_SECRET vacío: feed .ics apagado, las tareas llevan el .ics en línea"
+        )
+
+    # Avisos de recordatorios/eventos por WhatsApp/SMS (un proceso basta:
+    # el reclamo por tarea es compare-and-set)
+    if settings.REMINDER_DISPATCHER_ENABLED:
+        from app.services.reminder_dispatcher import start_reminder_dispatcher
+
+        start_reminder_dispatcher()
+
+    # Grabación de tráfico a proveedores (diagnóstico, ver provider_replay_service)
+    if settings.PROVIDER_RECORD_PATH:
+        from app.services.provider_replay_service import install_recorder
+
+        install_recorder(settings.PROVIDER_RECORD_PATH)
+
     return app
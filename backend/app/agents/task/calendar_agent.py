@@ -3,30 +3,21 @@ from __future__ import annotations
 import json
 import logging
 from typing import Dict, Any
-from datetime import datetime
-from zoneinfo import ZoneInfo
 
 from app.services.datetime_normalizer_service import normalize_datetime_from_text
-from app.services.calendar_ics import crear_invitacion_ics
 from app.services.groq_service import run_groq_completion
+from app.services.prompt_service import PromptTemplate
 from app.clients.groq_client import get_groq_client, get_groq_api_key
 
 
 logger = logging.getLogger(__name__)
 
-now = datetime.now(ZoneInfo("America/Mexico_City"))
-now_iso = now.isoformat(timespec="minutes")
-today = now.strftime("%Y-%m-%d")
 
-
-SYSTEM_PROMPT = f"""
+# Prefijo estático; la fecha/hora actual va en el sufijo que se arma en
+# cada request (PromptTemplate + CLOCK_SUFFIX)
+SYSTEM_PROMPT = """
 Eres un normalizador de eventos de calendario.
 
-FECHA Y HORA ACTUAL (referencia absoluta):
-- Fecha: {today}
-- Fecha y hora ISO: {now_iso}
-- Zona horaria: America/Mexico_City
-
 Devuelve ÚNICAMENTE un JSON con:
 - titulo: string
 - descripcion: string
@@ -36,17 +27,19 @@ Devuelve ÚNICAMENTE un JSON con:
 
 Reglas:
 -Debes omitir en el titulo las palabras instruccionales como "Agendar", "Programar", "Crear evento"
-- Todas las fechas relativas deben resolverse usando ESTA referencia
+- Todas las fechas relativas deben resolverse usando la FECHA Y HORA ACTUAL de abajo
 - titulo debe ser corto y limpio (sin fecha ni hora)
 - descripcion puede ampliar el contexto
 - NO inventes datos
 - NO uses markdown
 """
 
+SYSTEM_PROMPT_TEMPLATE = PromptTemplate(SYSTEM_PROMPT)
+
 
 def normalize_calendar_event(text: str) -> Dict[str, Any]:
     messages = [
-        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "system", "content": SYSTEM_PROMPT_TEMPLATE.render()},
         {"role": "user", "content": text},
     ]
 
@@ -97,9 +90,18 @@ class CalendarTaskAgent:
 
         needs_meeting_link = "meeting_link" in missing
 
-        dt = normalize_datetime_from_text(text=content)
-        fecha = dt.get("fecha")
-        hora = dt.get("hora")
+        # Extracción de una sola llamada (analyze_task); sin ella, el camino
+        # anterior de dos llamadas
+        extraction = analysis.get("extraction")
+        if extraction is not None:
+            llm = extraction
+            fecha = extraction.get("fecha")
+            hora = extraction.get("hora")
+        else:
+            dt = normalize_datetime_from_text(text=content)
+            llm = normalize_calendar_event(content)
+            fecha = llm.get("fecha") or dt.get("fecha")
+            hora = llm.get("hora") or dt.get("hora")
 
         needs_datetime = not (fecha and hora)
 
@@ -109,26 +111,11 @@ class CalendarTaskAgent:
         if needs_datetime:
             enrichment_candidates.append("datetime")
 
-        llm = normalize_calendar_event(content)
-
-        titulo = llm.get("titulo", content)
-        descripcion = llm.get("descripcion", titulo)
+        titulo = llm.get("titulo") or content
         ubicacion = llm.get("ubicacion")
         if not ubicacion:
             ubicacion = "No especificado"
 
-        fecha = llm.get("fecha") or fecha
-        hora = llm.get("hora") or hora
-
-        ics = None
-        if fecha and hora:
-            ics = crear_invitacion_ics(
-                titulo=titulo,
-                descripcion=descripcion,
-                fecha=fecha,
-                hora=hora,
-            )
-
         logger.info(
             "CalendarAgent.handle | result=%s",
             json.dumps({
@@ -149,7 +136,6 @@ class CalendarTaskAgent:
             "fecha": fecha,
             "hora": hora,
             "ubicacion": ubicacion,
-            "ics": ics,
             "enrichment_candidates": enrichment_candidates,
             "needs_followup": bool(enrichment_candidates),
             "followup_question": None,
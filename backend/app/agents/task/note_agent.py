@@ -76,10 +76,15 @@ class NoteAgent:
         state: Any = None,
     ) -> Dict[str, Any]:
 
-        llm = normalize_note(content)
-
-        title = llm.get("title", content[:60].strip())
-        body = llm.get("content", content)
+        # Extracción de una sola llamada (analyze_task); sin ella, normalize_note
+        extraction = analysis.get("extraction")
+        if extraction is not None:
+            title = extraction.get("titulo") or content[:60].strip()
+            body = extraction.get("descripcion") or content
+        else:
+            llm = normalize_note(content)
+            title = llm.get("title", content[:60].strip())
+            body = llm.get("content", content)
 
         logger.info(
             "NoteAgent.handle | result=%s",
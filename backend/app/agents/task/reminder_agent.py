@@ -6,26 +6,18 @@ from typing import Dict, Any
 
 from app.services.datetime_normalizer_service import normalize_datetime_from_text
 from app.services.groq_service import run_groq_completion
+from app.services.prompt_service import PromptTemplate
 from app.clients.groq_client import get_groq_client, get_groq_api_key
-from datetime import datetime
-from zoneinfo import ZoneInfo
-
-now = datetime.now(ZoneInfo("America/Mexico_City"))
-
-now_iso = now.isoformat(timespec="minutes")
-today = now.strftime("%Y-%m-%d")
-weekday = now.strftime("%A")
 
 
 logger = logging.getLogger(__name__)
+
+# Prefijo estático; la fecha/hora actual va en el sufijo que se arma en
+# cada request (PromptTemplate + CLOCK_SUFFIX). Antes este prompt no era
+# f-string y el modelo recibía "{today}" literal.
 SYSTEM_PROMPT = """
 Eres un normalizador de recordatorios.
 
-FECHA Y HORA ACTUAL (referencia absoluta):
-- Fecha: {today}
-- Fecha y hora ISO: {now_iso}
-- Zona horaria: America/Mexico_City
-
 Devuelve ÚNICAMENTE un JSON con:
 - content: string
 - fecha: YYYY-MM-DD | null
@@ -34,7 +26,7 @@ Devuelve ÚNICAMENTE un JSON con:
 
 Reglas:
 - Todas las fechas relativas ("mañana", "viernes", "en 2 horas")
-  DEBEN resolverse usando ESTA referencia previa
+  DEBEN resolverse usando la FECHA Y HORA ACTUAL de abajo
 - siempre devuelve fecha en formato YYYY-MM-DD o null si no se detecta
 - content debe ser una acción corta en infinitivo, pero omitiendo la palabra instruccional inicial (ej. "Recordar", "No olvidar", "Agendar")
 - NO incluir fecha, hora ni lugar en content
@@ -47,10 +39,12 @@ ya que los demas detalles son capturados en los otros campos.
 
 """
 
+SYSTEM_PROMPT_TEMPLATE = PromptTemplate(SYSTEM_PROMPT)
+
 
 def normalize_reminder(text: str) -> Dict[str, Any]:
     messages = [
-        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "system", "content": SYSTEM_PROMPT_TEMPLATE.render()},
         {"role": "user", "content": text},
     ]
 
@@ -96,16 +90,21 @@ class ReminderTaskAgent:
         state: Any = None,
     ) -> Dict[str, Any]:
 
-        dt = normalize_datetime_from_text(text=content)
-        fecha = dt.get("fecha")
-        hora = dt.get("hora")
-
-        llm = normalize_reminder(content)
-
-        content_final = llm.get("content", content)
-        fecha = llm.get("fecha") or fecha
-        hora = llm.get("hora") or hora
-        lugar = llm.get("lugar")
+        # Extracción de una sola llamada (analyze_task); sin ella, el camino
+        # anterior de dos llamadas
+        extraction = analysis.get("extraction")
+        if extraction is not None:
+            content_final = extraction.get("titulo") or content
+            fecha = extraction.get("fecha")
+            hora = extraction.get("hora")
+            lugar = extraction.get("ubicacion") or "No especificado"
+        else:
+            dt = normalize_datetime_from_text(text=content)
+            llm = normalize_reminder(content)
+            content_final = llm.get("content", content)
+            fecha = llm.get("fecha") or dt.get("fecha")
+            hora = llm.get("hora") or dt.get("hora")
+            lugar = llm.get("lugar")
 
         enrichment_candidates = []
         needs_followup = False
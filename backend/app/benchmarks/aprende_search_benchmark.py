@@ -0,0 +1,437 @@
+"""
+Benchmark offline de la búsqueda de cursos Aprende.
+
+Corre el pipeline real de `cluster_search_service` contra un set
+dorado de queries en español (query → courseIds esperados), sin red:
+
+  - pack sintético construido con los documentos locales (store de
+    recursos + catálogo) y el proveedor de embeddings `hashing`
+  - embeddings del query con el mismo proveedor (sin OpenAI)
+  - LLM de rewrite/desempate sustituido por un stub que solo cuenta
+
+Reporta recall@k, MRR, latencias por etapa (p50/p95/p99) y número de
+llamadas LLM, y compara contra un baseline guardado.
+
+Uso (desde backend/):
+    python -m app.benchmarks.aprende_search_benchmark
+    python -m app.benchmarks.aprende_search_benchmark --save-baseline
+    python -m app.benchmarks.aprende_search_benchmark --scale 20 --repeat 3
+"""
+from __future__ import annotations
+
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from app.services.embedding_provider_service import EmbeddingProvider, HashingEmbeddingProvider
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+GOLDEN_PATH = os.path.join(HERE, "data", "aprende_golden_queries.json")
+BASELINE_PATH = os.path.join(HERE, "data", "aprende_search_baseline.json")
+
+# Métricas de calidad que se comparan contra el baseline
+QUALITY_METRICS = ("recall_at_k", "mrr", "hit_at_1")
+
+# Etapas instrumentadas (funciones de cluster_search_service)
+STAGES = {
+    "embed": ("embed_query", "embed_queries"),
+    "bm25": ("_add_lexical_candidates", "_lexical_fallback"),
+    "lexical_rerank": ("apply_lexical_rerank",),
+    "llm": ("llm_rewrite_learning_intent", "llm_aprende_tiebreaker"),
+    "fusion": ("apply_rrf_fusion",),
+}
+
+
+# ==========================================================
+# PACK SINTÉTICO
+# ==========================================================
+
+def _kmeans(x: np.ndarray, k: int, iters: int = 15) -> Tuple[np.ndarray, np.ndarray]:
+    """K-means esférico determinístico (semillas equiespaciadas)."""
+    k = max(1, min(k, len(x)))
+    centroids = x[np.linspace(0, len(x) - 1, k).astype(int)].copy()
+    labels = np.zeros(len(x), dtype=np.int64)
+    for _ in range(iters):
+        labels = np.argmax(x @ centroids.T, axis=1)
+        for c in range(k):
+            members = x[labels == c]
+            if len(members):
+                centroid = members.mean(axis=0)
+                centroids[c] = centroid / (np.linalg.norm(centroid) + 1e-10)
+    return labels, centroids
+
+
+def build_synthetic_pack(
+    out_dir: str,
+    embedder: EmbeddingProvider,
+    *,
+    n_clusters: int = 12,
+    scale: int = 1,
+    seed: int = 0,
+) -> str:
+    """
+    Escribe courses_cluster_pack.npz + title_embeddings.npz en out_dir
+    (mismas llaves que build_clusters.py / generate_title_embeddings.py).
+
+    scale > 1 agrega réplicas ruidosas de cada curso ("<id>-s<i>") para
+    medir latencia con catálogos más grandes.
+    """
+    from app.services.course_lexical_search_service import _iter_course_documents
+
+    ids: List[str] = []
+    names: List[str] = []
+    texts: List[str] = []
+    for cid, name, text in _iter_course_documents():
+        ids.append(cid)
+        names.append(name)
+        texts.append(text)
+
+    x = embedder.embed(texts)
+    t = embedder.embed(names)
+
+    if scale > 1:
+        rng = np.random.RandomState(seed)
+        base_ids, base_names = list(ids), list(names)
+        blocks, title_blocks = [x], [t]
+        for i in range(1, scale):
+            noise = rng.normal(scale=0.05, size=x.shape).astype(np.float32)
+            replica = x + noise
+            blocks.append(replica / np.linalg.norm(replica, axis=1, keepdims=True))
+            title_blocks.append(t)
+            ids.extend(f"{cid}-s{i}" for cid in base_ids)
+            names.extend(base_names)
+        x = np.concatenate(blocks)
+        t = np.concatenate(title_blocks)
+
+    labels, centroids = _kmeans(x, n_clusters)
+
+    pack_path = os.path.join(out_dir, "courses_cluster_pack.npz")
+    np.savez(
+        pack_path,
+        ids=np.asarray(ids),
+        names=np.asarray(names),
+        X=x.astype(np.float32),
+        labels=labels,
+        centroids=centroids.astype(np.float32),
+        k=np.asarray(len(centroids)),
+        dim=np.asarray(embedder.dim),
+    )
+    np.savez(
+        os.path.join(out_dir, "title_embeddings.npz"),
+        course_ids=np.asarray(ids),
+        course_names=np.asarray(names),
+        title_embeddings=t.astype(np.float32),
+    )
+    return pack_path
+
+
+# ==========================================================
+# INSTRUMENTACIÓN
+# ==========================================================
+
+class StageRecorder:
+    """Acumula segundos por etapa dentro de una query y llamadas LLM."""
+
+    def __init__(self):
+        self.current: Dict[str, float] = defaultdict(float)
+        self.llm_calls = 0
+
+    def wrap(self, stage: str, fn: Callable) -> Callable:
+        def wrapper(*args, **kwargs):
+            t0 = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self.current[stage] += time.perf_counter() - t0
+        return wrapper
+
+    def take(self) -> Dict[str, float]:
+        out, self.current = dict(self.current), defaultdict(float)
+        return out
+
+
+@contextlib.contextmanager
+def offline_search_env(pack_path: str, embedder: EmbeddingProvider, mode: str, recorder: StageRecorder):
+    """
+    Apunta cluster_search_service al pack sintético, sustituye embeddings
+    y LLM por stubs y fija el modo de búsqueda. Restaura todo al salir.
+    """
+    from app.services import cluster_search_service as css
+    from app.services import course_catalog_service as catalog
+
+    def _llm_stub(*args, **kwargs):
+        recorder.llm_calls += 1
+        return None
+
+    stubs = {
+        "get_embedding_provider": lambda: embedder,
+        "llm_rewrite_learning_intent": _llm_stub,
+        "llm_aprende_tiebreaker": _llm_stub,
+        "get_search_mode": lambda: mode,
+    }
+
+    originals = {name: getattr(css, name) for names in STAGES.values() for name in names}
+    originals.update({name: getattr(css, name) for name in stubs})
+    prev_env = os.environ.get("COURSE_CLUSTER_PACK_PATH")
+
+    def _clear_caches():
+        for fn in (css.load_cluster_pack, css.load_title_embeddings, css._pack_row_by_id,
+                   css._normalized_pack_arrays, catalog.get_course_catalog):
+            fn.cache_clear()
+
+    try:
+        os.environ["COURSE_CLUSTER_PACK_PATH"] = pack_path
+        _clear_caches()
+        for name, stub in stubs.items():
+            setattr(css, name, stub)
+        for stage, names in STAGES.items():
+            for name in names:
+                setattr(css, name, recorder.wrap(stage, getattr(css, name)))
+        yield css
+    finally:
+        for name, fn in originals.items():
+            setattr(css, name, fn)
+        if prev_env is None:
+            os.environ.pop("COURSE_CLUSTER_PACK_PATH", None)
+        else:
+            os.environ["COURSE_CLUSTER_PACK_PATH"] = prev_env
+        _clear_caches()
+
+
+# ==========================================================
+# MÉTRICAS
+# ==========================================================
+
+def _percentiles(values: List[float]) -> Dict[str, float]:
+    if not values:
+        return {"p50": 0.0, "p95": 0.0, "p99": 0.0, "mean": 0.0}
+    ms = np.asarray(values) * 1000
+    p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+    return {
+        "p50": round(float(p50), 3),
+        "p95": round(float(p95), 3),
+        "p99": round(float(p99), 3),
+        "mean": round(float(ms.mean()), 3),
+    }
+
+
+def score_query(result_ids: List[str], expected: List[str], k: int) -> Dict[str, float]:
+    # Las réplicas sintéticas ("<id>-s<i>") cuentan como su curso original
+    top = [cid.split("-s", 1)[0] for cid in result_ids[:k]]
+    expected_set = set(expected)
+    hits = [cid for cid in top if cid in expected_set]
+    rank = next((i for i, cid in enumerate(top, 1) if cid in expected_set), None)
+    return {
+        # recall@k respecto a "al menos uno de los esperados"
+        "recall_at_k": 1.0 if hits else 0.0,
+        "mrr": 1.0 / rank if rank else 0.0,
+        "hit_at_1": 1.0 if rank == 1 else 0.0,
+    }
+
+
+def load_golden(path: str = GOLDEN_PATH) -> List[Dict[str, Any]]:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def run_mode(
+    golden: List[Dict[str, Any]],
+    pack_path: str,
+    embedder: EmbeddingProvider,
+    mode: str,
+    *,
+    k: int = 5,
+    repeat: int = 1,
+    batch: bool = False,
+) -> Dict[str, Any]:
+    recorder = StageRecorder()
+    stage_samples: Dict[str, List[float]] = defaultdict(list)
+    quality: Dict[str, List[float]] = defaultdict(list)
+    misses: List[str] = []
+    queries = [g["query"] for g in golden]
+
+    with offline_search_env(pack_path, embedder, mode, recorder) as css:
+        # Warm-up: carga de pack, catálogo e índice BM25 fuera de la medición
+        with contextlib.redirect_stdout(io.StringIO()):
+            css.search_courses_in_clusters(queries[0], k=k)
+        recorder.take()
+        recorder.llm_calls = 0
+
+        for run in range(repeat):
+            if batch:
+                t0 = time.perf_counter()
+                with contextlib.redirect_stdout(io.StringIO()):
+                    all_results = css.search_courses_batch(queries, k=k)
+                elapsed = time.perf_counter() - t0
+                stage_samples["total"].extend([elapsed / len(queries)] * len(queries))
+                for stage, secs in recorder.take().items():
+                    stage_samples[stage].extend([secs / len(queries)] * len(queries))
+            else:
+                all_results = []
+                for q in queries:
+                    t0 = time.perf_counter()
+                    with contextlib.redirect_stdout(io.StringIO()):
+                        all_results.append(css.search_courses_in_clusters(q, k=k))
+                    stage_samples["total"].append(time.perf_counter() - t0)
+                    for stage, secs in recorder.take().items():
+                        stage_samples[stage].append(secs)
+
+            if run == 0:
+                for g, results in zip(golden, all_results):
+                    scores = score_query([str(r["courseId"]) for r in results], g["expected"], k)
+                    for name, value in scores.items():
+                        quality[name].append(value)
+                    if not scores["recall_at_k"]:
+                        misses.append(g["query"])
+
+    n = len(golden)
+    return {
+        **{name: round(float(np.mean(values)), 4) for name, values in quality.items()},
+        "llm_calls": recorder.llm_calls,
+        "llm_calls_per_query": round(recorder.llm_calls / (n * repeat), 3),
+        "latency_ms": {stage: _percentiles(values) for stage, values in sorted(stage_samples.items())},
+        "misses": misses,
+    }
+
+
+def run_benchmark(
+    *,
+    modes: Iterable[str] = ("hybrid", "dense", "lexical"),
+    k: int = 5,
+    repeat: int = 1,
+    scale: int = 1,
+    batch: bool = False,
+    golden_path: str = GOLDEN_PATH,
+    dim: int = 512,
+) -> Dict[str, Any]:
+    golden = load_golden(golden_path)
+    embedder = HashingEmbeddingProvider(dim)
+
+    with tempfile.TemporaryDirectory(prefix="aprende-bench-") as tmp:
+        t0 = time.perf_counter()
+        pack_path = build_synthetic_pack(tmp, embedder, scale=scale)
+        build_ms = (time.perf_counter() - t0) * 1000
+
+        report = {
+            "k": k,
+            "queries": len(golden),
+            "repeat": repeat,
+            "scale": scale,
+            "batch": batch,
+            "embedder": {"type": "hashing", "dim": dim},
+            "pack_build_ms": round(build_ms, 1),
+            "modes": {
+                mode: run_mode(golden, pack_path, embedder, mode, k=k, repeat=repeat, batch=batch)
+                for mode in modes
+            },
+        }
+    return report
+
+
+# ==========================================================
+# BASELINE
+# ==========================================================
+
+def compare_to_baseline(
+    report: Dict[str, Any],
+    baseline: Dict[str, Any],
+    tolerance: float = 0.02,
+) -> List[str]:
+    """
+    Regresa la lista de regresiones de calidad (> tolerance) por modo.
+    La latencia se reporta pero no se valida (depende de la máquina).
+    """
+    regressions: List[str] = []
+    for mode, current in report.get("modes", {}).items():
+        base = (baseline.get("modes") or {}).get(mode)
+        if not base:
+            continue
+        for metric in QUALITY_METRICS:
+            if metric in base and current.get(metric, 0.0) < base[metric] - tolerance:
+                regressions.append(f"{mode}.{metric}: {base[metric]:.4f} → {current[metric]:.4f}")
+        if current.get("llm_calls_per_query", 0) > base.get("llm_calls_per_query", 0) + 1e-9:
+            regressions.append(
+                f"{mode}.llm_calls_per_query: {base['llm_calls_per_query']} → {current['llm_calls_per_query']}"
+            )
+    return regressions
+
+
+def print_report(report: Dict[str, Any], baseline: Optional[Dict[str, Any]] = None) -> None:
+    print(f"📊 Benchmark Aprende | {report['queries']} queries | k={report['k']} | "
+          f"scale={report['scale']} | batch={report['batch']} | pack {report['pack_build_ms']} ms")
+    for mode, m in report["modes"].items():
+        base = ((baseline or {}).get("modes") or {}).get(mode, {})
+        line = " | ".join(
+            f"{metric}={m[metric]:.4f}" + (f" ({m[metric] - base[metric]:+.4f})" if metric in base else "")
+            for metric in QUALITY_METRICS
+        )
+        print(f"\n▶ {mode}: {line} | llm_calls={m['llm_calls']}")
+        for stage, p in m["latency_ms"].items():
+            print(f"   {stage:<15} p50={p['p50']:>8.3f} ms  p95={p['p95']:>8.3f} ms  p99={p['p99']:>8.3f} ms")
+        if m["misses"]:
+            print("   misses:", "; ".join(m["misses"]))
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark offline de búsqueda de cursos Aprende")
+    parser.add_argument("--modes", default="hybrid,dense,lexical")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--scale", type=int, default=1, help="Réplicas sintéticas del catálogo")
+    parser.add_argument("--batch", action="store_true", help="Usar search_courses_batch")
+    parser.add_argument("--golden", default=GOLDEN_PATH)
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.02)
+    parser.add_argument("--json", help="Escribir el reporte completo en este archivo")
+    args = parser.parse_args(argv)
+
+    report = run_benchmark(
+        modes=[m.strip() for m in args.modes.split(",") if m.strip()],
+        k=args.k,
+        repeat=args.repeat,
+        scale=args.scale,
+        batch=args.batch,
+        golden_path=args.golden,
+    )
+
+    baseline = None
+    if not args.save_baseline and os.path.exists(args.baseline):
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    print_report(report, baseline)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n✅ Baseline guardado en {args.baseline}")
+        return 0
+
+    if baseline:
+        regressions = compare_to_baseline(report, baseline, args.tolerance)
+        if regressions:
+            print("\n❌ Regresiones contra baseline:")
+            for r in regressions:
+                print("   -", r)
+            return 1
+        print("\n✅ Sin regresiones de calidad contra baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
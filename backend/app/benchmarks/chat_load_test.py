@@ -0,0 +1,457 @@
+"""
+Prueba de carga de /chat, /whatsapp y /sms con guiones de conversación.
+
+Cada usuario virtual (VU) repite en lazo cerrado guiones multi-turno
+(data/chat_load_scripts.json): enriquecimiento de tareas, consultas de
+tareas, Aprende, Telcel, chat y búsqueda web automática. Cada guion usa
+un user_key nuevo, así que los follow-ups pasan por el estado real de
+conversación. La concurrencia sube por niveles; por nivel se reporta
+throughput, latencias p50/p90/p99 y tasa de error por ruta y por rama
+del pipeline, y al final el "knee" de la curva:
+
+  - knee: nivel con máxima potencia (throughput / latencia media)
+  - saturación: primer nivel donde el throughput crece menos de
+    --min-gain respecto al anterior
+
+Por defecto levanta dos procesos: el stub de proveedores
+(provider_stub_server) y la app apuntando a él. La app corre con
+gunicorn (--workers/--threads) si está instalado, o con run.py.
+La rama Telcel necesita MONGO_URI (el aggregate de Mongo no pasa por
+el stub); sin él esos turnos cuentan como error.
+
+Uso (desde backend/; importar `app` exige las API keys, basta un valor
+cualquiera porque las llamadas van al stub):
+    export OPENAI_API_KEY=stub GROQ_API_KEY=stub
+    python -m app.benchmarks.chat_load_test --concurrency 1,2,4,8,16 --duration 15
+    python -m app.benchmarks.chat_load_test --workers 2 --threads 8 --stub-config stub.json
+    python -m app.benchmarks.chat_load_test --target http://127.0.0.1:10000   # servidor ya levantado
+"""
+from __future__ import annotations
+
+import contextlib
+import json
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import requests
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.abspath(os.path.join(HERE, "..", ".."))
+SCRIPTS_PATH = os.path.join(HERE, "data", "chat_load_scripts.json")
+
+ROUTES = ("chat", "whatsapp", "sms")
+
+# Texto que regresan los webhooks cuando el controller atrapa una excepción
+CHANNEL_ERROR_TEXT = "Ocurrió un error"
+
+
+@dataclass
+class Sample:
+    route: str
+    branch: str
+    script: str
+    latency_ms: float
+    ok: bool
+    status: int
+
+
+# ==========================================================
+# GUIONES
+# ==========================================================
+
+def load_scripts(path: str = SCRIPTS_PATH) -> List[Dict[str, Any]]:
+    with open(path, "r", encoding="utf-8") as f:
+        scripts = json.load(f)["scripts"]
+    for s in scripts:
+        s.setdefault("weight", 1)
+        s.setdefault("routes", list(ROUTES))
+    return scripts
+
+
+def _send(session: requests.Session, base_url: str, route: str, user_key: str, step: Dict[str, Any], timeout: float) -> Tuple[bool, int]:
+    if route == "chat":
+        resp = session.post(
+            f"{base_url}/chat",
+            json={"message": step["message"], "action": step.get("action", "chat")},
+            headers={"X-Conversation-Id": user_key},
+            timeout=timeout,
+        )
+        ok = resp.status_code == 200 and bool(resp.json().get("success", True))
+        return ok, resp.status_code
+
+    resp = session.post(
+        f"{base_url}/{route}",
+        data={"Body": step["message"], "From": user_key},
+        timeout=timeout,
+    )
+    # TwiML llega como text/xml sin charset: decodificar explícitamente
+    ok = resp.status_code == 200 and CHANNEL_ERROR_TEXT not in resp.content.decode("utf-8", "replace")
+    return ok, resp.status_code
+
+
+def _user_key(route: str, vu: int, iteration: int, run_id: str) -> str:
+    if route == "chat":
+        return f"lt-{run_id}-{vu}-{iteration}"
+    number = f"+52155{vu:04d}{iteration % 10000:04d}"
+    return f"whatsapp:{number}" if route == "whatsapp" else number
+
+
+def _virtual_user(
+    vu: int,
+    base_url: str,
+    scripts: List[Dict[str, Any]],
+    routes: List[str],
+    stop_at: float,
+    record_from: float,
+    think_ms: float,
+    timeout: float,
+    run_id: str,
+    out: List[Sample],
+    lock: threading.Lock,
+) -> None:
+    rng = random.Random(f"{run_id}-{vu}")
+    weights = [s["weight"] for s in scripts]
+    session = requests.Session()
+    local: List[Sample] = []
+    iteration = 0
+
+    while time.perf_counter() < stop_at:
+        script = rng.choices(scripts, weights=weights)[0]
+        allowed = [r for r in script["routes"] if r in routes]
+        if not allowed:
+            continue
+        route = rng.choice(allowed)
+        user_key = _user_key(route, vu, iteration, run_id)
+        iteration += 1
+
+        for step in script["steps"]:
+            if time.perf_counter() >= stop_at:
+                break
+            t0 = time.perf_counter()
+            try:
+                ok, status = _send(session, base_url, route, user_key, step, timeout)
+            except Exception:
+                ok, status = False, 0
+            if t0 >= record_from:
+                local.append(Sample(route, step.get("branch", "?"), script["name"], (time.perf_counter() - t0) * 1000, ok, status))
+            if not ok:
+                break  # el resto del guion depende del estado de este turno
+            if think_ms:
+                time.sleep(rng.expovariate(1 / think_ms) / 1000)
+
+    with lock:
+        out.extend(local)
+
+
+def run_level(
+    base_url: str,
+    scripts: List[Dict[str, Any]],
+    *,
+    concurrency: int,
+    duration: float,
+    warmup: float = 2.0,
+    routes: Optional[List[str]] = None,
+    think_ms: float = 0.0,
+    timeout: float = 60.0,
+) -> Dict[str, Any]:
+    samples: List[Sample] = []
+    lock = threading.Lock()
+    run_id = f"{int(time.time()) % 100000}c{concurrency}"
+    start = time.perf_counter()
+    record_from = start + warmup
+    stop_at = record_from + duration
+
+    threads = [
+        threading.Thread(
+            target=_virtual_user,
+            args=(vu, base_url, scripts, routes or list(ROUTES), stop_at, record_from,
+                  think_ms, timeout, run_id, samples, lock),
+            daemon=True,
+        )
+        for vu in range(concurrency)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    # Ventana medida: desde fin de warmup hasta que terminó el último request
+    elapsed = max(time.perf_counter() - record_from, 1e-9)
+    return summarize(samples, concurrency=concurrency, elapsed_s=elapsed)
+
+
+# ==========================================================
+# MÉTRICAS
+# ==========================================================
+
+def _stats(samples: List[Sample], elapsed_s: float) -> Dict[str, Any]:
+    if not samples:
+        return {"requests": 0, "rps": 0.0, "error_rate": 0.0, "p50": 0.0, "p90": 0.0, "p99": 0.0, "mean": 0.0}
+    ms = np.asarray([s.latency_ms for s in samples])
+    p50, p90, p99 = np.percentile(ms, [50, 90, 99])
+    errors = sum(1 for s in samples if not s.ok)
+    return {
+        "requests": len(samples),
+        "rps": round(len(samples) / elapsed_s, 2),
+        "error_rate": round(errors / len(samples), 4),
+        "p50": round(float(p50), 1),
+        "p90": round(float(p90), 1),
+        "p99": round(float(p99), 1),
+        "mean": round(float(ms.mean()), 1),
+    }
+
+
+def summarize(samples: List[Sample], *, concurrency: int, elapsed_s: float) -> Dict[str, Any]:
+    by_route: Dict[str, List[Sample]] = defaultdict(list)
+    by_branch: Dict[str, List[Sample]] = defaultdict(list)
+    statuses: Dict[str, int] = defaultdict(int)
+    for s in samples:
+        by_route[s.route].append(s)
+        by_branch[s.branch].append(s)
+        if not s.ok:
+            statuses[str(s.status)] += 1
+
+    return {
+        "concurrency": concurrency,
+        "elapsed_s": round(elapsed_s, 2),
+        "overall": _stats(samples, elapsed_s),
+        "routes": {r: _stats(v, elapsed_s) for r, v in sorted(by_route.items())},
+        "branches": {b: _stats(v, elapsed_s) for b, v in sorted(by_branch.items())},
+        "error_statuses": dict(statuses),
+    }
+
+
+def find_knee(levels: List[Dict[str, Any]], min_gain: float = 0.10) -> Dict[str, Any]:
+    """
+    knee = nivel con máxima potencia (rps / latencia media);
+    saturation = primer nivel cuyo throughput crece < min_gain.
+    """
+    if not levels:
+        return {}
+    power = [
+        lv["overall"]["rps"] / lv["overall"]["mean"] if lv["overall"]["mean"] else 0.0
+        for lv in levels
+    ]
+    knee = levels[int(np.argmax(power))]
+
+    saturation = None
+    for prev, cur in zip(levels, levels[1:]):
+        if cur["overall"]["rps"] < prev["overall"]["rps"] * (1 + min_gain):
+            saturation = cur["concurrency"]
+            break
+
+    best = max(levels, key=lambda lv: lv["overall"]["rps"])
+    return {
+        "knee_concurrency": knee["concurrency"],
+        "knee_rps": knee["overall"]["rps"],
+        "knee_p90_ms": knee["overall"]["p90"],
+        "saturation_concurrency": saturation,
+        "max_rps": best["overall"]["rps"],
+        "max_rps_concurrency": best["concurrency"],
+    }
+
+
+# ==========================================================
+# PROCESOS (stub + app)
+# ==========================================================
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _wait_http(url: str, timeout: float = 60.0) -> None:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            requests.get(url, timeout=2)
+            return
+        except requests.RequestException:
+            time.sleep(0.3)
+    raise RuntimeError(f"El servidor no respondió en {url}")
+
+
+@contextlib.contextmanager
+def stub_and_app(
+    *,
+    workers: int = 1,
+    threads: int = 8,
+    stub_config: Optional[str] = None,
+    seed: Optional[int] = 0,
+    log_dir: Optional[str] = None,
+) -> Iterator[str]:
+    """
+    Levanta el stub y la app (gunicorn si existe, run.py si no).
+    Regresa la URL base de la app.
+    """
+    stub_port, app_port = _free_port(), _free_port()
+    log_dir = log_dir or tempfile.mkdtemp(prefix="chat_load_")
+    os.makedirs(log_dir, exist_ok=True)
+    print(f"📝 Logs de stub/app en {log_dir}", file=sys.stderr)
+
+    env = {
+        **os.environ,
+        "GROQ_API_KEY": os.environ.get("GROQ_API_KEY") or "stub",
+        "OPENAI_API_KEY": os.environ.get("OPENAI_API_KEY") or "stub",
+        "GROQ_BASE_URL": f"http://127.0.0.1:{stub_port}",
+        "OPENAI_BASE_URL": f"http://127.0.0.1:{stub_port}/v1",
+        "PORT": str(app_port),
+        "PYTHONUNBUFFERED": "1",
+    }
+
+    stub_cmd = [sys.executable, "-m", "app.benchmarks.provider_stub_server", "--port", str(stub_port)]
+    if stub_config:
+        stub_cmd += ["--config", stub_config]
+    if seed is not None:
+        stub_cmd += ["--seed", str(seed)]
+
+    if shutil.which("gunicorn"):
+        app_cmd = [
+            "gunicorn", "-w", str(workers), "--threads", str(threads),
+            "-b", f"127.0.0.1:{app_port}", "--timeout", "120", "run:app",
+        ]
+    else:
+        if workers > 1:
+            print("⚠️ gunicorn no instalado: se usa run.py (1 proceso, threaded)", file=sys.stderr)
+        app_cmd = [sys.executable, "run.py"]
+
+    procs: List[subprocess.Popen] = []
+    logs = []
+    try:
+        for name, cmd in (("stub", stub_cmd), ("app", app_cmd)):
+            log = open(os.path.join(log_dir, f"{name}.log"), "w", encoding="utf-8")
+            logs.append(log)
+            procs.append(subprocess.Popen(cmd, cwd=BACKEND_DIR, env=env, stdout=log, stderr=subprocess.STDOUT))
+
+        _wait_http(f"http://127.0.0.1:{stub_port}/_stub/stats")
+        _wait_http(f"http://127.0.0.1:{app_port}/health")
+        yield f"http://127.0.0.1:{app_port}"
+    finally:
+        for p in procs:
+            p.terminate()
+        for p in procs:
+            try:
+                p.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                p.kill()
+        for log in logs:
+            log.close()
+
+
+# ==========================================================
+# REPORTE
+# ==========================================================
+
+def _fmt(name: str, st: Dict[str, Any]) -> str:
+    return (
+        f"   {name:<14} n={st['requests']:>6}  rps={st['rps']:>7.2f}  "
+        f"p50={st['p50']:>8.1f}  p90={st['p90']:>8.1f}  p99={st['p99']:>8.1f} ms  "
+        f"err={st['error_rate'] * 100:>5.1f}%"
+    )
+
+
+def print_level(level: Dict[str, Any]) -> None:
+    print(f"\n▶ concurrencia={level['concurrency']} ({level['elapsed_s']} s)")
+    print(_fmt("TOTAL", level["overall"]))
+    for route, st in level["routes"].items():
+        print(_fmt(f"/{route}", st))
+    for branch, st in level["branches"].items():
+        print(_fmt(f"[{branch}]", st))
+    if level["error_statuses"]:
+        print("   errores por status:", level["error_statuses"])
+
+
+def print_knee(knee: Dict[str, Any], label: str) -> None:
+    print(f"\n📈 Curva {label}")
+    print(
+        f"   knee: concurrencia={knee['knee_concurrency']}  rps={knee['knee_rps']:.2f}  "
+        f"p90={knee['knee_p90_ms']:.1f} ms"
+    )
+    print(f"   máximo: {knee['max_rps']:.2f} rps con concurrencia={knee['max_rps_concurrency']}")
+    print(f"   saturación: {knee['saturation_concurrency'] or 'no alcanzada'}")
+
+
+def run_load_test(
+    base_url: str,
+    *,
+    concurrency_levels: List[int],
+    duration: float,
+    warmup: float,
+    routes: List[str],
+    think_ms: float,
+    scripts_path: str = SCRIPTS_PATH,
+    min_gain: float = 0.10,
+) -> Dict[str, Any]:
+    scripts = load_scripts(scripts_path)
+    levels = []
+    for c in concurrency_levels:
+        level = run_level(
+            base_url, scripts,
+            concurrency=c, duration=duration, warmup=warmup,
+            routes=routes, think_ms=think_ms,
+        )
+        print_level(level)
+        levels.append(level)
+    return {"levels": levels, "knee": find_knee(levels, min_gain=min_gain)}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Prueba de carga de /chat, /whatsapp y /sms")
+    parser.add_argument("--target", help="URL de una app ya levantada (no se lanzan stub ni app)")
+    parser.add_argument("--concurrency", default="1,2,4,8,16,32")
+    parser.add_argument("--duration", type=float, default=15.0, help="Segundos medidos por nivel")
+    parser.add_argument("--warmup", type=float, default=2.0)
+    parser.add_argument("--routes", default=",".join(ROUTES))
+    parser.add_argument("--think-ms", type=float, default=0.0, help="Pausa media entre turnos (exponencial)")
+    parser.add_argument("--scripts", default=SCRIPTS_PATH)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--stub-config", help="JSON de latencias/errores para el stub")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--min-gain", type=float, default=0.10)
+    parser.add_argument("--json", help="Escribir el reporte completo en este archivo")
+    args = parser.parse_args(argv)
+
+    levels = [int(c) for c in args.concurrency.split(",") if c.strip()]
+    routes = [r.strip() for r in args.routes.split(",") if r.strip() in ROUTES]
+    label = f"target={args.target}" if args.target else f"workers={args.workers} threads={args.threads}"
+    print(f"🚦 Carga {label} | niveles={levels} | {args.duration:.0f} s por nivel | rutas={routes}")
+
+    with (contextlib.nullcontext(args.target.rstrip("/")) if args.target else
+          stub_and_app(workers=args.workers, threads=args.threads, stub_config=args.stub_config, seed=args.seed)) as base_url:
+        report = run_load_test(
+            base_url,
+            concurrency_levels=levels,
+            duration=args.duration,
+            warmup=args.warmup,
+            routes=routes,
+            think_ms=args.think_ms,
+            scripts_path=args.scripts,
+            min_gain=args.min_gain,
+        )
+
+    report["config"] = {"target": args.target, "workers": args.workers, "threads": args.threads}
+    print_knee(report["knee"], label)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
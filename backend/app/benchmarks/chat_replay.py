@@ -0,0 +1,196 @@
+"""
+Replay determinístico de turnos grabados de `procesar_chat_web`.
+
+Toma una grabación de provider_replay_service (PROVIDER_RECORD_PATH) y
+vuelve a ejecutar cada turno en orden, en un proceso limpio, con las
+respuestas de proveedores servidas desde el archivo. Sirve para:
+
+  - reproducir un turno lento de producción
+  - perfilar el overhead de CPU propio del pipeline (--latency none --profile)
+  - comparar cambios del pipeline sobre entradas idénticas
+
+Latencias de proveedores:
+  original   las grabadas (default)
+  none       cero: solo queda el costo del pipeline
+  synthetic  distribuciones del stub de proveedores (provider_stub_server)
+  --latency-scale multiplica cualquiera de las anteriores
+
+Uso (desde backend/; importar `app` exige OPENAI_API_KEY/GROQ_API_KEY,
+basta un valor cualquiera porque nada sale a la red):
+    python -m app.benchmarks.chat_replay turnos.jsonl.gz
+    python -m app.benchmarks.chat_replay turnos.jsonl.gz --latency none --profile replay.prof
+    python -m app.benchmarks.chat_replay turnos.jsonl.gz --strict --json replay.json
+"""
+from __future__ import annotations
+
+import contextlib
+import io
+import json
+import logging
+import os
+import random
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+# Endpoint del stub cuyas latencias se usan en modo synthetic
+SYNTHETIC_ENDPOINT = {
+    "groq.chat": "chat",
+    "groq.http": "chat",
+    "openai.embeddings": "embeddings",
+    "openai.moderations": "moderations",
+    "openai.responses": "responses",
+}
+SYNTHETIC_MONGO_SPEC = {"dist": "lognormal", "median_ms": 40, "sigma": 0.3}
+
+
+def build_latency_fn(mode: str, scale: float = 1.0, seed: int = 0):
+    if mode == "none":
+        return lambda kind, ms: 0.0
+    if mode == "original":
+        return lambda kind, ms: ms * scale
+    if mode == "synthetic":
+        from app.benchmarks.provider_stub_server import DEFAULT_CONFIG, sample_latency_ms
+
+        rng = random.Random(seed)
+        specs = DEFAULT_CONFIG["latency"]
+
+        def synthetic(kind: str, ms: float) -> float:
+            spec = specs.get(SYNTHETIC_ENDPOINT.get(kind, ""), SYNTHETIC_MONGO_SPEC)
+            return sample_latency_ms(spec, rng) * scale
+
+        return synthetic
+    raise ValueError(f"Modo de latencia desconocido: {mode}")
+
+
+def _same_outcome(recorded: Optional[Dict[str, Any]], replayed: Optional[Dict[str, Any]]) -> bool:
+    """Se comparan solo los campos estables (ids y timestamps cambian)."""
+    recorded, replayed = recorded or {}, replayed or {}
+    return all(recorded.get(k) == replayed.get(k) for k in ("response", "action", "success"))
+
+
+def replay(path: str, *, latency: str = "original", scale: float = 1.0, strict: bool = False,
+           profile: Optional[str] = None, seed: int = 0) -> Dict[str, Any]:
+    # TelcelAgent exige MONGO_URI; el aggregate se sirve desde la grabación
+    os.environ.setdefault("MONGO_URI", "mongodb://replay.invalid:27017/?connect=false")
+
+    from app.services import cerebro_service
+    from app.services.provider_replay_service import install_replayer
+
+    replayer = install_replayer(path, latency=build_latency_fn(latency, scale, seed), strict=strict)
+    profiler = None
+    if profile:
+        import cProfile
+
+        profiler = cProfile.Profile()
+
+    rows: List[Dict[str, Any]] = []
+    logging.getLogger().setLevel(logging.WARNING)
+    try:
+        for turn in replayer.turns:
+            waited_before = replayer.waited_ms
+            error = None
+            result = None
+            t0 = time.perf_counter()
+            # El pipeline imprime mucho en stdout; se descarta durante el turno
+            with contextlib.redirect_stdout(io.StringIO()):
+                if profiler:
+                    profiler.enable()
+                try:
+                    result = cerebro_service.procesar_chat_web(**turn["args"])
+                except Exception as e:
+                    error = f"{type(e).__name__}: {e}"
+                finally:
+                    if profiler:
+                        profiler.disable()
+            wall_ms = (time.perf_counter() - t0) * 1000
+            waited_ms = replayer.waited_ms - waited_before
+            rows.append({
+                "turn": turn.get("id"),
+                "user_key": turn["args"].get("user_key"),
+                "message": (turn["args"].get("user_message") or "")[:60],
+                "recorded_ms": turn.get("ms"),
+                "replay_ms": round(wall_ms, 2),
+                "provider_wait_ms": round(waited_ms, 2),
+                "pipeline_ms": round(max(wall_ms - waited_ms, 0.0), 2),
+                "same_outcome": error is None and _same_outcome(turn.get("result"), result),
+                "error": error,
+            })
+    finally:
+        replayer.uninstall()
+
+    if profiler:
+        profiler.dump_stats(profile)
+
+    pipeline = np.asarray([r["pipeline_ms"] for r in rows] or [0.0])
+    return {
+        "path": path,
+        "recorded_at": replayer.header.get("created_at"),
+        "latency": latency,
+        "scale": scale,
+        "turns": rows,
+        "summary": {
+            "turns": len(rows),
+            "diverged": sum(1 for r in rows if not r["same_outcome"]),
+            "recorded_ms": round(sum(r["recorded_ms"] or 0 for r in rows), 1),
+            "replay_ms": round(sum(r["replay_ms"] for r in rows), 1),
+            "pipeline_p50_ms": round(float(np.percentile(pipeline, 50)), 2),
+            "pipeline_p95_ms": round(float(np.percentile(pipeline, 95)), 2),
+        },
+        "provider_calls": dict(replayer.stats),
+    }
+
+
+def print_report(report: Dict[str, Any], profile: Optional[str] = None) -> None:
+    s = report["summary"]
+    print(f"🔁 Replay {report['path']} | latencia={report['latency']} x{report['scale']} | {s['turns']} turnos")
+    print(f"{'turno':>5}  {'grabado':>9}  {'replay':>9}  {'espera':>9}  {'pipeline':>9}  ok  mensaje")
+    for r in report["turns"]:
+        mark = "✅" if r["same_outcome"] else "❌"
+        recorded = f"{r['recorded_ms']:.1f}" if r["recorded_ms"] is not None else "-"
+        print(f"{str(r['turn']):>5}  {recorded:>9}  {r['replay_ms']:>9.1f}  {r['provider_wait_ms']:>9.1f}  "
+              f"{r['pipeline_ms']:>9.1f}  {mark}  {r['message']}" + (f"  ({r['error']})" if r["error"] else ""))
+    print(f"\n   total grabado={s['recorded_ms']} ms | replay={s['replay_ms']} ms | "
+          f"pipeline p50={s['pipeline_p50_ms']} ms p95={s['pipeline_p95_ms']} ms | divergentes={s['diverged']}")
+    print("   llamadas:", report["provider_calls"])
+
+    if profile:
+        import pstats
+
+        print(f"\n🔬 Perfil en {profile} (top 15 por tiempo acumulado)")
+        pstats.Stats(profile).sort_stats("cumulative").print_stats(15)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Replay de turnos grabados de procesar_chat_web")
+    parser.add_argument("path")
+    parser.add_argument("--latency", choices=("original", "none", "synthetic"), default="original")
+    parser.add_argument("--latency-scale", type=float, default=1.0)
+    parser.add_argument("--strict", action="store_true", help="Fallar si una llamada no coincide exacta")
+    parser.add_argument("--profile", help="Guardar perfil cProfile del pipeline en este archivo")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="Escribir el reporte completo en este archivo")
+    args = parser.parse_args(argv)
+
+    report = replay(
+        args.path,
+        latency=args.latency,
+        scale=args.latency_scale,
+        strict=args.strict,
+        profile=args.profile,
+        seed=args.seed,
+    )
+    print_report(report, args.profile)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2, default=str)
+    return 1 if report["summary"]["diverged"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
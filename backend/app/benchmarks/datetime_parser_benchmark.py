@@ -0,0 +1,106 @@
+"""
+Benchmark del parser de fecha/hora por reglas (app.services.datetime_parser).
+
+Sobre un corpus de frases de tareas con la fecha/hora esperada (relativa a
+un "now" fijo) mide:
+  - llamadas al LLM ahorradas: frases resueltas por reglas con confianza
+    >= DATETIME_RULES_MIN_CONFIDENCE (antes, todas iban al LLM)
+  - exactitud de las resueltas por reglas (deben coincidir con lo esperado)
+  - latencia del parser por frase
+
+Corpus: app/benchmarks/data/task_datetime_phrases.json
+    {"now": "2026-10-19T10:00:00-06:00",
+     "phrases": [{"text": "...", "fecha": "YYYY-MM-DD"|null, "hora": "HH:MM"|null}]}
+
+Uso (desde backend/):
+    python -m app.benchmarks.datetime_parser_benchmark
+    python -m app.benchmarks.datetime_parser_benchmark --min-confidence 0.6 --verbose
+"""
+from __future__ import annotations
+
+import json
+import os
+import sys
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from app.services.datetime_parser import parse_spanish_datetime
+
+DEFAULT_CORPUS = os.path.join(os.path.dirname(__file__), "data", "task_datetime_phrases.json")
+
+
+def run(corpus_path: str, min_confidence: float, repeat: int = 200) -> Dict[str, Any]:
+    with open(corpus_path, "r", encoding="utf-8") as f:
+        corpus = json.load(f)
+    now = datetime.fromisoformat(corpus["now"])
+    phrases: List[Dict[str, Any]] = corpus["phrases"]
+
+    rows = []
+    for item in phrases:
+        parsed = parse_spanish_datetime(item["text"], now)
+        got = parsed.as_strings()
+        rows.append({
+            "text": item["text"],
+            "expected": {"fecha": item.get("fecha"), "hora": item.get("hora")},
+            "got": got,
+            "confidence": parsed.confidence,
+            "by_rules": parsed.confidence >= min_confidence,
+            "correct": got == {"fecha": item.get("fecha"), "hora": item.get("hora")},
+        })
+
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        for item in phrases:
+            parse_spanish_datetime(item["text"], now)
+    per_phrase_us = (time.perf_counter() - t0) / (repeat * len(phrases)) * 1e6
+
+    by_rules = [r for r in rows if r["by_rules"]]
+    return {
+        "phrases": len(rows),
+        "min_confidence": min_confidence,
+        "llm_calls_before": len(rows),
+        "llm_calls_after": len(rows) - len(by_rules),
+        "llm_calls_saved": len(by_rules),
+        "rules_correct": sum(r["correct"] for r in by_rules),
+        "rules_wrong": [r for r in by_rules if not r["correct"]],
+        "fallback": [r["text"] for r in rows if not r["by_rules"]],
+        "parse_us_per_phrase": round(per_phrase_us, 1),
+        "rows": rows,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark del parser de fecha/hora por reglas")
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS)
+    parser.add_argument("--min-confidence", type=float, default=None,
+                        help="Default: settings.DATETIME_RULES_MIN_CONFIDENCE")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args(argv)
+
+    min_confidence = args.min_confidence
+    if min_confidence is None:
+        from app.config import settings
+        min_confidence = settings.DATETIME_RULES_MIN_CONFIDENCE
+
+    report = run(args.corpus, min_confidence)
+    saved_pct = 100.0 * report["llm_calls_saved"] / max(report["phrases"], 1)
+    print(f"🕒 {report['phrases']} frases | confianza mínima {report['min_confidence']}")
+    print(f"   llamadas LLM: {report['llm_calls_before']} → {report['llm_calls_after']} "
+          f"(ahorradas {report['llm_calls_saved']}, {saved_pct:.0f}%)")
+    print(f"   exactitud por reglas: {report['rules_correct']}/{report['llm_calls_saved']}")
+    print(f"   parser: {report['parse_us_per_phrase']} µs por frase")
+    for row in report["rules_wrong"]:
+        print(f"   ❌ {row['text']!r}: {row['got']} (esperado {row['expected']})")
+    print("   al LLM: " + "; ".join(report["fallback"]))
+    if args.verbose:
+        for row in report["rows"]:
+            mark = "✅" if row["correct"] else ("↪️" if not row["by_rules"] else "❌")
+            print(f"   {mark} {row['confidence']:.2f} {row['text']!r} → {row['got']}")
+    return 1 if report["rules_wrong"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,546 @@
+"""
+Servidor stub local compatible con OpenAI y Groq para pruebas de carga.
+
+Los prompts del backend que esperan JSON (intención, frescura, sustantivo,
+fecha/hora, normalizadores y extractor de tareas) reciben respuestas enlatadas con el
+mismo esquema, derivadas del mensaje del usuario.
+
+Rutas:
+  POST /openai/v1/chat/completions   (Groq SDK / fallback HTTP)
+  POST /v1/chat/completions          (alias estilo OpenAI)
+  POST /v1/embeddings                (float o base64, como el SDK)
+  POST /v1/moderations
+  POST /v1/responses                 (web search simulado)
+  GET  /_stub/stats                  conteos, errores inyectados
+  GET|POST /_stub/config             ver / reemplazar la configuración
+
+Para apuntar la app al stub (ver config.Settings):
+    GROQ_BASE_URL=http://127.0.0.1:8089
+    OPENAI_BASE_URL=http://127.0.0.1:8089/v1
+
+Uso (desde backend/):
+    python -m app.benchmarks.provider_stub_server --port 8089 [--config stub.json] [--seed 7]
+
+Configuración (JSON, todo opcional; se mezcla con DEFAULT_CONFIG):
+    {
+      "latency": {"chat": {"dist": "lognormal", "median_ms": 350, "sigma": 0.4}, ...},
+      "token_delay_ms": 15,
+      "errors": {"chat": {"rate": 0.02, "status": 429}, "embeddings": {"timeout_rate": 0.01}},
+      "canned": [{"match": "texto del system prompt", "content": "{...}"}]
+    }
+Distribuciones: fixed (ms), uniform (min_ms, max_ms), normal (mean_ms,
+std_ms), lognormal (median_ms, sigma).
+"""
+from __future__ import annotations
+
+import base64
+import copy
+import importlib
+import json
+import random
+import re
+import sys
+import threading
+import time
+import unicodedata
+import uuid
+from collections import Counter
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from flask import Flask, Response, jsonify, request, stream_with_context
+
+ENDPOINTS = ("chat", "embeddings", "moderations", "responses")
+
+DEFAULT_CONFIG: Dict[str, Any] = {
+    "latency": {
+        "chat": {"dist": "lognormal", "median_ms": 350, "sigma": 0.35},
+        "embeddings": {"dist": "lognormal", "median_ms": 120, "sigma": 0.3},
+        "moderations": {"dist": "lognormal", "median_ms": 90, "sigma": 0.3},
+        "responses": {"dist": "lognormal", "median_ms": 2500, "sigma": 0.4},
+    },
+    # Retraso entre tokens en streaming
+    "token_delay_ms": 12,
+    # rate → status HTTP; timeout_rate → la respuesta tarda timeout_ms
+    "errors": {name: {"rate": 0.0, "status": 500, "timeout_rate": 0.0, "timeout_ms": 30000} for name in ENDPOINTS},
+    # Reglas extra: primer match por substring del system prompt
+    "canned": [],
+    "default_chat_content": "Respuesta simulada del asistente.",
+    "embedding_dim": 3072,
+}
+
+_STOPWORDS = {
+    "quiero", "aprender", "como", "cómo", "para", "sobre", "curso", "cursos", "enseñame",
+    "enséñame", "puedo", "hacer", "una", "uno", "unos", "unas", "los", "las", "del", "que",
+    "mas", "más", "mejor", "saber", "necesito", "busco",
+}
+
+
+# ==========================================================
+# LATENCIAS Y ERRORES
+# ==========================================================
+
+def sample_latency_ms(spec: Dict[str, Any], rng: random.Random) -> float:
+    dist = (spec or {}).get("dist", "fixed")
+    if dist == "uniform":
+        return rng.uniform(spec.get("min_ms", 0), spec.get("max_ms", 0))
+    if dist == "normal":
+        return max(0.0, rng.gauss(spec.get("mean_ms", 0), spec.get("std_ms", 0)))
+    if dist == "lognormal":
+        median = max(spec.get("median_ms", 0), 1e-3)
+        return rng.lognormvariate(np.log(median), spec.get("sigma", 0.0))
+    return float((spec or {}).get("ms", 0))
+
+
+def _merge(base: Dict[str, Any], override: Dict[str, Any]) -> Dict[str, Any]:
+    out = copy.deepcopy(base)
+    for key, value in (override or {}).items():
+        if isinstance(value, dict) and isinstance(out.get(key), dict):
+            out[key] = _merge(out[key], value)
+        else:
+            out[key] = value
+    return out
+
+
+# ==========================================================
+# RESPUESTAS ENLATADAS
+# ==========================================================
+
+def _prompt_markers() -> Dict[str, str]:
+    """
+    Primera línea de los prompts reales del backend, para reconocer qué
+    clasificador está llamando. Si un módulo no importa se usa una
+    palabra clave de su esquema de salida.
+    """
+    sources = {
+        "intent": ("app.services.intent_clasification_service", "INTENT_PROMPT", "macro_intent"),
+        "freshness": ("app.services.freshness_llm_service", "FRESHNESS_CHECK_PROMPT", "has_sufficient_knowledge"),
+        "noun": ("app.services.noun_extraction_service", "SYSTEM_PROMPT", "main_noun"),
+        "datetime": ("app.services.datetime_normalizer_service", "SYSTEM_PROMPT", "normalizador de fecha y hora"),
+        "calendar": ("app.agents.task.calendar_agent", "SYSTEM_PROMPT", "normalizador de eventos"),
+        "reminder": ("app.agents.task.reminder_agent", "SYSTEM_PROMPT", "normalizador de recordatorios"),
+        "note": ("app.agents.task.note_agent", "SYSTEM_PROMPT", "normalizador de notas"),
+        "extraction": ("app.services.task_extraction_service", "SYSTEM_PROMPT", "extractor de tareas"),
+    }
+    markers: Dict[str, str] = {}
+    for kind, (module, attr, fallback) in sources.items():
+        try:
+            prompt = getattr(importlib.import_module(module), attr)
+            markers[kind] = prompt.strip().splitlines()[0].strip()
+        except Exception:
+            markers[kind] = fallback
+    return markers
+
+
+def _fold(text: str) -> str:
+    decomposed = unicodedata.normalize("NFKD", (text or "").lower())
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+def canned_intent(user_message: str) -> Dict[str, Any]:
+    text = _fold(user_message)
+    if re.search(r"\bque tengo\b|\bmis (recordatorios|notas|pendientes|eventos)\b|\bagenda de\b", text):
+        return {"macro_intent": "task_query", "task_type": None}
+    if re.search(r"\brecuerda|\brecordatorio", text):
+        return {"macro_intent": "task", "task_type": "reminder"}
+    if re.search(r"\bagenda|\breunion\b|\bcita\b|\bevento\b", text):
+        return {"macro_intent": "task", "task_type": "calendar"}
+    if re.search(r"\banota\b|\bnota\b|\blista\b", text):
+        return {"macro_intent": "task", "task_type": "note"}
+    return {"macro_intent": "chat", "task_type": None}
+
+
+def canned_noun(user_message: str) -> Dict[str, Any]:
+    words = [w for w in re.findall(r"\w+", user_message or "") if len(w) > 3 and _fold(w) not in _STOPWORDS]
+    if not words:
+        return {"main_noun": "NONE", "confidence": 0.0, "raw_phrase": ""}
+    noun = max(words, key=len)
+    return {"main_noun": noun.lower(), "confidence": 0.9, "raw_phrase": user_message}
+
+
+def canned_freshness(prompt: str) -> Dict[str, Any]:
+    # La pregunta va al final del prompt: Pregunta: "..."
+    question = prompt.rsplit("Pregunta:", 1)[-1]
+    recent = re.search(r"\b(hoy|ayer|actual|ultim|precio|clima|noticia|resultado|202[4-9])", _fold(question))
+    return {
+        "has_sufficient_knowledge": not recent,
+        "reason": "Respuesta simulada del stub",
+    }
+
+
+_WEEKDAYS = ("lunes", "martes", "miercoles", "jueves", "viernes", "sabado", "domingo")
+_MONTHS = (
+    "enero", "febrero", "marzo", "abril", "mayo", "junio", "julio",
+    "agosto", "septiembre", "octubre", "noviembre", "diciembre",
+)
+
+
+def canned_datetime(text: str, today: Optional[date] = None) -> Dict[str, Optional[str]]:
+    """
+    Extracción mínima de fecha/hora para que los flujos de tareas
+    (follow-up de datetime) avancen igual que con el LLM real.
+    """
+    today = today or date.today()
+    t = _fold(text)
+
+    fecha: Optional[date] = None
+    if "pasado manana" in t:
+        fecha = today + timedelta(days=2)
+    elif re.search(r"\bmanana\b", t.replace("de la manana", "")):
+        fecha = today + timedelta(days=1)
+    elif re.search(r"\bhoy\b", t):
+        fecha = today
+    if fecha is None:
+        for i, name in enumerate(_WEEKDAYS):
+            if re.search(rf"\b{name}\b", t):
+                fecha = today + timedelta(days=(i - today.weekday()) % 7 or 7)
+                break
+    if fecha is None:
+        m = re.search(r"\b(\d{1,2})\s*(?:/|de\s+)(\d{1,2}|" + "|".join(_MONTHS) + r")\b", t)
+        if m:
+            month = int(m.group(2)) if m.group(2).isdigit() else _MONTHS.index(m.group(2)) + 1
+            try:
+                fecha = date(today.year, month, int(m.group(1)))
+                if fecha < today:
+                    fecha = fecha.replace(year=today.year + 1)
+            except ValueError:
+                fecha = None
+
+    hora = None
+    m = re.search(r"\b(?:a las|a la)\s+(\d{1,2})(?::(\d{2}))?", t) or re.search(r"\b(\d{1,2}):(\d{2})\b", t)
+    if m:
+        hour, minute = int(m.group(1)), int(m.group(2) or 0)
+        if re.search(r"\b(pm|de la tarde|de la noche)\b", t) and hour < 12:
+            hour += 12
+        if hour < 24 and minute < 60:
+            hora = f"{hour:02d}:{minute:02d}"
+
+    return {"fecha": fecha.isoformat() if fecha else None, "hora": hora}
+
+
+def _task_text(user: str) -> str:
+    """El normalizador de fecha manda un JSON {"text": ...}; los agentes, texto plano."""
+    try:
+        data = json.loads(user)
+        if isinstance(data, dict) and data.get("text"):
+            return str(data["text"])
+    except Exception:
+        pass
+    return user
+
+
+def canned_task(kind: str, user: str) -> Dict[str, Any]:
+    text = _task_text(user)
+    dt = canned_datetime(text)
+    title = re.sub(r"^(recuerdame|recuérdame|agenda|agendar|anota|nota)\s+", "", text.strip(), flags=re.I)[:60]
+    if kind == "datetime":
+        return dt
+    if kind == "calendar":
+        return {"titulo": title, "descripcion": text, "ubicacion": None, **dt}
+    if kind == "reminder":
+        return {"content": title, "lugar": "No especificado", **dt}
+    if kind == "extraction":
+        t = _fold(text)
+        link = re.search(r"https?://\S+", text)
+        meeting_type = "virtual" if re.search(r"\b(zoom|teams|meet|videollamada|llamada)\b", t) else None
+        return {
+            "titulo": title, "descripcion": text, "ubicacion": None,
+            "meeting_type": meeting_type, "meeting_link": link.group(0) if link else None,
+            "missing_fields": [], **dt,
+        }
+    return {"title": title, "content": text}
+
+
+def chat_content(messages: List[Dict[str, Any]], config: Dict[str, Any], markers: Dict[str, str]) -> Tuple[str, str]:
+    """Regresa (contenido, tipo de respuesta)."""
+    system = "\n".join(str(m.get("content") or "") for m in messages if m.get("role") == "system")
+    user = next((str(m.get("content") or "") for m in reversed(messages) if m.get("role") == "user"), "")
+
+    for rule in config.get("canned") or []:
+        if rule.get("match") and rule["match"] in system + "\n" + user:
+            content = rule.get("content", "")
+            return (content if isinstance(content, str) else json.dumps(content, ensure_ascii=False)), "canned"
+
+    if markers["intent"] in system:
+        return json.dumps(canned_intent(user), ensure_ascii=False), "intent"
+    if markers["freshness"] in system:
+        return json.dumps(canned_freshness(system), ensure_ascii=False), "freshness"
+    if markers["noun"] in system:
+        return json.dumps(canned_noun(user), ensure_ascii=False), "noun"
+    for kind in ("datetime", "calendar", "reminder", "note", "extraction"):
+        if markers[kind] in system:
+            return json.dumps(canned_task(kind, user), ensure_ascii=False), kind
+
+    return config.get("default_chat_content", ""), "default"
+
+
+# ==========================================================
+# APP
+# ==========================================================
+
+def create_stub_app(config: Optional[Dict[str, Any]] = None, seed: Optional[int] = None) -> Flask:
+    app = Flask(__name__)
+    state = {
+        "config": _merge(DEFAULT_CONFIG, config or {}),
+        "stats": Counter(),
+    }
+    rng = random.Random(seed)
+    lock = threading.Lock()
+    markers = _prompt_markers()
+
+    def _draw(kind: str) -> Tuple[float, Optional[Tuple[int, float]]]:
+        """(latencia ms, error inyectado (status, ms) | None)."""
+        cfg = state["config"]
+        with lock:
+            latency = sample_latency_ms(cfg["latency"].get(kind, {}), rng)
+            err = cfg["errors"].get(kind, {})
+            roll = rng.random()
+        if roll < err.get("timeout_rate", 0.0):
+            return latency, (504, float(err.get("timeout_ms", 30000)))
+        if roll < err.get("timeout_rate", 0.0) + err.get("rate", 0.0):
+            return latency, (int(err.get("status", 500)), latency)
+        return latency, None
+
+    def _count(key: str) -> None:
+        with lock:
+            state["stats"][key] += 1
+
+    def _simulate(kind: str) -> Optional[Response]:
+        latency, error = _draw(kind)
+        _count(f"{kind}.requests")
+        if error:
+            status, wait_ms = error
+            time.sleep(wait_ms / 1000)
+            _count(f"{kind}.errors.{status}")
+            body = {"error": {"message": f"Error simulado ({status})", "type": "stub_error", "code": status}}
+            return jsonify(body), status
+        time.sleep(latency / 1000)
+        return None
+
+    # ------------------------------------------------------
+    # Chat completions
+    # ------------------------------------------------------
+
+    def chat_completions():
+        data = request.get_json(silent=True) or {}
+        model = data.get("model", "stub-model")
+        messages = data.get("messages") or []
+        stream = bool(data.get("stream"))
+
+        if not stream:
+            failed = _simulate("chat")
+            if failed is not None:
+                return failed
+
+        content, kind = chat_content(messages, state["config"], markers)
+        _count(f"chat.{kind}")
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+        created = int(time.time())
+        prompt_tokens = sum(len(str(m.get("content") or "").split()) for m in messages)
+        completion_tokens = len(content.split())
+
+        if not stream:
+            return jsonify({
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": "stop",
+                }],
+                "usage": {
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": completion_tokens,
+                    "total_tokens": prompt_tokens + completion_tokens,
+                },
+            })
+
+        # Streaming: el tiempo al primer token sigue la distribución de chat
+        first_token_ms, error = _draw("chat")
+        _count("chat.requests")
+        if error:
+            _count(f"chat.errors.{error[0]}")
+            time.sleep(error[1] / 1000)
+            return jsonify({"error": {"message": "Error simulado", "type": "stub_error"}}), error[0]
+
+        token_delay = state["config"].get("token_delay_ms", 0) / 1000
+        tokens = re.findall(r"\S+\s*", content) or [""]
+
+        def _chunk(delta: Dict[str, Any], finish: Optional[str] = None) -> str:
+            payload = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish}],
+            }
+            return f"data: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+        def generate():
+            time.sleep(first_token_ms / 1000)
+            yield _chunk({"role": "assistant", "content": ""})
+            for tok in tokens:
+                yield _chunk({"content": tok})
+                if token_delay:
+                    time.sleep(token_delay)
+            yield _chunk({}, "stop")
+            yield "data: [DONE]\n\n"
+
+        return Response(stream_with_context(generate()), mimetype="text/event-stream")
+
+    app.add_url_rule("/openai/v1/chat/completions", "groq_chat", chat_completions, methods=["POST"])
+    app.add_url_rule("/v1/chat/completions", "openai_chat", chat_completions, methods=["POST"])
+
+    # ------------------------------------------------------
+    # Embeddings (determinísticos por hashing)
+    # ------------------------------------------------------
+
+    @app.route("/v1/embeddings", methods=["POST"])
+    def embeddings():
+        failed = _simulate("embeddings")
+        if failed is not None:
+            return failed
+
+        from app.services.embedding_provider_service import HashingEmbeddingProvider
+
+        data = request.get_json(silent=True) or {}
+        inputs = data.get("input")
+        texts = [inputs] if isinstance(inputs, str) else [str(t) for t in (inputs or [])]
+        dim = int(data.get("dimensions") or state["config"].get("embedding_dim") or 3072)
+        vectors = HashingEmbeddingProvider(dim).embed(texts)
+        as_base64 = data.get("encoding_format") == "base64"
+
+        return jsonify({
+            "object": "list",
+            "model": data.get("model", "stub-embedding"),
+            "data": [
+                {
+                    "object": "embedding",
+                    "index": i,
+                    "embedding": (
+                        base64.b64encode(vec.astype("<f4").tobytes()).decode("ascii")
+                        if as_base64 else vec.tolist()
+                    ),
+                }
+                for i, vec in enumerate(vectors)
+            ],
+            "usage": {"prompt_tokens": sum(len(t.split()) for t in texts), "total_tokens": sum(len(t.split()) for t in texts)},
+        })
+
+    # ------------------------------------------------------
+    # Moderations
+    # ------------------------------------------------------
+
+    @app.route("/v1/moderations", methods=["POST"])
+    def moderations():
+        failed = _simulate("moderations")
+        if failed is not None:
+            return failed
+
+        data = request.get_json(silent=True) or {}
+        inputs = data.get("input")
+        texts = [inputs] if isinstance(inputs, str) else [str(t) for t in (inputs or [])]
+        categories = ("harassment", "hate", "self-harm", "sexual", "violence")
+        return jsonify({
+            "id": f"modr-{uuid.uuid4().hex[:24]}",
+            "model": data.get("model", "omni-moderation-latest"),
+            "results": [
+                {
+                    "flagged": False,
+                    "categories": {c: False for c in categories},
+                    "category_scores": {c: 0.0 for c in categories},
+                }
+                for _ in texts
+            ],
+        })
+
+    # ------------------------------------------------------
+    # Responses (web search)
+    # ------------------------------------------------------
+
+    @app.route("/v1/responses", methods=["POST"])
+    def responses():
+        failed = _simulate("responses")
+        if failed is not None:
+            return failed
+
+        data = request.get_json(silent=True) or {}
+        query = data.get("input") if isinstance(data.get("input"), str) else "consulta"
+        text = f"Resultado simulado de búsqueda web para: {query}"
+        return jsonify({
+            "id": f"resp_{uuid.uuid4().hex[:24]}",
+            "object": "response",
+            "created_at": int(time.time()),
+            "status": "completed",
+            "model": data.get("model", "stub-model"),
+            "output": [{
+                "type": "message",
+                "id": f"msg_{uuid.uuid4().hex[:24]}",
+                "status": "completed",
+                "role": "assistant",
+                "content": [{
+                    "type": "output_text",
+                    "text": text,
+                    "annotations": [{
+                        "type": "url_citation",
+                        "url": "https://example.com/stub",
+                        "title": "Fuente simulada",
+                        "start_index": 0,
+                        "end_index": len(text),
+                    }],
+                }],
+            }],
+            "parallel_tool_calls": True,
+            "tool_choice": "auto",
+            "tools": [],
+            "usage": {"input_tokens": len(query.split()), "output_tokens": len(text.split()), "total_tokens": 0},
+        })
+
+    # ------------------------------------------------------
+    # Control
+    # ------------------------------------------------------
+
+    @app.route("/_stub/stats", methods=["GET"])
+    def stats():
+        with lock:
+            return jsonify(dict(state["stats"]))
+
+    @app.route("/_stub/config", methods=["GET", "POST"])
+    def stub_config():
+        if request.method == "POST":
+            with lock:
+                state["config"] = _merge(DEFAULT_CONFIG, request.get_json(silent=True) or {})
+                state["stats"].clear()
+        return jsonify(state["config"])
+
+    return app
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Stub local de OpenAI/Groq")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--config", help="JSON con latencias/errores/respuestas")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    config = {}
+    if args.config:
+        with open(args.config, "r", encoding="utf-8") as f:
+            config = json.load(f)
+
+    app = create_stub_app(config, seed=args.seed)
+    print(f"🧪 Stub de proveedores en http://{args.host}:{args.port}")
+    print(f"   GROQ_BASE_URL=http://{args.host}:{args.port}")
+    print(f"   OPENAI_BASE_URL=http://{args.host}:{args.port}/v1")
+    app.run(host=args.host, port=args.port, threaded=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,106 @@
+"""
+Benchmark del despachador de recordatorios (app.services.reminder_dispatcher).
+
+Mide:
+  - TimingWheel: costo de agendar y de drenar N avisos repartidos en un
+    horizonte (default 1M en 7 días), recorriendo el reloj tick a tick
+  - despacho completo con LocalSender: U usuarios con K avisos que vencen
+    en el mismo tick (coalescing: U mensajes, no U*K), incluyendo el
+    reclamo compare-and-set en el store
+
+Uso (desde backend/):
+    TASK_JOURNAL_DIR= python -m app.benchmarks.reminder_dispatch_benchmark
+    TASK_JOURNAL_DIR= python -m app.benchmarks.reminder_dispatch_benchmark --entries 3000000 --users 5000
+"""
+from __future__ import annotations
+
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from app.domain.task import Task
+from app.services.datetime_parser import TIMEZONE
+from app.services.outbound_message_service import LocalSender
+from app.services.reminder_dispatcher import ReminderDispatcher, TimingWheel
+from app.stores import task_store
+
+
+def bench_wheel(entries: int, horizon_seconds: float, tick: float) -> Dict[str, Any]:
+    rng = random.Random(7)
+    base = time.time()
+    wheel = TimingWheel(tick)
+    dues = [base + rng.random() * horizon_seconds for _ in range(entries)]
+
+    t0 = time.perf_counter()
+    for i, due in enumerate(dues):
+        wheel.schedule(due, i)
+    t1 = time.perf_counter()
+    drained = len(wheel.advance(base))
+    now = base
+    while now <= base + horizon_seconds + tick:
+        now += tick
+        drained += len(wheel.advance(now))
+    t2 = time.perf_counter()
+    return {
+        "entries": entries,
+        "schedule_ns": round((t1 - t0) / entries * 1e9),
+        "drain_ns": round((t2 - t1) / entries * 1e9),
+        "ticks": int(horizon_seconds // tick) + 1,
+        "drained": drained,
+    }
+
+
+def bench_dispatch(users: int, per_user: int) -> Dict[str, Any]:
+    sender = LocalSender(keep=users)
+    dispatcher = ReminderDispatcher(sender, tick_seconds=30, batch_size=50, catchup_seconds=3600)
+    due = datetime.now(TIMEZONE) + timedelta(minutes=5)
+    for u in range(users):
+        user_key = f"whatsapp:+52155{u:08d}"
+        for k in range(per_user):
+            task = Task(
+                user_key=user_key, type="reminder", content=f"Pendiente {k}",
+                fecha=due.strftime("%Y-%m-%d"), hora=due.strftime("%H:%M"),
+            )
+            task_store.add_task(task)
+            dispatcher.schedule(task)
+
+    t0 = time.perf_counter()
+    sent = dispatcher.run_once(due.timestamp() + 1)
+    elapsed = time.perf_counter() - t0
+    return {
+        "users": users,
+        "reminders": users * per_user,
+        "messages": sent,
+        "dispatch_ms": round(elapsed * 1000, 1),
+        "per_reminder_us": round(elapsed / max(users * per_user, 1) * 1e6, 1),
+        "stats": dispatcher.stats(),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark del despachador de recordatorios")
+    parser.add_argument("--entries", type=int, default=1_000_000)
+    parser.add_argument("--horizon-days", type=float, default=7.0)
+    parser.add_argument("--tick", type=float, default=30.0)
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--per-user", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    wheel = bench_wheel(args.entries, args.horizon_days * 86400, args.tick)
+    print(f"🛞 TimingWheel: {wheel['entries']} avisos en {wheel['ticks']} ticks")
+    print(f"   agendar {wheel['schedule_ns']} ns/aviso | drenar {wheel['drain_ns']} ns/aviso "
+          f"({wheel['drained']} drenados)")
+
+    dispatch = bench_dispatch(args.users, args.per_user)
+    print(f"🔔 Despacho: {dispatch['reminders']} avisos de {dispatch['users']} usuarios "
+          f"→ {dispatch['messages']} mensajes en {dispatch['dispatch_ms']} ms "
+          f"({dispatch['per_reminder_us']} µs/aviso)")
+    return 0 if wheel["drained"] == wheel["entries"] and dispatch["messages"] == dispatch["users"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
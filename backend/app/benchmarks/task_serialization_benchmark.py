@@ -0,0 +1,157 @@
+"""
+Benchmark de la representación de tareas y su serialización.
+
+Compara la Task anterior (dataclass con __dict__, payload con
+`[t.__dict__ ...]` + json de Flask) contra la actual (slots, frozen,
+esquema fijo + orjson vía FastJSONProvider):
+
+  - memoria por tarea (tracemalloc, N tareas vivas)
+  - construcción de N tareas
+  - serialización del payload agrupado {"calendar","reminder","note"}
+    a texto JSON, como lo hace jsonify
+
+Uso (desde backend/):
+    python -m app.benchmarks.task_serialization_benchmark
+    python -m app.benchmarks.task_serialization_benchmark --tasks 5000 --repeat 50
+"""
+from __future__ import annotations
+
+import gc
+import json
+import random
+import sys
+import time
+import tracemalloc
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+from app.domain.task import Task, tasks_payload
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+@dataclass
+class LegacyTask:
+    """Copia de la Task previa (dataclass simple con __dict__)."""
+    id: str = field(default_factory=lambda: str(uuid.uuid4()))
+    user_key: str = ""
+    type: str = "note"
+    content: str = ""
+    description: Optional[str] = None
+    meeting_type: Optional[str] = None
+    meeting_link: Optional[str] = None
+    location: Optional[str] = None
+    fecha: Optional[str] = None
+    hora: Optional[str] = None
+    status: str = "active"
+    created_at: float = field(default_factory=time.time)
+    notified_at: Optional[float] = None
+
+
+def _fields(rng: random.Random, i: int) -> Dict[str, Any]:
+    ttype = rng.choice(("calendar", "reminder", "note"))
+    dated = ttype != "note"
+    return {
+        "user_key": "whatsapp:+5215512345678",
+        "type": ttype,
+        "content": f"Tarea de prueba número {i} con algo de texto",
+        "location": "No especificado" if dated else None,
+        "fecha": f"2026-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}" if dated else None,
+        "hora": f"{rng.randint(7, 20):02d}:{rng.choice((0, 15, 30, 45)):02d}" if dated else None,
+    }
+
+
+def _build(cls: Callable[..., Any], n: int, seed: int) -> List[Any]:
+    rng = random.Random(seed)
+    return [cls(**_fields(rng, i)) for i in range(n)]
+
+
+def _grouped(tasks: List[Any]) -> Dict[str, List[Any]]:
+    return {ttype: [t for t in tasks if t.type == ttype] for ttype in ("calendar", "reminder", "note")}
+
+
+def measure_memory(cls: Callable[..., Any], n: int, seed: int) -> float:
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    tasks = _build(cls, n, seed)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del tasks
+    return (after - before) / n
+
+
+def _time(fn: Callable[[], Any], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def legacy_payload(grouped: Dict[str, List[LegacyTask]]) -> str:
+    payload = {
+        "calendar": [t.__dict__ for t in grouped["calendar"]],
+        "reminder": [t.__dict__ for t in grouped["reminder"]],
+        "note": [t.__dict__ for t in grouped["note"]],
+    }
+    # Equivalente al DefaultJSONProvider de Flask (sort_keys, compacto)
+    return json.dumps({"tasks": payload}, sort_keys=True, separators=(",", ":"))
+
+
+def current_payload(grouped: Dict[str, List[Task]]) -> str:
+    payload = {"tasks": tasks_payload(grouped)}
+    if orjson is None:
+        return json.dumps(payload, sort_keys=True, separators=(",", ":"))
+    return orjson.dumps(payload, option=orjson.OPT_SORT_KEYS).decode("utf-8")
+
+
+def run(n: int, repeat: int, seed: int) -> Dict[str, Any]:
+    legacy = _grouped(_build(LegacyTask, n, seed))
+    current = _grouped(_build(Task, n, seed))
+    assert json.loads(legacy_payload(legacy))["tasks"]["calendar"][0].keys() == \
+        json.loads(current_payload(current))["tasks"]["calendar"][0].keys()
+
+    legacy_s = _time(lambda: legacy_payload(legacy), repeat)
+    current_s = _time(lambda: current_payload(current), repeat)
+    return {
+        "tasks": n,
+        "orjson": orjson is not None,
+        "bytes_per_task": {
+            "legacy": round(measure_memory(LegacyTask, n, seed), 1),
+            "current": round(measure_memory(Task, n, seed), 1),
+        },
+        "build_ms": {
+            "legacy": round(_time(lambda: _build(LegacyTask, n, seed), max(repeat // 5, 1)) * 1000, 2),
+            "current": round(_time(lambda: _build(Task, n, seed), max(repeat // 5, 1)) * 1000, 2),
+        },
+        "serialize_ms": {"legacy": round(legacy_s * 1000, 2), "current": round(current_s * 1000, 2)},
+        "serialize_tasks_per_s": {"legacy": int(n / legacy_s), "current": int(n / current_s)},
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark de Task y su serialización")
+    parser.add_argument("--tasks", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=30)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    report = run(args.tasks, args.repeat, args.seed)
+    print(f"🧮 {report['tasks']} tareas | orjson={'sí' if report['orjson'] else 'no'}")
+    print(f"{'':24}{'anterior':>12}{'actual':>12}")
+    for label, key in (("bytes por tarea", "bytes_per_task"), ("construcción (ms)", "build_ms"),
+                       ("serialización (ms)", "serialize_ms"), ("tareas/s serializadas", "serialize_tasks_per_s")):
+        print(f"{label:24}{report[key]['legacy']:>12}{report[key]['current']:>12}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
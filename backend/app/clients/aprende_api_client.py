@@ -13,6 +13,6 @@ def fetch_course_by_id(course_id: str) -> Dict[str, Any]:
         resp = requests.get(url, timeout=5)
         if resp.status_code == 200:
             return resp.json()
-        return {"success": False, "error": "No encontrado"}
+        return {"success": False, "error": "No encontrado", "status_code": resp.status_code}
     except Exception as e:
         return {"success": False, "error": str(e)}
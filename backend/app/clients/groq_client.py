@@ -28,7 +28,7 @@ def build_groq_client() -> GroqClientType:
 
     try:
         from groq import Groq
-        client = Groq(api_key=settings.GROQ_API_KEY)
+        client = Groq(api_key=settings.GROQ_API_KEY, base_url=settings.GROQ_BASE_URL or None)
         logger.info("Cliente Groq inicializado correctamente")
         return client
 
@@ -48,7 +48,7 @@ def build_openai_client() -> Optional["OpenAIType"]:
 
     try:
         from openai import OpenAI
-        client = OpenAI(api_key=api_key)
+        client = OpenAI(api_key=api_key, base_url=settings.OPENAI_BASE_URL or None)
         logger.info("Cliente OpenAI inicializado correctamente")
         return client
     except Exception as e:
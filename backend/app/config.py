@@ -40,6 +40,79 @@ class Settings:
 
     OPENAI_API_KEY: str = os.getenv("OPENAI_API_KEY", "")
 
+    # Base URLs de proveedores ("" = default del SDK). Para pruebas de carga
+    # se apuntan al stub local (app/benchmarks/provider_stub_server.py):
+    #   GROQ_BASE_URL=http://127.0.0.1:8089  OPENAI_BASE_URL=http://127.0.0.1:8089/v1
+    GROQ_BASE_URL: str = os.getenv("GROQ_BASE_URL", "")
+    OPENAI_BASE_URL: str = os.getenv("OPENAI_BASE_URL", "")
+
+    # Grabación de llamadas a proveedores para replay ("" = apagado).
+    # Acepta {pid} para un archivo por worker.
+    PROVIDER_RECORD_PATH: str = os.getenv("PROVIDER_RECORD_PATH", "")
+
+    # Memoria conversacional (memory_service): TTL por usuario y presupuestos
+    CHAT_MEMORY_TTL_SECONDS: float = float(os.getenv("CHAT_MEMORY_TTL_SECONDS", "21600"))
+    CHAT_MEMORY_MAX_ENTRIES: int = int(os.getenv("CHAT_MEMORY_MAX_ENTRIES", "20000"))
+    CHAT_MEMORY_MAX_BYTES: int = int(os.getenv("CHAT_MEMORY_MAX_BYTES", str(64 * 1024 * 1024)))
+    CHAT_MEMORY_SWEEP_SECONDS: float = float(os.getenv("CHAT_MEMORY_SWEEP_SECONDS", "60"))
+
+    # Backend de estado conversacional (conversationStore, memoria, tareas):
+    #   memory (por proceso, un solo worker) | sqlite (WAL, un host) | redis
+    STATE_BACKEND: str = os.getenv("STATE_BACKEND", "memory")
+    STATE_SQLITE_PATH: str = os.getenv("STATE_SQLITE_PATH", "data/state.sqlite3")
+    STATE_REDIS_URL: str = os.getenv("STATE_REDIS_URL", "redis://127.0.0.1:6379/0")
+
+    # Estado conversacional: TTL default, TTL por intent ("intent=seg,...")
+    # y cada cuánto se barren los vencidos
+    CONVERSATION_TTL_SECONDS: float = float(os.getenv("CONVERSATION_TTL_SECONDS", "300"))
+    CONVERSATION_TTL_BY_INTENT: str = os.getenv("CONVERSATION_TTL_BY_INTENT", "task_enrichment=1800,claro=600")
+    CONVERSATION_SWEEP_SECONDS: float = float(os.getenv("CONVERSATION_SWEEP_SECONDS", "30"))
+
+    # Índices de tareas por usuario (task_store), por proceso
+    TASK_INDEX_MAX_USERS: int = int(os.getenv("TASK_INDEX_MAX_USERS", "5000"))
+    TASK_INDEX_TTL_SECONDS: float = float(os.getenv("TASK_INDEX_TTL_SECONDS", "3600"))
+    # Cambios recientes por usuario para responder deltas de la lista de
+    # tareas; un cliente más atrasado recibe la lista completa
+    TASK_DELTA_MAX_CHANGES: int = int(os.getenv("TASK_DELTA_MAX_CHANGES", "500"))
+
+    # Journal durable de tareas (backend memory): write-behind por lotes,
+    # snapshot cada N operaciones. "" (default) = sin persistencia; una
+    # ruta relativa se resuelve contra backend/, no contra el cwd
+    TASK_JOURNAL_DIR: str = os.getenv("TASK_JOURNAL_DIR", "")
+    TASK_JOURNAL_FLUSH_SECONDS: float = float(os.getenv("TASK_JOURNAL_FLUSH_SECONDS", "0.2"))
+    TASK_JOURNAL_COMPACT_OPS: int = int(os.getenv("TASK_JOURNAL_COMPACT_OPS", "10000"))
+    TASK_JOURNAL_FSYNC: bool = os.getenv("TASK_JOURNAL_FSYNC", "true").lower() == "true"
+
+    # Extracción de tareas en una sola llamada: json_schema (estricto, si el
+    # modelo lo soporta) | json_object | "" (texto; se valida igual local)
+    TASK_EXTRACTION_RESPONSE_FORMAT: str = os.getenv("TASK_EXTRACTION_RESPONSE_FORMAT", "json_object")
+    # Parser de fecha/hora por reglas: por debajo de esta confianza se
+    # consulta al LLM
+    DATETIME_RULES_MIN_CONFIDENCE: float = float(os.getenv("DATETIME_RULES_MIN_CONFIDENCE", "0.75"))
+
+    # Despachador de recordatorios (reminder_dispatcher): avisa por
+    # WhatsApp/SMS cuando vence un recordatorio o está por empezar un evento.
+    # Rueda de tiempo con ticks de REMINDER_TICK_SECONDS; los avisos de un
+    # mismo usuario en el mismo tick salen en un solo mensaje. Al arrancar
+    # se reenvía lo vencido hace menos de REMINDER_CATCHUP_SECONDS.
+    REMINDER_DISPATCHER_ENABLED: bool = os.getenv("REMINDER_DISPATCHER_ENABLED", "false").lower() == "true"
+    REMINDER_TICK_SECONDS: float = float(os.getenv("REMINDER_TICK_SECONDS", "30"))
+    REMINDER_BATCH_SIZE: int = int(os.getenv("REMINDER_BATCH_SIZE", "50"))
+    REMINDER_CATCHUP_SECONDS: float = float(os.getenv("REMINDER_CATCHUP_SECONDS", "21600"))
+    REMINDER_CALENDAR_LEAD_MINUTES: int = int(os.getenv("REMINDER_CALENDAR_LEAD_MINUTES", "15"))
+
+    # Feed .ics por usuario (GET /calendar/<token>.ics). El token va
+    # firmado con este secreto, igual en todos los workers; "" = feed
+    # apagado y el .ics completo va en línea en cada respuesta de tarea.
+    # CALENDAR_INLINE_ICS=true lo manda en línea también con el feed.
+    CALENDAR_FEED_SECRET: str = os.getenv("CALENDAR_FEED_SECRET", "")
+    CALENDAR_INLINE_ICS: bool = os.getenv("CALENDAR_INLINE_ICS", "false").lower() == "true"
+
+    # Embeddings: openai | local (modelo en disco, CPU) | hashing (determinístico)
+    EMBEDDING_PROVIDER: str = os.getenv("EMBEDDING_PROVIDER", "openai")
+    EMBEDDING_MODEL_PATH: str = os.getenv("EMBEDDING_MODEL_PATH", "")
+    EMBEDDING_DIM: int = int(os.getenv("EMBEDDING_DIM", "0"))          # 0 = nativa
+    EMBEDDING_BATCH_SIZE: int = int(os.getenv("EMBEDDING_BATCH_SIZE", "0"))  # 0 = default del proveedor
 
     # Twilio
     TWILIO_ACCOUNT_SID: str = os.getenv("TWILIO_ACCOUNT_SID", "")
@@ -48,9 +121,44 @@ class Settings:
         "TWILIO_WHATSAPP_NUMBER",
         "whatsapp:+14155238886"
     )
+    TWILIO_SMS_NUMBER: str = os.getenv("TWILIO_SMS_NUMBER", "")
+    # Mensajes salientes fuera del webhook (recordatorios, respuestas en
+    # modo asíncrono):
+    #   twilio (REST API) | local (no envía; log + últimos mensajes en memoria)
+    OUTBOUND_SENDER: str = os.getenv("OUTBOUND_SENDER", "twilio")
+    OUTBOUND_SEND_WORKERS: int = int(os.getenv("OUTBOUND_SEND_WORKERS", "4"))
+
+    # Webhooks de Twilio en modo asíncrono: se responde TwiML vacío de
+    # inmediato y un pool de hilos procesa el mensaje (FIFO por remitente) y
+    # contesta por la REST API con OUTBOUND_SENDER. Solo WhatsApp/SMS.
+    WEBHOOK_ASYNC: bool = os.getenv("WEBHOOK_ASYNC", "false").lower() == "true"
+    WEBHOOK_WORKERS: int = int(os.getenv("WEBHOOK_WORKERS", "4"))
+    WEBHOOK_QUEUE_MAX: int = int(os.getenv("WEBHOOK_QUEUE_MAX", "1000"))
+    # Idempotencia por MessageSid (/whatsapp, /sms, /rcs): Twilio reintenta
+    # si la respuesta tarda; el reintento espera al original (hasta
+    # WEBHOOK_IDEMPOTENCY_WAIT_SECONDS) o recibe el TwiML ya guardado. Una
+    # entrada "en proceso" más vieja que STALE_SECONDS (worker caído) se
+    # puede volver a reclamar.
+    WEBHOOK_IDEMPOTENCY_ENABLED: bool = os.getenv("WEBHOOK_IDEMPOTENCY_ENABLED", "true").lower() == "true"
+    WEBHOOK_IDEMPOTENCY_TTL_SECONDS: float = float(os.getenv("WEBHOOK_IDEMPOTENCY_TTL_SECONDS", "86400"))
+    WEBHOOK_IDEMPOTENCY_MAX_ENTRIES: int = int(os.getenv("WEBHOOK_IDEMPOTENCY_MAX_ENTRIES", "50000"))
+    WEBHOOK_IDEMPOTENCY_WAIT_SECONDS: float = float(os.getenv("WEBHOOK_IDEMPOTENCY_WAIT_SECONDS", "10"))
+    WEBHOOK_IDEMPOTENCY_STALE_SECONDS: float = float(os.getenv("WEBHOOK_IDEMPOTENCY_STALE_SECONDS", "120"))
 
     # Cursos API (para el siguiente paso del flujo Aprende)
     COURSES_API_BASE_URL: str = os.getenv("COURSES_API_BASE_URL", "")
 
+    # Búsqueda de cursos: hybrid (BM25 + embeddings, RRF) | dense | lexical
+    COURSE_SEARCH_MODE: str = os.getenv("COURSE_SEARCH_MODE", "hybrid")
+    COURSE_EMBED_TIMEOUT_SECONDS: float = float(os.getenv("COURSE_EMBED_TIMEOUT_SECONDS", "3"))
+    COURSE_RRF_K: int = int(os.getenv("COURSE_RRF_K", "60"))
+    COURSE_SEARCH_BATCH_MAX_QUERIES: int = int(os.getenv("COURSE_SEARCH_BATCH_MAX_QUERIES", "256"))
+    # Con "llm": true cada query es una llamada a Groq. El endpoint es
+    # público: apagado salvo COURSE_SEARCH_BATCH_LLM=true y, encendido,
+    # lotes más chicos y un límite por cliente que cuenta queries
+    COURSE_SEARCH_BATCH_LLM: bool = os.getenv("COURSE_SEARCH_BATCH_LLM", "false").lower() == "true"
+    COURSE_SEARCH_BATCH_MAX_LLM_QUERIES: int = int(os.getenv("COURSE_SEARCH_BATCH_MAX_LLM_QUERIES", "16"))
+    COURSE_SEARCH_BATCH_LLM_RATE: str = os.getenv("COURSE_SEARCH_BATCH_LLM_RATE", "60 per hour")
+
 
 settings = Settings()
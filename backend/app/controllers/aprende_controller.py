@@ -0,0 +1,82 @@
+import logging
+import time
+
+from flask import jsonify, request
+
+from app.config import settings
+from app.services.cluster_search_service import get_search_mode, search_courses_batch
+
+logger = logging.getLogger(__name__)
+
+
+def _public_result(r: dict) -> dict:
+    # Sin campos internos de ranking salvo los scores útiles para evaluar
+    return {
+        "courseId": r.get("courseId"),
+        "courseName": r.get("courseName"),
+        "score": r.get("score"),
+        "combined": r.get("_combined"),
+        "bm25": r.get("_bm25"),
+        "rrf": r.get("_rrf"),
+    }
+
+
+def batch_llm_queries() -> int:
+    """Queries de este request que irían al LLM (0 sin "llm": true o con llm apagado en lotes); costo del límite LLM."""
+    data = request.get_json(silent=True) or {}
+    queries = data.get("queries")
+    if not settings.COURSE_SEARCH_BATCH_LLM or not data.get("llm") or not isinstance(queries, list):
+        return 0
+    return len(queries)
+
+
+def aprende_search_batch_controller():
+    """
+    POST /aprende/search/batch
+    Body: {"queries": [...], "k": 10, "llm": false}
+    """
+    data = request.get_json(silent=True) or {}
+    queries = data.get("queries")
+
+    if not isinstance(queries, list) or not queries or not all(isinstance(q, str) for q in queries):
+        return jsonify({"success": False, "error": "queries debe ser una lista de textos"}), 400
+
+    if len(queries) > settings.COURSE_SEARCH_BATCH_MAX_QUERIES:
+        return jsonify({
+            "success": False,
+            "error": f"Máximo {settings.COURSE_SEARCH_BATCH_MAX_QUERIES} queries por lote",
+        }), 400
+
+    try:
+        k = max(1, min(int(data.get("k", 10)), 50))
+    except (TypeError, ValueError):
+        return jsonify({"success": False, "error": "k inválido"}), 400
+
+    use_llm = bool(data.get("llm", False))
+    if use_llm and not settings.COURSE_SEARCH_BATCH_LLM:
+        return jsonify({"success": False, "error": "llm no está habilitado en búsquedas por lote"}), 400
+    if use_llm and len(queries) > settings.COURSE_SEARCH_BATCH_MAX_LLM_QUERIES:
+        return jsonify({
+            "success": False,
+            "error": f"Máximo {settings.COURSE_SEARCH_BATCH_MAX_LLM_QUERIES} queries por lote con llm",
+        }), 400
+
+    try:
+        t0 = time.perf_counter()
+        batch = search_courses_batch([q.strip() for q in queries], k=k, use_llm=use_llm)
+        elapsed = time.perf_counter() - t0
+    except Exception as e:
+        logger.error(f"Error en aprende_search_batch_controller: {e}", exc_info=True)
+        return jsonify({"success": False, "error": str(e)}), 500
+
+    return jsonify({
+        "success": True,
+        "mode": get_search_mode(),
+        "count": len(queries),
+        "elapsed_ms": round(elapsed * 1000, 2),
+        "qps": round(len(queries) / elapsed, 2) if elapsed > 0 else None,
+        "results": [
+            {"query": q, "results": [_public_result(r) for r in results]}
+            for q, results in zip(queries, batch)
+        ],
+    })
@@ -1,8 +1,10 @@
 # app/controllers/calendar_controller.py
 import logging
+import time
 from flask import Response, request
 
-from app.services.calendar_ics import crear_invitacion_ics
+from app.services.calendar_ics import crear_invitacion_ics, iter_calendar_feed
+from app.services.calendar_feed_service import current_etag, load_feed, user_key_from_token
 
 logger = logging.getLogger(__name__)
 
@@ -41,3 +43,50 @@ def calendar_create_ics_controller():
     except Exception as e:
         logger.error("Error generando ICS", exc_info=True)
         return {"error": str(e)}, 500
+
+
+def calendar_feed_controller(feed: str):
+    """
+    Feed .ics del usuario con GET condicional: If-None-Match se resuelve
+    con la versión del store (sin leer las tareas) y responde 304.
+    ?task=<id> regresa solo ese evento (descarga desde el front).
+    """
+    user_key = user_key_from_token(feed)
+    if not user_key:
+        return {"error": "Calendario no encontrado"}, 404
+
+    task_id = request.args.get("task") or None
+    headers = {"Cache-Control": "private, no-cache"}
+
+    try:
+        etag = current_etag(user_key, task_id)
+        if request.if_none_match.contains(etag):
+            return Response(status=304, headers={**headers, "ETag": f'"{etag}"'})
+
+        feed_data = load_feed(user_key, task_id)
+        if task_id and not feed_data["tasks"]:
+            return {"error": "Tarea no encontrada"}, 404
+
+        response = Response(
+            iter_calendar_feed(feed_data["tasks"]),
+            mimetype="text/calendar",
+            headers={
+                **headers,
+                "Content-Disposition": f"inline; filename={'evento' if task_id else 'calendario'}.ics",
+            },
+        )
+        response.set_etag(feed_data["etag"])
+        # Last-Modified tiene resolución de segundos: si el cambio cae en el
+        # segundo en curso no se manda, o un cambio posterior en ese mismo
+        # segundo se contestaría 304 por If-Modified-Since
+        if feed_data["last_modified"] and time.time() - feed_data["last_modified"] >= 1:
+            response.last_modified = feed_data["last_modified"]
+            # Sin ETag del cliente, If-Modified-Since decide
+            if not request.if_none_match and request.if_modified_since is not None \
+                    and int(feed_data["last_modified"]) <= request.if_modified_since.timestamp():
+                return Response(status=304, headers={**headers, "ETag": f'"{feed_data["etag"]}"'})
+        return response
+
+    except Exception:
+        logger.error("Error generando feed ICS", exc_info=True)
+        return {"error": "No se pudo generar el calendario"}, 500
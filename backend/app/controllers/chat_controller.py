@@ -19,6 +19,8 @@ def chat_controller():
     task_type = data.get("task_type",None)
     user_message = data.get("message", "").strip()
     action = data.get("action", "chat")
+    # Última versión de la lista de tareas que tiene el front (deltas)
+    tasks_version = data.get("tasks_version")
 
     if not user_message:
         return jsonify({
@@ -35,6 +37,7 @@ def chat_controller():
             user_key=user_key,
             macro_intent=macro_intent,
             task_type=task_type,
+            tasks_version=tasks_version,
         )
         return jsonify(result), 200
 
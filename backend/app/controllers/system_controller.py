@@ -2,6 +2,12 @@ from flask import jsonify, request
 import logging
 
 from app.services.usage_service import get_usage_status
+from app.services.memory_service import get_memory_stats
+from app.states.conversationStore import get_state_stats
+from app.stores.task_store import get_task_store_stats
+from app.services.reminder_dispatcher import get_reminder_dispatcher_stats
+from app.services.channel_worker_service import get_channel_worker_stats
+from app.services.webhook_idempotency_service import get_webhook_idempotency_stats
 from app.services.context_service import get_relevant_urls, get_context_for_query
 from app.clients.groq_client import get_groq_client, get_groq_api_key
 
@@ -15,7 +21,15 @@ def health_controller():
     return jsonify({
         "status": "healthy",
         "service": "Telecom Copilot - Refactor",
-        "ai_ready": bool(client) or bool(api_key)
+        "ai_ready": bool(client) or bool(api_key),
+        "stores": {
+            "chat_memory": get_memory_stats(),
+            "conversation": get_state_stats(),
+            "tasks": get_task_store_stats(),
+            "webhook_messages": get_webhook_idempotency_stats(),
+        },
+        "reminders": get_reminder_dispatcher_stats(),
+        "webhook_workers": get_channel_worker_stats(),
     })
 
 
@@ -2,7 +2,11 @@ import logging
 from flask import request
 from twilio.twiml.messaging_response import MessagingResponse
 
+from app.config import settings
 from app.services.cerebro_service import procesar_chat_web
+from app.services.channel_worker_service import get_channel_worker_pool
+from app.services.outbound_message_service import OutboundMessage, get_message_sender, sender_address
+from app.services.webhook_idempotency_service import run_once
 
 logger = logging.getLogger(__name__)
 
@@ -127,55 +131,108 @@ def rcs_controller():
     return _generic_channel_controller(channel_name="rcs")
 
 
-def _generic_channel_controller(channel_name: str):
-    try:
-        incoming_msg = (request.values.get("Body", "") or "").strip()
-        from_number = request.values.get("From", "")
+# Canales que pueden contestar fuera de banda (REST API de Twilio)
+ASYNC_CHANNELS = ("whatsapp", "sms")
 
-        resp = MessagingResponse()
+FALLBACK_TEXT = (
+    "Puedo ayudarte con cursos, información y servicios. "
+    "Escribe el tema que te interesa."
+)
+ERROR_TEXT = "Ocurrió un error. Intenta nuevamente."
 
-        if not incoming_msg:
-            resp.message("Por favor envía un mensaje válido.")
-            return str(resp), 200, {"Content-Type": "text/xml"}
 
+def _twiml(message_text: str | None):
+    resp = MessagingResponse()
+    if message_text:
+        resp.message(message_text)
+    return str(resp), 200, {"Content-Type": "text/xml"}
+
+
+def _process_channel_message(channel_name: str, from_number: str, incoming_msg: str) -> str:
+    """Pipeline completo de un mensaje de canal; regresa el texto a contestar."""
+    if channel_name in ["whatsapp", "sms"] and incoming_msg.lower() in ["reiniciar", "reset", "empezar de nuevo"]:
+        from app.states.conversationStore import clear_state, save_state, ConversationState
+        # Borra estado anterior
+        clear_state(from_number)
+        state = ConversationState()
+        state.slots["_reset"] = "true"
+        # Crear estado limpio explícito (opcional pero más seguro)
+        save_state(from_number, state)
+
+        return "✅ Conversación reiniciada. ¿En qué puedo ayudarte hoy?"
+
+    result = procesar_chat_web(
+        user_message=incoming_msg,
+        action="chat",
+        user_key=from_number,
+        # El mensaje del canal es solo texto: la lista de tareas sobra
+        include_tasks=False,
+    )
 
-        if channel_name in ["whatsapp", "sms"] and incoming_msg.lower() in ["reiniciar", "reset", "empezar de nuevo"]:
-            from app.states.conversationStore import clear_state, save_state, ConversationState
-                # Borra estado anterior
-            clear_state(from_number)
-            state = ConversationState()
-            state.slots["_reset"] = "true"
-                # Crear estado limpio explícito (opcional pero más seguro)
-            save_state(from_number, state)
+    return build_channel_message(result, channel_name) or FALLBACK_TEXT
 
-            resp.message("✅ Conversación reiniciada. ¿En qué puedo ayudarte hoy?")
-            return str(resp), 200, {"Content-Type": "text/xml"}
 
+def _reply_out_of_band(channel_name: str, from_number: str, to_number: str, incoming_msg: str) -> None:
+    """Corre en el pool de webhooks: procesa y contesta por la REST API."""
+    try:
+        message_text = _process_channel_message(channel_name, from_number, incoming_msg)
+    except Exception:
+        logger.error(f"Error en {channel_name} (asíncrono)", exc_info=True)
+        message_text = ERROR_TEXT
 
+    get_message_sender().send(OutboundMessage(
+        to=from_number,
+        body=message_text,
+        kind="reply",
+        from_=to_number or None,
+    ))
 
 
-        result = procesar_chat_web(
-            user_message=incoming_msg,
-            action="chat",
-            user_key=from_number,
-        )
+def _can_reply_async(channel_name: str, from_number: str, to_number: str) -> bool:
+    return (
+        settings.WEBHOOK_ASYNC
+        and channel_name in ASYNC_CHANNELS
+        and bool(from_number)
+        and bool(to_number or sender_address(from_number))
+    )
 
-        message_text = build_channel_message(result, channel_name)
 
-        if not message_text:
-            message_text = (
-                "Puedo ayudarte con cursos, información y servicios. "
-                "Escribe el tema que te interesa."
-            )
+def _handle_channel_message(channel_name: str, from_number: str, to_number: str, incoming_msg: str):
+    # Modo asíncrono: TwiML vacío ya (Twilio no reintenta por timeout) y
+    # la respuesta sale por la REST API en orden por remitente
+    if _can_reply_async(channel_name, from_number, to_number):
+        pool = get_channel_worker_pool()
+        if pool.submit(from_number, _reply_out_of_band, channel_name, from_number, to_number, incoming_msg):
+            return _twiml(None)
+        # Solo se rechaza a remitentes sin mensajes en cola. En línea, pero con
+        # la llave ocupada: sus siguientes mensajes se encolan detrás de este
+        logger.warning("⚠️ Cola de webhooks llena; %s se procesa en línea", channel_name)
+        return _twiml(pool.run_inline(from_number, _process_channel_message, channel_name, from_number, incoming_msg))
 
-        resp.message(message_text)
-        return str(resp), 200, {"Content-Type": "text/xml"}
+    return _twiml(_process_channel_message(channel_name, from_number, incoming_msg))
+
+
+def _generic_channel_controller(channel_name: str):
+    try:
+        incoming_msg = (request.values.get("Body", "") or "").strip()
+        from_number = request.values.get("From", "")
+        to_number = request.values.get("To", "")
+
+        if not incoming_msg:
+            return _twiml("Por favor envía un mensaje válido.")
+
+        # Un reintento de Twilio trae el mismo MessageSid: espera al original
+        # o recibe su TwiML, sin volver a correr el pipeline. Si el original
+        # sigue en proceso al agotar la espera, TwiML vacío
+        return run_once(
+            request.values.get("MessageSid"),
+            lambda: _handle_channel_message(channel_name, from_number, to_number, incoming_msg),
+            on_timeout=lambda: _twiml(None),
+        )
 
     except Exception as e:
         logger.error(f"Error en {channel_name}_controller", exc_info=True)
-        resp = MessagingResponse()
-        resp.message("Ocurrió un error. Intenta nuevamente.")
-        return str(resp), 200, {"Content-Type": "text/xml"}
+        return _twiml(ERROR_TEXT)
 
 
 def rcs_status_controller():
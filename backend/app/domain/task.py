@@ -1,12 +1,46 @@
 from dataclasses import dataclass, field
-from typing import Optional, Literal
+from functools import lru_cache
+from datetime import date, datetime, time as dtime
+from operator import attrgetter
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Literal
 import time
 import uuid
 
 TaskType = Literal["reminder", "calendar", "note"]
 TaskStatus = Literal["created", "active", "completed"]
 MeetingType = Literal["virtual", "presencial"]
-@dataclass
+
+
+@lru_cache(maxsize=4096)
+def parse_fecha(fecha: Optional[str]) -> Optional[date]:
+    if not fecha:
+        return None
+    try:
+        return date.fromisoformat(fecha)
+    except (TypeError, ValueError):
+        try:
+            return datetime.strptime(fecha, "%Y-%m-%d").date()
+        except (TypeError, ValueError):
+            return None
+
+
+@lru_cache(maxsize=4096)
+def parse_hora(hora: Optional[str]) -> Optional[dtime]:
+    if not hora:
+        return None
+    try:
+        return dtime.fromisoformat(hora)
+    except (TypeError, ValueError):
+        try:
+            return datetime.strptime(hora.strip(), "%H:%M").time()
+        except (AttributeError, TypeError, ValueError):
+            return None
+
+
+# Inmutable y con __slots__: sin __dict__ por instancia. fecha/hora se
+# guardan solo como texto (es lo que ve el front); fecha_date/hora_time las
+# parsean al leerse, con caché por valor (pocas fechas/horas distintas).
+@dataclass(frozen=True, slots=True)
 class Task:
     id: str = field(default_factory=lambda: str(uuid.uuid4()))
     user_key: str = ""
@@ -20,4 +54,44 @@ class Task:
     hora: Optional[str] = None
     status: TaskStatus = "active"
     created_at: float = field(default_factory=time.time)
+    # Cuándo el despachador de recordatorios avisó al usuario (None = pendiente)
+    notified_at: Optional[float] = None
+
+    @property
+    def fecha_date(self) -> Optional[date]:
+        return parse_fecha(self.fecha)
+
+    @property
+    def hora_time(self) -> Optional[dtime]:
+        return parse_hora(self.hora)
+
+
+# ======================================================
+# Serialización (esquema fijo del payload de tareas)
+# ======================================================
+
+TASK_FIELDS = (
+    "id", "user_key", "type", "content", "description", "meeting_type",
+    "meeting_link", "location", "fecha", "hora", "status", "created_at",
+    "notified_at",
+)
+_task_values = attrgetter(*TASK_FIELDS)
+
+
+def task_to_dict(task: Task) -> Dict[str, Any]:
+    """Mismo shape que antes daba task.__dict__."""
+    return dict(zip(TASK_FIELDS, _task_values(task)))
+
+
+def tasks_to_dicts(tasks: Iterable[Task]) -> List[Dict[str, Any]]:
+    return [dict(zip(TASK_FIELDS, _task_values(t))) for t in tasks]
+
+
+def tasks_payload(grouped: Mapping[str, Iterable[Task]]) -> Dict[str, List[Dict[str, Any]]]:
+    """{"calendar": [...], "reminder": [...], "note": [...]} para las respuestas."""
+    return {ttype: tasks_to_dicts(grouped.get(ttype, ())) for ttype in ("calendar", "reminder", "note")}
+
 
+def task_from_dict(data: Mapping[str, Any]) -> Task:
+    """Ignora llaves ajenas al esquema (p. ej. datos viejos del journal)."""
+    return Task(**{k: data[k] for k in TASK_FIELDS if k in data})
@@ -0,0 +1,34 @@
+"""
+Proveedor JSON de Flask respaldado por orjson.
+
+jsonify serializa los payloads de tareas completos en cada respuesta;
+orjson lo hace varias veces más rápido que el módulo json. Se mantiene
+la semántica de Flask: llaves ordenadas, fechas/dataclasses por el
+default de Flask. Sin orjson (entornos sin requirements) o con
+indentación (debug) se usa el proveedor estándar.
+"""
+from typing import Any
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # en requirements; json como respaldo
+    orjson = None
+
+_COMPACT = (",", ":")
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        if orjson is None or kwargs.pop("separators", _COMPACT) != _COMPACT or kwargs:
+            return super().dumps(obj, **kwargs)
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(obj, default=self.default, option=option).decode("utf-8")
+
+    def loads(self, s: Any, **kwargs: Any) -> Any:
+        if orjson is None or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
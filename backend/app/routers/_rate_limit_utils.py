@@ -9,15 +9,15 @@ except Exception:
     limiter = None  # type: ignore
 
 
-def limit(rule: str) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+def limit(rule: str, **options: Any) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
     """
     Decorador seguro para rate limit.
-    Si limiter existe, aplica limiter.limit(rule).
-    Si no existe, deja la función intacta.
+    Si limiter existe, aplica limiter.limit(rule, **options) (cost,
+    exempt_when, ...). Si no existe, deja la función intacta.
     """
     def decorator(fn: Callable[..., Any]) -> Callable[..., Any]:
         if limiter:
-            return limiter.limit(rule)(fn)
+            return limiter.limit(rule, **options)(fn)
         return fn
     return decorator
 
@@ -0,0 +1,19 @@
+# backend/app/routers/aprende_routes.py
+from flask import Blueprint
+
+from app.config import settings
+from app.controllers.aprende_controller import aprende_search_batch_controller, batch_llm_queries
+from app.routers._rate_limit_utils import limit
+
+aprende_bp = Blueprint("aprende", __name__)
+
+# Con "llm": true cada query cuenta contra COURSE_SEARCH_BATCH_LLM_RATE
+aprende_bp.route("/aprende/search/batch", methods=["POST"])(
+    limit("30 per minute")(
+        limit(
+            settings.COURSE_SEARCH_BATCH_LLM_RATE,
+            cost=batch_llm_queries,
+            exempt_when=lambda: batch_llm_queries() == 0,
+        )(aprende_search_batch_controller)
+    )
+)
@@ -1,6 +1,6 @@
 # app/routers/calendar_routes.py
 from flask import Blueprint
-from app.controllers.calendar_controller import calendar_create_ics_controller
+from app.controllers.calendar_controller import calendar_create_ics_controller, calendar_feed_controller
 
 calendar_bp = Blueprint("calendar", __name__)
 
@@ -8,3 +8,9 @@ calendar_bp.route(
     "/calendar/ics",
     methods=["POST"]
 )(calendar_create_ics_controller)
+
+# Feed suscribible (clientes de calendario lo consultan cada pocos minutos)
+calendar_bp.route(
+    "/calendar/<feed>.ics",
+    methods=["GET"]
+)(calendar_feed_controller)
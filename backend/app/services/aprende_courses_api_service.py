@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 import os
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Optional
 import logging
 import requests
 
@@ -12,7 +12,7 @@ def get_aprende_api_base_url() -> Optional[str]:
     return os.getenv("APRENDE_API_BASE_URL")
 
 
-def fetch_course_by_id(course_id: str) -> Dict[str, Any]:
+def fetch_course_by_id(course_id: str, timeout: float = 12) -> Dict[str, Any]:
     base = get_aprende_api_base_url()
     if not base:
         logger.warning("APRENDE_API_BASE_URL no configurado.")
@@ -20,99 +20,71 @@ def fetch_course_by_id(course_id: str) -> Dict[str, Any]:
 
     try:
         url = f"{base.rstrip('/')}/courses/{course_id}"
-        print(f"\n📡 LLAMANDO API: {url}")
-        r = requests.get(url, timeout=12)
+        logger.info("📡 Aprende API GET %s", url)
+        r = requests.get(url, timeout=timeout)
+
+        if r.status_code == 404:
+            return {"success": False, "error": "No encontrado", "status_code": 404}
         r.raise_for_status()
-        
+
         raw_data = r.json() if r.content else {}
-        print(f"📦 RAW RESPONSE TYPE: {type(raw_data)}")
-        print(f"📦 RAW RESPONSE KEYS: {list(raw_data.keys()) if isinstance(raw_data, dict) else 'Not a dict'}")
-        
+
         # DIFERENTES FORMATOS POSIBLES:
-        # 1. { "356": { "name": "...", ... } }  ← El que mostraste antes
-        # 2. { "id": 356, "name": "...", ... }  ← El que veo en los logs
-        
+        # 1. { "356": { "name": "...", ... } }
+        # 2. { "id": 356, "name": "...", ... }
         course_data = None
-        
+
         # Caso 1: La clave es el course_id como string
         if isinstance(raw_data, dict) and str(course_id) in raw_data:
             course_data = raw_data[str(course_id)]
-            print(f"✅ Formato 1: datos bajo key '{course_id}'")
-            
+            fmt = "key"
+
         # Caso 2: Es un objeto directo con 'id' field
         elif isinstance(raw_data, dict) and 'id' in raw_data:
             course_data = raw_data
-            print(f"✅ Formato 2: objeto directo con id={course_data.get('id')}")
-            
+            fmt = "direct"
+
         # Caso 3: Primer objeto del dict
         elif isinstance(raw_data, dict) and len(raw_data) == 1:
             first_key = next(iter(raw_data))
             course_data = raw_data[first_key]
-            print(f"⚠️ Formato 3: usando primera key '{first_key}'")
-            
+            fmt = "first_key"
+
         else:
             course_data = raw_data
-            print(f"ℹ️ Formato desconocido, usando raw_data")
-        
-        print(f"📊 COURSE_DATA TYPE: {type(course_data)}")
-        if isinstance(course_data, dict):
-            print(f"🔑 COURSE_DATA KEYS: {list(course_data.keys())}")
-            print(f"🏷️  NAME FIELD: {course_data.get('name', 'NO NAME')}")
-            print(f"📝 TITLE FIELD: {course_data.get('title', 'NO TITLE')}")
-            print(f"🎓 COURSENAME FIELD: {course_data.get('courseName', 'NO COURSENAME')}")
-        
+            fmt = "unknown"
+
+        logger.debug(
+            "Aprende API curso %s | formato=%s | keys=%s",
+            course_id,
+            fmt,
+            list(course_data.keys()) if isinstance(course_data, dict) else type(course_data).__name__,
+        )
+
         return {
-            "success": True, 
+            "success": True,
             "data": course_data,
             "raw_response": raw_data  # Para debug
         }
 
+    except requests.HTTPError as e:
+        status = e.response.status_code if e.response is not None else None
+        logger.error(f"Error fetch_course_by_id({course_id}): HTTP {status}")
+        return {"success": False, "error": str(e), "status_code": status}
+
     except Exception as e:
-        print(f"❌ ERROR en API call: {e}")
         logger.error(f"Error fetch_course_by_id({course_id}): {e}", exc_info=True)
         return {"success": False, "error": str(e)}
 
-def fetch_courses_top_candidates(candidates: List[Dict[str, Any]], max_fetch: int = 1) -> List[Dict[str, Any]]:
-    """
-    Recibe la lista de candidatos del vector search y enriquece
-    con detalles de la API de cursos.
-    Por defecto solo trae top1.
-    """
-    enriched: List[Dict[str, Any]] = []
-    for c in candidates[:max_fetch]:
-        course_id = str(c.get("courseId", ""))
-        if not course_id:
-            continue
-
-        detail = fetch_course_by_id(course_id)
-        enriched.append({
-            **c,
-            "detail": detail.get("data") if detail.get("success") else None,
-            "detail_error": None if detail.get("success") else detail.get("error")
-        })
-
-    return enriched
-
 def get_course_by_id(course_id: str) -> Optional[dict]:
     """
-    Obtiene un curso directamente por ID desde la API Aprende.
-    Retorna None si no existe.
+    Obtiene un curso por ID desde el catálogo local (sin red).
+    Retorna None si el ID no existe en el catálogo.
     """
     try:
-        course = fetch_course_by_id(course_id)
-        if not course:
-            return None
+        from app.services.course_catalog_service import lookup_course_by_id
 
-        return {
-            "courseId": str(course.get("courseId") or course_id),
-            "courseName": course.get("courseName") or "Curso disponible",
-            "score": 1.0,
-            "metadata": {
-                "courseId": str(course.get("courseId") or course_id),
-                "courseName": course.get("courseName"),
-                "matchType": "explicit_id"
-            }
-        }
+        return lookup_course_by_id(course_id)
     except Exception:
         logger.exception("Error obteniendo curso por ID")
-        return None
\ No newline at end of file
+        return None
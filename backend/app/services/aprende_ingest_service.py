@@ -0,0 +1,304 @@
+"""
+Ingesta streaming del dump de recursos Aprende (cursos_response.json).
+
+Reemplaza el flujo exploratorio de `prueba-por-curso.py`
+(json.load + pandas.groupby + BeautifulSoup fila por fila) por un
+pipeline incremental:
+
+    iter_resources(path)          → recursos uno a uno (ijson o JSONL)
+    iter_course_documents(...)    → documentos por curso (generador)
+
+La memoria queda acotada al curso en curso + la ventana de trabajos
+en vuelo del pool de procesos, sin importar el tamaño del catálogo.
+
+Uso offline (desde backend/):
+    python -m app.services.aprende_ingest_service \
+        ../pruebas-exploratorias/cursos_response.json cursos_documentos.jsonl
+"""
+from __future__ import annotations
+
+import html
+import json
+import logging
+import os
+import re
+import sys
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Tamaño de lectura para el parser incremental (bytes de texto)
+READ_CHUNK_SIZE = 64 * 1024
+
+# Trabajos de limpieza en vuelo por worker (acota memoria)
+INFLIGHT_PER_WORKER = 4
+
+_TAG_RE = re.compile(r"<[^>]+>")
+
+
+# ==========================================================
+# LECTURA INCREMENTAL
+# ==========================================================
+
+def _iter_json_array(fh, chunk_size: int = READ_CHUNK_SIZE) -> Iterator[Dict[str, Any]]:
+    """
+    Decodifica una lista JSON de objetos de forma incremental con
+    `JSONDecoder.raw_decode`, sin cargar el archivo completo.
+    Se usa cuando ijson no está instalado.
+    """
+    decoder = json.JSONDecoder()
+    buf = ""
+    pos = 0
+    started = False
+    eof = False
+
+    while True:
+        # Saltar separadores entre elementos
+        while pos < len(buf) and buf[pos] in " \t\r\n,":
+            pos += 1
+
+        if not started and pos < len(buf):
+            if buf[pos] != "[":
+                raise ValueError("El dump debe ser una lista JSON de recursos")
+            started = True
+            pos += 1
+            continue
+
+        if started and pos < len(buf) and buf[pos] == "]":
+            return
+
+        if pos < len(buf):
+            try:
+                obj, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                obj = None
+            if obj is not None:
+                pos = end
+                yield obj
+                continue
+
+        if eof:
+            if not started:
+                return
+            raise ValueError("Lista JSON incompleta en el dump")
+
+        chunk = fh.read(chunk_size)
+        if not chunk:
+            eof = True
+        # Compactar el buffer para mantener memoria plana
+        buf = buf[pos:] + chunk
+        pos = 0
+
+
+def iter_resources(path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Itera los recursos del dump uno por uno.
+
+    - `.jsonl` / `.ndjson`: un recurso por línea.
+    - `.json`: lista plana; usa ijson si está disponible y si no,
+      el decodificador incremental interno.
+    """
+    lower = path.lower()
+
+    if lower.endswith((".jsonl", ".ndjson")):
+        with open(path, "r", encoding="utf-8") as fh:
+            for line in fh:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+        return
+
+    try:
+        import ijson  # type: ignore
+    except ImportError:
+        ijson = None
+
+    if ijson is not None:
+        with open(path, "rb") as fh:
+            # use_float evita Decimal en campos numéricos (courseId)
+            for obj in ijson.items(fh, "item", use_float=True):
+                yield obj
+        return
+
+    with open(path, "r", encoding="utf-8") as fh:
+        yield from _iter_json_array(fh)
+
+
+# ==========================================================
+# LIMPIEZA HTML
+# ==========================================================
+
+def clean_html(html_text: Any) -> str:
+    """
+    Extrae el texto plano de un fragmento HTML usando lxml.
+    Equivalente a BeautifulSoup(...).get_text().strip(), mucho más rápido.
+    """
+    if not isinstance(html_text, str) or not html_text:
+        return ""
+
+    # Fast path: sin marcado ni entidades
+    if "<" not in html_text and "&" not in html_text:
+        return html_text.strip()
+
+    try:
+        from lxml import html as lxml_html
+
+        fragment = lxml_html.fragment_fromstring(html_text, create_parent="div")
+        return fragment.text_content().strip()
+    except Exception:
+        # Fallback defensivo (lxml ausente o fragmento inválido)
+        return html.unescape(_TAG_RE.sub("", html_text)).strip()
+
+
+def clean_html_batch(texts: List[Any]) -> List[str]:
+    """Limpia una lista de descripciones (unidad de trabajo del pool)."""
+    return [clean_html(t) for t in texts]
+
+
+# ==========================================================
+# DOCUMENTOS POR CURSO
+# ==========================================================
+
+def build_course_text(course_name: str, resource_names: List[str], description: str) -> str:
+    """
+    Mismo formato `textForEmbedding` que generó el pack de clusters.
+    """
+    recursos = "\n - ".join(resource_names)
+    return (
+        f"{course_name}\n\n"
+        f"Temas del curso:\n - {recursos}\n\n"
+        f"Descripción general del curso:\n{description}"
+    )
+
+
+def _make_document(
+    course_id: str,
+    course_name: str,
+    resource_names: List[str],
+    clean_descriptions: List[str],
+) -> Dict[str, Any]:
+    description = " ".join(clean_descriptions)
+    return {
+        "courseId": course_id,
+        "courseName": course_name,
+        "resourceName": resource_names,
+        "resourceDescriptionClean": description,
+        "textForEmbedding": build_course_text(course_name, resource_names, description),
+    }
+
+
+def _iter_course_groups(
+    resources: Iterable[Dict[str, Any]],
+) -> Iterator[Tuple[str, str, List[str], List[Any]]]:
+    """
+    Agrupa por courseId en una sola pasada.
+    El dump viene ordenado por curso (los recursos de un curso son
+    contiguos), así que basta con emitir cada vez que cambia el id.
+    """
+    current_id: Optional[str] = None
+    current_name = ""
+    names: List[str] = []
+    raw_descriptions: List[Any] = []
+    seen: set = set()
+
+    for r in resources:
+        cid = str(r.get("courseId", "") or "")
+        if not cid:
+            continue
+
+        if cid != current_id:
+            if current_id is not None:
+                yield current_id, current_name, names, raw_descriptions
+            if cid in seen:
+                logger.warning("courseId %s no es contiguo en el dump; se emite por separado", cid)
+            seen.add(cid)
+            current_id = cid
+            current_name = str(r.get("courseName") or "")
+            names = []
+            raw_descriptions = []
+
+        names.append(str(r.get("resourceName") or ""))
+        raw_descriptions.append(r.get("resourceDescription"))
+
+    if current_id is not None:
+        yield current_id, current_name, names, raw_descriptions
+
+
+def iter_course_documents(
+    resources: Iterable[Dict[str, Any]],
+    *,
+    workers: Optional[int] = None,
+    executor: Optional[Executor] = None,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Emite documentos por curso a partir de un iterable de recursos.
+
+    - workers=0 → limpieza HTML en el proceso actual.
+    - workers=None → os.cpu_count().
+    - executor → pool externo (no se cierra aquí).
+
+    El orden de salida respeta el orden de entrada y la ventana de
+    trabajos en vuelo está acotada a INFLIGHT_PER_WORKER * workers.
+    """
+    groups = _iter_course_groups(resources)
+
+    if workers == 0 and executor is None:
+        for cid, cname, names, raw in groups:
+            yield _make_document(cid, cname, names, clean_html_batch(raw))
+        return
+
+    n_workers = workers or os.cpu_count() or 1
+    own_executor = executor is None
+    pool = executor or ProcessPoolExecutor(max_workers=n_workers)
+    window = max(1, INFLIGHT_PER_WORKER * n_workers)
+    pending: Deque[Tuple[str, str, List[str], Future]] = deque()
+
+    try:
+        for cid, cname, names, raw in groups:
+            pending.append((cid, cname, names, pool.submit(clean_html_batch, raw)))
+            if len(pending) >= window:
+                pcid, pname, pnames, fut = pending.popleft()
+                yield _make_document(pcid, pname, pnames, fut.result())
+
+        while pending:
+            pcid, pname, pnames, fut = pending.popleft()
+            yield _make_document(pcid, pname, pnames, fut.result())
+    finally:
+        if own_executor:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+
+def stream_course_documents(path: str, *, workers: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+    """Atajo: dump en disco → documentos por curso."""
+    return iter_course_documents(iter_resources(path), workers=workers)
+
+
+# ==========================================================
+# CLI
+# ==========================================================
+
+def main(argv: Optional[List[str]] = None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Ingesta streaming del dump de cursos Aprende")
+    parser.add_argument("input", help="cursos_response.json o .jsonl")
+    parser.add_argument("output", help="Salida JSONL (un curso por línea)")
+    parser.add_argument("--workers", type=int, default=None, help="Procesos para limpiar HTML (0 = en línea)")
+    args = parser.parse_args(argv)
+
+    total = 0
+    with open(args.output, "w", encoding="utf-8") as out:
+        for doc in stream_course_documents(args.input, workers=args.workers):
+            out.write(json.dumps(doc, ensure_ascii=False) + "\n")
+            total += 1
+
+    print(f"✅ Documentos de curso generados: {total} → {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,6 +3,7 @@ import re
 from typing import Any, Dict, List
 
 from app.services.cluster_search_service import search_courses_in_clusters
+from app.services.course_catalog_service import search_courses_by_name
 from app.services.noun_extraction_service import extract_main_noun
 from app.services.semantic_guard_service import evaluate_domain
 
@@ -75,6 +76,7 @@ def run_aprende_flow(
 
     # =====================================================
     # BYPASS: Curso solicitado explícitamente por ID
+    # (catálogo local en memoria, sin llamada HTTP)
     # =====================================================
     def extract_course_id(text: str):
         t = (text or "").lower()
@@ -105,7 +107,7 @@ def run_aprende_flow(
                     "top": [course],
                 }
             else:
-                logger.info(f"❌ Curso {course_id} no encontrado, continuando flujo semántico")
+                logger.info(f"❌ Curso {course_id} no está en el catálogo, continuando flujo semántico")
         except Exception:
             logger.exception("Error en bypass por ID, continuando flujo semántico")
 
@@ -163,6 +165,12 @@ def run_aprende_flow(
         k=k,
     ) or []
 
+    # Fallback sin red: nombre aproximado en el catálogo local
+    if not candidates:
+        candidates = search_courses_by_name(main_noun, limit=k)
+        if candidates:
+            logger.info("📚 Fallback catálogo local por nombre | noun=%s | hits=%s", main_noun, len(candidates))
+
     logger.info(f"📊 Resultados de búsqueda: {len(candidates)} candidatos")
 
     top = candidates[:max(fetch_top_n, 0)] if candidates else []
@@ -0,0 +1,95 @@
+"""
+Feed .ics suscribible por usuario: GET /calendar/<token>.ics
+
+El cliente de calendario (Google, Outlook, Apple) consulta la URL cada
+pocos minutos. La respuesta lleva ETag = "<epoch>.<versión>" de la lista
+de tareas del usuario (la misma versión de los deltas de task_store), así
+que mientras no cambie nada el poll se contesta 304 sin decodificar ni
+serializar las tareas.
+
+El token no es el user_key en claro (para WhatsApp/SMS es el teléfono):
+es base64url(user_key) + "." + HMAC-SHA256 truncado con
+CALENDAR_FEED_SECRET, así nadie arma la URL del calendario de otro.
+
+Sin CALENDAR_FEED_SECRET el feed está apagado: un secreto aleatorio por
+proceso dejaría ligas que mueren al reiniciar y que los demás workers no
+reconocen. En ese caso las tareas llevan el .ics en línea (ver
+task_calendar_service).
+"""
+from __future__ import annotations
+
+import base64
+import hashlib
+import hmac
+import logging
+from functools import lru_cache
+from typing import Any, Dict, Optional
+
+from app.config import settings
+from app.stores.task_store import EPOCH, feed_snapshot, get_tasks_version
+
+logger = logging.getLogger(__name__)
+
+FEED_TYPES = ("calendar", "reminder")
+_SIGNATURE_CHARS = 22
+
+
+def feed_enabled() -> bool:
+    return bool(settings.CALENDAR_FEED_SECRET)
+
+
+@lru_cache(maxsize=1)
+def _secret() -> bytes:
+    if not feed_enabled():
+        raise RuntimeError("CALENDAR_FEED_SECRET no configurado: feed .ics apagado")
+    return settings.CALENDAR_FEED_SECRET.encode("utf-8")
+
+
+def _sign(payload: str) -> str:
+    digest = hmac.new(_secret(), payload.encode("ascii"), hashlib.sha256).digest()
+    return base64.urlsafe_b64encode(digest).decode("ascii")[:_SIGNATURE_CHARS]
+
+
+def feed_token(user_key: str) -> str:
+    payload = base64.urlsafe_b64encode(user_key.encode("utf-8")).decode("ascii").rstrip("=")
+    return f"{payload}.{_sign(payload)}"
+
+
+def user_key_from_token(token: str) -> Optional[str]:
+    if not feed_enabled():
+        return None
+    payload, _, signature = (token or "").partition(".")
+    if not payload or not hmac.compare_digest(signature, _sign(payload)):
+        return None
+    try:
+        return base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)).decode("utf-8")
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+def feed_path(user_key: str, task_id: Optional[str] = None) -> str:
+    path = f"/calendar/{feed_token(user_key)}.ics"
+    return f"{path}?task={task_id}" if task_id else path
+
+
+def feed_etag(version: int, task_id: Optional[str] = None) -> str:
+    tag = f"{EPOCH}.{version}"
+    return f"{tag}.{task_id}" if task_id else tag
+
+
+def current_etag(user_key: str, task_id: Optional[str] = None) -> str:
+    """Sin decodificar la lista: solo la versión del backend."""
+    return feed_etag(get_tasks_version(user_key), task_id)
+
+
+def load_feed(user_key: str, task_id: Optional[str] = None) -> Dict[str, Any]:
+    """Tareas del feed (o solo `task_id`) con su ETag y último cambio, leídos juntos."""
+    version, modified_at, tasks = feed_snapshot(user_key, FEED_TYPES)
+    if task_id:
+        tasks = [task for task in tasks if task.id == task_id]
+    tasks.sort(key=lambda task: (task.fecha_date is None, task.fecha_date, task.hora or "", task.id))
+    return {
+        "etag": feed_etag(version, task_id),
+        "last_modified": modified_at or None,
+        "tasks": tasks,
+    }
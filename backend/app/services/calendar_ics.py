@@ -1,4 +1,5 @@
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone as dt_timezone
+from typing import Iterable, Iterator, Optional
 import uuid
 
 
@@ -81,3 +82,106 @@ def _escape_text(text: str) -> str:
         .replace(",", "\\,")
         .replace("\n", "\\n")
     )
+
+
+# =====================================================
+# Feed suscribible (todas las tareas en un VCALENDAR)
+# =====================================================
+
+# Sin horario de verano desde 2022: un solo bloque STANDARD
+VTIMEZONE_MEXICO_CITY = (
+    "BEGIN:VTIMEZONE",
+    "TZID:America/Mexico_City",
+    "BEGIN:STANDARD",
+    "DTSTART:19700101T000000",
+    "TZOFFSETFROM:-0600",
+    "TZOFFSETTO:-0600",
+    "TZNAME:CST",
+    "END:STANDARD",
+    "END:VTIMEZONE",
+)
+
+
+def _fold(line: str) -> str:
+    """Líneas de máx. 75 octetos (RFC 5545 §3.1), continuación con espacio."""
+    data = line.encode("utf-8")
+    if len(data) <= 75:
+        return line + "\r\n"
+    parts = []
+    limit = 75
+    while data:
+        cut = min(limit, len(data))
+        # No partir un carácter UTF-8 a la mitad
+        while cut < len(data) and (data[cut] & 0xC0) == 0x80:
+            cut -= 1
+        parts.append(data[:cut].decode("utf-8"))
+        data = data[cut:]
+        limit = 74
+    return "\r\n ".join(parts) + "\r\n"
+
+
+def _utc_stamp(ts: Optional[float]) -> str:
+    moment = datetime.fromtimestamp(ts, dt_timezone.utc) if ts else datetime.now(dt_timezone.utc)
+    return moment.strftime("%Y%m%dT%H%M%SZ")
+
+
+def _event_lines(task, *, timezone: str, duracion_horas: float) -> Iterator[str]:
+    yield "BEGIN:VEVENT"
+    # UID estable: el cliente de calendario actualiza el evento en lugar de duplicarlo
+    yield f"UID:{task.id}@claria.ai"
+    yield f"DTSTAMP:{_utc_stamp(task.created_at)}"
+    yield f"SUMMARY:{_escape_text(task.content)}"
+    if task.description:
+        yield f"DESCRIPTION:{_escape_text(task.description)}"
+    location = task.meeting_link or (task.location if task.location != "No especificado" else None)
+    if location:
+        yield f"LOCATION:{_escape_text(location)}"
+    if task.hora_time is not None:
+        inicio = datetime.combine(task.fecha_date, task.hora_time)
+        fin = inicio + timedelta(minutes=int(duracion_horas * 60)) if task.type == "calendar" else inicio
+        yield f"DTSTART;TZID={timezone}:{inicio.strftime('%Y%m%dT%H%M%S')}"
+        yield f"DTEND;TZID={timezone}:{fin.strftime('%Y%m%dT%H%M%S')}"
+    else:
+        # Sin hora: evento de día completo
+        yield f"DTSTART;VALUE=DATE:{task.fecha_date.strftime('%Y%m%d')}"
+        yield f"DTEND;VALUE=DATE:{(task.fecha_date + timedelta(days=1)).strftime('%Y%m%d')}"
+    yield "STATUS:CONFIRMED"
+    if task.type == "reminder" and task.hora_time is not None:
+        yield "BEGIN:VALARM"
+        yield "ACTION:DISPLAY"
+        yield f"DESCRIPTION:{_escape_text(task.content)}"
+        yield "TRIGGER:PT0M"
+        yield "END:VALARM"
+    yield "END:VEVENT"
+
+
+def iter_calendar_feed(
+    tasks: Iterable,
+    *,
+    nombre: str = "Claria",
+    timezone: str = DEFAULT_TIMEZONE,
+    duracion_horas: float = 1,
+) -> Iterator[str]:
+    """
+    VCALENDAR con un VEVENT por tarea fechada (calendar/reminder), en
+    trozos para responder en streaming. Las tareas sin fecha se omiten.
+    """
+    header = [
+        "BEGIN:VCALENDAR",
+        "VERSION:2.0",
+        "PRODID:-//Claria//Calendar//ES",
+        "CALSCALE:GREGORIAN",
+        "METHOD:PUBLISH",
+        f"X-WR-CALNAME:{_escape_text(nombre)}",
+        f"X-WR-TIMEZONE:{timezone}",
+    ]
+    if timezone == DEFAULT_TIMEZONE:
+        header.extend(VTIMEZONE_MEXICO_CITY)
+    yield "".join(_fold(line) for line in header)
+
+    for task in tasks:
+        if task.fecha_date is None:
+            continue
+        yield "".join(_fold(line) for line in _event_lines(task, timezone=timezone, duracion_horas=duracion_horas))
+
+    yield _fold("END:VCALENDAR")
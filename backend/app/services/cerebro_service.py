@@ -9,8 +9,8 @@ from app.services.channel_message_service import build_chat_messages
 from app.services.prompt_service import build_system_prompt
 from app.services.context_service import get_context_for_query
 from app.services.task_calendar_service import generate_ics_for_task
-from app.domain.task import Task
-from app.stores.task_store import add_task, get_tasks_grouped
+from app.domain.task import Task, tasks_to_dicts
+from app.stores.task_store import add_task, count as count_tasks, query as query_tasks
 
 from app.services.content_safety_service import check_content_safety
 from app.services.chat_orchestrator_service import run_web_chat
@@ -35,6 +35,8 @@ from app.agents.claro.claro_agent import ClaroAgent
 from app.states.conversationStore import load_state, save_state
 from app.services.task_orchestator_service import handle_task_web
 from app.services.task_continuation_service import handle_task_continuation, continue_task
+from app.services.task_service import build_tasks_sync
+from app.services.datetime_parser import now_local
 
 logger = logging.getLogger(__name__)
 
@@ -125,6 +127,22 @@ def _build_task_response(task_result: Dict[str, Any], state) -> Dict[str, Any]:
     }
 
 
+def _attach_tasks(
+    response: Dict[str, Any],
+    user_key: str,
+    include_tasks: bool,
+    tasks_version: Optional[str],
+) -> Dict[str, Any]:
+    """
+    Al cerrar una tarea agrega la lista del usuario: completa ("tasks") o
+    solo lo cambiado desde tasks_version ("tasks_delta"). Los canales que
+    no la muestran (WhatsApp/SMS/RCS) pasan include_tasks=False.
+    """
+    if include_tasks and response.get("action") == "task":
+        response.update(build_tasks_sync(user_key, tasks_version))
+    return response
+
+
 # =====================================================
 # Helpers locales (extraídos del controller)
 # =====================================================
@@ -201,10 +219,16 @@ def procesar_chat_web(
     user_key: str,
     macro_intent: str | None = None,
     task_type: str | None = None,
+    include_tasks: bool = True,
+    tasks_version: str | None = None,
 ) -> Dict[str, Any]:
     """
     Núcleo conversacional del sistema.
     Retorna exactamente el mismo payload que antes devolvía /chat.
+
+    include_tasks=False omite la lista de tareas (canales sin sidebar);
+    tasks_version es la última versión de la lista que tiene el cliente,
+    para responder solo el delta.
     """
     logger.info("🧠 procesar_chat_web INVOCADO")
     logger.info(f"➡️ user_message='{user_message}'")
@@ -288,16 +312,14 @@ def procesar_chat_web(
     # CONSULTA DE TAREAS (task_query) - PRIORIDAD ABSOLUTA
     # ⚠️ NO DEBE DEPENDER DE LLM
     # -------------------------------------------------
+    max_rows_per_type = 10
+
     def _parse_task_date(task: Task) -> Optional[date]:
-        if not getattr(task, "fecha", None):
-            return None
-        try:
-            return datetime.strptime(task.fecha, "%Y-%m-%d").date()
-        except Exception:
-            return None
+        # Pre-parseada al construir la Task
+        return getattr(task, "fecha_date", None)
 
     def _detect_date_range(text: str) -> Tuple[Optional[date], Optional[date], Optional[str]]:
-        today = date.today()
+        today = now_local().date()
 
         if "pasado mañana" in text or "pasado manana" in text:
             target = today + timedelta(days=2)
@@ -333,9 +355,8 @@ def procesar_chat_web(
         calendar_tasks: list[Task],
         reminder_tasks: list[Task],
         notes_tasks: list[Task],
+        totals: Tuple[int, int, int],
     ) -> str:
-        max_rows_per_type = 10
-
         def _sanitize(value: Optional[str]) -> str:
             if not value:
                 return "-"
@@ -384,11 +405,11 @@ def procesar_chat_web(
 
         def _is_today(task: Task) -> bool:
             dt = _get_date(task)
-            return bool(dt and dt == date.today())
+            return bool(dt and dt == now_local().date())
 
         def _is_tomorrow(task: Task) -> bool:
             dt = _get_date(task)
-            return bool(dt and dt == date.today() + timedelta(days=1))
+            return bool(dt and dt == now_local().date() + timedelta(days=1))
 
         def _status_label(task: Task) -> str:
             if _is_today(task):
@@ -397,21 +418,12 @@ def procesar_chat_web(
                 return "mañana"
             return _sanitize(getattr(task, "status", None))
 
-        def _sort_key(task: Task) -> tuple:
-            dt = _get_date(task)
-            hora = _get_time(task) or "23:59"
-            if dt:
-                return (0, dt, hora)
-            created = getattr(task, "created_at", 0.0) or 0.0
-            return (1, datetime.fromtimestamp(float(created)).date(), "23:59")
-
-        def _build_table_for_type(tasks: list[Task], tlabel: str) -> str:
+        def _build_table_for_type(tasks: list[Task], total: int, tlabel: str) -> str:
             if not tasks:
                 return f"### {tlabel}\nSin tareas.\n"
 
-            ordered = sorted(tasks, key=_sort_key)
-            total = len(ordered)
-            visible = ordered[:max_rows_per_type]
+            # Ya vienen ordenadas (fecha/hora, luego sin fecha) desde task_store.query
+            visible = tasks[:max_rows_per_type]
 
             lines = [
                 f"### {tlabel} ({total})",
@@ -451,9 +463,9 @@ def procesar_chat_web(
             return "\n".join(lines)
 
         return "\n".join([
-            _build_table_for_type(calendar_tasks, "Eventos"),
-            _build_table_for_type(reminder_tasks, "Recordatorios"),
-            _build_table_for_type(notes_tasks, "Notas"),
+            _build_table_for_type(calendar_tasks, totals[0], "Eventos"),
+            _build_table_for_type(reminder_tasks, totals[1], "Recordatorios"),
+            _build_table_for_type(notes_tasks, totals[2], "Notas"),
         ]).strip()
 
     QUERY_PATTERNS = (
@@ -479,31 +491,29 @@ def procesar_chat_web(
     if any(p in normalized_message for p in QUERY_PATTERNS):
         logger.info("📊 TASK QUERY detectado (early)")
 
-        tasks = get_tasks_grouped(user_key)
-
         start_date, end_date, range_label = _detect_date_range(normalized_message)
         if start_date and end_date:
             logger.info("🗓️ Rango detectado: %s -> %s (%s)", start_date, end_date, range_label)
         else:
             logger.info("🗓️ Sin rango detectado para task_query")
 
-        calendar_tasks = tasks.get("calendar", [])
-        reminder_tasks = tasks.get("reminder", [])
-        notes_tasks = tasks.get("note", [])
-
-        if start_date and end_date:
-            calendar_tasks = [
-                t for t in calendar_tasks
-                if (dt := _parse_task_date(t)) and start_date <= dt <= end_date
-            ]
-            reminder_tasks = [
-                t for t in reminder_tasks
-                if (dt := _parse_task_date(t)) and start_date <= dt <= end_date
-            ]
-
-        total_calendar = len(calendar_tasks)
-        total_reminder = len(reminder_tasks)
-        total_notes = len(notes_tasks)
+        # Índice por fecha del task_store: el rango es un bisect, sin
+        # re-parsear ni reordenar todas las tareas en cada consulta. La tabla
+        # solo muestra max_rows_per_type por tipo y los totales salen de
+        # count(); las listas completas solo si el payload las incluye
+        rows = None if include_tasks else max_rows_per_type
+        calendar_tasks = query_tasks(user_key, "calendar", start_date, end_date, limit=rows)
+        reminder_tasks = query_tasks(user_key, "reminder", start_date, end_date, limit=rows)
+        notes_tasks = query_tasks(user_key, "note", limit=rows)
+
+        if include_tasks:
+            total_calendar = len(calendar_tasks)
+            total_reminder = len(reminder_tasks)
+            total_notes = len(notes_tasks)
+        else:
+            total_calendar = count_tasks(user_key, "calendar", start_date, end_date)
+            total_reminder = count_tasks(user_key, "reminder", start_date, end_date)
+            total_notes = count_tasks(user_key, "note")
 
         if range_label:
             response_text = (
@@ -518,20 +528,25 @@ def procesar_chat_web(
                 f" Además, has guardado {total_notes} notas."
             )
 
-        table_text = _build_task_table(calendar_tasks, reminder_tasks, notes_tasks)
+        table_text = _build_task_table(
+            calendar_tasks, reminder_tasks, notes_tasks,
+            (total_calendar, total_reminder, total_notes),
+        )
 
-        return {
+        response = {
             "success": True,
             "response": f"{response_text}\n\n{table_text}",
             "context": "🗓️ GESTIÓN DE TAREAS",
             "context_reset": False,
             "action": "task_query",
-            "tasks": {
-                "calendar": [t.__dict__ for t in calendar_tasks],
-                "reminder": [t.__dict__ for t in reminder_tasks],
-                "note": [t.__dict__ for t in notes_tasks],
-            },
         }
+        if include_tasks:
+            response["tasks"] = {
+                "calendar": tasks_to_dicts(calendar_tasks),
+                "reminder": tasks_to_dicts(reminder_tasks),
+                "note": tasks_to_dicts(notes_tasks),
+            }
+        return response
 
     # -------------------------------------------------
     # Analizar contexto via LLM/service para detectar macro intent y task_type
@@ -581,6 +596,11 @@ def procesar_chat_web(
         logger.info(f"🧪 Resultado continue_task action={result.get('action')}")
         logger.info(f"🧪 Resultado completo continue_task: {result}")
 
+        # continue_task cierra/ajusta el estado en sitio; load_state entrega
+        # una copia, así que el cierre hay que persistirlo explícitamente
+        if result.get("action") != "task_followup":
+            save_state(user_key, state)
+
         if result.get("action") == "task_followup":
             logger.info("🔄 Follow-up continúa, no evaluar otros intents")
             task = result.get("task", {})
@@ -612,16 +632,15 @@ def procesar_chat_web(
 
         if result.get("action") == "task":
             logger.info("✅ Tarea cerrada desde follow-up")
-            return {
+            return _attach_tasks({
                 "success": True,
                 "response": _confirmation_text(result.get("task", {})),
                 "context": "🗓️ GESTIÓN DE TAREAS",
                 "context_reset": False,
                 "action": "task",
                 "task": result.get("task"),
-                "tasks": result.get("tasks"),
                 "ics": result.get("ics"),
-            }
+            }, user_key, include_tasks, tasks_version)
 
         # ⛔️ CORTA EJECUCIÓN TOTAL
         return result
@@ -686,8 +705,13 @@ def procesar_chat_web(
                     if isinstance(raw_task, dict) and isinstance(raw_task.get("task"), dict):
                         raw_task = raw_task.get("task")
 
+                    # Sobre los slots que el orquestador acaba de guardar
+                    # (meeting_type/meeting_link/location del análisis); los
+                    # None del agente no los borran
+                    raw_task = raw_task or {}
                     raw_task = {
-                        **(raw_task or {}),
+                        **(state.slots if isinstance(state.slots, dict) else {}),
+                        **{key: value for key, value in raw_task.items() if value is not None},
                         "task_type": raw_task.get("task_type") or task_type,
                         "content": raw_task.get("content") or normalized_text,
                         "user_key": user_key,
@@ -704,7 +728,9 @@ def procesar_chat_web(
             logger.info("✅ Tarea completada sin follow-up (cerrada por orquestador)")
             logger.info("🚦 Delegando respuesta final a _build_task_response")
 
-            return _build_task_response(task_result, state)
+            return _attach_tasks(
+                _build_task_response(task_result, state), user_key, include_tasks, tasks_version
+            )
             
         except Exception as e:
             logger.exception(f"❌ Error procesando tarea: {e}")
@@ -0,0 +1,168 @@
+"""
+Pool de hilos para procesar mensajes de canal (WhatsApp/SMS) fuera del
+request del webhook, con orden FIFO por remitente.
+
+Cada remitente tiene su cola; una llave con trabajo está en `ready` o la
+tiene un hilo, nunca dos a la vez. Así los mensajes de un mismo usuario se
+procesan en el orden en que llegaron (el estado conversacional depende
+de ello) y usuarios distintos avanzan en paralelo. Un hilo procesa un
+mensaje y devuelve la llave al final de `ready`: un usuario con muchos
+mensajes no acapara un hilo.
+
+La cola está acotada (WEBHOOK_QUEUE_MAX): si se llena, submit() regresa
+False para remitentes sin trabajo pendiente y el webhook procesa en línea
+con run_inline(), que deja la llave ocupada mientras tanto: lo que llegue
+de ese remitente se encola detrás. Un remitente con mensajes en cola, en
+proceso o en línea se encola aunque se pase del tope: procesarlo en línea
+adelantaría su mensaje a los previos.
+"""
+from __future__ import annotations
+
+import atexit
+import logging
+import threading
+import time
+from collections import deque
+from functools import lru_cache
+from typing import Any, Callable, Deque, Dict, List, Tuple
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+Job = Tuple[Callable[..., Any], Tuple[Any, ...], float]
+
+
+class KeyedWorkerPool:
+    def __init__(self, name: str, workers: int = 4, max_pending: int = 1000):
+        self.name = name
+        self.max_pending = max(1, int(max_pending))
+        lock = threading.Lock()
+        self._cond = threading.Condition(lock)
+        # Aparte de _cond para que un notify() a los hilos no lo tome run_inline
+        self._key_released = threading.Condition(lock)
+        self._queues: Dict[str, Deque[Job]] = {}
+        self._ready: Deque[str] = deque()
+        self._pending = 0
+        self._closed = False
+        self.stats_counters = {
+            "queued": 0, "processed": 0, "failed": 0, "rejected": 0, "over_cap": 0, "inline": 0,
+            "max_wait_ms": 0.0,
+        }
+        self._threads: List[threading.Thread] = []
+        for i in range(max(1, int(workers))):
+            thread = threading.Thread(target=self._run, name=f"{name}-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        atexit.register(self.close)
+
+    def submit(self, key: str, fn: Callable[..., Any], *args: Any) -> bool:
+        with self._cond:
+            queue = self._queues.get(key)
+            if self._closed or (self._pending >= self.max_pending and queue is None):
+                self.stats_counters["rejected"] += 1
+                return False
+            if self._pending >= self.max_pending:
+                # La llave ya tiene trabajo: se respeta su orden aunque pase del tope
+                self.stats_counters["over_cap"] += 1
+            if queue is None:
+                # Llave sin trabajo: nadie la tiene, pasa a ready
+                queue = self._queues[key] = deque()
+                self._ready.append(key)
+            queue.append((fn, args, time.monotonic()))
+            self._pending += 1
+            self.stats_counters["queued"] += 1
+            self._cond.notify()
+        return True
+
+    def run_inline(self, key: str, fn: Callable[..., Any], *args: Any) -> Any:
+        """
+        Corre fn en el hilo que llama (cuando submit() rechazó la llave).
+        Mientras corre, la llave cuenta como ocupada: submit() encola detrás
+        y ningún hilo la toma; al terminar, lo encolado pasa a `ready`.
+        """
+        with self._cond:
+            # Otro request del remitente alcanzó a encolarse: se espera a que
+            # su cola se vacíe para no adelantarle este mensaje
+            while key in self._queues and not self._closed:
+                self._key_released.wait()
+            # Cerrando el pool con la llave aún en un hilo: ya no hay orden que cuidar
+            owned = key not in self._queues
+            if owned:
+                self._queues[key] = deque()
+            self.stats_counters["inline"] += 1
+        try:
+            return fn(*args)
+        finally:
+            if owned:
+                with self._cond:
+                    self._release(key)
+
+    def _release(self, key: str) -> None:
+        # Con el lock tomado: la llave vuelve a ready si quedó trabajo, si no se suelta
+        if self._queues[key]:
+            self._ready.append(key)
+            self._cond.notify()
+        else:
+            del self._queues[key]
+            self._key_released.notify_all()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._ready and not self._closed:
+                    self._cond.wait()
+                if not self._ready:
+                    return
+                key = self._ready.popleft()
+                fn, args, enqueued = self._queues[key].popleft()
+
+            wait_ms = (time.monotonic() - enqueued) * 1000
+            ok = True
+            try:
+                fn(*args)
+            except Exception:
+                ok = False
+                logger.exception("Error procesando mensaje en %s", self.name)
+
+            with self._cond:
+                self._pending -= 1
+                self.stats_counters["processed" if ok else "failed"] += 1
+                self.stats_counters["max_wait_ms"] = max(self.stats_counters["max_wait_ms"], round(wait_ms, 1))
+                self._release(key)
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Deja de aceptar; los hilos terminan lo encolado antes de salir."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+            self._key_released.notify_all()
+        deadline = time.monotonic() + timeout
+        for thread in self._threads:
+            if thread is not threading.current_thread():
+                thread.join(timeout=max(0.0, deadline - time.monotonic()))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                **self.stats_counters,
+                "pending": self._pending,
+                "senders": len(self._queues),
+                "workers": len(self._threads),
+            }
+
+
+@lru_cache(maxsize=1)
+def get_channel_worker_pool() -> KeyedWorkerPool:
+    return KeyedWorkerPool(
+        "webhook-worker",
+        workers=settings.WEBHOOK_WORKERS,
+        max_pending=settings.WEBHOOK_QUEUE_MAX,
+    )
+
+
+def get_channel_worker_stats() -> Dict[str, Any] | None:
+    # Sin crear el pool si el modo asíncrono nunca se usó
+    if get_channel_worker_pool.cache_info().currsize == 0:
+        return None
+    return get_channel_worker_pool().stats()
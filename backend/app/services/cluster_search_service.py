@@ -1,5 +1,6 @@
 import logging
 import os
+import time
 from functools import lru_cache
 from typing import Any, Dict, List, Optional, Tuple
 
@@ -7,6 +8,7 @@ import numpy as np
 from difflib import SequenceMatcher
 
 from app.config import settings
+from app.services.embedding_provider_service import get_embedding_provider
 
 logger = logging.getLogger(__name__)
 
@@ -27,7 +29,7 @@ def build_groq_client():
         return None
     try:
         from groq import Groq
-        return Groq(api_key=api_key)
+        return Groq(api_key=api_key, base_url=settings.GROQ_BASE_URL or None)
     except Exception as e:
         print("❌ Error inicializando Groq client:", e)
         return None
@@ -37,16 +39,6 @@ def get_groq_client():
     return build_groq_client()
 
 
-def get_openai_api_key() -> Optional[str]:
-    return getattr(settings, "OPENAI_API_KEY", None) or os.getenv("OPENAI_API_KEY")
-
-def get_embedding_model() -> str:
-    return (
-        getattr(settings, "OPENAI_EMBEDDING_MODEL", None)
-        or os.getenv("OPENAI_EMBEDDING_MODEL")
-        or "text-embedding-3-large"
-    )
-
 def get_cluster_pack_path() -> str:
     env = getattr(settings, "COURSE_CLUSTER_PACK_PATH", None) or os.getenv("COURSE_CLUSTER_PACK_PATH")
     if env:
@@ -54,20 +46,6 @@ def get_cluster_pack_path() -> str:
     here = os.path.dirname(__file__)
     return os.path.abspath(os.path.join(here, "..", "data", "courses_cluster_pack.npz"))
 
-def build_openai_client():
-    api_key = get_openai_api_key()
-    if not api_key:
-        return None
-    try:
-        from openai import OpenAI
-        return OpenAI(api_key=api_key)
-    except Exception as e:
-        logger.error("No se pudo inicializar OpenAI client: %s", e, exc_info=True)
-        return None
-
-@lru_cache(maxsize=1)
-def get_openai_client():
-    return build_openai_client()
 def llm_aprende_tiebreaker(query: str, options: List[str]) -> Optional[str]:
     """
     Usa Groq como árbitro semántico SOLO para desempates.
@@ -152,21 +130,29 @@ def _safe_get(pack: Dict[str, Any], *keys):
 # ==========================================================
 
 def embed_query(text: str) -> Optional[np.ndarray]:
-    client = get_openai_client()
-    if not client:
-        return None
-
     try:
-        model = get_embedding_model()
-        resp = client.embeddings.create(
-            model=model,
-            input=text
+        # Sin reintentos: si el proveedor está lento se cae al modo léxico
+        return get_embedding_provider().embed_one(
+            text,
+            timeout=settings.COURSE_EMBED_TIMEOUT_SECONDS,
         )
-        return np.array(resp.data[0].embedding, dtype=np.float32)
     except Exception as e:
         logger.error("Error generando embedding del query: %s", e, exc_info=True)
         return None
 
+
+def embed_queries(texts: List[str]) -> Optional[np.ndarray]:
+    """
+    Embeddings de varias queries; el proveedor arma los lotes. Regresa (n, d).
+    """
+    if not texts:
+        return None
+    try:
+        return get_embedding_provider().embed(texts)
+    except Exception as e:
+        logger.error("Error generando embeddings en lote: %s", e, exc_info=True)
+        return None
+
 # ==========================================================
 # SIMILARIDAD COSENO
 # ==========================================================
@@ -241,6 +227,10 @@ def _tokenize(text: str) -> List[str]:
     tokens = re.findall(r"\w+", text, flags=re.UNICODE)
     return [t for t in tokens if len(t) > 2 and t not in LEXICAL_STOPWORDS]
 
+def _trigrams(text: str) -> set:
+    text = _normalize(text).replace(" ", "")
+    return {text[i:i+3] for i in range(len(text) - 2)}
+
 def _lexical_similarity(query: str, title: str) -> float:
     """
     Similaridad léxica robusta usando n-grams + Jaccard aproximado.
@@ -249,13 +239,8 @@ def _lexical_similarity(query: str, title: str) -> float:
     if not query or not title:
         return 0.0
 
-    def ngrams(text, n=3):
-        text = _normalize(text)
-        text = text.replace(" ", "")
-        return {text[i:i+n] for i in range(len(text) - n + 1)}
-
-    q_grams = ngrams(query, 3)
-    t_grams = ngrams(title, 3)
+    q_grams = _trigrams(query)
+    t_grams = _trigrams(title)
 
     if not q_grams or not t_grams:
         return 0.0
@@ -266,39 +251,41 @@ def _lexical_similarity(query: str, title: str) -> float:
     return inter / union if union else 0.0
 
 
-def apply_lexical_rerank(query: str, results: List[dict]) -> List[dict]:
+def apply_lexical_rerank(query: str, results: List[dict], verbose: bool = True) -> List[dict]:
     """
     Aplica re-ranking léxico SOLO si:
       - hay ≥2 resultados
       - top_score ∈ [0.35, 0.40]
       - delta < 0.02
     """
-    print("\n============================")
-    print("🔎 [DEBUG] Evaluando re-ranking léxico…")
-    print("============================")
+    log = print if verbose else (lambda *args, **kwargs: None)
+
+    log("\n============================")
+    log("🔎 [DEBUG] Evaluando re-ranking léxico…")
+    log("============================")
 
     if len(results) < 2:
-        print("→ NO: menos de 2 resultados.")
+        log("→ NO: menos de 2 resultados.")
         return results
 
     top = float(results[0]["score"])
     second = float(results[1]["score"])
     delta = top - second
 
-    print(f"→ Top score:    {top:.4f}")
-    print(f"→ Second score: {second:.4f}")
-    print(f"→ Delta:        {delta:.4f}")
-    print("→ Rango válido:", 0.35, "<= top <=", 0.45)
+    log(f"→ Top score:    {top:.4f}")
+    log(f"→ Second score: {second:.4f}")
+    log(f"→ Delta:        {delta:.4f}")
+    log("→ Rango válido:", 0.35, "<= top <=", 0.45)
 
     if not (0.35 <= top <= 0.45):
-        print("→ NO: Top fuera de rango.")
+        log("→ NO: Top fuera de rango.")
         return results
 
     if delta > 0.02:
-        print("→ NO: delta demasiado grande.")
+        log("→ NO: delta demasiado grande.")
         return results
 
-    print("→ SÍ: Activando re-ranking léxico.")
+    log("→ SÍ: Activando re-ranking léxico.")
 
     # Calcular scores léxicos
     for r in results:
@@ -308,20 +295,20 @@ def apply_lexical_rerank(query: str, results: List[dict]) -> List[dict]:
         r["_lex"] = lex
         r["_combined"] = combined
 
-        print("\nCurso:", cname)
-        print("  score original:", f"{r['score']:.4f}")
-        print("  lex_score:     ", f"{lex:.4f}")
-        print("  combined_score:", f"{combined:.4f}")
+        log("\nCurso:", cname)
+        log("  score original:", f"{r['score']:.4f}")
+        log("  lex_score:     ", f"{lex:.4f}")
+        log("  combined_score:", f"{combined:.4f}")
 
-    print("\n→ Reordenando por combined_score…\n")
+    log("\n→ Reordenando por combined_score…\n")
 
     results.sort(key=lambda x: x.get("_combined", x["score"]), reverse=True)
 
-    print("🏁 ORDEN FINAL DESPUÉS DEL RERANKING:")
+    log("🏁 ORDEN FINAL DESPUÉS DEL RERANKING:")
     for i, r in enumerate(results, 1):
-        print(f" {i}. {r.get('courseName')} → combined={r.get('_combined'):.4f}")
+        log(f" {i}. {r.get('courseName')} → combined={r.get('_combined'):.4f}")
 
-    print("============================\n")
+    log("============================\n")
     return results
 def llm_rewrite_learning_intent(user_query: str) -> Optional[str]:
     """
@@ -409,6 +396,120 @@ Salida:
         return None
 
 
+# ==========================================================
+# BÚSQUEDA LÉXICA (BM25) Y FUSIÓN
+# ==========================================================
+
+def get_search_mode() -> str:
+    mode = (getattr(settings, "COURSE_SEARCH_MODE", "") or "hybrid").strip().lower()
+    return mode if mode in ("hybrid", "dense", "lexical") else "hybrid"
+
+
+def _lexical_fallback(query: str, k: int, reason: str, verbose: bool = True) -> List[dict]:
+    """
+    Modo degradado sin red: solo BM25 (sin embeddings ni LLM).
+    """
+    from app.services.course_lexical_search_service import search_courses_lexical
+
+    if verbose:
+        print(f"📚 [BM25] Búsqueda puramente léxica ({reason})")
+    try:
+        results = search_courses_lexical(query, k=k)
+    except Exception as e:
+        logger.error("Error en búsqueda léxica: %s", e, exc_info=True)
+        return []
+
+    if verbose:
+        for i, r in enumerate(results, 1):
+            print(f" {i}. {r['courseName']} → bm25={r['_bm25']:.4f} | score={r['score']:.4f}")
+    return results
+
+
+@lru_cache(maxsize=1)
+def _pack_row_by_id() -> Dict[str, int]:
+    pack = load_cluster_pack()
+    course_ids = _safe_get(pack, "course_ids", "ids", "indices") if pack else None
+    if course_ids is None:
+        return {}
+    return {str(cid): i for i, cid in enumerate(course_ids)}
+
+
+def _add_lexical_candidates(
+    query: str,
+    q_vec: np.ndarray,
+    results: List[Dict[str, Any]],
+    embeddings: np.ndarray,
+    course_names: Optional[np.ndarray],
+    k: int,
+    verbose: bool = True,
+) -> List[Dict[str, Any]]:
+    """
+    Anota `_bm25` en los candidatos densos y agrega los top-k de BM25
+    que el ranking denso dejó fuera (con su coseno real como `score`).
+    """
+    from app.services.course_lexical_search_service import get_course_lexical_index
+
+    try:
+        index = get_course_lexical_index()
+        bm25_scores, _ = index.score_vector(query)
+    except Exception as e:
+        logger.error("Índice BM25 no disponible: %s", e, exc_info=True)
+        return results
+
+    for r in results:
+        row = index.row_of(r["courseId"])
+        r["_bm25"] = float(bm25_scores[row]) if row is not None else 0.0
+
+    seen = {r["courseId"] for r in results}
+    pack_rows = _pack_row_by_id()
+    extra_rows, extra_hits = [], []
+    for cid, bm25, _norm in index.search(query, k=k):
+        row = pack_rows.get(cid)
+        if cid in seen or row is None:
+            continue
+        extra_rows.append(row)
+        extra_hits.append((cid, bm25))
+
+    if extra_rows:
+        sims = _cosine_sim_matrix(q_vec, embeddings[extra_rows])
+        for (cid, bm25), row, sim in zip(extra_hits, extra_rows, sims):
+            cname = str(course_names[row]) if course_names is not None else None
+            results.append({
+                "courseId": cid,
+                "courseName": cname,
+                "score": float(sim),
+                "_bm25": bm25,
+                "metadata": {"courseId": cid, "courseName": cname},
+            })
+        if verbose:
+            print(f"📚 [BM25] {len(extra_rows)} candidatos léxicos agregados al pool")
+
+    results.sort(key=lambda x: x["score"], reverse=True)
+    return results
+
+
+def apply_rrf_fusion(results: List[dict], k: int, rrf_k: Optional[int] = None) -> List[dict]:
+    """
+    Reciprocal-rank fusion entre el orden denso final (con re-rankings)
+    y el orden BM25. `score` conserva el coseno para los umbrales.
+    """
+    from app.services.course_lexical_search_service import reciprocal_rank_fusion
+
+    rrf_k = rrf_k or getattr(settings, "COURSE_RRF_K", 60)
+    dense_rank = [r["courseId"] for r in results]
+    lexical_rank = [
+        r["courseId"]
+        for r in sorted(results, key=lambda x: x.get("_bm25", 0.0), reverse=True)
+        if r.get("_bm25", 0.0) > 0
+    ]
+    fused = reciprocal_rank_fusion([dense_rank, lexical_rank], k=rrf_k)
+
+    for r in results:
+        r["_rrf"] = fused.get(r["courseId"], 0.0)
+    results.sort(key=lambda x: x["_rrf"], reverse=True)
+    return results[:k]
+
+
 # ==========================================================
 # SEARCH MAIN
 # ==========================================================
@@ -420,18 +521,22 @@ def search_courses_in_clusters(query: str, k: int = 10) -> List[dict]:
     if not query:
         return []
 
+    mode = get_search_mode()
+    if mode == "lexical":
+        return _lexical_fallback(query, k, "COURSE_SEARCH_MODE=lexical")
+
     # ==========================================================
     # LOAD CLUSTER PACK
     # ==========================================================
     path = get_cluster_pack_path()
     if not os.path.exists(path):
         logger.error("Cluster pack no encontrado.")
-        return []
+        return _lexical_fallback(query, k, "sin cluster pack") if mode == "hybrid" else []
 
     pack = load_cluster_pack()
     if not pack:
         logger.error("Cluster pack vacío.")
-        return []
+        return _lexical_fallback(query, k, "cluster pack vacío") if mode == "hybrid" else []
 
     embeddings = _safe_get(pack, "embeddings", "X", "vectors", "course_embeddings", "data")
     course_ids = _safe_get(pack, "course_ids", "ids", "indices")
@@ -448,7 +553,15 @@ def search_courses_in_clusters(query: str, k: int = 10) -> List[dict]:
     # ==========================================================
     q_vec = embed_query(query)
     if q_vec is None:
-        return []
+        # Proveedor de embeddings caído o lento → modo léxico
+        return _lexical_fallback(query, k, "embeddings no disponibles") if mode == "hybrid" else []
+
+    if q_vec.shape[-1] != embeddings.shape[1]:
+        logger.error(
+            "Dimensión del query (%s) distinta a la del pack (%s); revisa EMBEDDING_PROVIDER/EMBEDDING_DIM",
+            q_vec.shape[-1], embeddings.shape[1],
+        )
+        return _lexical_fallback(query, k, "dimensión incompatible") if mode == "hybrid" else []
 
     # ==========================================================
     # SELECCIÓN POR CLUSTERS
@@ -482,6 +595,12 @@ def search_courses_in_clusters(query: str, k: int = 10) -> List[dict]:
             "metadata": {"courseId": cid, "courseName": cname},
         })
 
+    # ==========================================================
+    # CANDIDATOS BM25 (HÍBRIDO)
+    # ==========================================================
+    if mode == "hybrid":
+        results = _add_lexical_candidates(query, q_vec, results, embeddings, course_names, k)
+
     # ==========================================================
     # PRINT: ORDEN INICIAL
     # ==========================================================
@@ -554,6 +673,12 @@ def search_courses_in_clusters(query: str, k: int = 10) -> List[dict]:
 
         results.sort(key=lambda x: x["_combined"], reverse=True)
 
+    # ==========================================================
+    # FUSIÓN RRF (DENSO + BM25)
+    # ==========================================================
+    if mode == "hybrid":
+        results = apply_rrf_fusion(results, k)
+
     # ==========================================================
     # RESULTADOS FINALES
     # ==========================================================
@@ -568,3 +693,335 @@ def search_courses_in_clusters(query: str, k: int = 10) -> List[dict]:
 
     return results
 
+
+# ==========================================================
+# SEARCH BATCH
+# ==========================================================
+
+def _l2_normalize(m: np.ndarray) -> np.ndarray:
+    return m / (np.linalg.norm(m, axis=1, keepdims=True) + 1e-10)
+
+
+def _trigram_rows(texts: List[str], vocab: Dict[str, int]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Matriz binaria (n, G) de los trigramas de cada texto sobre `vocab`, más
+    el tamaño de cada conjunto completo (los trigramas fuera del vocabulario
+    no intersectan, pero cuentan en la unión).
+    """
+    mat = np.zeros((len(texts), len(vocab)), dtype=np.float32)
+    sizes = np.zeros(len(texts), dtype=np.float64)
+    for i, text in enumerate(texts):
+        grams = _trigrams(text)
+        sizes[i] = len(grams)
+        cols = [vocab[g] for g in grams if g in vocab]
+        if cols:
+            mat[i, cols] = 1.0
+    return mat, sizes
+
+
+def _jaccard_matrix(texts: List[str], arrays: Dict[str, Any]) -> np.ndarray:
+    """_lexical_similarity de cada texto contra cada nombre distinto del pack: (n, U)."""
+    q_mat, q_sizes = _trigram_rows(texts, arrays["trigram_vocab"])
+    inter = (q_mat @ arrays["name_grams"].T).astype(np.float64)
+    union = q_sizes[:, None] + arrays["name_gram_sizes"][None, :] - inter
+    ok = (q_sizes[:, None] > 0) & (arrays["name_gram_sizes"][None, :] > 0) & (union > 0)
+    return np.where(ok, inter / np.maximum(union, 1.0), 0.0)
+
+
+def _lexical_alignment(course_ids: np.ndarray) -> Optional[Dict[str, Any]]:
+    """Índice BM25 + mapeos fila del pack ↔ fila del índice (-1 si no está)."""
+    from app.services.course_lexical_search_service import get_course_lexical_index
+
+    try:
+        index = get_course_lexical_index()
+    except Exception as e:
+        logger.error("Índice BM25 no disponible: %s", e, exc_info=True)
+        return None
+
+    pack_rows = _pack_row_by_id()
+    pack_to_lex = np.asarray(
+        [index.row_of(cid) if index.row_of(cid) is not None else -1 for cid in course_ids],
+        dtype=np.int64,
+    )
+    lex_to_pack = np.asarray([pack_rows.get(str(cid), -1) for cid in index.doc_ids], dtype=np.int64)
+    return {"index": index, "pack_to_lex": pack_to_lex, "lex_to_pack": lex_to_pack}
+
+
+@lru_cache(maxsize=1)
+def _normalized_pack_arrays() -> Optional[Dict[str, Any]]:
+    """
+    Matrices del pack normalizadas una sola vez por proceso, más:
+      - fila del pack → fila de title_embeddings (-1 si no hay)
+      - trigramas de los nombres distintos (para _lexical_similarity en
+        lote) y fila del pack → nombre distinto
+      - alineación con el índice BM25
+    """
+    pack = load_cluster_pack()
+    if not pack:
+        return None
+
+    embeddings = np.asarray(
+        _safe_get(pack, "embeddings", "X", "vectors", "course_embeddings", "data"),
+        dtype=np.float32,
+    )
+    course_ids = np.asarray(_safe_get(pack, "course_ids", "ids", "indices"))
+    course_names = _safe_get(pack, "course_names", "names", "titles", "course_titles")
+    labels = _safe_get(pack, "cluster_labels", "labels", "y")
+    centroids = _safe_get(pack, "centroids", "cluster_centroids", "centers")
+
+    title_pack = load_title_embeddings()
+    title_rows = None
+    title_norm = None
+    if title_pack:
+        by_id = {str(cid): i for i, cid in enumerate(title_pack["course_ids"])}
+        title_rows = np.asarray([by_id.get(str(cid), -1) for cid in course_ids], dtype=np.int64)
+        title_norm = _l2_normalize(title_pack["title_embeddings"])
+
+    # Los nombres se repiten (réplicas, cursos homónimos): una fila por nombre distinto
+    names = [str(n) for n in course_names] if course_names is not None else [""] * len(course_ids)
+    unique_names = list(dict.fromkeys(names))
+    name_row = {name: i for i, name in enumerate(unique_names)}
+    vocab: Dict[str, int] = {}
+    for name in unique_names:
+        for gram in _trigrams(name):
+            vocab.setdefault(gram, len(vocab))
+    name_grams, name_gram_sizes = _trigram_rows(unique_names, vocab)
+
+    return {
+        "embeddings": embeddings,
+        "emb_norm": _l2_normalize(embeddings),
+        "course_ids": course_ids,
+        "course_names": np.asarray(course_names) if course_names is not None else None,
+        "labels": np.asarray(labels) if labels is not None else None,
+        "cent_norm": _l2_normalize(np.asarray(centroids, dtype=np.float32)) if centroids is not None else None,
+        "title_rows": title_rows,
+        "title_norm": title_norm,
+        "name_idx": np.asarray([name_row[name] for name in names], dtype=np.int64),
+        "trigram_vocab": vocab,
+        "name_grams": name_grams,
+        "name_gram_sizes": name_gram_sizes,
+        "lexical": _lexical_alignment(course_ids),
+    }
+
+
+def _reorder(key: np.ndarray, valid: np.ndarray, apply: np.ndarray, cols: Dict[str, np.ndarray]) -> None:
+    """
+    Reordena en sitio las columnas de candidatos por `key` descendente
+    (estable, como list.sort(reverse=True)) en las filas con `apply`; las
+    demás conservan su orden. Los inválidos siempre quedan al final.
+    """
+    m = key.shape[1]
+    keep = np.broadcast_to(-np.arange(m, dtype=np.float64), key.shape)
+    key = np.where(apply[:, None], key, keep)
+    order = np.argsort(-np.where(valid, key, -np.inf), axis=1, kind="stable")
+    for name, arr in cols.items():
+        cols[name] = np.take_along_axis(arr, order, axis=1)
+
+
+def search_courses_batch(
+    queries: List[str],
+    k: int = 10,
+    *,
+    use_llm: bool = False,
+) -> List[List[dict]]:
+    """
+    Mismo pipeline que search_courses_in_clusters para N queries, con cada
+    etapa como operación sobre matrices (queries × candidatos):
+
+      - un solo request (por lote) de embeddings
+      - una multiplicación matriz-matriz Q·Xᵀ contra el pack
+      - selección de clusters y top-k denso
+      - BM25 del lote (score_matrix) y sus top-k como candidatos extra
+      - re-ranking léxico (Jaccard de trigramas como producto de matrices
+        binarias), por título, por intención y fusión RRF con argsort
+        estable por fila
+      - rewrite de intención por LLM opcional (concurrente)
+
+    Solo el armado de los dicts de salida recorre query por query.
+    Regresa una lista de resultados por query, en el mismo orden.
+    """
+    t0 = time.perf_counter()
+    queries = [q or "" for q in queries]
+    if not queries:
+        return []
+
+    mode = get_search_mode()
+    arrays = _normalized_pack_arrays() if mode != "lexical" else None
+
+    q_mat = None
+    if arrays is not None:
+        q_mat = embed_queries(queries)
+        if q_mat is not None and q_mat.shape[1] != arrays["embeddings"].shape[1]:
+            logger.error(
+                "Dimensión de queries (%s) distinta a la del pack (%s)",
+                q_mat.shape[1], arrays["embeddings"].shape[1],
+            )
+            q_mat = None
+
+    if q_mat is None:
+        reason = "COURSE_SEARCH_MODE=lexical" if mode == "lexical" else "embeddings no disponibles"
+        if mode == "dense":
+            return [[] for _ in queries]
+        out = [_lexical_fallback(q, k, reason, verbose=False) if q else [] for q in queries]
+        _log_batch_throughput(len(queries), t0, "lexical")
+        return out
+
+    n = len(queries)
+    rows = np.arange(n)[:, None]
+    active = np.asarray([bool(q) for q in queries])
+
+    q_norm = _l2_normalize(q_mat)
+    sims = q_norm @ arrays["emb_norm"].T                       # (n, N)
+
+    # Selección por clusters: top-3 centroides por query
+    if arrays["cent_norm"] is not None and arrays["labels"] is not None:
+        c_sims = q_norm @ arrays["cent_norm"].T                # (n, C)
+        top_clusters = np.argsort(-c_sims, axis=1)[:, :3]
+        in_pool = (arrays["labels"][None, :, None] == top_clusters[:, None, :]).any(axis=2)
+        pool_sims = np.where(in_pool, sims, -np.inf)
+    else:
+        pool_sims = sims
+
+    n_rows = pool_sims.shape[1]
+    kk = min(k, n_rows)
+    top = np.argpartition(-pool_sims, kk - 1, axis=1)[:, :kk]
+    top_vals = np.take_along_axis(pool_sims, top, axis=1)
+    top = np.take_along_axis(top, np.argsort(-top_vals, axis=1, kind="stable"), axis=1)
+
+    # ---- Candidatos: top-k denso (+ top-k BM25 que faltan, en híbrido) ----
+    cand = top
+    valid = np.isfinite(np.take_along_axis(pool_sims, top, axis=1)) & active[:, None]
+    lexical = arrays["lexical"] if mode == "hybrid" else None
+    lex_scores = None
+    if lexical is not None:
+        index = lexical["index"]
+        lex_scores, upper = index.score_matrix(queries)        # (n, L)
+        kl = min(k, lex_scores.shape[1])
+        if kl > 0:
+            lex_top = np.argpartition(-lex_scores, kl - 1, axis=1)[:, :kl]
+            lex_vals = np.take_along_axis(lex_scores, lex_top, axis=1)
+            lex_top = np.take_along_axis(lex_top, np.argsort(-lex_vals, axis=1, kind="stable"), axis=1)
+            lex_vals = np.take_along_axis(lex_scores, lex_top, axis=1)
+            extra = lexical["lex_to_pack"][lex_top]
+            seen = ((extra[:, :, None] == cand[:, None, :]) & valid[:, None, :]).any(axis=2)
+            extra_valid = (lex_vals > 0) & (upper[:, None] > 0) & (extra >= 0) & ~seen & active[:, None]
+            cand = np.concatenate([cand, np.where(extra_valid, extra, 0)], axis=1)
+            valid = np.concatenate([valid, extra_valid], axis=1)
+
+    m = cand.shape[1]
+    cols: Dict[str, np.ndarray] = {
+        "cand": cand,
+        "valid": valid,
+        "score": np.take_along_axis(sims, cand, axis=1).astype(np.float64),
+    }
+    if lexical is not None:
+        lex_rows = lexical["pack_to_lex"][cand]
+        bm25 = lex_scores[rows, np.maximum(lex_rows, 0)]
+        cols["bm25"] = np.where(lex_rows >= 0, bm25, 0.0).astype(np.float64)
+        _reorder(cols["score"], cols["valid"], active, cols)
+
+    counts = cols["valid"].sum(axis=1)
+    name_idx = arrays["name_idx"]
+
+    # ---- Re-ranking léxico (solo top ∈ [0.35, 0.45] con delta ≤ 0.02) ----
+    lex_applied = np.zeros(n, dtype=bool)
+    combined = cols["score"].copy()
+    has_combined = np.zeros(n, dtype=bool)
+    if m >= 2:
+        top_score, second = cols["score"][:, 0], cols["score"][:, 1]
+        lex_applied = (counts >= 2) & (top_score >= 0.35) & (top_score <= 0.45) & (top_score - second <= 0.02)
+    if lex_applied.any():
+        jacc = _jaccard_matrix(queries, arrays)
+        cols["lex"] = jacc[rows, name_idx[cols["cand"]]]
+        cols["combined"] = np.where(lex_applied[:, None], cols["score"] + 0.03 * cols["lex"], combined)
+        has_combined |= lex_applied
+        _reorder(cols["combined"], cols["valid"], lex_applied, cols)
+    else:
+        cols["combined"] = combined
+
+    # ---- Re-ranking semántico por título ----
+    title_applied = np.zeros(n, dtype=bool)
+    if arrays["title_norm"] is not None:
+        title_rows = arrays["title_rows"]
+        t_all = q_norm @ arrays["title_norm"].T                # (n, T)
+        t_rows = title_rows[cols["cand"]]
+        cols["title"] = np.where(
+            t_rows >= 0, t_all[rows, np.maximum(t_rows, 0)], 0.0
+        ).astype(np.float64)
+        title_applied = active & (counts >= 2)
+        cols["combined"] = np.where(
+            title_applied[:, None], 0.7 * cols["score"] + 0.3 * cols["title"], cols["combined"]
+        )
+        has_combined |= title_applied
+        _reorder(cols["combined"], cols["valid"], title_applied, cols)
+
+    # ---- Re-ranking por intención (LLM opcional) ----
+    if use_llm:
+        from concurrent.futures import ThreadPoolExecutor
+
+        with ThreadPoolExecutor(max_workers=min(8, n)) as pool:
+            intents = list(pool.map(lambda q: llm_rewrite_learning_intent(q) if q else None, queries))
+        intent_applied = active & np.asarray([bool(i) for i in intents])
+        if intent_applied.any():
+            intent_sim = _jaccard_matrix([i or "" for i in intents], arrays)[rows, name_idx[cols["cand"]]]
+            base = np.where(has_combined[:, None], cols["combined"], cols["score"])
+            cols["combined"] = np.where(intent_applied[:, None], base + 0.05 * intent_sim, cols["combined"])
+            has_combined |= intent_applied
+            _reorder(cols["combined"], cols["valid"], intent_applied, cols)
+
+    # ---- Fusión RRF (denso + BM25) ----
+    limit = m
+    if mode == "hybrid":
+        rrf_k = getattr(settings, "COURSE_RRF_K", 60)
+        valid = cols["valid"]
+        bm25 = cols.get("bm25", np.zeros_like(cols["score"]))
+        dense_term = np.where(valid, 1.0 / (rrf_k + np.arange(1, m + 1)), 0.0)
+        lexical_ok = valid & (bm25 > 0)
+        lex_order = np.argsort(-np.where(lexical_ok, bm25, -np.inf), axis=1, kind="stable")
+        lex_pos = np.empty_like(lex_order)
+        np.put_along_axis(lex_pos, lex_order, np.arange(m)[None, :].repeat(n, axis=0), axis=1)
+        cols["rrf"] = dense_term + np.where(lexical_ok, 1.0 / (rrf_k + lex_pos + 1), 0.0)
+        _reorder(cols["rrf"], valid, active, cols)
+        limit = k
+
+    # ---- Salida ----
+    course_ids = arrays["course_ids"]
+    course_names = arrays["course_names"]
+    out: List[List[dict]] = []
+    for qi in range(n):
+        results: List[Dict[str, Any]] = []
+        for j in range(min(int(cols["valid"][qi].sum()), limit)):
+            row = cols["cand"][qi, j]
+            cid = str(course_ids[row])
+            cname = str(course_names[row]) if course_names is not None else None
+            r: Dict[str, Any] = {
+                "courseId": cid,
+                "courseName": cname,
+                "score": float(cols["score"][qi, j]),
+                "metadata": {"courseId": cid, "courseName": cname},
+            }
+            if "bm25" in cols:
+                r["_bm25"] = float(cols["bm25"][qi, j])
+            if lex_applied[qi]:
+                r["_lex"] = float(cols["lex"][qi, j])
+            if title_applied[qi]:
+                r["_title_sim"] = float(cols["title"][qi, j])
+            if has_combined[qi]:
+                r["_combined"] = float(cols["combined"][qi, j])
+            if "rrf" in cols:
+                r["_rrf"] = float(cols["rrf"][qi, j])
+            results.append(r)
+        out.append(results)
+
+    _log_batch_throughput(len(queries), t0, mode)
+    return out
+
+
+def _log_batch_throughput(n_queries: int, t0: float, mode: str) -> float:
+    elapsed = time.perf_counter() - t0
+    qps = n_queries / elapsed if elapsed > 0 else float("inf")
+    logger.info(
+        "🔍 search_courses_batch: %s queries | modo=%s | %.1f ms | %.1f qps",
+        n_queries, mode, elapsed * 1000, qps,
+    )
+    return qps
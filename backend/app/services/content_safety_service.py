@@ -2,9 +2,11 @@ from openai import OpenAI
 import logging
 import os
 
+from app.config import settings
+
 logger = logging.getLogger(__name__)
 
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"), base_url=settings.OPENAI_BASE_URL or None)
 
 def check_content_safety(text: str) -> dict:
     response = client.moderations.create(
@@ -0,0 +1,206 @@
+"""
+Catálogo local de cursos Aprende (id → nombre) en memoria.
+
+Fuentes:
+  - app/data/course_map.json  (469 cursos)
+  - cluster pack (ids/names), si existe
+
+Responde búsquedas por ID y por nombre aproximado sin red.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import unicodedata
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Umbral mínimo de similitud para búsquedas por nombre
+NAME_MATCH_THRESHOLD = 0.45
+
+
+def get_course_map_path() -> str:
+    env = os.getenv("COURSE_MAP_PATH")
+    if env:
+        return env
+    here = os.path.dirname(__file__)
+    return os.path.abspath(os.path.join(here, "..", "data", "course_map.json"))
+
+
+def normalize_course_text(text: str) -> str:
+    """Minúsculas, sin acentos y con espacios colapsados."""
+    if not text:
+        return ""
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    stripped = "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return " ".join(stripped.split())
+
+
+def _trigrams(normalized: str) -> Set[str]:
+    compact = normalized.replace(" ", "")
+    return {compact[i:i + 3] for i in range(len(compact) - 2)}
+
+
+class CourseCatalog:
+    """
+    Índices en memoria:
+      - id → nombre
+      - trigrama → ids (posting lists para fuzzy)
+      - tamaño del set de trigramas por curso (Jaccard, como _lexical_similarity)
+    """
+
+    def __init__(self, names_by_id: Dict[str, str]):
+        self._names: Dict[str, str] = {}
+        self._normalized: Dict[str, str] = {}
+        self._gram_counts: Dict[str, int] = {}
+        self._gram_index: Dict[str, List[str]] = {}
+
+        for cid, name in names_by_id.items():
+            cid = str(cid).strip()
+            name = str(name or "").strip()
+            if not cid or not name:
+                continue
+
+            norm = normalize_course_text(name)
+            grams = _trigrams(norm)
+            self._names[cid] = name
+            self._normalized[cid] = norm
+            self._gram_counts[cid] = len(grams)
+            for g in grams:
+                self._gram_index.setdefault(g, []).append(cid)
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def __contains__(self, course_id: Any) -> bool:
+        return str(course_id) in self._names
+
+    def items(self) -> List[Tuple[str, str]]:
+        return list(self._names.items())
+
+    def get_name(self, course_id: Any) -> Optional[str]:
+        return self._names.get(str(course_id).strip())
+
+    def get_course(self, course_id: Any) -> Optional[Dict[str, Any]]:
+        """
+        Regresa el curso con el mismo shape que un candidato de búsqueda.
+        """
+        cid = str(course_id).strip()
+        name = self._names.get(cid)
+        if name is None:
+            return None
+        return {
+            "courseId": cid,
+            "courseName": name,
+            "score": 1.0,
+            "metadata": {
+                "courseId": cid,
+                "courseName": name,
+                "matchType": "explicit_id",
+            },
+        }
+
+    def search_by_name(
+        self,
+        query: str,
+        limit: int = 5,
+        min_score: float = NAME_MATCH_THRESHOLD,
+    ) -> List[Dict[str, Any]]:
+        """
+        Búsqueda aproximada por nombre (Jaccard de trigramas).
+        Las intersecciones se cuentan recorriendo solo las posting
+        lists de los trigramas de la query.
+        """
+        norm = normalize_course_text(query)
+        if not norm:
+            return []
+
+        q_grams = _trigrams(norm)
+        if not q_grams:
+            return []
+
+        shared: Dict[str, int] = {}
+        for g in q_grams:
+            for cid in self._gram_index.get(g, ()):
+                shared[cid] = shared.get(cid, 0) + 1
+
+        n_query = len(q_grams)
+        scored = []
+        for cid, inter in shared.items():
+            union = n_query + self._gram_counts[cid] - inter
+            score = inter / union if union else 0.0
+            if self._normalized[cid] == norm:
+                score = 1.0
+            if score >= min_score:
+                scored.append((score, cid))
+
+        scored.sort(key=lambda x: (-x[0], x[1]))
+
+        return [
+            {
+                "courseId": cid,
+                "courseName": self._names[cid],
+                "score": float(score),
+                "metadata": {
+                    "courseId": cid,
+                    "courseName": self._names[cid],
+                    "matchType": "catalog_name",
+                },
+            }
+            for score, cid in scored[:max(limit, 0)]
+        ]
+
+
+def _load_course_map() -> Dict[str, str]:
+    path = get_course_map_path()
+    if not os.path.exists(path):
+        logger.warning("course_map.json no encontrado en %s", path)
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return {str(k): str(v) for k, v in (data or {}).items()}
+    except Exception as e:
+        logger.error("Error leyendo course_map.json: %s", e, exc_info=True)
+        return {}
+
+
+def _load_pack_names() -> Dict[str, str]:
+    try:
+        from app.services.cluster_search_service import load_cluster_pack, _safe_get
+    except Exception:
+        return {}
+
+    pack = load_cluster_pack()
+    if not pack:
+        return {}
+
+    ids = _safe_get(pack, "course_ids", "ids", "indices")
+    names = _safe_get(pack, "course_names", "names", "titles", "course_titles")
+    if ids is None or names is None:
+        return {}
+    return {str(i): str(n) for i, n in zip(ids, names)}
+
+
+@lru_cache(maxsize=1)
+def get_course_catalog() -> CourseCatalog:
+    """
+    Construye el catálogo una sola vez por proceso.
+    course_map.json tiene prioridad; el pack completa ids faltantes.
+    """
+    names = _load_pack_names()
+    names.update(_load_course_map())
+    catalog = CourseCatalog(names)
+    logger.info("📚 Catálogo local de cursos cargado: %s cursos", len(catalog))
+    return catalog
+
+
+def lookup_course_by_id(course_id: Any) -> Optional[Dict[str, Any]]:
+    return get_course_catalog().get_course(course_id)
+
+
+def search_courses_by_name(query: str, limit: int = 5) -> List[Dict[str, Any]]:
+    return get_course_catalog().search_by_name(query, limit=limit)
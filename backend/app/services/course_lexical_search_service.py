@@ -0,0 +1,255 @@
+"""
+Índice invertido BM25 en proceso para cursos Aprende.
+
+Documentos estilo `textForEmbedding`: nombre del curso (con boost),
+nombres de recursos y descripciones limpias, tomados del store
+SQLite de recursos y del catálogo local. No usa red, así que sirve
+como modo degradado cuando el proveedor de embeddings está lento o
+caído, y como señal léxica para la fusión RRF con el ranking denso.
+"""
+from __future__ import annotations
+
+import logging
+import math
+import re
+import time
+import unicodedata
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Parámetros BM25 estándar
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Constante de Reciprocal Rank Fusion (Cormack et al.)
+RRF_K = 60
+
+# Repeticiones del nombre del curso en el documento (boost de campo)
+NAME_BOOST = 3
+
+_TOKEN_RE = re.compile(r"\w+", flags=re.UNICODE)
+
+LEXICAL_INDEX_STOPWORDS = {
+    "curso", "cursos", "taller", "talleres", "aprende", "aprender",
+    "conoce", "conocer", "basico", "avanzado", "profesional",
+    "que", "como", "para", "con", "por", "los", "las", "del", "una", "uno",
+    "unos", "unas", "sus", "este", "esta", "estos", "estas", "ese", "esa",
+    "entre", "sobre", "desde", "hasta", "cual", "cuales", "donde", "cuando",
+    "muy", "mas", "sin", "tambien", "son", "ser", "hay", "han", "fue",
+    "quiero", "usar", "hacer",
+}
+
+
+def _strip_accents(text: str) -> str:
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+# Sufijos (de más largo a más corto) para un stemming ligero en español:
+# electricidad / electricista / eléctrico → "electric"
+_SUFFIXES = (
+    "aciones", "adoras", "adores", "idades", "amente",
+    "acion", "adora", "ador", "idad", "istas", "ista", "mente", "ando", "iendo",
+    "icos", "icas", "eros", "eras", "ias",
+    "ico", "ica", "ero", "era", "ia", "es",
+    "ar", "er", "ir", "s", "o", "a", "e",
+)
+_MIN_STEM = 4
+
+
+def _strip_suffix(token: str) -> str:
+    for suffix in _SUFFIXES:
+        if token.endswith(suffix) and len(token) - len(suffix) >= _MIN_STEM:
+            return token[: -len(suffix)]
+    return token
+
+
+def _stem(token: str) -> str:
+    # Dos pasadas: plomería → plomer → plom (= plomeros)
+    return _strip_suffix(_strip_suffix(token))
+
+
+def tokenize(text: str) -> List[str]:
+    if not text:
+        return []
+    norm = _strip_accents(text.lower())
+    return [
+        _stem(t) for t in _TOKEN_RE.findall(norm)
+        if len(t) > 2 and not t.isdigit() and t not in LEXICAL_INDEX_STOPWORDS
+    ]
+
+
+class BM25Index:
+    """
+    Índice invertido con posting lists en numpy:
+      término → (doc_idx[int32], tf[float32])
+    La consulta acumula sobre un vector denso de N documentos.
+    """
+
+    def __init__(self, doc_ids: Sequence[str], doc_tokens: Sequence[List[str]]):
+        self.doc_ids = np.asarray([str(d) for d in doc_ids])
+        self._row_by_id = {cid: i for i, cid in enumerate(self.doc_ids.tolist())}
+        n_docs = len(doc_ids)
+        self.n_docs = n_docs
+
+        doc_len = np.zeros(n_docs, dtype=np.float32)
+        postings: Dict[str, Dict[int, int]] = {}
+        for i, tokens in enumerate(doc_tokens):
+            doc_len[i] = len(tokens)
+            for t in tokens:
+                row = postings.setdefault(t, {})
+                row[i] = row.get(i, 0) + 1
+
+        avgdl = float(doc_len.mean()) if n_docs else 0.0
+        self._norm = (BM25_K1 * (1 - BM25_B + BM25_B * doc_len / (avgdl or 1.0))).astype(np.float32)
+
+        self._postings: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        self._idf: Dict[str, float] = {}
+        for term, row in postings.items():
+            docs = np.fromiter(row.keys(), dtype=np.int32, count=len(row))
+            tfs = np.fromiter(row.values(), dtype=np.float32, count=len(row))
+            self._postings[term] = (docs, tfs)
+            df = len(row)
+            self._idf[term] = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+
+    def __len__(self) -> int:
+        return self.n_docs
+
+    def row_of(self, course_id: Any) -> Optional[int]:
+        return self._row_by_id.get(str(course_id))
+
+    def score_vector(self, query: str) -> Tuple[np.ndarray, float]:
+        """
+        Scores BM25 para todos los documentos + cota superior de la query
+        (Σ idf·(k1+1) de sus términos), útil para normalizar a [0, 1].
+        """
+        scores, upper = self.score_matrix([query])
+        return scores[0], float(upper[0])
+
+    def score_matrix(self, queries: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        score_vector para N queries: (n, N docs) y cotas (n,). Se recorre
+        cada término distinto del lote una vez y su contribución se suma
+        a todas las queries que lo contienen.
+        """
+        scores = np.zeros((len(queries), self.n_docs), dtype=np.float32)
+        upper = np.zeros(len(queries), dtype=np.float64)
+        rows_by_term: Dict[str, List[int]] = {}
+        for qi, query in enumerate(queries):
+            for term in set(tokenize(query)):
+                if term in self._postings:
+                    rows_by_term.setdefault(term, []).append(qi)
+
+        for term, rows in rows_by_term.items():
+            docs, tfs = self._postings[term]
+            idf = self._idf[term]
+            contrib = idf * tfs * (BM25_K1 + 1) / (tfs + self._norm[docs])
+            scores[np.ix_(rows, docs)] += contrib
+            upper[rows] += idf * (BM25_K1 + 1)
+        return scores, upper
+
+    def search(self, query: str, k: int = 10) -> List[Tuple[str, float, float]]:
+        """
+        Top-k por BM25 → [(courseId, bm25, bm25_normalizado)].
+        """
+        scores, upper = self.score_vector(query)
+        if upper <= 0:
+            return []
+
+        k = min(max(k, 0), self.n_docs)
+        if k == 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+
+        return [
+            (str(self.doc_ids[i]), float(scores[i]), float(scores[i] / upper))
+            for i in top
+            if scores[i] > 0
+        ]
+
+
+def reciprocal_rank_fusion(
+    rankings: Iterable[Sequence[str]],
+    *,
+    k: int = RRF_K,
+) -> Dict[str, float]:
+    """
+    RRF: Σ 1 / (k + rank) sobre cada ranking (rank base 1).
+    """
+    fused: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            fused[doc_id] = fused.get(doc_id, 0.0) + 1.0 / (k + rank)
+    return fused
+
+
+# ==========================================================
+# CONSTRUCCIÓN DEL ÍNDICE
+# ==========================================================
+
+def _iter_course_documents() -> Iterable[Tuple[str, str, str]]:
+    """
+    (courseId, courseName, texto) desde el store de recursos;
+    cursos del catálogo sin recursos se indexan solo por nombre.
+    """
+    from app.services.aprende_ingest_service import clean_html, build_course_text
+    from app.services.course_catalog_service import get_course_catalog
+    from app.stores.aprende_resource_store import get_resource_store
+
+    store = get_resource_store()
+    catalog = get_course_catalog()
+
+    names: Dict[str, str] = dict(store.iter_courses())
+    for cid, name in catalog.items():  # ids del pack/course_map sin recursos
+        names.setdefault(cid, name)
+
+    for cid, name in names.items():
+        resources = store.get_resources(cid)
+        resource_names = [r.get("resourceName") or "" for r in resources]
+        description = " ".join(clean_html(r.get("resourceDescription")) for r in resources)
+        text = build_course_text(name, resource_names, description) if resources else name
+        yield cid, name, text
+
+
+@lru_cache(maxsize=1)
+def get_course_lexical_index() -> BM25Index:
+    t0 = time.perf_counter()
+    doc_ids: List[str] = []
+    doc_tokens: List[List[str]] = []
+    for cid, name, text in _iter_course_documents():
+        doc_ids.append(cid)
+        doc_tokens.append(tokenize(name) * (NAME_BOOST - 1) + tokenize(text))
+
+    index = BM25Index(doc_ids, doc_tokens)
+    logger.info(
+        "📚 Índice BM25 de cursos listo: %s docs | %.1f ms",
+        len(index),
+        (time.perf_counter() - t0) * 1000,
+    )
+    return index
+
+
+def search_courses_lexical(query: str, k: int = 10) -> List[Dict[str, Any]]:
+    """
+    Búsqueda puramente léxica (modo degradado, sin red).
+    `score` es el BM25 normalizado a [0, 1] contra la cota de la query.
+    """
+    from app.services.course_catalog_service import get_course_catalog
+
+    catalog = get_course_catalog()
+    results: List[Dict[str, Any]] = []
+    for cid, bm25, norm in get_course_lexical_index().search(query, k=k):
+        cname = catalog.get_name(cid)
+        results.append({
+            "courseId": cid,
+            "courseName": cname,
+            "score": norm,
+            "_bm25": bm25,
+            "metadata": {"courseId": cid, "courseName": cname, "matchType": "lexical"},
+        })
+    return results
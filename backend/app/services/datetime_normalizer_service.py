@@ -2,10 +2,15 @@ from __future__ import annotations
 from typing import Optional, Dict
 from datetime import datetime, timedelta
 import json
+import logging
 
+from app.config import settings
+from app.services.datetime_parser import WEEKDAY_NAMES, now_local, parse_spanish_datetime
 from app.services.groq_service import run_groq_completion
 from app.clients.groq_client import get_groq_client, get_groq_api_key
 
+logger = logging.getLogger(__name__)
+
 SYSTEM_PROMPT = """
 Eres un normalizador de fecha y hora.
 Devuelve SOLO un JSON válido.
@@ -26,7 +31,13 @@ def normalize_datetime_from_text(
     now: Optional[datetime] = None
 ) -> Dict[str, Optional[str]]:
 
-    now = now or datetime.now()
+    now = now or now_local()
+
+    # Primera pasada determinística: el LLM solo si el parser no está seguro
+    rules = parse_spanish_datetime(text, now)
+    if rules.confidence >= settings.DATETIME_RULES_MIN_CONFIDENCE:
+        return rules.as_strings()
+    logger.info("🕒 Fecha/hora con baja confianza (%.2f), se usa el LLM: %r", rules.confidence, text)
 
     messages = [
         {"role": "system", "content": SYSTEM_PROMPT},
@@ -35,23 +46,23 @@ def normalize_datetime_from_text(
             "content": json.dumps({
                 "text": text,
                 "today": now.strftime("%Y-%m-%d"),
-                "weekday": now.strftime("%A"),
+                "weekday": WEEKDAY_NAMES[now.weekday()],
             }, ensure_ascii=False)
         }
     ]
 
-    raw = run_groq_completion(
-        messages=messages,
-        groq_client=get_groq_client(),
-        groq_api_key=get_groq_api_key(),
-        temperature=0.0,
-        max_tokens=150,
-    )
-
     try:
+        raw = run_groq_completion(
+            messages=messages,
+            groq_client=get_groq_client(),
+            groq_api_key=get_groq_api_key(),
+            temperature=0.0,
+            max_tokens=150,
+        )
         data = json.loads(raw)
     except Exception:
-        return {"fecha": None, "hora": None}
+        # Sin LLM, lo que haya entendido el parser es mejor que nada
+        return rules.as_strings()
 
     fecha = data.get("fecha")
     hora = data.get("hora")
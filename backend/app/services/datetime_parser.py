@@ -0,0 +1,399 @@
+"""
+Parser determinístico de fecha/hora en español (primera pasada, sin LLM).
+
+Entiende las expresiones comunes en tareas:
+  - hoy, mañana, pasado mañana, esta tarde/noche
+  - días de la semana: "el viernes", "este lunes", "el próximo viernes",
+    "el martes que viene", "el lunes de la próxima semana"
+  - día de la semana + día del mes: "el viernes 13" (la próxima fecha que
+    cumple ambos)
+  - relativas: "en 2 horas", "en media hora", "dentro de 3 días", "en una semana"
+  - horas: "a las 5 de la tarde", "a las 17:30", "5 pm", "a las 6 y cuarto",
+    "al mediodía"
+  - fechas: 15/11, 15/11/2026, 2026-11-15, "15 de noviembre (de 2026)",
+    "el 30", "el día 28"
+
+Todo se resuelve contra `now` en America/Mexico_City. "A las 12 de la
+noche" es el 0:00 del día siguiente, y una hora de hoy sin am/pm que ya
+pasó se toma de la noche ("hoy a las 9" a las 15:00 → 21:00). El resultado trae
+una confianza (0-1): baja si queda vocabulario temporal sin entender
+("la próxima semana", "temprano", "fin de semana"), si la hora es ambigua
+("a las 5" sin am/pm) o si hay fechas que se contradicen. Quien lo usa
+cae al LLM solo por debajo de settings.DATETIME_RULES_MIN_CONFIDENCE.
+"""
+from __future__ import annotations
+
+import re
+import unicodedata
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+TIMEZONE = ZoneInfo("America/Mexico_City")
+WEEKDAY_NAMES = ("lunes", "martes", "miércoles", "jueves", "viernes", "sábado", "domingo")
+
+# Sin nada temporal en el texto: "no hay fecha" es casi seguro
+CONFIDENCE_NONE = 0.9
+CONFIDENCE_AMBIGUOUS_HOUR = 0.6
+CONFIDENCE_UNPARSED = 0.4
+CONFIDENCE_INVALID = 0.2
+
+_WEEKDAYS = ("lunes", "martes", "miercoles", "jueves", "viernes", "sabado", "domingo")
+_MONTHS = (
+    "enero", "febrero", "marzo", "abril", "mayo", "junio", "julio",
+    "agosto", "septiembre", "octubre", "noviembre", "diciembre",
+)
+_NUMBER_WORDS = {
+    "un": 1, "una": 1, "uno": 1, "dos": 2, "tres": 3, "cuatro": 4, "cinco": 5,
+    "seis": 6, "siete": 7, "ocho": 8, "nueve": 9, "diez": 10, "once": 11,
+    "doce": 12, "quince": 15, "veinte": 20, "treinta": 30,
+}
+
+_WEEKDAY_RE = "|".join(_WEEKDAYS)
+_MONTH_RE = "|".join(_MONTHS) + "|setiembre"
+_NUMBER_RE = r"\d{1,3}|" + "|".join(_NUMBER_WORDS)
+_SUFFIX_RE = (
+    r"a\.?\s?m\.?|p\.?\s?m\.?|hrs|horas|h|de la manana|de la tarde|de la noche|"
+    r"de la madrugada|del mediodia|en la manana|en la tarde|en la noche|"
+    r"por la manana|por la tarde|por la noche"
+)
+
+_PART_OF_DAY_RE = re.compile(
+    r"\b(?:de|en|por) la (manana|tarde|noche|madrugada)\b|\besta (tarde|noche)\b"
+)
+_ISO_RE = re.compile(r"\b(\d{4})-(\d{2})-(\d{2})\b")
+_NUMERIC_DATE_RE = re.compile(r"\b(\d{1,2})[/-](\d{1,2})(?:[/-](\d{2,4}))?\b")
+_NAMED_DATE_RE = re.compile(
+    rf"\b(?:el\s+)?(?:(?:{_WEEKDAY_RE})\s+)?(\d{{1,2}})\s+de\s+({_MONTH_RE})(?:\s+(?:de|del)\s+(\d{{4}}))?\b"
+)
+_RELATIVE_RE = re.compile(
+    rf"\b(?:en|dentro de)\s+(media hora|(?:{_NUMBER_RE})\s+(minutos?|mins?|horas?|hrs?|dias?|semanas?))\b"
+)
+_WEEKDAY_EXPR_RE = re.compile(
+    rf"\b(?:(el|este|esta|para el)\s+)?(?:(proximo|siguiente)\s+)?({_WEEKDAY_RE})\b"
+    r"(?:\s+(que viene|proximo|siguiente|de la (?:proxima|siguiente) semana|de la semana que viene))?"
+)
+_WEEKDAY_DAY_RE = re.compile(
+    rf"\b(?:(?:el|este|para el)\s+)?({_WEEKDAY_RE})\s+(?:dia\s+)?(\d{{1,2}})\b"
+    r"(?!\s*(?::|/|-|de\s|am|pm|a\.m|p\.m|hrs|horas))"
+)
+_DAY_OF_MONTH_RE = re.compile(r"\b(?:el|para el)\s+(?:dia\s+)?(\d{1,2})\b(?!\s*(?::|/|-|de\s|am|pm|a\.m|p\.m))")
+_DAY_WORD_RE = re.compile(r"\b(pasado manana|manana|hoy(?: mismo)?)\b")
+_NOON_RE = re.compile(r"\b(?:a|al|a el)\s+mediodia\b|\bmediodia\b")
+_TIME_RE = re.compile(
+    r"\b(?:a\s+las?|alas|a\s+eso\s+de\s+las?|las)\s+(\d{1,2})(?:[:.](\d{2}))?"
+    r"(?:\s+y\s+(media|cuarto))?"
+    rf"(?:\s*({_SUFFIX_RE})\b)?"
+)
+_CLOCK_RE = re.compile(rf"\b(\d{{1,2}}):(\d{{2}})(?:\s*({_SUFFIX_RE})\b)?")
+_MERIDIEM_RE = re.compile(r"\b(\d{1,2})\s*(a\.?\s?m\.?|p\.?\s?m\.?)(?=\s|$|[,.;!?])")
+
+# Vocabulario temporal que, si queda sin consumir, indica algo que este
+# parser no entendió (el LLM decide)
+_UNPARSED_HINT_RE = re.compile(
+    r"\b(semana|quincena|mes|meses|ano|fin de|manana|tarde|noche|madrugada|mediodia|"
+    r"medianoche|temprano|despues|antes|ayer|anteayer|proxim[oa]s?|siguiente|"
+    r"dia|dias|horas?|minutos?|" + _WEEKDAY_RE + "|" + _MONTH_RE + r")\b|\b\d{1,2}:\d{2}\b"
+)
+
+
+def now_local() -> datetime:
+    """Reloj del request en America/Mexico_City (nunca al importar)."""
+    return datetime.now(TIMEZONE)
+
+
+@dataclass(frozen=True, slots=True)
+class ParsedDateTime:
+    fecha: Optional[date]
+    hora: Optional[time]
+    confidence: float
+
+    def as_strings(self) -> Dict[str, Optional[str]]:
+        """Mismo shape que normalize_datetime_from_text."""
+        return {
+            "fecha": self.fecha.isoformat() if self.fecha else None,
+            "hora": self.hora.strftime("%H:%M") if self.hora else None,
+        }
+
+
+def fold(text: str) -> str:
+    """Minúsculas, sin acentos y con espacios simples."""
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return re.sub(r"\s+", " ", text.lower()).strip()
+
+
+def _to_int(token: str) -> Optional[int]:
+    if token.isdigit():
+        return int(token)
+    return _NUMBER_WORDS.get(token)
+
+
+class _Scan:
+    """Texto en proceso: cada match se 'consume' (se borra) del texto."""
+
+    def __init__(self, text: str):
+        self.text = text
+
+    def consume(self, pattern: "re.Pattern[str]", handler: Callable[["re.Match[str]"], None]) -> None:
+        for match in list(pattern.finditer(self.text)):
+            handler(match)
+        self.text = pattern.sub(lambda m: " " * len(m.group(0)), self.text)
+
+
+def _apply_meridiem(hour: int, suffix: str, part_of_day: Optional[str]) -> Tuple[int, float]:
+    """Regresa (hora 0-23, confianza) según am/pm, 'de la tarde' o el contexto."""
+    suffix = suffix.replace(" ", "").replace(".", "") if suffix else ""
+    marker = suffix or ""
+    if marker in ("pm",) or any(w in marker for w in ("tarde", "noche")):
+        if "noche" in marker and hour == 12:
+            return 0, 1.0
+        return (hour + 12 if hour < 12 else hour), 1.0
+    if marker in ("am",) or any(w in marker for w in ("manana", "madrugada")):
+        return (0 if hour == 12 else hour), 1.0
+    if "mediodia" in marker:
+        return (hour + 12 if hour < 12 else hour), 1.0
+    if part_of_day == "noche" and hour == 12:
+        return 0, 1.0
+    # Sin sufijo: usar "esta tarde"/"por la noche" si vino en otra parte
+    if part_of_day in ("tarde", "noche") and hour < 12:
+        return hour + 12, 1.0
+    if part_of_day in ("manana", "madrugada"):
+        return hour, 1.0
+    if hour == 0 or hour >= 13 or marker in ("hrs", "horas", "h"):
+        return hour, 1.0
+    if 7 <= hour <= 12:
+        return hour, 0.85
+    # 1-6 sin am/pm: casi siempre es de la tarde, pero es ambiguo
+    return hour + 12, CONFIDENCE_AMBIGUOUS_HOUR
+
+
+def parse_spanish_datetime(text: str, now: Optional[datetime] = None) -> ParsedDateTime:
+    now = now or now_local()
+    if now.tzinfo is not None:
+        now = now.astimezone(TIMEZONE)
+    today = now.date()
+
+    scan = _Scan(fold(text))
+    dates: List[date] = []
+    times: List[time] = []
+    # Por hora: (sin am/pm ni parte del día, "12 de la noche" = fin del día)
+    time_flags: List[Tuple[bool, bool]] = []
+    confidence = 1.0
+    found = False
+
+    def lower(value: float) -> None:
+        nonlocal confidence
+        confidence = min(confidence, value)
+
+    def add_date(value: Optional[date]) -> None:
+        nonlocal found
+        found = True
+        if value is None:
+            lower(CONFIDENCE_INVALID)
+        else:
+            dates.append(value)
+
+    def add_time(hour: int, minute: int, conf: float = 1.0, *, bare: bool = False, midnight: bool = False) -> None:
+        nonlocal found
+        found = True
+        if 0 <= hour < 24 and 0 <= minute < 60:
+            times.append(time(hour, minute))
+            time_flags.append((bare, midnight))
+            lower(conf)
+        else:
+            lower(CONFIDENCE_INVALID)
+
+    def is_midnight(said_hour: int, hour: int, suffix: str) -> bool:
+        # "a las 12 de la noche" / "esta noche a las 12": el 0:00 que cierra el día
+        return said_hour == 12 and hour == 0 and ("noche" in suffix or part_of_day == "noche")
+
+    def safe_date(year: int, month: int, day: int) -> Optional[date]:
+        try:
+            return date(year, month, day)
+        except ValueError:
+            return None
+
+    def upcoming(month: int, day: int, year: Optional[int]) -> Optional[date]:
+        if year is not None:
+            return safe_date(year if year > 99 else 2000 + year, month, day)
+        value = safe_date(today.year, month, day)
+        if value is not None and value < today:
+            value = safe_date(today.year + 1, month, day)
+        return value
+
+    # Parte del día ("esta tarde", "por la noche"): contexto para la hora,
+    # no se consume aquí para que "de la tarde" junto a la hora lo tome _TIME_RE
+    pod = _PART_OF_DAY_RE.search(scan.text)
+    part_of_day = (pod.group(1) or pod.group(2)) if pod else None
+
+    # ---- Relativas ("en 2 horas", "dentro de 3 días") ----
+    def on_relative(m: "re.Match[str]") -> None:
+        if m.group(1) == "media hora":
+            moment = now + timedelta(minutes=30)
+            add_date(moment.date())
+            add_time(moment.hour, moment.minute)
+            return
+        amount = _to_int(m.group(1).split()[0])
+        unit = m.group(2)
+        if amount is None:
+            lower(CONFIDENCE_UNPARSED)
+            return
+        if unit.startswith(("min", "hora", "hr")):
+            moment = now + (timedelta(minutes=amount) if unit.startswith("min") else timedelta(hours=amount))
+            add_date(moment.date())
+            add_time(moment.hour, moment.minute)
+        elif unit.startswith("dia"):
+            add_date(today + timedelta(days=amount))
+        else:
+            add_date(today + timedelta(weeks=amount))
+
+    scan.consume(_RELATIVE_RE, on_relative)
+
+    # ---- Fechas explícitas ----
+    scan.consume(_ISO_RE, lambda m: add_date(safe_date(int(m.group(1)), int(m.group(2)), int(m.group(3)))))
+
+    def on_named(m: "re.Match[str]") -> None:
+        month = 9 if m.group(2) == "setiembre" else _MONTHS.index(m.group(2)) + 1
+        add_date(upcoming(month, int(m.group(1)), int(m.group(3)) if m.group(3) else None))
+        weekday = re.search(rf"\b({_WEEKDAY_RE})\b", m.group(0))
+        if weekday and dates and dates[-1].weekday() != _WEEKDAYS.index(weekday.group(1)):
+            lower(CONFIDENCE_UNPARSED)
+
+    scan.consume(_NAMED_DATE_RE, on_named)
+
+    # La hora va antes que dd/mm para que "a las 10:30" no se lea como fecha
+    def on_time(m: "re.Match[str]") -> None:
+        hour, minute = int(m.group(1)), int(m.group(2) or 0)
+        if m.group(3) == "media":
+            minute = 30
+        elif m.group(3) == "cuarto":
+            minute = 15
+        said_hour = hour
+        hour, conf = _apply_meridiem(hour, m.group(4) or "", part_of_day)
+        # Confianza < 1 de _apply_meridiem = hora sin am/pm ni contexto
+        bare = conf < 1.0
+        if m.group(2) and conf < 1.0 and hour < 12:
+            conf = max(conf, 0.85)
+        add_time(hour, minute, conf, bare=bare, midnight=is_midnight(said_hour, hour, m.group(4) or ""))
+
+    scan.consume(_TIME_RE, on_time)
+
+    def on_clock(m: "re.Match[str]") -> None:
+        hour, conf = _apply_meridiem(int(m.group(1)), m.group(3) or "", part_of_day)
+        add_time(hour, int(m.group(2)), conf, bare=conf < 1.0,
+                 midnight=is_midnight(int(m.group(1)), hour, m.group(3) or ""))
+
+    scan.consume(_CLOCK_RE, on_clock)
+
+    def on_meridiem(m: "re.Match[str]") -> None:
+        hour, conf = _apply_meridiem(int(m.group(1)), m.group(2), part_of_day)
+        add_time(hour, 0, conf)
+
+    scan.consume(_MERIDIEM_RE, on_meridiem)
+    scan.consume(_NOON_RE, lambda m: add_time(12, 0))
+
+    def on_numeric(m: "re.Match[str]") -> None:
+        day, month = int(m.group(1)), int(m.group(2))
+        add_date(upcoming(month, day, int(m.group(3)) if m.group(3) else None))
+
+    scan.consume(_NUMERIC_DATE_RE, on_numeric)
+
+    # ---- Día de la semana + día del mes ("el viernes 13") ----
+    def on_weekday_day(m: "re.Match[str]") -> None:
+        target, day = _WEEKDAYS.index(m.group(1)), int(m.group(2))
+        year, month = today.year, today.month
+        # Cualquier combinación día/día de la semana válida vuelve a caer en
+        # menos de 28 meses
+        for _ in range(28):
+            value = safe_date(year, month, day)
+            if value is not None and value >= today and value.weekday() == target:
+                add_date(value)
+                if (value - today).days > 62:
+                    # Tan lejos, es más probable un error en el día o el número
+                    lower(CONFIDENCE_UNPARSED)
+                return
+            year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+        add_date(None)
+
+    scan.consume(_WEEKDAY_DAY_RE, on_weekday_day)
+
+    # ---- Días de la semana ----
+    def on_weekday(m: "re.Match[str]") -> None:
+        article, prefix, name, suffix = m.groups()
+        target = _WEEKDAYS.index(name)
+        if suffix and "semana" in suffix:
+            next_monday = today + timedelta(days=7 - today.weekday())
+            add_date(next_monday + timedelta(days=target))
+            return
+        delta = (target - today.weekday()) % 7
+        if delta == 0:
+            if article in ("este", "esta") and not (prefix or suffix):
+                add_date(today)
+                return
+            delta = 7
+            if not (prefix or suffix):
+                # "el lunes" dicho un lunes: casi siempre es el siguiente
+                lower(0.8)
+        add_date(today + timedelta(days=delta))
+
+    scan.consume(_WEEKDAY_EXPR_RE, on_weekday)
+
+    # ---- hoy / mañana / pasado mañana ----
+    # ("de la mañana" ya lo consumió la hora; el que quede es contexto)
+    scan.text = _PART_OF_DAY_RE.sub(lambda m: " " * len(m.group(0)), scan.text)
+    if pod and pod.group(2):
+        # "esta tarde" / "esta noche" = hoy
+        add_date(today)
+
+    def on_day_word(m: "re.Match[str]") -> None:
+        word = m.group(1)
+        if word == "pasado manana":
+            add_date(today + timedelta(days=2))
+        elif word == "manana":
+            add_date(today + timedelta(days=1))
+        else:
+            add_date(today)
+
+    scan.consume(_DAY_WORD_RE, on_day_word)
+
+    def on_day_of_month(m: "re.Match[str]") -> None:
+        day = int(m.group(1))
+        value = safe_date(today.year, today.month, day)
+        if value is None or value < today:
+            month = today.month % 12 + 1
+            value = safe_date(today.year + (today.month == 12), month, day)
+        add_date(value)
+        lower(0.8)
+
+    scan.consume(_DAY_OF_MONTH_RE, on_day_of_month)
+
+    # ---- Confianza ----
+    if _UNPARSED_HINT_RE.search(scan.text):
+        lower(CONFIDENCE_UNPARSED)
+    if len(set(dates)) > 1 or len(set(times)) > 1:
+        lower(CONFIDENCE_UNPARSED)
+    if not found and confidence == 1.0:
+        confidence = CONFIDENCE_NONE
+
+    fecha = dates[0] if dates else None
+    hora = times[0] if times else None
+    if hora is not None:
+        bare, midnight = time_flags[0]
+        if midnight:
+            # Las 0:00 del día siguiente al nombrado (o a hoy)
+            fecha = (fecha or today) + timedelta(days=1)
+        elif bare and fecha in (None, today) and hora < now.time().replace(tzinfo=None):
+            # "hoy a las 9" dicho a las 15:00: la hora sin am/pm que ya pasó
+            # es la de la noche; si también pasó, que decida el LLM
+            if hora.hour < 12 and hora.replace(hour=hora.hour + 12) > now.time().replace(tzinfo=None):
+                hora = hora.replace(hour=hora.hour + 12)
+            else:
+                lower(CONFIDENCE_AMBIGUOUS_HOUR)
+
+    return ParsedDateTime(
+        fecha=fecha,
+        hora=hora,
+        confidence=round(confidence, 2),
+    )
@@ -0,0 +1,341 @@
+"""
+Proveedores de embeddings intercambiables.
+
+  - openai   → API de OpenAI (text-embedding-3-*), lotes por request
+  - local    → modelo local en CPU cargado desde disco (torch)
+  - hashing  → feature hashing determinístico, sin red ni modelo
+
+Todos regresan matrices float32 (n, d) normalizadas L2. La selección
+se hace con EMBEDDING_PROVIDER; EMBEDDING_DIM recorta (y renormaliza)
+la salida cuando se necesita una dimensión menor a la nativa.
+"""
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import threading
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingProvider(ABC):
+    """
+    Interfaz común. Las subclases implementan `_embed_batch` para un
+    lote que ya respeta `batch_size`; aquí se hace el troceo y el
+    ajuste de dimensión.
+    """
+
+    name = "base"
+    default_batch_size = 64
+
+    def __init__(self, *, batch_size: Optional[int] = None, output_dim: Optional[int] = None):
+        self.batch_size = max(1, int(batch_size or self.default_batch_size))
+        self.output_dim = int(output_dim) if output_dim else None
+
+    @property
+    def dim(self) -> Optional[int]:
+        """Dimensión de salida (None si no se conoce hasta el primer embedding)."""
+        return self.output_dim or self.native_dim
+
+    @property
+    def native_dim(self) -> Optional[int]:
+        return None
+
+    @abstractmethod
+    def _embed_batch(self, texts: List[str], *, timeout: Optional[float] = None) -> np.ndarray:
+        ...
+
+    def _fit_dim(self, m: np.ndarray) -> np.ndarray:
+        if self.output_dim and m.shape[1] != self.output_dim:
+            if m.shape[1] < self.output_dim:
+                raise ValueError(
+                    f"{self.name}: dimensión nativa {m.shape[1]} menor a la pedida {self.output_dim}"
+                )
+            m = m[:, :self.output_dim]
+        return m / (np.linalg.norm(m, axis=1, keepdims=True) + 1e-10)
+
+    def embed(self, texts: List[str], *, timeout: Optional[float] = None) -> np.ndarray:
+        texts = [t or "" for t in texts]
+        if not texts:
+            return np.zeros((0, self.dim or 0), dtype=np.float32)
+
+        blocks = [
+            np.asarray(self._embed_batch(texts[i:i + self.batch_size], timeout=timeout), dtype=np.float32)
+            for i in range(0, len(texts), self.batch_size)
+        ]
+        return self._fit_dim(np.concatenate(blocks, axis=0))
+
+    def embed_one(self, text: str, *, timeout: Optional[float] = None) -> np.ndarray:
+        return self.embed([text], timeout=timeout)[0]
+
+
+# ==========================================================
+# OPENAI
+# ==========================================================
+
+class OpenAIEmbeddingProvider(EmbeddingProvider):
+    name = "openai"
+    default_batch_size = 256
+
+    # Dimensiones nativas conocidas
+    NATIVE_DIMS = {
+        "text-embedding-3-large": 3072,
+        "text-embedding-3-small": 1536,
+        "text-embedding-ada-002": 1536,
+    }
+
+    def __init__(
+        self,
+        model: str = "text-embedding-3-large",
+        *,
+        client=None,
+        batch_size: Optional[int] = None,
+        output_dim: Optional[int] = None,
+        max_retries: Optional[int] = None,
+    ):
+        super().__init__(batch_size=batch_size, output_dim=output_dim)
+        self.model = model
+        self._client = client
+        self.max_retries = max_retries
+
+    @property
+    def native_dim(self) -> Optional[int]:
+        return self.NATIVE_DIMS.get(self.model)
+
+    @property
+    def client(self):
+        if self._client is None:
+            from app.clients.openai_client import get_openai_client
+
+            self._client = get_openai_client()
+        if self._client is None:
+            raise RuntimeError("Cliente OpenAI no disponible (OPENAI_API_KEY)")
+        return self._client
+
+    def _embed_batch(self, texts: List[str], *, timeout: Optional[float] = None) -> np.ndarray:
+        options = {}
+        if timeout is not None:
+            # Con timeout explícito (camino de request) se falla rápido
+            options["timeout"] = timeout
+            options["max_retries"] = 0
+        if self.max_retries is not None:
+            options["max_retries"] = self.max_retries
+        client = self.client.with_options(**options) if options else self.client
+
+        kwargs = {}
+        # text-embedding-3-* acorta del lado del servidor
+        if self.output_dim and self.model.startswith("text-embedding-3"):
+            kwargs["dimensions"] = self.output_dim
+
+        resp = client.embeddings.create(model=self.model, input=texts, **kwargs)
+        # La API puede no respetar el orden: se ordena por index
+        return np.asarray([d.embedding for d in sorted(resp.data, key=lambda d: d.index)], dtype=np.float32)
+
+
+# ==========================================================
+# MODELO LOCAL (CPU)
+# ==========================================================
+
+class LocalEmbeddingProvider(EmbeddingProvider):
+    """
+    Modelo local cargado desde `model_path` (perezoso, una vez por proceso):
+
+      - carpeta sentence-transformers (modules.json), si el paquete está
+        instalado
+      - o TorchScript `model.pt` + `tokenizer.json` (torch + tokenizers,
+        ambos en requirements); pooling promedio sobre la máscara
+    """
+
+    name = "local"
+    default_batch_size = 32
+
+    def __init__(
+        self,
+        model_path: str,
+        *,
+        batch_size: Optional[int] = None,
+        output_dim: Optional[int] = None,
+        max_length: int = 256,
+        threads: Optional[int] = None,
+    ):
+        super().__init__(batch_size=batch_size, output_dim=output_dim)
+        self.model_path = model_path
+        self.max_length = max_length
+        self.threads = threads
+        self._lock = threading.Lock()
+        self._encode: Optional[Callable[[List[str]], np.ndarray]] = None
+        self._native_dim: Optional[int] = None
+
+    @property
+    def native_dim(self) -> Optional[int]:
+        return self._native_dim
+
+    def _load(self) -> Callable[[List[str]], np.ndarray]:
+        if self._encode is not None:
+            return self._encode
+
+        with self._lock:
+            if self._encode is not None:
+                return self._encode
+
+            if not os.path.isdir(self.model_path):
+                raise FileNotFoundError(f"Modelo de embeddings no encontrado en {self.model_path}")
+
+            import torch
+
+            if self.threads:
+                torch.set_num_threads(self.threads)
+
+            if os.path.exists(os.path.join(self.model_path, "modules.json")):
+                from sentence_transformers import SentenceTransformer  # type: ignore
+
+                model = SentenceTransformer(self.model_path, device="cpu")
+                model.max_seq_length = self.max_length
+
+                def encode(texts: List[str]) -> np.ndarray:
+                    return model.encode(texts, batch_size=len(texts), convert_to_numpy=True)
+
+            else:
+                from tokenizers import Tokenizer
+
+                tokenizer = Tokenizer.from_file(os.path.join(self.model_path, "tokenizer.json"))
+                tokenizer.enable_truncation(max_length=self.max_length)
+                tokenizer.enable_padding()
+                model = torch.jit.load(os.path.join(self.model_path, "model.pt"), map_location="cpu")
+                model.eval()
+
+                def encode(texts: List[str]) -> np.ndarray:
+                    batch = tokenizer.encode_batch(texts)
+                    ids = torch.tensor([e.ids for e in batch], dtype=torch.long)
+                    mask = torch.tensor([e.attention_mask for e in batch], dtype=torch.long)
+                    with torch.inference_mode():
+                        out = model(ids, mask)
+                        hidden = out[0] if isinstance(out, (tuple, list)) else out
+                        if hidden.dim() == 3:
+                            m = mask.unsqueeze(-1).to(hidden.dtype)
+                            hidden = (hidden * m).sum(dim=1) / m.sum(dim=1).clamp(min=1e-9)
+                    return hidden.float().numpy()
+
+            self._encode = encode
+            logger.info("🧠 Modelo local de embeddings cargado desde %s", self.model_path)
+            return encode
+
+    def _embed_batch(self, texts: List[str], *, timeout: Optional[float] = None) -> np.ndarray:
+        vectors = np.asarray(self._load()(texts), dtype=np.float32)
+        self._native_dim = vectors.shape[1]
+        return vectors
+
+
+# ==========================================================
+# HASHING DETERMINÍSTICO
+# ==========================================================
+
+class HashingEmbeddingProvider(EmbeddingProvider):
+    """
+    Feature hashing con signo (proyección aleatoria dispersa): stems de
+    palabras + n-gramas de caracteres. Determinístico entre procesos
+    (blake2b, no hash()), sin red ni modelo. Para tests y benchmarks.
+    """
+
+    name = "hashing"
+    default_batch_size = 1024
+
+    def __init__(
+        self,
+        dim: int = 512,
+        *,
+        char_ngram: int = 4,
+        char_weight: float = 0.5,
+        batch_size: Optional[int] = None,
+    ):
+        super().__init__(batch_size=batch_size)
+        self._dim = dim
+        self.char_ngram = char_ngram
+        self.char_weight = char_weight
+
+    @property
+    def native_dim(self) -> Optional[int]:
+        return self._dim
+
+    def _features(self, text: str) -> Iterable[Tuple[str, float]]:
+        from app.services.course_lexical_search_service import tokenize
+
+        n = self.char_ngram
+        for token in tokenize(text):
+            yield "w:" + token, 1.0
+            padded = f"#{token}#"
+            for i in range(max(len(padded) - n + 1, 1)):
+                yield "c:" + padded[i:i + n], self.char_weight
+
+    def _embed_text(self, text: str) -> np.ndarray:
+        vec = np.zeros(self._dim, dtype=np.float32)
+        for feature, weight in self._features(text):
+            h = int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "little")
+            vec[h % self._dim] += weight if (h >> 63) & 1 else -weight
+        return vec
+
+    def _embed_batch(self, texts: List[str], *, timeout: Optional[float] = None) -> np.ndarray:
+        return np.stack([self._embed_text(t) for t in texts])
+
+
+# ==========================================================
+# SELECCIÓN
+# ==========================================================
+
+def get_embedding_model() -> str:
+    return (
+        getattr(settings, "OPENAI_EMBEDDING_MODEL", None)
+        or os.getenv("OPENAI_EMBEDDING_MODEL")
+        or "text-embedding-3-large"
+    )
+
+
+def _build_openai(**kwargs) -> EmbeddingProvider:
+    return OpenAIEmbeddingProvider(kwargs.pop("model", None) or get_embedding_model(), **kwargs)
+
+
+def _build_local(**kwargs) -> EmbeddingProvider:
+    model_path = kwargs.pop("model_path", None) or settings.EMBEDDING_MODEL_PATH
+    if not model_path:
+        raise ValueError("EMBEDDING_MODEL_PATH es requerido para EMBEDDING_PROVIDER=local")
+    return LocalEmbeddingProvider(model_path, **kwargs)
+
+
+def _build_hashing(**kwargs) -> EmbeddingProvider:
+    dim = kwargs.pop("output_dim", None) or settings.EMBEDDING_DIM or 512
+    return HashingEmbeddingProvider(dim, **kwargs)
+
+
+EMBEDDING_PROVIDERS: Dict[str, Callable[..., EmbeddingProvider]] = {
+    "openai": _build_openai,
+    "local": _build_local,
+    "hashing": _build_hashing,
+}
+
+
+def build_embedding_provider(name: Optional[str] = None, **kwargs) -> EmbeddingProvider:
+    name = (name or settings.EMBEDDING_PROVIDER or "openai").strip().lower()
+    factory = EMBEDDING_PROVIDERS.get(name)
+    if factory is None:
+        raise ValueError(f"EMBEDDING_PROVIDER desconocido: {name!r} ({', '.join(EMBEDDING_PROVIDERS)})")
+
+    kwargs.setdefault("batch_size", settings.EMBEDDING_BATCH_SIZE or None)
+    if name != "hashing":
+        kwargs.setdefault("output_dim", settings.EMBEDDING_DIM or None)
+    return factory(**kwargs)
+
+
+@lru_cache(maxsize=None)
+def get_embedding_provider(name: Optional[str] = None) -> EmbeddingProvider:
+    """Instancia compartida por proceso (una por nombre)."""
+    provider = build_embedding_provider(name)
+    logger.info("🧠 Embedding provider: %s (dim=%s, batch=%s)", provider.name, provider.dim, provider.batch_size)
+    return provider
@@ -1,7 +1,12 @@
 from typing import List, Dict, Any, Optional
 from pymongo import MongoClient
-from openai import OpenAI
-import os
+
+from app.config import settings
+from app.services.embedding_provider_service import (
+    EmbeddingProvider,
+    get_embedding_provider,
+    OpenAIEmbeddingProvider,
+)
 
 
 class GenericRAGService:
@@ -14,6 +19,7 @@ class GenericRAGService:
         *,
         vector_index: str = "vector_index",
         openai_model: str = "text-embedding-3-large",
+        embedding_provider: Optional[EmbeddingProvider] = None,
     ):
         self.mongo_client = MongoClient(
             mongo_uri,
@@ -23,16 +29,16 @@ class GenericRAGService:
         )
 
         self.collection = self.mongo_client[db_name][collection_name]
-        self.openai_client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        # El modelo de OpenAI se respeta salvo que se elija otro proveedor
+        if embedding_provider is None and settings.EMBEDDING_PROVIDER.lower() == "openai":
+            embedding_provider = OpenAIEmbeddingProvider(openai_model)
+        self.embedder = embedding_provider or get_embedding_provider()
         self.openai_model = openai_model
         self.vector_index = vector_index
 
     def embed_query(self, query: str) -> List[float]:
-        response = self.openai_client.embeddings.create(
-            model=self.openai_model,
-            input=query,
-        )
-        return list(response.data[0].embedding)
+        # list[float] para el pipeline de Mongo
+        return self.embedder.embed_one(query).tolist()
 
     def retrieve(
         self,
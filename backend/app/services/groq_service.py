@@ -5,6 +5,7 @@ from typing import Any, Dict, List, Optional
 
 import requests
 
+from app.config import settings
 from app.services.usage_service import calculate_cost, add_usage
 import os
 from groq import Groq
@@ -67,12 +68,14 @@ def call_groq_api_directly(
     max_tokens: int = 2048,
     top_p: Optional[float] = None,
     frequency_penalty: Optional[float] = None,
-    timeout_seconds: int = 30
+    timeout_seconds: int = 30,
+    response_format: Optional[Dict[str, Any]] = None,
 ) -> Dict[str, Any]:
     """
     Llamada directa al endpoint OpenAI-compatible de Groq.
     """
-    url = "https://api.groq.com/openai/v1/chat/completions"
+    base_url = (settings.GROQ_BASE_URL or "https://api.groq.com").rstrip("/")
+    url = f"{base_url}/openai/v1/chat/completions"
     headers = {
         "Authorization": f"Bearer {api_key}",
         "Content-Type": "application/json"
@@ -89,6 +92,8 @@ def call_groq_api_directly(
         payload["top_p"] = top_p
     if frequency_penalty is not None:
         payload["frequency_penalty"] = frequency_penalty
+    if response_format is not None:
+        payload["response_format"] = response_format
 
     response = requests.post(url, headers=headers, json=payload, timeout=timeout_seconds)
     response.raise_for_status()
@@ -134,24 +139,32 @@ def run_groq_completion(
     temperature: float = 0.5,
     max_tokens: int = 2048,
     top_p: Optional[float] = None,
-    frequency_penalty: Optional[float] = None
+    frequency_penalty: Optional[float] = None,
+    response_format: Optional[Dict[str, Any]] = None,
 ) -> str:
     """
     Ejecuta una completion usando:
       1) SDK si está disponible y no es 'api_fallback'
       2) HTTP fallback si hay API key
 
+    response_format: {"type": "json_object"} o {"type": "json_schema", ...}
+    para salidas estructuradas; None = texto libre.
+
     Retorna el texto final de respuesta.
     """
     # 1) Preferencia: SDK
     if groq_client and groq_client != "api_fallback":
+        extra: Dict[str, Any] = {}
+        if response_format is not None:
+            extra["response_format"] = response_format
         completion = groq_client.chat.completions.create(
             model=model,
             messages=messages,
             temperature=temperature,
             max_tokens=max_tokens,
             top_p=top_p if top_p is not None else 1,
-            frequency_penalty=frequency_penalty if frequency_penalty is not None else 0
+            frequency_penalty=frequency_penalty if frequency_penalty is not None else 0,
+            **extra,
         )
         text = completion.choices[0].message.content
 
@@ -173,7 +186,8 @@ def run_groq_completion(
         temperature=temperature,
         max_tokens=max_tokens,
         top_p=top_p,
-        frequency_penalty=frequency_penalty
+        frequency_penalty=frequency_penalty,
+        response_format=response_format,
     )
     text = result["choices"][0]["message"]["content"]
 
@@ -199,4 +213,4 @@ def get_groq_client() -> Groq:
     Retorna un cliente Groq inicializado.
     """
     api_key = get_groq_api_key()
-    return Groq(api_key=api_key)
+    return Groq(api_key=api_key, base_url=settings.GROQ_BASE_URL or None)
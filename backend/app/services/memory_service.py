@@ -2,6 +2,9 @@ import logging
 import re
 from typing import Dict, List, Any
 
+from app.config import settings
+from app.stores.state_backend import create_state_backend
+
 logger = logging.getLogger(__name__)
 
 # ============================
@@ -16,7 +19,18 @@ logger = logging.getLogger(__name__)
 #   }
 # }
 #
-CHAT_MEMORY: Dict[str, Dict[str, Any]] = {}
+# Acotada: TTL por usuario, techo de entradas y bytes, LRU y barrido
+# periódico (antes era un dict que crecía con cada user_key distinto).
+# Vive en el backend de estado (STATE_BACKEND) para compartirse entre
+# workers; los techos de entradas/bytes aplican al backend en memoria.
+#
+CHAT_MEMORY = create_state_backend(
+    "chat_memory",
+    ttl_seconds=settings.CHAT_MEMORY_TTL_SECONDS,
+    max_entries=settings.CHAT_MEMORY_MAX_ENTRIES,
+    max_bytes=settings.CHAT_MEMORY_MAX_BYTES,
+    sweep_interval=settings.CHAT_MEMORY_SWEEP_SECONDS,
+)
 
 
 # ============================
@@ -85,14 +99,21 @@ def detect_main_topic(text: str) -> str:
 # INICIALIZACIÓN DE USUARIO
 # ============================
 
-def _ensure_user_memory(user_key: str) -> Dict[str, Any]:
-    if user_key not in CHAT_MEMORY:
-        CHAT_MEMORY[user_key] = {
+def _ensure_user_memory(user_key: str, memory: Any = None) -> Dict[str, Any]:
+    """
+    Memoria del usuario (nueva si no existe o venció). Es una copia: los
+    cambios se persisten con CHAT_MEMORY.update para no pisar el turno
+    concurrente de otro worker.
+    """
+    if memory is None:
+        memory, _ = CHAT_MEMORY.get(user_key)
+    if memory is None:
+        memory = {
             "facts": {},
             "recent": [],
             "active_topic": "general",
         }
-    return CHAT_MEMORY[user_key]
+    return memory
 
 
 # ============================
@@ -111,26 +132,34 @@ def append_memory(
     - Mantiene una ventana conversacional acotada.
     - Actualiza el contexto temático sin borrar identidad.
     """
-    memory = _ensure_user_memory(user_key)
-
+    new_facts: Dict[str, Any] = {}
+    topic = None
     if role == "user":
         # Extraer hechos persistentes
         new_facts = extract_facts(message)
         if new_facts:
             logger.info(f"Hechos detectados para {user_key}: {new_facts}")
-            memory["facts"].update(new_facts)
 
         # Actualizar contexto activo (soft)
-        memory["active_topic"] = detect_main_topic(message)
+        topic = detect_main_topic(message)
+
+    def apply(current: Any) -> Dict[str, Any]:
+        memory = _ensure_user_memory(user_key, current)
+        memory["facts"].update(new_facts)
+        if topic is not None:
+            memory["active_topic"] = topic
+
+        # Agregar a ventana conversacional
+        memory["recent"].append({
+            "role": role,
+            "content": message
+        })
 
-    # Agregar a ventana conversacional
-    memory["recent"].append({
-        "role": role,
-        "content": message
-    })
+        # Limitar tamaño de ventana
+        memory["recent"] = memory["recent"][-max_recent:]
+        return memory
 
-    # Limitar tamaño de ventana
-    memory["recent"] = memory["recent"][-max_recent:]
+    CHAT_MEMORY.update(user_key, apply)
 
 
 def get_memory_snapshot(user_key: str) -> Dict[str, Any]:
@@ -185,8 +214,12 @@ def reset_conversation_window(user_key: str) -> None:
     Limpia solo la ventana conversacional.
     NO borra hechos persistentes.
     """
-    memory = _ensure_user_memory(user_key)
-    memory["recent"] = []
+    def apply(current: Any) -> Dict[str, Any]:
+        memory = _ensure_user_memory(user_key, current)
+        memory["recent"] = []
+        return memory
+
+    CHAT_MEMORY.update(user_key, apply)
 
 
 def reset_all_memory(user_key: str) -> None:
@@ -194,5 +227,9 @@ def reset_all_memory(user_key: str) -> None:
     Borra toda la memoria del usuario.
     Usar solo bajo acción explícita del usuario.
     """
-    if user_key in CHAT_MEMORY:
-        del CHAT_MEMORY[user_key]
+    CHAT_MEMORY.delete(user_key)
+
+
+def get_memory_stats() -> Dict[str, Any]:
+    """Entradas, bytes estimados y desalojos de la memoria conversacional."""
+    return CHAT_MEMORY.stats()
@@ -0,0 +1,138 @@
+"""
+Mensajes salientes por WhatsApp/SMS fuera del request de un webhook.
+
+El webhook de Twilio responde con TwiML en el mismo request; lo que sale
+después (un recordatorio que vence, la respuesta de un webhook en modo
+asíncrono) va por la REST API. El sender es intercambiable
+(settings.OUTBOUND_SENDER):
+  twilio  REST API vía twilio_client; los lotes se envían en paralelo
+          con OUTBOUND_SEND_WORKERS hilos
+  local   no envía nada: registra en log y guarda los últimos mensajes
+          en memoria (desarrollo y pruebas)
+
+El canal sale del user_key (el "From" del webhook): "whatsapp:+52..."
+responde desde TWILIO_WHATSAPP_NUMBER y "+52..." desde TWILIO_SMS_NUMBER.
+Los usuarios web no tienen a dónde mandarles nada.
+"""
+from __future__ import annotations
+
+import logging
+import re
+import threading
+from abc import ABC, abstractmethod
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Deque, Dict, List, Optional, Sequence
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Límite de Twilio por mensaje (WhatsApp y SMS concatenado)
+MAX_BODY_CHARS = 1600
+
+_PHONE_RE = re.compile(r"^\+\d{8,15}$")
+
+
+@dataclass(frozen=True, slots=True)
+class OutboundMessage:
+    to: str
+    body: str
+    kind: str = "reminder"
+    # Remitente explícito (p. ej. el "To" del webhook al contestar); si no,
+    # el número configurado para el canal
+    from_: Optional[str] = None
+
+
+def sender_address(user_key: str) -> Optional[str]:
+    """Número "From" para escribirle a user_key; None si no es un canal de Twilio."""
+    user_key = (user_key or "").strip()
+    if user_key.startswith("whatsapp:"):
+        return settings.TWILIO_WHATSAPP_NUMBER or None
+    if _PHONE_RE.match(user_key):
+        return settings.TWILIO_SMS_NUMBER or None
+    return None
+
+
+def is_reachable(user_key: str) -> bool:
+    return sender_address(user_key) is not None
+
+
+class MessageSender(ABC):
+    name = "base"
+
+    def __init__(self):
+        self.stats_counters = {"sent": 0, "failed": 0, "batches": 0}
+        self._lock = threading.Lock()
+
+    @abstractmethod
+    def _deliver(self, message: OutboundMessage) -> None:
+        ...
+
+    def send(self, message: OutboundMessage) -> bool:
+        try:
+            self._deliver(message)
+            ok = True
+        except Exception:
+            logger.exception("❌ Error enviando %s a %s", message.kind, message.to)
+            ok = False
+        with self._lock:
+            self.stats_counters["sent" if ok else "failed"] += 1
+        return ok
+
+    def send_batch(self, messages: Sequence[OutboundMessage]) -> List[bool]:
+        with self._lock:
+            self.stats_counters["batches"] += 1
+        return [self.send(message) for message in messages]
+
+    def stats(self) -> Dict[str, Any]:
+        return {"sender": self.name, **self.stats_counters}
+
+
+class TwilioSender(MessageSender):
+    name = "twilio"
+
+    def __init__(self, max_workers: int = 4):
+        super().__init__()
+        self._pool = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="twilio-send")
+
+    def _deliver(self, message: OutboundMessage) -> None:
+        from app.clients.twilio_client import get_twilio_client
+
+        client = get_twilio_client()
+        from_ = message.from_ or sender_address(message.to)
+        if client is None or from_ is None:
+            raise RuntimeError("Twilio no configurado para este destino")
+        client.messages.create(from_=from_, to=message.to, body=message.body[:MAX_BODY_CHARS])
+
+    def send_batch(self, messages: Sequence[OutboundMessage]) -> List[bool]:
+        # Cada envío es un POST a Twilio: el lote se reparte entre hilos
+        with self._lock:
+            self.stats_counters["batches"] += 1
+        return list(self._pool.map(self.send, messages))
+
+
+class LocalSender(MessageSender):
+    """Stand-in: no sale nada del proceso; `outbox` guarda los últimos mensajes."""
+
+    name = "local"
+
+    def __init__(self, keep: int = 1000):
+        super().__init__()
+        self.outbox: Deque[OutboundMessage] = deque(maxlen=keep)
+
+    def _deliver(self, message: OutboundMessage) -> None:
+        logger.info("📤 [local] %s → %s: %s", message.kind, message.to, message.body)
+        self.outbox.append(message)
+
+
+@lru_cache(maxsize=1)
+def get_message_sender() -> MessageSender:
+    kind = (settings.OUTBOUND_SENDER or "twilio").lower()
+    if kind == "local":
+        return LocalSender()
+    if kind != "twilio":
+        logger.warning("⚠️ OUTBOUND_SENDER desconocido (%s), se usa twilio", kind)
+    return TwilioSender(max_workers=settings.OUTBOUND_SEND_WORKERS)
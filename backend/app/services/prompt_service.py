@@ -1,8 +1,13 @@
+from dataclasses import dataclass
+from datetime import datetime
 from textwrap import dedent
+from typing import Dict, Optional
 import json
 import logging
 import re
 
+from app.services.datetime_parser import TIMEZONE, WEEKDAY_NAMES, now_local
+
 logger = logging.getLogger(__name__)
 
 
@@ -12,6 +17,51 @@ class _SafeDict(dict):
         return ""
 
 
+# =====================================================
+# Plantillas con reloj del request
+# =====================================================
+
+# Sufijo dinámico estándar: la referencia de fecha/hora se calcula en cada
+# request (antes se fijaba al importar el módulo y envejecía pasada la
+# medianoche)
+CLOCK_SUFFIX = """
+FECHA Y HORA ACTUAL (referencia absoluta):
+- Fecha: {today} ({weekday})
+- Fecha y hora ISO: {now_iso}
+- Zona horaria: {timezone}
+"""
+
+
+def request_clock(now: Optional[datetime] = None) -> Dict[str, str]:
+    """today / now_iso / weekday (en español) / timezone para el request actual."""
+    now = now or now_local()
+    if now.tzinfo is not None:
+        now = now.astimezone(TIMEZONE)
+    return {
+        "today": now.strftime("%Y-%m-%d"),
+        "now_iso": now.isoformat(timespec="minutes"),
+        "weekday": WEEKDAY_NAMES[now.weekday()],
+        "timezone": "America/Mexico_City",
+    }
+
+
+@dataclass(frozen=True, slots=True)
+class PromptTemplate:
+    """
+    Prompt = prefijo estático + sufijo dinámico.
+
+    El prefijo (instrucciones, esquema, reglas) es idéntico en todos los
+    requests, así el proveedor puede reutilizar su caché de prompt; el
+    sufijo se formatea por request con el reloj y los valores extra.
+    """
+    static: str
+    dynamic: str = CLOCK_SUFFIX
+
+    def render(self, now: Optional[datetime] = None, **values: str) -> str:
+        mapping = _SafeDict({**request_clock(now), **values})
+        return f"{self.static.rstrip()}\n{self.dynamic.format_map(mapping).rstrip()}\n"
+
+
 def build_urls_block(urls):
     if urls is None:
         return ""
@@ -0,0 +1,409 @@
+"""
+Grabación y reproducción en la frontera con proveedores externos.
+
+Se interceptan las llamadas a nivel de SDK / driver, así que cubren
+todos los clientes sin importar dónde se construyan:
+
+  groq.chat         groq Completions.create (SDK)
+  groq.http         groq_service.call_groq_api_directly (fallback HTTP)
+  openai.embeddings openai Embeddings.create
+  openai.moderations openai Moderations.create
+  openai.responses  openai Responses.create (web search)
+  mongo.aggregate   pymongo Collection.aggregate
+
+Además se graba cada turno de `procesar_chat_web` (argumentos, resultado
+y duración) para poder reproducirlo.
+
+Formato: JSONL comprimido con gzip (un registro por línea, se escribe
+en modo append y sobrevive a reinicios). Los embeddings se guardan como
+float32 en base64. Las grabaciones contienen mensajes de usuarios:
+tratarlas como datos de producción.
+
+Grabar en producción: PROVIDER_RECORD_PATH=/tmp/turnos-{pid}.jsonl.gz
+Reproducir: python -m app.benchmarks.chat_replay /tmp/turnos-123.jsonl.gz
+"""
+from __future__ import annotations
+
+import atexit
+import base64
+import functools
+import gzip
+import hashlib
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import defaultdict, deque
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+
+# Milisegundos a esperar en replay dado (kind, ms grabados)
+LatencyFn = Callable[[str, float], float]
+
+
+class ReplayMiss(LookupError):
+    """No hay respuesta grabada para la llamada (modo estricto)."""
+
+
+class ReplayedProviderError(RuntimeError):
+    """Error que el proveedor regresó durante la grabación."""
+
+
+# ==========================================================
+# SERIALIZACIÓN
+# ==========================================================
+
+def request_key(kind: str, payload: Any) -> str:
+    raw = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(f"{kind}\n{raw}".encode("utf-8")).hexdigest()[:20]
+
+
+def _encode_vector(vec: List[float]) -> str:
+    return base64.b64encode(np.asarray(vec, dtype="<f4").tobytes()).decode("ascii")
+
+
+def _decode_vector(data: str) -> List[float]:
+    return np.frombuffer(base64.b64decode(data), dtype="<f4").astype(float).tolist()
+
+
+def _dump_model(obj: Any) -> Any:
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump(mode="json", by_alias=True, exclude_unset=True)
+    return obj
+
+
+def _dump_response(kind: str, resp: Any) -> Any:
+    if kind == "mongo.aggregate":
+        from bson import json_util
+
+        return json.loads(json_util.dumps(resp))
+    data = _dump_model(resp)
+    if kind == "openai.embeddings":
+        for item in data.get("data", []):
+            if isinstance(item.get("embedding"), list):
+                item["embedding"] = {"f32": _encode_vector(item["embedding"])}
+    return data
+
+
+def _load_response(kind: str, data: Any) -> Any:
+    # construct_type de cada SDK: misma construcción laxa que al parsear la API
+    if kind == "groq.chat":
+        from groq._models import construct_type
+        from groq.types.chat import ChatCompletion
+
+        return construct_type(type_=ChatCompletion, value=data)
+    if kind.startswith("openai."):
+        from openai._models import construct_type
+        from openai.types import CreateEmbeddingResponse, ModerationCreateResponse
+        from openai.types.responses import Response
+
+        if kind == "openai.embeddings":
+            for item in data.get("data", []):
+                if isinstance(item.get("embedding"), dict):
+                    item["embedding"] = _decode_vector(item["embedding"]["f32"])
+        model = {
+            "openai.embeddings": CreateEmbeddingResponse,
+            "openai.moderations": ModerationCreateResponse,
+            "openai.responses": Response,
+        }[kind]
+        return construct_type(type_=model, value=data)
+    if kind == "mongo.aggregate":
+        from bson import json_util
+
+        return iter(json_util.loads(json.dumps(data)))
+    return data
+
+
+def _request_payload(kind: str, args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> Any:
+    """Parte determinística de la llamada (lo que se usa como llave)."""
+    if kind == "mongo.aggregate":
+        collection, pipeline = args[0], args[1] if len(args) > 1 else kwargs.get("pipeline")
+        return {"ns": collection.full_name, "pipeline": pipeline}
+    return {k: v for k, v in kwargs.items() if k not in ("api_key", "timeout", "timeout_seconds", "extra_headers")}
+
+
+def iter_records(path: str) -> Iterator[Dict[str, Any]]:
+    """Lee una grabación; tolera una cola truncada (proceso muerto a media escritura)."""
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        try:
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+        except (EOFError, json.JSONDecodeError):
+            logger.warning("Grabación truncada al final: %s", path)
+
+
+# ==========================================================
+# PARCHES
+# ==========================================================
+
+def _patch_targets() -> List[Tuple[str, Any, str]]:
+    """(kind, owner, atributo) de cada punto de intercepción disponible."""
+    targets: List[Tuple[str, Any, str]] = []
+    try:
+        from groq.resources.chat.completions import Completions as GroqCompletions
+
+        targets.append(("groq.chat", GroqCompletions, "create"))
+    except Exception:
+        pass
+    try:
+        from openai.resources.embeddings import Embeddings
+        from openai.resources.moderations import Moderations
+        from openai.resources.responses import Responses
+
+        targets += [
+            ("openai.embeddings", Embeddings, "create"),
+            ("openai.moderations", Moderations, "create"),
+            ("openai.responses", Responses, "create"),
+        ]
+    except Exception:
+        pass
+    try:
+        from pymongo.collection import Collection
+
+        targets.append(("mongo.aggregate", Collection, "aggregate"))
+    except Exception:
+        pass
+    from app.services import groq_service
+
+    targets.append(("groq.http", groq_service, "call_groq_api_directly"))
+    return targets
+
+
+class _Interceptor(ABC):
+    """Base: instala wrappers sobre los puntos de intercepción y los restaura."""
+
+    def __init__(self):
+        self._originals: List[Tuple[Any, str, Any]] = []
+        self._local = threading.local()
+
+    @property
+    def current_turn(self) -> Optional[int]:
+        return getattr(self._local, "turn", None)
+
+    @abstractmethod
+    def _call(self, kind: str, original: Callable[..., Any], args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> Any:
+        ...
+
+    def _wrap(self, kind: str, original: Callable[..., Any]) -> Callable[..., Any]:
+        interceptor = self
+
+        @functools.wraps(original)
+        def wrapper(*args, **kwargs):
+            # Streaming no se graba: pasa directo
+            if kwargs.get("stream"):
+                return original(*args, **kwargs)
+            return interceptor._call(kind, original, args, kwargs)
+
+        return wrapper
+
+    def install(self) -> "_Interceptor":
+        for kind, owner, attr in _patch_targets():
+            original = getattr(owner, attr)
+            self._originals.append((owner, attr, original))
+            setattr(owner, attr, self._wrap(kind, original))
+        self._wrap_turns()
+        return self
+
+    def uninstall(self) -> None:
+        for owner, attr, original in reversed(self._originals):
+            setattr(owner, attr, original)
+        self._originals.clear()
+
+    def __enter__(self) -> "_Interceptor":
+        return self.install()
+
+    def __exit__(self, *exc) -> None:
+        self.uninstall()
+
+    # ------------------------------------------------------
+    # Turnos de procesar_chat_web
+    # ------------------------------------------------------
+
+    def _begin_turn(self) -> None:
+        pass
+
+    def _on_turn(self, kwargs: Dict[str, Any], result: Any, elapsed_ms: float, error: Optional[str]) -> None:
+        pass
+
+    def _wrap_turns(self) -> None:
+        """
+        Los controllers importan `procesar_chat_web` por nombre, así que se
+        re-enlaza en cada módulo de app.* que tenga la referencia original.
+        """
+        from app.services import cerebro_service
+
+        original = cerebro_service.procesar_chat_web
+        interceptor = self
+
+        @functools.wraps(original)
+        def wrapper(**kwargs):
+            interceptor._begin_turn()
+            t0 = time.perf_counter()
+            try:
+                result = original(**kwargs)
+            except Exception as e:
+                interceptor._on_turn(kwargs, None, (time.perf_counter() - t0) * 1000, f"{type(e).__name__}: {e}")
+                raise
+            interceptor._on_turn(kwargs, result, (time.perf_counter() - t0) * 1000, None)
+            return result
+
+        for name, module in list(sys.modules.items()):
+            if (name == "app" or name.startswith("app.")) and getattr(module, "procesar_chat_web", None) is original:
+                self._originals.append((module, "procesar_chat_web", original))
+                setattr(module, "procesar_chat_web", wrapper)
+
+
+# ==========================================================
+# GRABACIÓN
+# ==========================================================
+
+class ProviderRecorder(_Interceptor):
+
+    def __init__(self, path: str):
+        super().__init__()
+        self.path = path.replace("{pid}", str(os.getpid()))
+        self._lock = threading.Lock()
+        self._turn_seq = 0
+        self._file = None
+
+    def install(self) -> "ProviderRecorder":
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._file = gzip.open(self.path, "at", encoding="utf-8")
+        self._write({"t": "header", "version": FORMAT_VERSION, "pid": os.getpid(), "created_at": time.time()})
+        super().install()
+        # Cerrar el miembro gzip al salir para no dejar la cola truncada
+        atexit.register(self.uninstall)
+        logger.info("🎙️ Grabando llamadas a proveedores en %s", self.path)
+        return self
+
+    def uninstall(self) -> None:
+        super().uninstall()
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def _write(self, record: Dict[str, Any], flush: bool = False) -> None:
+        line = json.dumps(record, ensure_ascii=False, separators=(",", ":"), default=str)
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.write(line + "\n")
+            if flush:
+                self._file.flush()
+
+    def _call(self, kind, original, args, kwargs):
+        payload = _request_payload(kind, args, kwargs)
+        t0 = time.perf_counter()
+        try:
+            resp = original(*args, **kwargs)
+            if kind == "mongo.aggregate":
+                resp = list(resp)
+        except Exception as e:
+            self._write({
+                "t": "call", "kind": kind, "key": request_key(kind, payload), "turn": self.current_turn,
+                "ms": round((time.perf_counter() - t0) * 1000, 2), "error": f"{type(e).__name__}: {e}",
+            })
+            raise
+        ms = (time.perf_counter() - t0) * 1000
+        try:
+            self._write({
+                "t": "call", "kind": kind, "key": request_key(kind, payload), "turn": self.current_turn,
+                "ms": round(ms, 2), "resp": _dump_response(kind, resp),
+            })
+        except Exception:
+            logger.exception("No se pudo grabar la llamada %s", kind)
+        return iter(resp) if kind == "mongo.aggregate" else resp
+
+    def _on_turn(self, kwargs, result, elapsed_ms, error):
+        self._write({
+            "t": "turn", "id": self.current_turn, "args": kwargs,
+            "ms": round(elapsed_ms, 2), "result": result, "error": error,
+        }, flush=True)
+        self._local.turn = None
+
+    def _begin_turn(self) -> None:
+        with self._lock:
+            self._turn_seq += 1
+            self._local.turn = self._turn_seq
+
+
+def install_recorder(path: str) -> ProviderRecorder:
+    return ProviderRecorder(path).install()
+
+
+# ==========================================================
+# REPRODUCCIÓN
+# ==========================================================
+
+class ProviderReplayer(_Interceptor):
+    """
+    Responde desde la grabación. Búsqueda por llave exacta (FIFO para
+    llamadas repetidas); si no hay y `strict` es False, se usa la
+    siguiente grabada del mismo tipo (prompts con la fecha actual, por
+    ejemplo, cambian la llave entre días).
+    """
+
+    def __init__(self, path: str, *, latency: Optional[LatencyFn] = None, strict: bool = False):
+        super().__init__()
+        self.path = path
+        self.strict = strict
+        self.latency = latency or (lambda kind, ms: ms)
+        self._lock = threading.Lock()
+        self._by_key: Dict[str, Deque[Dict[str, Any]]] = defaultdict(deque)
+        self._by_kind: Dict[str, Deque[Dict[str, Any]]] = defaultdict(deque)
+        self.turns: List[Dict[str, Any]] = []
+        self.header: Dict[str, Any] = {}
+        self.stats: Dict[str, int] = defaultdict(int)
+        self.waited_ms = 0.0
+
+        for record in iter_records(path):
+            t = record.get("t")
+            if t == "call":
+                self._by_key[record["key"]].append(record)
+                self._by_kind[record["kind"]].append(record)
+            elif t == "turn":
+                self.turns.append(record)
+            elif t == "header" and not self.header:
+                self.header = record
+
+    def _take(self, kind: str, key: str) -> Dict[str, Any]:
+        with self._lock:
+            queue = self._by_key.get(key)
+            if queue:
+                record = queue.popleft()
+                self._by_kind[kind].remove(record)
+                self.stats[f"{kind}.hit"] += 1
+                return record
+            if self.strict or not self._by_kind.get(kind):
+                self.stats[f"{kind}.miss"] += 1
+                raise ReplayMiss(f"Sin respuesta grabada para {kind} ({key})")
+            record = self._by_kind[kind].popleft()
+            self._by_key[record["key"]].remove(record)
+            self.stats[f"{kind}.loose"] += 1
+            return record
+
+    def _call(self, kind, original, args, kwargs):
+        record = self._take(kind, request_key(kind, _request_payload(kind, args, kwargs)))
+        wait_ms = max(0.0, float(self.latency(kind, record.get("ms", 0.0))))
+        if wait_ms:
+            time.sleep(wait_ms / 1000)
+        with self._lock:
+            self.waited_ms += wait_ms
+        if record.get("error"):
+            raise ReplayedProviderError(record["error"])
+        return _load_response(kind, record["resp"])
+
+
+def install_replayer(path: str, **kwargs) -> ProviderReplayer:
+    return ProviderReplayer(path, **kwargs).install()
@@ -0,0 +1,284 @@
+"""
+Despachador de recordatorios: avisa por WhatsApp/SMS cuando vence un
+recordatorio o está por empezar un evento del calendario.
+
+Agenda
+  TimingWheel: rueda de tiempo con hash, un slot por tick absoluto
+  (int(ts // REMINDER_TICK_SECONDS)). Agendar es O(1) (append al slot) y
+  avanzar visita solo los ticks transcurridos, O(1) amortizado por aviso;
+  no hay heap que reordenar aunque haya millones pendientes. Cancelar es
+  perezoso: al vencer se relee la tarea y se descarta si se borró, se
+  editó la fecha/hora o ya se avisó.
+
+Entrada
+  - add_task_listener: cada tarea nueva o editada se agenda al guardarse
+  - catch_up() al arrancar: recorre el store; lo futuro se agenda y lo
+    vencido hace menos de REMINDER_CATCHUP_SECONDS sale en el primer tick
+
+Salida
+  - coalescing: lo que vence en el mismo tick para un usuario sale en un
+    solo mensaje
+  - lotes de REMINDER_BATCH_SIZE mensajes al sender (outbound_message_service)
+  - task_store.mark_tasks_notified reclama las tareas con compare-and-set
+    antes de enviar: notified_at queda en la tarea (journal/sqlite/redis),
+    así un reinicio o un segundo worker no repiten el aviso. Si el envío
+    falla el aviso se pierde (a lo más una vez) y queda en las stats.
+"""
+from __future__ import annotations
+
+import atexit
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from app.config import settings
+from app.domain.task import Task
+from app.services.datetime_parser import TIMEZONE
+from app.services.outbound_message_service import (
+    MessageSender,
+    OutboundMessage,
+    get_message_sender,
+    is_reachable,
+)
+from app.stores import task_store
+
+logger = logging.getLogger(__name__)
+
+# (user_key, task_id, due_ts)
+Entry = Tuple[str, str, float]
+
+
+# ======================================================
+# Rueda de tiempo
+# ======================================================
+
+class TimingWheel:
+    """
+    slot absoluto → entradas. Lo agendado en un tick ya recorrido va a
+    `overdue` y sale en el siguiente advance().
+    """
+
+    def __init__(self, tick_seconds: float):
+        self.tick = float(tick_seconds)
+        self._slots: Dict[int, List[Any]] = {}
+        self._overdue: List[Any] = []
+        self._cursor: Optional[int] = None  # último tick ya vencido
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def schedule(self, due_ts: float, item: Any) -> None:
+        slot = int(due_ts // self.tick)
+        if self._cursor is not None and slot <= self._cursor:
+            self._overdue.append(item)
+        else:
+            self._slots.setdefault(slot, []).append(item)
+        self._size += 1
+
+    def advance(self, now_ts: float) -> List[Any]:
+        target = int(now_ts // self.tick)
+        due, self._overdue = self._overdue, []
+        if self._cursor is None or target - self._cursor > len(self._slots):
+            # Primer avance o salto largo (proceso dormido): más barato
+            # visitar los slots ocupados que cada tick del hueco
+            ticks: Iterable[int] = sorted(slot for slot in self._slots if slot <= target)
+        else:
+            ticks = range(self._cursor + 1, target + 1)
+        for slot in ticks:
+            items = self._slots.pop(slot, None)
+            if items:
+                due.extend(items)
+        if self._cursor is None or target > self._cursor:
+            self._cursor = target
+        self._size -= len(due)
+        return due
+
+
+# ======================================================
+# Despachador
+# ======================================================
+
+def due_at(task: Task) -> Optional[float]:
+    """Epoch en que toca avisar; None si la tarea no lleva aviso."""
+    if task.status != "active" or task.notified_at or task.fecha_date is None or task.hora_time is None:
+        return None
+    start = datetime.combine(task.fecha_date, task.hora_time, tzinfo=TIMEZONE)
+    if task.type == "reminder":
+        return start.timestamp()
+    if task.type == "calendar":
+        return (start - timedelta(minutes=settings.REMINDER_CALENDAR_LEAD_MINUTES)).timestamp()
+    return None
+
+
+def _describe(task: Task) -> str:
+    text = f"{task.hora} {task.content}"
+    if task.type == "calendar":
+        where = task.meeting_link or (task.location if task.location not in (None, "No especificado") else None)
+        if where:
+            text += f" ({where})"
+    return text
+
+
+def format_reminder_message(tasks: List[Task]) -> str:
+    if len(tasks) == 1:
+        task = tasks[0]
+        if task.type == "calendar":
+            return f"📅 En {settings.REMINDER_CALENDAR_LEAD_MINUTES} min: {_describe(task)}"
+        return f"⏰ Recordatorio: {task.content}"
+    lines = [f"🔔 Tienes {len(tasks)} pendientes:"]
+    lines += [f"{'📅' if task.type == 'calendar' else '⏰'} {_describe(task)}" for task in tasks]
+    return "\n".join(lines)
+
+
+class ReminderDispatcher:
+    def __init__(
+        self,
+        sender: MessageSender,
+        *,
+        tick_seconds: float = 30.0,
+        batch_size: int = 50,
+        catchup_seconds: float = 21600.0,
+    ):
+        self.sender = sender
+        self.batch_size = max(1, int(batch_size))
+        self.catchup_seconds = float(catchup_seconds)
+        self.wheel = TimingWheel(tick_seconds)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.stats_counters = {
+            "scheduled": 0, "fired": 0, "stale": 0, "skipped": 0,
+            "messages": 0, "failed": 0, "caught_up": 0, "too_old": 0,
+        }
+
+    # ------------------------------------------------------
+    # Agenda
+    # ------------------------------------------------------
+
+    def schedule(self, task: Task, now: Optional[float] = None) -> bool:
+        due = due_at(task)
+        if due is None or not is_reachable(task.user_key):
+            return False
+        now = time.time() if now is None else now
+        if due < now - self.catchup_seconds:
+            self.stats_counters["too_old"] += 1
+            return False
+        with self._lock:
+            self.wheel.schedule(due, (task.user_key, task.id, due))
+            self.stats_counters["scheduled"] += 1
+        return True
+
+    def catch_up(self, now: Optional[float] = None) -> int:
+        """Agenda todo lo pendiente del store (arranque / reinicio)."""
+        now = time.time() if now is None else now
+        scheduled = 0
+        for task in task_store.iter_all_tasks():
+            if self.schedule(task, now):
+                scheduled += 1
+        self.stats_counters["caught_up"] += scheduled
+        logger.info("🔔 Recordatorios agendados al arrancar: %s", scheduled)
+        return scheduled
+
+    # ------------------------------------------------------
+    # Disparo
+    # ------------------------------------------------------
+
+    def run_once(self, now: Optional[float] = None) -> int:
+        """Despacha lo vencido hasta `now`; regresa cuántos mensajes salieron."""
+        now = time.time() if now is None else now
+        with self._lock:
+            due: List[Entry] = self.wheel.advance(now)
+        if not due:
+            return 0
+        self.stats_counters["fired"] += len(due)
+
+        # Coalescing por usuario (orden de vencimiento dentro de cada uno)
+        by_user: "OrderedDict[str, Dict[str, float]]" = OrderedDict()
+        for user_key, task_id, due_ts in sorted(due, key=lambda entry: entry[2]):
+            by_user.setdefault(user_key, {})[task_id] = due_ts
+
+        messages: List[OutboundMessage] = []
+        for user_key, entries in by_user.items():
+            # Cancelación perezosa: la tarea debe seguir igual que al agendarla
+            valid = []
+            for task_id, due_ts in entries.items():
+                task = task_store.get_task(user_key, task_id)
+                if task is not None and due_at(task) == due_ts:
+                    valid.append(task_id)
+                else:
+                    self.stats_counters["stale"] += 1
+            claimed = task_store.mark_tasks_notified(user_key, valid, now)
+            self.stats_counters["skipped"] += len(valid) - len(claimed)
+            if claimed:
+                claimed.sort(key=lambda task: entries[task.id])
+                messages.append(OutboundMessage(to=user_key, body=format_reminder_message(claimed)))
+
+        sent = 0
+        for start in range(0, len(messages), self.batch_size):
+            results = self.sender.send_batch(messages[start:start + self.batch_size])
+            ok = sum(1 for result in results if result)
+            sent += ok
+            self.stats_counters["failed"] += len(results) - ok
+        self.stats_counters["messages"] += sent
+        if messages:
+            logger.info("🔔 Recordatorios: %s vencidos → %s mensajes (%s enviados)", len(due), len(messages), sent)
+        return sent
+
+    # ------------------------------------------------------
+    # Hilo
+    # ------------------------------------------------------
+
+    def start(self) -> None:
+        task_store.add_task_listener(self.schedule)
+        self.catch_up()
+        self._thread = threading.Thread(target=self._run, name="reminder-dispatcher", daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+
+    def _run(self) -> None:
+        # El primer tick despacha de inmediato lo vencido del catch-up
+        while True:
+            try:
+                self.run_once()
+            except Exception:
+                logger.exception("Error en el despachador de recordatorios")
+            if self._stop.wait(self.wheel.tick):
+                return
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=5)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats_counters,
+            "pending": len(self.wheel),
+            "tick_seconds": self.wheel.tick,
+            "sender": self.sender.stats(),
+        }
+
+
+_DISPATCHER: Optional[ReminderDispatcher] = None
+
+
+def start_reminder_dispatcher(sender: Optional[MessageSender] = None) -> ReminderDispatcher:
+    """Uno por proceso; lo arranca create_app con REMINDER_DISPATCHER_ENABLED."""
+    global _DISPATCHER
+    if _DISPATCHER is None:
+        _DISPATCHER = ReminderDispatcher(
+            sender or get_message_sender(),
+            tick_seconds=settings.REMINDER_TICK_SECONDS,
+            batch_size=settings.REMINDER_BATCH_SIZE,
+            catchup_seconds=settings.REMINDER_CATCHUP_SECONDS,
+        )
+        _DISPATCHER.start()
+    return _DISPATCHER
+
+
+def get_reminder_dispatcher_stats() -> Optional[Dict[str, Any]]:
+    return _DISPATCHER.stats() if _DISPATCHER is not None else None
@@ -23,7 +23,8 @@ def evaluate_domain(noun: str) -> dict:
     if not results:
         return {"allowed": False, "reason": "no_results"}
 
-    best_score = results[0]["score"]
+    # Con fusión RRF el primero no siempre es el de mayor coseno
+    best_score = max(float(r["score"]) for r in results)
 
     if best_score >= HIGH_THRESHOLD:
         return {
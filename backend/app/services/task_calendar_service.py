@@ -1,24 +1,33 @@
+from app.config import settings
 from app.services.calendar_ics import crear_invitacion_ics
+from app.services.calendar_feed_service import feed_enabled, feed_path
 from app.domain.task import Task
 
 
 def generate_ics_for_task(task: Task) -> dict | None:
     """
-    Genera ICS solo si la tarea tiene fecha y hora válidas.
-    Nunca lanza excepción (fail-safe).
+    Liga al evento dentro del feed .ics del usuario (GET feed_url) y al
+    feed completo para suscribirse. El .ics completo en la respuesta
+    (ics_content) con CALENDAR_INLINE_ICS, o siempre que el feed esté
+    apagado (sin CALENDAR_FEED_SECRET): así la descarga no depende de él.
+    Solo si la tarea tiene fecha y hora válidas.
     """
 
     if not task.fecha or not task.hora:
         return None
 
-    ics_content = crear_invitacion_ics(
-        titulo=task.content,
-        descripcion=task.description or task.content,
-        fecha=str(task.fecha),
-        hora=str(task.hora),
-    )
+    payload = {"filename": f"evento_{task.fecha}_{task.hora}.ics"}
 
-    return {
-        "ics_content": ics_content,
-        "filename": f"evento_{task.fecha}_{task.hora}.ics",
-    }
\ No newline at end of file
+    if feed_enabled():
+        payload["feed_url"] = feed_path(task.user_key, task.id)
+        payload["subscribe_url"] = feed_path(task.user_key)
+
+    if settings.CALENDAR_INLINE_ICS or not feed_enabled():
+        payload["ics_content"] = crear_invitacion_ics(
+            titulo=task.content,
+            descripcion=task.description or task.content,
+            fecha=str(task.fecha),
+            hora=str(task.hora),
+        )
+
+    return payload
@@ -5,8 +5,8 @@ import re
 
 from app.services.task_calendar_service import generate_ics_for_task
 from app.services.task_content_synthesizer import synthesize_task_content
-from app.stores.task_store import add_task, get_tasks_grouped
-from app.domain.task import Task
+from app.stores.task_store import add_task
+from app.domain.task import Task, task_to_dict
 
 logger = logging.getLogger(__name__)
 
@@ -285,15 +285,10 @@ def continue_task(*, state: Any, user_message: str) -> Dict[str, Any]:
     state.awaiting_slot = None
     state.slots = {}
 
-    tasks_grouped = get_tasks_grouped(task.user_key)
-
+    # La lista de tareas (completa o delta) la agrega cerebro_service según
+    # el canal; ver build_tasks_sync
     return {
         "action": "task",
-        "task": task.__dict__,
-        "tasks": {
-            "calendar": [t.__dict__ for t in tasks_grouped["calendar"]],
-            "reminder": [t.__dict__ for t in tasks_grouped["reminder"]],
-            "note": [t.__dict__ for t in tasks_grouped["note"]],
-        },
+        "task": task_to_dict(task),
         "ics": ics_payload,
     }
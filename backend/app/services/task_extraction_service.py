@@ -0,0 +1,236 @@
+"""
+Extracción estructurada de tareas en UNA llamada al LLM.
+
+Antes, crear un evento pasaba por normalize_datetime_from_text (en
+analyze_task), otra vez normalize_datetime_from_text y
+normalize_calendar_event (en el agente): 3-4 llamadas secuenciales a Groq
+para obtener fecha/hora/título/ubicación. Aquí una sola llamada regresa
+todos los campos con un esquema JSON estricto; el resultado lo comparten
+analyze_task, el agente y el follow-up (vía state.slots).
+
+El esquema se manda como response_format (json_schema si el modelo lo
+soporta, json_object si no; ver TASK_EXTRACTION_RESPONSE_FORMAT) y además
+se valida localmente: lo que no cumpla el esquema se descarta a null, y
+missing_fields se recalcula aquí a partir de los campos, no se confía en
+el modelo.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import re
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from app.config import settings
+from app.domain.task import parse_fecha, parse_hora
+from app.services.datetime_parser import WEEKDAY_NAMES, now_local, parse_spanish_datetime
+from app.services.groq_service import run_groq_completion
+from app.clients.groq_client import get_groq_client, get_groq_api_key
+
+logger = logging.getLogger(__name__)
+
+TASK_EXTRACTION_SCHEMA: Dict[str, Any] = {
+    "type": "object",
+    "properties": {
+        "titulo": {"type": "string"},
+        "descripcion": {"type": ["string", "null"]},
+        "fecha": {"type": ["string", "null"], "description": "YYYY-MM-DD"},
+        "hora": {"type": ["string", "null"], "description": "HH:MM (24 horas)"},
+        "ubicacion": {"type": ["string", "null"]},
+        "meeting_type": {"type": ["string", "null"], "enum": ["virtual", "presencial", None]},
+        "meeting_link": {"type": ["string", "null"]},
+        "missing_fields": {
+            "type": "array",
+            "items": {"type": "string", "enum": ["datetime", "meeting_link"]},
+        },
+    },
+    "required": [
+        "titulo", "descripcion", "fecha", "hora", "ubicacion",
+        "meeting_type", "meeting_link", "missing_fields",
+    ],
+    "additionalProperties": False,
+}
+
+SYSTEM_PROMPT = """
+Eres un extractor de tareas (eventos, recordatorios y notas).
+Devuelve ÚNICAMENTE un JSON válido con este esquema, sin markdown:
+
+{
+  "titulo": string,
+  "descripcion": string | null,
+  "fecha": "YYYY-MM-DD" | null,
+  "hora": "HH:MM" | null,
+  "ubicacion": string | null,
+  "meeting_type": "virtual" | "presencial" | null,
+  "meeting_link": string | null,
+  "missing_fields": ["datetime" | "meeting_link", ...]
+}
+
+Reglas:
+- El usuario manda {"text", "task_type", "today", "now", "weekday", "timezone"}.
+  Resuelve fechas relativas ("mañana", "el viernes", "en 2 horas") con
+  esa referencia.
+- titulo: corto y limpio, sin fecha, hora ni lugar, y sin palabras
+  instruccionales ("Agendar", "Programar", "Recuérdame", "Anota").
+  Para recordatorios, una acción en infinitivo ("Lavar el carro").
+- descripcion: puede ampliar el contexto; para notas, el contenido completo
+  con su significado original.
+- hora en formato 24 horas.
+- meeting_type: "virtual" si es videollamada/zoom/teams/meet/llamada,
+  "presencial" si es en persona/oficina/sala; si no, null.
+- missing_fields: "datetime" si a un evento o recordatorio le falta fecha u
+  hora; "meeting_link" si es virtual y no hay liga.
+- NO inventes datos: lo que no esté en el texto va en null.
+"""
+
+_URL_RE = re.compile(r"https?://\S+")
+
+_VIRTUAL_KEYWORDS = (
+    "video llamada", "videollamada", "llamada", "zoom", "teams",
+    "google meet", "meet", "virtual", "online", "remoto",
+    "conferencia", "conferencia virtual", "skype", "webex",
+)
+
+_PRESENCIAL_KEYWORDS = (
+    "presencial", "en persona", "en oficina", "físico",
+    "cara a cara", "en el sitio", "en la empresa",
+    "sala de juntas", "oficina", "local",
+)
+
+
+def detect_meeting_type(text: str) -> Optional[str]:
+    """Detección por palabras clave (la misma que usaba analyze_task)."""
+    text_lower = (text or "").lower()
+    if any(keyword in text_lower for keyword in _VIRTUAL_KEYWORDS):
+        return "virtual"
+    if any(keyword in text_lower for keyword in _PRESENCIAL_KEYWORDS):
+        return "presencial"
+    return None
+
+
+def _parse_json(raw: Optional[str]) -> Dict[str, Any]:
+    if not raw or not raw.strip():
+        return {}
+
+    cleaned = raw.strip()
+    if cleaned.startswith("```"):
+        cleaned = cleaned[3:]
+        if cleaned.endswith("```"):
+            cleaned = cleaned[:-3]
+        cleaned = cleaned.strip()
+        lines = cleaned.splitlines()
+        if lines and lines[0].strip().lower() == "json":
+            cleaned = "\n".join(lines[1:]).strip()
+
+    try:
+        data = json.loads(cleaned)
+        if isinstance(data, dict):
+            return data
+    except Exception:
+        pass
+    return {}
+
+
+def _text_or_none(value: Any) -> Optional[str]:
+    if isinstance(value, str) and value.strip() and value.strip().lower() != "null":
+        return value.strip()
+    return None
+
+
+def missing_fields_for(task_type: str, extraction: Dict[str, Any]) -> List[str]:
+    missing: List[str] = []
+    if task_type in ("calendar", "reminder") and not (extraction.get("fecha") and extraction.get("hora")):
+        missing.append("datetime")
+    if task_type == "calendar" and extraction.get("meeting_type") == "virtual" and not extraction.get("meeting_link"):
+        missing.append("meeting_link")
+    return missing
+
+
+def coerce_extraction(data: Dict[str, Any], *, text: str, task_type: str) -> Dict[str, Any]:
+    """Ajusta la salida del modelo al esquema; lo inválido queda en null."""
+    fecha = _text_or_none(data.get("fecha"))
+    hora = _text_or_none(data.get("hora"))
+    fecha_date = parse_fecha(fecha)
+    hora_time = parse_hora(hora)
+
+    meeting_type = data.get("meeting_type")
+    if meeting_type not in ("virtual", "presencial"):
+        meeting_type = detect_meeting_type(text)
+
+    meeting_link = _text_or_none(data.get("meeting_link"))
+    if not meeting_link or not _URL_RE.match(meeting_link):
+        url_match = _URL_RE.search(text or "")
+        meeting_link = url_match.group(0) if url_match else None
+
+    extraction: Dict[str, Any] = {
+        "titulo": _text_or_none(data.get("titulo")) or (text or "").strip(),
+        "descripcion": _text_or_none(data.get("descripcion")),
+        "fecha": fecha_date.isoformat() if fecha_date else None,
+        "hora": hora_time.strftime("%H:%M") if hora_time else None,
+        "ubicacion": _text_or_none(data.get("ubicacion")),
+        "meeting_type": meeting_type,
+        "meeting_link": meeting_link,
+    }
+    extraction["missing_fields"] = missing_fields_for(task_type, extraction)
+    return extraction
+
+
+def _response_format() -> Optional[Dict[str, Any]]:
+    mode = (settings.TASK_EXTRACTION_RESPONSE_FORMAT or "").lower()
+    if mode == "json_schema":
+        return {
+            "type": "json_schema",
+            "json_schema": {"name": "task_extraction", "schema": TASK_EXTRACTION_SCHEMA, "strict": True},
+        }
+    if mode == "json_object":
+        return {"type": "json_object"}
+    return None
+
+
+def extract_task(*, text: str, task_type: str, now: Optional[datetime] = None) -> Dict[str, Any]:
+    """
+    Una sola llamada: titulo, descripcion, fecha, hora, ubicacion,
+    meeting_type, meeting_link y missing_fields.
+    """
+    now = now or now_local()
+
+    messages = [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {
+            "role": "user",
+            "content": json.dumps({
+                "text": text,
+                "task_type": task_type,
+                "today": now.strftime("%Y-%m-%d"),
+                "now": now.isoformat(timespec="minutes"),
+                "weekday": WEEKDAY_NAMES[now.weekday()],
+                "timezone": "America/Mexico_City",
+            }, ensure_ascii=False),
+        },
+    ]
+
+    try:
+        raw = run_groq_completion(
+            messages=messages,
+            groq_client=get_groq_client(),
+            groq_api_key=get_groq_api_key(),
+            temperature=0.0,
+            max_tokens=300,
+            response_format=_response_format(),
+        )
+    except Exception:
+        logger.exception("❌ Error en extract_task")
+        raw = None
+
+    logger.info("🧾 extract_task | task_type=%s raw=%r", task_type, raw)
+    data = _parse_json(raw)
+
+    # Si el parser por reglas está seguro, su fecha/hora manda: es
+    # determinística y no depende de que el modelo resuelva bien "el viernes".
+    # Solo lo que encontró: "a las 9 pm" no borra la fecha del modelo
+    rules = parse_spanish_datetime(text, now)
+    if rules.confidence >= settings.DATETIME_RULES_MIN_CONFIDENCE:
+        data.update({key: value for key, value in rules.as_strings().items() if value is not None})
+
+    return coerce_extraction(data, text=text, task_type=task_type)
@@ -4,8 +4,8 @@ from app.agents.task.calendar_agent import CalendarTaskAgent
 from app.agents.task.reminder_agent import ReminderTaskAgent
 from app.agents.task.note_agent import NoteAgent as NoteTaskAgent
 
-from app.domain.task import Task
-from app.stores.task_store import add_task, get_tasks_grouped
+from app.domain.task import Task, task_to_dict
+from app.stores.task_store import add_task
 from app.services.task_analysis_service import analyze_task
 from app.services.task_calendar_service import generate_ics_for_task
 
@@ -101,6 +101,7 @@ def process_task(
 
     # -------------------------------------------------
     # 1) Analizar intención / slots (⚠️ firma real: text, task_type)
+    #    Una sola llamada de extracción; el agente usa analysis["extraction"]
     # -------------------------------------------------
     analysis = analyze_task(
         text=normalized,
@@ -142,9 +143,13 @@ def process_task(
         state.intent = "task_enrichment"
         state.awaiting_slot = candidates[0] if candidates else None
 
+        # El follow-up reutiliza la misma extracción (tipo de reunión y liga
+        # incluidos) en lugar de volver a preguntarle al LLM
         state.slots = {
             **agent_result,
             "task_type": ttype,
+            "meeting_type": agent_result.get("meeting_type") or analysis.get("meeting_type"),
+            "meeting_link": agent_result.get("meeting_link") or analysis.get("meeting_link"),
             "location": (
                 agent_result.get("ubicacion")
                 or agent_result.get("lugar")
@@ -207,19 +212,14 @@ def process_task(
     add_task(task_entity)
     print("💾 TASK PERSISTED:", task_entity)
 
-    tasks_grouped = get_tasks_grouped(final_user_key)
-
-    # Mantengo tu comportamiento actual (ics string) para no romper el front:
+    # Liga al evento en el feed .ics del usuario (el .ics completo con
+    # CALENDAR_INLINE_ICS o si el feed está apagado)
     ics = generate_ics_for_task(task_entity)
 
     ret = {
         "action": "task",
-        "task": task_entity.__dict__,
-        "tasks": {
-            "calendar": [t.__dict__ for t in tasks_grouped["calendar"]],
-            "reminder": [t.__dict__ for t in tasks_grouped["reminder"]],
-            "note": [t.__dict__ for t in tasks_grouped["note"]],
-        },
+        "task": task_to_dict(task_entity),
+        # "tasks" / "tasks_delta" los agrega cerebro_service según el canal
         "ics": ics,
     }
 
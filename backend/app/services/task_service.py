@@ -1,5 +1,50 @@
-from app.stores.task_store import delete_task_by_id, get_tasks_grouped
+from typing import Any, Dict, Optional
+
+from app.domain.task import tasks_payload, tasks_to_dicts
+from app.stores.task_store import EPOCH, changes_since, delete_task_by_id, get_tasks_grouped
 
 def delete_task_service(task_id: str, user_key: str):
     delete_task_by_id(task_id, user_key)
     return get_tasks_grouped(user_key)
+
+
+# ======================================================
+# Sincronización de la lista de tareas (deltas versionados)
+# ======================================================
+
+def _parse_tasks_version(token: Optional[str]) -> Optional[int]:
+    """"<epoch>.<versión>" → versión; None si falta o es de otro epoch."""
+    if not token or not isinstance(token, str):
+        return None
+    epoch, _, version = token.rpartition(".")
+    if epoch != EPOCH:
+        return None
+    try:
+        return int(version)
+    except ValueError:
+        return None
+
+
+def build_tasks_sync(user_key: str, tasks_version: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Campos de la lista de tareas para una respuesta.
+
+    Sin tasks_version (o si ya no alcanza el historial) regresa la lista
+    completa en "tasks", igual que antes. Con una versión conocida regresa
+    solo "tasks_delta": tareas agregadas/cambiadas y ids borrados desde
+    ella. En ambos casos "tasks_version" es la versión que el cliente debe
+    mandar la próxima vez.
+    """
+    since = _parse_tasks_version(tasks_version)
+    version, changed, deleted = changes_since(user_key, since)
+    token = f"{EPOCH}.{version}"
+    if changed is None:
+        return {"tasks": tasks_payload(get_tasks_grouped(user_key)), "tasks_version": token}
+    return {
+        "tasks_delta": {
+            "since": tasks_version,
+            "changed": tasks_to_dicts(changed),
+            "deleted": deleted,
+        },
+        "tasks_version": token,
+    }
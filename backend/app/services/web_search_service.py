@@ -4,8 +4,10 @@ import dotenv
 import re
 from openai.types.responses import WebSearchToolParam
 
+from app.config import settings
+
 OPENAI_API_KEY = dotenv.get_key(".env", "OPENAI_API_KEY")
-client = OpenAI(api_key=OPENAI_API_KEY)
+client = OpenAI(api_key=OPENAI_API_KEY, base_url=settings.OPENAI_BASE_URL or None)
 
 
 def sanitize_preserving_markdown(text: str) -> str:
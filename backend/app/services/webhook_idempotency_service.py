@@ -0,0 +1,154 @@
+"""
+Ingesta idempotente de webhooks de Twilio, por MessageSid.
+
+Twilio reintenta el webhook si la respuesta tarda; cada reintento volvía a
+correr el pipeline completo (LLM, tareas, memoria). Aquí cada MessageSid
+se procesa una sola vez:
+  - el primer request reclama el SID con compare-and-set (versión 0) y
+    guarda {"status": "processing"}
+  - un duplicado en vuelo espera al original (evento local si es el mismo
+    proceso, polling del backend si no) hasta WEBHOOK_IDEMPOTENCY_WAIT_SECONDS
+  - al terminar se guarda la respuesta (TwiML, status, headers) y los
+    duplicados posteriores la reciben tal cual
+
+El store es un namespace del state backend (memoria acotada por entradas
+o SQLite/Redis compartido entre workers) con TTL. Si el procesamiento
+lanza excepción la entrada se borra: el siguiente reintento vuelve a
+procesar. Una entrada "processing" más vieja que
+WEBHOOK_IDEMPOTENCY_STALE_SECONDS (worker caído) se puede volver a reclamar.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from app.config import settings
+from app.stores.state_backend import VersionConflict, create_state_backend
+
+logger = logging.getLogger(__name__)
+
+Response = Tuple[str, int, Dict[str, str]]
+
+PROCESSING = "processing"
+DONE = "done"
+
+# Polling del backend cuando el original corre en otro proceso
+_POLL_SECONDS = 0.05
+
+_MESSAGES = create_state_backend(
+    "webhook_messages",
+    ttl_seconds=settings.WEBHOOK_IDEMPOTENCY_TTL_SECONDS,
+    max_entries=settings.WEBHOOK_IDEMPOTENCY_MAX_ENTRIES,
+    sweep_interval=60,
+)
+
+_WAITERS: Dict[str, threading.Event] = {}
+_LOCK = threading.Lock()
+_COUNTERS = {"processed": 0, "replayed": 0, "waited": 0, "timeouts": 0, "reclaimed": 0, "failed": 0}
+
+
+def _count(name: str) -> None:
+    with _LOCK:
+        _COUNTERS[name] += 1
+
+
+def _is_stale(entry: Dict[str, Any]) -> bool:
+    return (
+        entry.get("status") == PROCESSING
+        and time.time() - float(entry.get("started_at") or 0) > settings.WEBHOOK_IDEMPOTENCY_STALE_SECONDS
+    )
+
+
+def _claim(message_sid: str, version: int) -> bool:
+    try:
+        _MESSAGES.put(message_sid, {"status": PROCESSING, "started_at": time.time()}, expected_version=version)
+        return True
+    except VersionConflict:
+        return False
+
+
+def _wait(message_sid: str, timeout: float) -> None:
+    with _LOCK:
+        event = _WAITERS.get(message_sid)
+    if event is not None:
+        event.wait(timeout)
+    else:
+        time.sleep(min(timeout, _POLL_SECONDS))
+
+
+def _run_claimed(message_sid: str, fn: Callable[[], Response]) -> Response:
+    event = threading.Event()
+    with _LOCK:
+        _WAITERS[message_sid] = event
+    try:
+        try:
+            body, status, headers = fn()
+        except Exception:
+            _count("failed")
+            _MESSAGES.delete(message_sid)
+            raise
+        _MESSAGES.put(message_sid, {
+            "status": DONE,
+            "response": [body, status, dict(headers)],
+            "finished_at": time.time(),
+        })
+        _count("processed")
+        return body, status, headers
+    finally:
+        with _LOCK:
+            _WAITERS.pop(message_sid, None)
+        event.set()
+
+
+def run_once(
+    message_sid: Optional[str],
+    fn: Callable[[], Response],
+    on_timeout: Callable[[], Response],
+) -> Response:
+    """
+    Corre fn() una sola vez por message_sid y regresa su respuesta; los
+    duplicados reciben la misma. on_timeout() contesta a un duplicado que
+    se cansó de esperar al original (el siguiente reintento ya la encuentra).
+    Sin SID (o con la idempotencia apagada) solo corre fn().
+    """
+    if not settings.WEBHOOK_IDEMPOTENCY_ENABLED or not message_sid:
+        return fn()
+
+    deadline = time.monotonic() + settings.WEBHOOK_IDEMPOTENCY_WAIT_SECONDS
+    waited = False
+    while True:
+        entry, version = _MESSAGES.get(message_sid)
+
+        if entry is None or _is_stale(entry):
+            if _claim(message_sid, version):
+                if entry is not None:
+                    _count("reclaimed")
+                    logger.warning("⚠️ MessageSid %s abandonado en proceso; se vuelve a procesar", message_sid)
+                return _run_claimed(message_sid, fn)
+            # Otro request lo reclamó entre la lectura y el put: releer
+            continue
+
+        if entry.get("status") == DONE:
+            _count("replayed")
+            logger.info("🔁 MessageSid %s duplicado; se reenvía la respuesta guardada", message_sid)
+            body, status, headers = entry["response"]
+            return body, status, headers
+
+        if not waited:
+            waited = True
+            _count("waited")
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            _count("timeouts")
+            logger.warning("⏳ MessageSid %s sigue en proceso; el duplicado no espera más", message_sid)
+            return on_timeout()
+        _wait(message_sid, remaining)
+
+
+def get_webhook_idempotency_stats() -> Dict[str, Any]:
+    with _LOCK:
+        counters = dict(_COUNTERS)
+        in_flight = len(_WAITERS)
+    return {**_MESSAGES.stats(), **counters, "in_flight": in_flight}
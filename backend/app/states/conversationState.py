@@ -8,3 +8,4 @@ class ConversationState:
     awaiting_slot: Optional[str] = None
     original_query: Optional[str] = None   # 👈 NUEVO
     updated_at: float = field(default_factory=time.time)
+    version: int = 0  # versión optimista del backend de estado (no se persiste)
@@ -1,38 +1,107 @@
+import logging
 import time
-from typing import Dict
+from dataclasses import asdict
+from typing import Any, Dict, Optional
+from app.config import settings
 from app.states.conversationState import ConversationState
+from app.stores.state_backend import VersionConflict, create_state_backend
 
-_CACHE: Dict[str, ConversationState] = {}
-TTL_SECONDS = 300  # 5 minutos
+logger = logging.getLogger(__name__)
+
+TTL_SECONDS = settings.CONVERSATION_TTL_SECONDS  # 5 minutos por default
+
+
+def _parse_ttl_by_intent(raw: str) -> Dict[str, float]:
+    ttls: Dict[str, float] = {}
+    for part in (raw or "").split(","):
+        intent, _, seconds = part.partition("=")
+        if intent.strip() and seconds.strip():
+            try:
+                ttls[intent.strip()] = float(seconds)
+            except ValueError:
+                logger.warning(f"⚠️ TTL inválido para intent {intent.strip()}: {seconds}")
+    return ttls
+
+
+# El enriquecimiento de tareas espera a que el usuario busque una liga o
+# una hora; la pregunta de país de Claro es de ida y vuelta inmediata.
+TTL_BY_INTENT: Dict[str, float] = _parse_ttl_by_intent(settings.CONVERSATION_TTL_BY_INTENT)
+
+
+def ttl_for(intent: Optional[str]) -> float:
+    return TTL_BY_INTENT.get(intent or "", TTL_SECONDS)
+
+
+# Compartido entre workers según STATE_BACKEND: el follow-up de WhatsApp
+# puede caer en otro worker y aun así encontrar su awaiting_slot. El
+# vencimiento lo aplica el backend (heap de vencimientos + barrido
+# periódico en memoria, índice por expires_at en SQLite, PX en Redis).
+_CACHE = create_state_backend(
+    "conversation",
+    ttl_seconds=TTL_SECONDS,
+    sweep_interval=settings.CONVERSATION_SWEEP_SECONDS,
+)
 
 print("🔥 conversationStore LOADED", id(globals()))
 
+
+def _to_dict(state: ConversationState) -> Dict[str, Any]:
+    data = asdict(state)
+    data.pop("version", None)
+    return data
+
+
 def load_state(user_key: str) -> ConversationState:
     print("📤 load_state:", user_key)
     if not user_key:
         return ConversationState()
 
-    state = _CACHE.get(user_key)
-    if not state:
+    data, version = _CACHE.get(user_key)
+    if not data:
         return ConversationState()
 
-    if time.time() - state.updated_at > TTL_SECONDS:
-        _CACHE.pop(user_key, None)
+    if time.time() - data.get("updated_at", 0) > ttl_for(data.get("intent")):
+        _CACHE.delete(user_key)
         return ConversationState()
 
-    return state
+    return ConversationState(**data, version=version)
 
 
-def save_state(user_key: str, state: ConversationState):
+def save_state(user_key: str, state: ConversationState) -> bool:
+    """
+    Guarda solo si nadie más escribió desde el load_state de este turno.
+    Si otro turno concurrente ganó, su estado se conserva (es el más
+    reciente) y se regresa False.
+    """
     print("💾 save_state:", user_key, state)
 
     if not user_key:
-        return
+        return False
     state.updated_at = time.time()
-    _CACHE[user_key] = state
+    try:
+        state.version = _CACHE.put(
+            user_key,
+            _to_dict(state),
+            expected_version=state.version,
+            ttl_seconds=ttl_for(state.intent),
+        )
+    except VersionConflict as e:
+        logger.warning(f"⚠️ Estado de {user_key} modificado por otro turno, se descarta este guardado ({e})")
+        return False
+    return True
 
 
 def clear_state(user_key: str):
     if not user_key:
         return
-    _CACHE.pop(user_key, None)
+    _CACHE.delete(user_key)
+
+
+def count_live_states() -> Optional[int]:
+    """Estados no vencidos (None si el backend no puede contarlos)."""
+    return _CACHE.count()
+
+
+def get_state_stats() -> Dict[str, Any]:
+    live = count_live_states()
+    return {**_CACHE.stats(), "live": live, "ttl_by_intent": TTL_BY_INTENT}
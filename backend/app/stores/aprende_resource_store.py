@@ -0,0 +1,324 @@
+"""
+Store compacto de recursos Aprende por curso (SQLite, solo lectura).
+
+Sustituye en runtime al literal `recursos_por_curso.py` (≈3.4 MB de
+código Python que se compila y vive completo en cada worker).
+El archivo `app/data/recursos_por_curso.sqlite` se genera offline a
+partir del literal y se abre de forma perezosa, con mmap, en la
+primera consulta.
+
+Construir / medir (desde backend/):
+    python app/stores/aprende_resource_store.py build
+    python app/stores/aprende_resource_store.py measure
+
+Este módulo solo depende de la stdlib para poder cargarse aislado
+(medición de arranque/RSS sin el resto de la app).
+"""
+from __future__ import annotations
+
+import importlib
+import logging
+import os
+import re
+import sqlite3
+import sys
+import threading
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 64 MB de mmap: cubre el archivo completo con holgura
+MMAP_SIZE = 64 * 1024 * 1024
+
+_RESOURCE_ID_RE = re.compile(r"resourceId=(\d+)")
+
+_SCHEMA = """
+CREATE TABLE courses (
+    course_id   TEXT PRIMARY KEY,
+    course_name TEXT NOT NULL
+) WITHOUT ROWID;
+
+CREATE TABLE resources (
+    course_id            TEXT NOT NULL,
+    position             INTEGER NOT NULL,
+    resource_id          TEXT,
+    resource_name        TEXT,
+    resource_description TEXT,
+    resource_poster      TEXT,
+    resource_redirection TEXT,
+    PRIMARY KEY (course_id, position)
+) WITHOUT ROWID;
+
+CREATE INDEX idx_resources_resource_id ON resources (resource_id);
+"""
+
+_RESOURCE_COLUMNS = (
+    "course_id, resource_id, resource_name, resource_description, "
+    "resource_poster, resource_redirection"
+)
+
+
+def get_resource_store_path() -> str:
+    env = os.getenv("APRENDE_RESOURCE_STORE_PATH")
+    if env:
+        return env
+    here = os.path.dirname(__file__)
+    return os.path.abspath(os.path.join(here, "..", "data", "recursos_por_curso.sqlite"))
+
+
+def _row_to_resource(row: Tuple[Any, ...]) -> Dict[str, Any]:
+    # Mismas llaves que el literal + ids explícitos
+    return {
+        "courseId": row[0],
+        "resourceId": row[1],
+        "resourceName": row[2],
+        "resourceDescription": row[3],
+        "resourcePoster": row[4],
+        "resourceRedirection": row[5],
+    }
+
+
+class AprendeResourceStore:
+    """
+    Acceso de solo lectura al store SQLite.
+    Una conexión por hilo (sqlite3 no comparte conexiones entre hilos).
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or get_resource_store_path()
+        self._local = threading.local()
+
+    # --------------------------------------------------
+    # Conexión perezosa
+    # --------------------------------------------------
+
+    def _conn(self) -> Optional[sqlite3.Connection]:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            return conn
+
+        if not os.path.exists(self.path):
+            logger.warning("Store de recursos no encontrado en %s", self.path)
+            return None
+
+        conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True)
+        conn.execute(f"PRAGMA mmap_size={MMAP_SIZE}")
+        conn.execute("PRAGMA query_only=1")
+        self._local.conn = conn
+        return conn
+
+    def available(self) -> bool:
+        return self._conn() is not None
+
+    # --------------------------------------------------
+    # API pública
+    # --------------------------------------------------
+
+    def get_resources(self, course_id: Any) -> List[Dict[str, Any]]:
+        conn = self._conn()
+        if conn is None:
+            return []
+        rows = conn.execute(
+            f"SELECT {_RESOURCE_COLUMNS} FROM resources WHERE course_id = ? ORDER BY position",
+            (str(course_id),),
+        ).fetchall()
+        return [_row_to_resource(r) for r in rows]
+
+    def get_resource(self, resource_id: Any, course_id: Any = None) -> Optional[Dict[str, Any]]:
+        """
+        Un mismo resourceId puede aparecer en más de un curso;
+        sin course_id se regresa la primera aparición.
+        """
+        conn = self._conn()
+        if conn is None:
+            return None
+        if course_id is not None:
+            row = conn.execute(
+                f"SELECT {_RESOURCE_COLUMNS} FROM resources "
+                "WHERE resource_id = ? AND course_id = ? LIMIT 1",
+                (str(resource_id), str(course_id)),
+            ).fetchone()
+        else:
+            row = conn.execute(
+                f"SELECT {_RESOURCE_COLUMNS} FROM resources "
+                "WHERE resource_id = ? ORDER BY course_id, position LIMIT 1",
+                (str(resource_id),),
+            ).fetchone()
+        return _row_to_resource(row) if row else None
+
+    def get_course_name(self, course_id: Any) -> Optional[str]:
+        conn = self._conn()
+        if conn is None:
+            return None
+        row = conn.execute(
+            "SELECT course_name FROM courses WHERE course_id = ?",
+            (str(course_id),),
+        ).fetchone()
+        return row[0] if row else None
+
+    def iter_courses(self) -> Iterator[Tuple[str, str]]:
+        conn = self._conn()
+        if conn is None:
+            return
+        yield from conn.execute("SELECT course_id, course_name FROM courses")
+
+    def close(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+_store: Optional[AprendeResourceStore] = None
+_store_lock = threading.Lock()
+
+
+def get_resource_store() -> AprendeResourceStore:
+    """Singleton perezoso (no abre el archivo hasta la primera consulta)."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = AprendeResourceStore()
+    return _store
+
+
+def get_resources(course_id: Any) -> List[Dict[str, Any]]:
+    return get_resource_store().get_resources(course_id)
+
+
+def get_resource(resource_id: Any, course_id: Any = None) -> Optional[Dict[str, Any]]:
+    return get_resource_store().get_resource(resource_id, course_id)
+
+
+# ==========================================================
+# BUILD (offline)
+# ==========================================================
+
+def _load_literal(backend_dir: str):
+    if backend_dir not in sys.path:
+        sys.path.insert(0, backend_dir)
+    return importlib.import_module("recursos_por_curso")
+
+
+def build_resource_store(output_path: Optional[str] = None, backend_dir: Optional[str] = None) -> str:
+    """
+    Genera el archivo SQLite a partir de `recursos_por_curso.py`.
+    Se escribe a un temporal y se renombra al final (atómico).
+    """
+    here = os.path.dirname(os.path.abspath(__file__))
+    backend_dir = backend_dir or os.path.abspath(os.path.join(here, "..", ".."))
+    output_path = output_path or get_resource_store_path()
+
+    literal = _load_literal(backend_dir)
+    recursos = literal.recursos_por_curso
+    nombres = dict(getattr(literal, "id_curso_cursos", {}) or {})
+    for cid, course in recursos.items():
+        nombres.setdefault(cid, course.get("courseName") or "")
+
+    tmp_path = output_path + ".tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+    conn = sqlite3.connect(tmp_path)
+    try:
+        conn.executescript(_SCHEMA)
+        conn.executemany(
+            "INSERT INTO courses (course_id, course_name) VALUES (?, ?)",
+            ((str(cid), str(name)) for cid, name in nombres.items()),
+        )
+
+        rows = []
+        for cid, course in recursos.items():
+            for position, r in enumerate(course.get("recursos_por_curso") or []):
+                redirection = r.get("resourceRedirection") or ""
+                m = _RESOURCE_ID_RE.search(redirection)
+                rows.append((
+                    str(cid),
+                    position,
+                    m.group(1) if m else None,
+                    r.get("resourceName"),
+                    r.get("resourceDescription"),
+                    r.get("resourcePoster"),
+                    redirection,
+                ))
+        conn.executemany(
+            "INSERT INTO resources (course_id, position, resource_id, resource_name, "
+            "resource_description, resource_poster, resource_redirection) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            rows,
+        )
+        conn.commit()
+        conn.execute("VACUUM")
+    finally:
+        conn.close()
+
+    os.replace(tmp_path, output_path)
+    print(f"✅ Store generado: {output_path} ({len(nombres)} cursos, {len(rows)} recursos)")
+    return output_path
+
+
+# ==========================================================
+# MEDICIÓN (literal vs store)
+# ==========================================================
+
+_MEASURE_SNIPPET = """
+import resource, sys, time, importlib.util
+sys.path.insert(0, {backend_dir!r})
+t0 = time.perf_counter()
+{body}
+elapsed = (time.perf_counter() - t0) * 1000
+print(f"{{elapsed:.1f}} {{resource.getrusage(resource.RUSAGE_SELF).ru_maxrss}}")
+"""
+
+_MEASURE_BODIES = {
+    "baseline": "pass",
+    "literal": (
+        "import recursos_por_curso as m\n"
+        "res = m.recursos_por_curso['2']['recursos_por_curso']"
+    ),
+    "store": (
+        "spec = importlib.util.spec_from_file_location('rs', {module_path!r})\n"
+        "rs = importlib.util.module_from_spec(spec); spec.loader.exec_module(rs)\n"
+        "res = rs.get_resources('2')"
+    ),
+}
+
+
+def measure(backend_dir: Optional[str] = None) -> Dict[str, Dict[str, float]]:
+    """
+    Arranque (ms) y RSS máximo (KB) en un intérprete limpio:
+    import del literal vs apertura del store + primera consulta.
+    """
+    import subprocess
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    backend_dir = backend_dir or os.path.abspath(os.path.join(here, "..", ".."))
+
+    results: Dict[str, Dict[str, float]] = {}
+    for name, body in _MEASURE_BODIES.items():
+        code = _MEASURE_SNIPPET.format(
+            backend_dir=backend_dir,
+            body=body.format(module_path=os.path.abspath(__file__)),
+        )
+        # -B: sin .pyc, refleja el costo real de compilar el literal en un worker nuevo
+        out = subprocess.run(
+            [sys.executable, "-B", "-c", code],
+            capture_output=True, text=True, check=True, cwd=backend_dir,
+        ).stdout.split()
+        results[name] = {"startup_ms": float(out[0]), "max_rss_kb": float(out[1])}
+
+    for name, r in results.items():
+        print(f"{name:<9} startup={r['startup_ms']:>8.1f} ms | max_rss={r['max_rss_kb'] / 1024:>6.1f} MB")
+    return results
+
+
+if __name__ == "__main__":
+    cmd = sys.argv[1] if len(sys.argv) > 1 else "build"
+    if cmd == "build":
+        build_resource_store(sys.argv[2] if len(sys.argv) > 2 else None)
+    elif cmd == "measure":
+        measure()
+    else:
+        print("Uso: aprende_resource_store.py [build [salida.sqlite] | measure]")
+        sys.exit(2)
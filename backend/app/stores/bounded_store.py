@@ -0,0 +1,223 @@
+"""
+Store en memoria acotado: TTL por entrada, presupuesto global de
+entradas y de bytes, desalojo LRU y barrido periódico en background.
+
+Los bytes son una estimación (tamaño del JSON serializado), suficiente
+para poner techo al crecimiento del RSS por usuarios únicos.
+
+Los vencimientos viven además en un min-heap (expira_en, key): el barrido
+solo toca las entradas vencidas, O(vencidas · log n), en vez de recorrer
+todo el store.
+"""
+from __future__ import annotations
+
+import heapq
+import json
+import logging
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def estimate_size(value: Any) -> int:
+    try:
+        return len(json.dumps(value, ensure_ascii=False, default=str).encode("utf-8"))
+    except Exception:
+        return len(repr(value))
+
+
+class BoundedTTLStore:
+    """
+    key → (valor, expira_en, bytes), en orden LRU (el más viejo al inicio).
+
+    - get() mueve la entrada al final; una entrada vencida cuenta como miss
+    - set() re-mide el valor y renueva su TTL (ttl= lo fija por entrada)
+    - al rebasar max_entries o max_bytes se desaloja desde el inicio
+    """
+
+    SWEEP_BATCH = 1000
+
+    def __init__(
+        self,
+        *,
+        name: str,
+        ttl_seconds: float,
+        max_entries: int,
+        max_bytes: int,
+        sweep_interval: float = 0.0,
+        sizeof: Callable[[Any], int] = estimate_size,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.name = name
+        self.ttl_seconds = float(ttl_seconds)
+        self.max_entries = int(max_entries)
+        self.max_bytes = int(max_bytes)
+        self.sweep_interval = float(sweep_interval)
+        self._sizeof = sizeof
+        self._clock = clock
+
+        self._lock = threading.RLock()
+        self._data: "OrderedDict[str, Tuple[Any, float, int]]" = OrderedDict()
+        # Índice de vencimientos con borrado perezoso: una tupla es válida
+        # solo si coincide con el expira_en vigente de la llave
+        self._expiry: List[Tuple[float, str]] = []
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions: Dict[str, int] = {"ttl": 0, "lru": 0, "bytes": 0}
+
+        self._sweeper: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    # ------------------------------------------------------
+    # API tipo dict
+    # ------------------------------------------------------
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            item = self._data.get(key)
+            return item is not None and item[1] > self._clock()
+
+    def get(self, key: str, default: Any = None) -> Any:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self._misses += 1
+                return default
+            if item[1] <= self._clock():
+                self._remove(key, "ttl")
+                self._misses += 1
+                return default
+            self._data.move_to_end(key)
+            self._hits += 1
+            return item[0]
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        size = self._sizeof(value)
+        expires_at = self._clock() + (self.ttl_seconds if ttl is None else float(ttl))
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self._bytes -= old[2]
+            self._data[key] = (value, expires_at, size)
+            self._bytes += size
+            if not math.isinf(expires_at):
+                heapq.heappush(self._expiry, (expires_at, key))
+                self._maybe_compact_expiry()
+            self._enforce_budgets()
+        self._ensure_sweeper()
+
+    def pop(self, key: str, default: Any = None) -> Any:
+        with self._lock:
+            item = self._data.pop(key, None)
+            if item is None:
+                return default
+            self._bytes -= item[2]
+            return item[0]
+
+    def items(self) -> List[Tuple[str, Any]]:
+        """Copia de (key, valor) vigentes, sin tocar el orden LRU."""
+        now = self._clock()
+        with self._lock:
+            return [(k, item[0]) for k, item in self._data.items() if item[1] > now]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._expiry.clear()
+            self._bytes = 0
+
+    # ------------------------------------------------------
+    # Desalojo
+    # ------------------------------------------------------
+
+    def _remove(self, key: str, reason: str) -> None:
+        item = self._data.pop(key)
+        self._bytes -= item[2]
+        self._evictions[reason] += 1
+
+    def _enforce_budgets(self) -> None:
+        while len(self._data) > self.max_entries:
+            self._remove(next(iter(self._data)), "lru")
+        # Se conserva al menos la entrada recién escrita
+        while self._bytes > self.max_bytes and len(self._data) > 1:
+            self._remove(next(iter(self._data)), "bytes")
+
+    def _maybe_compact_expiry(self) -> None:
+        # Cada renovación deja una tupla obsoleta; se reconstruye el heap
+        # cuando las obsoletas superan a las vigentes
+        if len(self._expiry) > 2 * len(self._data) + 64:
+            self._expiry = [(item[1], k) for k, item in self._data.items() if not math.isinf(item[1])]
+            heapq.heapify(self._expiry)
+
+    def sweep(self) -> int:
+        """Elimina las entradas vencidas; regresa cuántas."""
+        now = self._clock()
+        removed = 0
+        more = True
+        while more:
+            # Por lotes: no se retiene el candado durante un barrido grande
+            with self._lock:
+                for _ in range(self.SWEEP_BATCH):
+                    if not self._expiry or self._expiry[0][0] > now:
+                        more = False
+                        break
+                    expires_at, key = heapq.heappop(self._expiry)
+                    item = self._data.get(key)
+                    if item is not None and item[1] == expires_at:
+                        self._remove(key, "ttl")
+                        removed += 1
+        if removed:
+            logger.info("🧹 %s: %s entradas vencidas eliminadas", self.name, removed)
+        return removed
+
+    # ------------------------------------------------------
+    # Barrido en background
+    # ------------------------------------------------------
+
+    def _ensure_sweeper(self) -> None:
+        """
+        Arranque perezoso (primer set): así también se levanta en cada
+        worker tras un fork, donde el hilo del padre no existe.
+        """
+        if self.sweep_interval <= 0 or (self._sweeper is not None and self._sweeper.is_alive()):
+            return
+        with self._lock:
+            if self._sweeper is not None and self._sweeper.is_alive():
+                return
+            self._stop.clear()
+            self._sweeper = threading.Thread(target=self._sweep_loop, name=f"{self.name}-sweeper", daemon=True)
+            self._sweeper.start()
+
+    def _sweep_loop(self) -> None:
+        while not self._stop.wait(self.sweep_interval):
+            try:
+                self.sweep()
+            except Exception:
+                logger.exception("Error barriendo %s", self.name)
+
+    def stop_sweeper(self) -> None:
+        self._stop.set()
+
+    # ------------------------------------------------------
+    # Métricas
+    # ------------------------------------------------------
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._data),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": dict(self._evictions),
+            }
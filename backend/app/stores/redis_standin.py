@@ -0,0 +1,256 @@
+"""
+Stand-in local del protocolo Redis (RESP2) para desarrollo y pruebas
+multi-worker sin instalar Redis.
+
+Implementa solo lo que usa RedisStateBackend: PING, GET, GETRANGE,
+SET (EX/PX), MGET, DEL, EXISTS, SCAN (MATCH), DBSIZE, FLUSHDB, SELECT,
+AUTH, WATCH/UNWATCH y MULTI/EXEC/DISCARD con la semántica de Redis (EXEC regresa nil si una
+llave vigilada cambió). Todo vive en memoria del proceso.
+
+Uso (desde backend/):
+    python -m app.stores.redis_standin --port 6390
+    STATE_BACKEND=redis STATE_REDIS_URL=redis://127.0.0.1:6390/0 gunicorn -w 4 run:app
+"""
+from __future__ import annotations
+
+import logging
+import socketserver
+import threading
+import time
+from fnmatch import fnmatchcase
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class _Data:
+    """Llaves con vencimiento y contador de modificaciones para WATCH."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.values: Dict[bytes, Tuple[bytes, Optional[float]]] = {}
+        self.revisions: Dict[bytes, int] = {}
+
+    def _alive(self, key: bytes) -> Optional[bytes]:
+        item = self.values.get(key)
+        if item is None:
+            return None
+        if item[1] is not None and item[1] <= time.time():
+            self.values.pop(key, None)
+            self._touch(key)
+            return None
+        return item[0]
+
+    def _touch(self, key: bytes) -> None:
+        self.revisions[key] = self.revisions.get(key, 0) + 1
+
+    def revision(self, key: bytes) -> int:
+        self._alive(key)
+        return self.revisions.get(key, 0)
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    server: "RespStandInServer"
+
+    def setup(self):
+        super().setup()
+        self.watched: Dict[bytes, int] = {}
+        self.queue: Optional[List[List[bytes]]] = None
+
+    # --------------------------------------------------
+    # Protocolo
+    # --------------------------------------------------
+
+    def _read_command(self) -> Optional[List[bytes]]:
+        line = self.rfile.readline()
+        if not line:
+            return None
+        if not line.startswith(b"*"):
+            # Comando inline (p. ej. "PING" desde telnet)
+            return line.strip().split()
+        args = []
+        for _ in range(int(line[1:-2])):
+            size = int(self.rfile.readline()[1:-2])
+            args.append(self.rfile.read(size + 2)[:-2])
+        return args
+
+    def _encode(self, value: Any) -> bytes:
+        if value is None:
+            return b"$-1\r\n"
+        if isinstance(value, _Status):
+            return b"+" + value.text.encode() + b"\r\n"
+        if isinstance(value, _Err):
+            return b"-" + value.text.encode() + b"\r\n"
+        if isinstance(value, int):
+            return b":%d\r\n" % value
+        if isinstance(value, bytes):
+            return b"$%d\r\n%s\r\n" % (len(value), value)
+        if isinstance(value, list):
+            return b"*%d\r\n" % len(value) + b"".join(self._encode(v) for v in value)
+        raise TypeError(type(value))
+
+    def handle(self):
+        while True:
+            try:
+                args = self._read_command()
+            except (ConnectionError, ValueError):
+                return
+            if args is None:
+                return
+            if not args:
+                continue
+            reply = self._dispatch(args)
+            try:
+                self.wfile.write(self._encode(reply))
+                self.wfile.flush()
+            except ConnectionError:
+                return
+
+    # --------------------------------------------------
+    # Comandos
+    # --------------------------------------------------
+
+    def _dispatch(self, args: List[bytes]) -> Any:
+        name = args[0].upper()
+        data = self.server.data
+
+        if name == b"MULTI":
+            self.queue = []
+            return OK
+        if name == b"DISCARD":
+            self.queue = None
+            self.watched = {}
+            return OK
+        if name == b"EXEC":
+            if self.queue is None:
+                return _Err("ERR EXEC without MULTI")
+            queue, self.queue = self.queue, None
+            with data.lock:
+                dirty = any(data.revision(k) != rev for k, rev in self.watched.items())
+                self.watched = {}
+                if dirty:
+                    return None
+                return [self._execute(cmd) for cmd in queue]
+        if self.queue is not None:
+            self.queue.append(args)
+            return _Status("QUEUED")
+
+        if name == b"WATCH":
+            with data.lock:
+                for key in args[1:]:
+                    self.watched[key] = data.revision(key)
+            return OK
+        if name == b"UNWATCH":
+            self.watched = {}
+            return OK
+
+        with data.lock:
+            return self._execute(args)
+
+    def _execute(self, args: List[bytes]) -> Any:
+        name = args[0].upper()
+        data = self.server.data
+
+        if name == b"PING":
+            return _Status("PONG") if len(args) == 1 else args[1]
+        if name in (b"SELECT", b"AUTH", b"CLIENT"):
+            return OK
+        if name == b"GET":
+            return data._alive(args[1])
+        if name == b"GETRANGE":
+            value = data._alive(args[1]) or b""
+            start, end = int(args[2]), int(args[3])
+            return value[start:(end + 1) if end >= 0 else (len(value) + end + 1)]
+        if name == b"SET":
+            expires_at = None
+            opts = [a.upper() for a in args[3:]]
+            if b"PX" in opts:
+                expires_at = time.time() + int(args[3 + opts.index(b"PX") + 1]) / 1000.0
+            elif b"EX" in opts:
+                expires_at = time.time() + int(args[3 + opts.index(b"EX") + 1])
+            data.values[args[1]] = (args[2], expires_at)
+            data._touch(args[1])
+            return OK
+        if name == b"DEL":
+            removed = 0
+            for key in args[1:]:
+                if data._alive(key) is not None:
+                    removed += 1
+                data.values.pop(key, None)
+                data._touch(key)
+            return removed
+        if name == b"MGET":
+            return [data._alive(key) for key in args[1:]]
+        if name == b"SCAN":
+            # Una sola pasada (cursor de regreso "0"); COUNT se ignora
+            opts = [a.upper() for a in args[2:]]
+            pattern = args[2 + opts.index(b"MATCH") + 1] if b"MATCH" in opts else b"*"
+            keys = [key for key in list(data.values)
+                    if fnmatchcase(key, pattern) and data._alive(key) is not None]
+            return [b"0", keys]
+        if name == b"EXISTS":
+            return sum(1 for key in args[1:] if data._alive(key) is not None)
+        if name == b"DBSIZE":
+            return sum(1 for key in list(data.values) if data._alive(key) is not None)
+        if name == b"FLUSHDB":
+            for key in list(data.values):
+                data._touch(key)
+            data.values.clear()
+            return OK
+        return _Err(f"ERR unknown command '{name.decode(errors='replace')}'")
+
+
+class _Status:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class _Err:
+    def __init__(self, text: str):
+        self.text = text
+
+
+OK = _Status("OK")
+
+
+class RespStandInServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 6390):
+        super().__init__((host, port), _Handler)
+        self.data = _Data()
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"redis://{host}:{port}/0"
+
+    def start_in_thread(self) -> threading.Thread:
+        thread = threading.Thread(target=self.serve_forever, name="redis-standin", daemon=True)
+        thread.start()
+        return thread
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Stand-in local del protocolo Redis")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=6390)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    server = RespStandInServer(args.host, args.port)
+    logger.info("🧪 Stand-in RESP escuchando en %s", server.url)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,549 @@
+"""
+Backend de estado conversacional compartible entre workers.
+
+Cada store (conversationStore, memoria de chat, tareas) pide un backend
+por namespace con create_state_backend(). Los valores viajan como JSON,
+así que cualquier worker puede leer lo que escribió otro.
+
+Backends (settings.STATE_BACKEND):
+  memory  dict por proceso (BoundedTTLStore); default, un solo worker
+  sqlite  archivo SQLite en modo WAL; varios workers en un mismo host
+  redis   cualquier servidor que hable el protocolo de Redis (RESP).
+          Para desarrollo sin Redis: python -m app.stores.redis_standin
+
+Versionado optimista: get() regresa (valor, versión) con versión 0 si no
+existe; put(expected_version=v) solo escribe si la versión sigue siendo v
+y si no lanza VersionConflict. Así dos turnos concurrentes del mismo
+usuario no se pisan: el segundo relee y reintenta (o descarta).
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import random
+import socket
+import sqlite3
+import sys
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from app.stores.bounded_store import BoundedTTLStore
+
+try:
+    import orjson
+except ImportError:  # en requirements; json como respaldo
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+
+class VersionConflict(Exception):
+    """Otro worker/turno escribió la llave después de nuestra lectura."""
+
+    def __init__(self, namespace: str, key: str, expected: int, actual: int):
+        super().__init__(f"{namespace}:{key} versión esperada {expected}, actual {actual}")
+        self.namespace = namespace
+        self.key = key
+        self.expected = expected
+        self.actual = actual
+
+
+def dumps(value: Any) -> str:
+    if orjson is not None:
+        return orjson.dumps(value, default=str, option=orjson.OPT_NON_STR_KEYS).decode("utf-8")
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"), default=str)
+
+
+def loads(raw: Any) -> Any:
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+# ======================================================
+# Interfaz
+# ======================================================
+
+class StateBackend(ABC):
+    """
+    Llave → valor JSON con versión, acotado a un namespace.
+
+    ttl_seconds=None significa sin vencimiento (p. ej. tareas); put()
+    acepta un ttl_seconds propio para vencimientos por entrada.
+    """
+
+    kind = "base"
+
+    def __init__(self, namespace: str, ttl_seconds: Optional[float] = None):
+        self.namespace = namespace
+        self.ttl_seconds = ttl_seconds
+        self._conflicts = 0
+
+    @abstractmethod
+    def get(self, key: str) -> Tuple[Any, int]:
+        ...
+
+    @abstractmethod
+    def put(self, key: str, value: Any, *, expected_version: Optional[int] = None,
+            ttl_seconds: Optional[float] = None) -> int:
+        """Escribe y regresa la nueva versión. expected_version=None escribe sin comparar."""
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        ...
+
+    def get_version(self, key: str) -> int:
+        """Versión actual sin decodificar el valor (0 si no existe)."""
+        return self.get(key)[1]
+
+    def count(self) -> Optional[int]:
+        """Entradas vivas (sin vencidas); None si el backend no lo sabe barato."""
+        return None
+
+    @abstractmethod
+    def items(self) -> List[Tuple[str, Any]]:
+        """(llave, valor) de todas las entradas vivas del namespace (recorridos completos, no por request)."""
+
+    def _ttl(self, ttl_seconds: Optional[float]) -> Optional[float]:
+        return self.ttl_seconds if ttl_seconds is None else ttl_seconds
+
+    def update(self, key: str, fn: Callable[[Any], Any], *, retries: int = 8,
+               ttl_seconds: Optional[float] = None) -> Tuple[Any, int]:
+        """
+        Lectura-modificación-escritura con reintento ante conflicto.
+        fn recibe el valor actual (None si no existe) y regresa el nuevo;
+        debe ser idempotente porque puede correr más de una vez.
+        Regresa (valor nuevo, versión nueva).
+        """
+        for attempt in range(retries + 1):
+            value, version = self.get(key)
+            new_value = fn(value)
+            try:
+                new_version = self.put(key, new_value, expected_version=version, ttl_seconds=ttl_seconds)
+                return new_value, new_version
+            except VersionConflict:
+                if attempt == retries:
+                    raise
+                # Backoff exponencial con jitter para no chocar de nuevo en fase
+                time.sleep(random.uniform(0, min(0.002 * (2 ** attempt), 0.05)))
+        return None, 0  # pragma: no cover
+
+    def _conflict(self, key: str, expected: int, actual: int) -> VersionConflict:
+        self._conflicts += 1
+        return VersionConflict(self.namespace, key, expected, actual)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": self.kind,
+            "entries": self.count(),
+            "conflicts": self._conflicts,
+        }
+
+
+# ======================================================
+# Memoria del proceso
+# ======================================================
+
+class MemoryStateBackend(StateBackend):
+    """
+    BoundedTTLStore de (versión, json). Se guarda el JSON y no el objeto
+    para que cada load_state entregue una copia independiente, igual que
+    los backends compartidos.
+    """
+
+    kind = "memory"
+
+    def __init__(
+        self,
+        namespace: str,
+        ttl_seconds: Optional[float] = None,
+        *,
+        max_entries: int = sys.maxsize,
+        max_bytes: int = sys.maxsize,
+        sweep_interval: float = 0.0,
+    ):
+        super().__init__(namespace, ttl_seconds)
+        self.store = BoundedTTLStore(
+            name=namespace,
+            ttl_seconds=ttl_seconds if ttl_seconds is not None else float("inf"),
+            max_entries=max_entries,
+            max_bytes=max_bytes,
+            sweep_interval=sweep_interval,
+            sizeof=lambda item: len(item[1]),
+        )
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Tuple[Any, int]:
+        item = self.store.get(key)
+        if item is None:
+            return None, 0
+        return loads(item[1]), item[0]
+
+    def get_version(self, key: str) -> int:
+        item = self.store.get(key)
+        return item[0] if item is not None else 0
+
+    def put(self, key: str, value: Any, *, expected_version: Optional[int] = None,
+            ttl_seconds: Optional[float] = None) -> int:
+        raw = dumps(value)
+        with self._lock:
+            item = self.store.get(key)
+            current = item[0] if item is not None else 0
+            if expected_version is not None and expected_version != current:
+                raise self._conflict(key, expected_version, current)
+            self.store.set(key, (current + 1, raw), ttl=ttl_seconds)
+        return current + 1
+
+    def delete(self, key: str) -> None:
+        self.store.pop(key, None)
+
+    def items(self) -> List[Tuple[str, Any]]:
+        return [(key, loads(raw)) for key, (_, raw) in self.store.items()]
+
+    def count(self) -> Optional[int]:
+        # El barrido es O(vencidas), así que contar vivas es barato
+        self.store.sweep()
+        return len(self.store)
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self.store.stats(), "backend": self.kind, "conflicts": self._conflicts}
+
+
+# ======================================================
+# SQLite (WAL)
+# ======================================================
+
+class SQLiteStateBackend(StateBackend):
+    """
+    Una tabla compartida por todos los namespaces. BEGIN IMMEDIATE toma
+    el candado de escritura del archivo, así el compare-and-set es atómico
+    también entre procesos. Conexión por hilo (sqlite3 no las comparte).
+    """
+
+    kind = "sqlite"
+    SWEEP_EVERY_SECONDS = 60.0
+
+    def __init__(self, namespace: str, ttl_seconds: Optional[float] = None, *, path: str):
+        super().__init__(namespace, ttl_seconds)
+        self.path = path
+        self._local = threading.local()
+        self._last_sweep = 0.0
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        conn = self._conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS state ("
+            " namespace TEXT NOT NULL,"
+            " key TEXT NOT NULL,"
+            " value TEXT NOT NULL,"
+            " version INTEGER NOT NULL,"
+            " expires_at REAL,"
+            " PRIMARY KEY (namespace, key))"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS state_expires ON state (expires_at)")
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        # Tras un fork la conexión del padre no sirve: una por pid
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=10.0, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _expires_at(self, ttl_seconds: Optional[float]) -> Optional[float]:
+        ttl = self._ttl(ttl_seconds)
+        return time.time() + ttl if ttl is not None else None
+
+    def get(self, key: str) -> Tuple[Any, int]:
+        row = self._conn().execute(
+            "SELECT value, version, expires_at FROM state WHERE namespace = ? AND key = ?",
+            (self.namespace, key),
+        ).fetchone()
+        if row is None or (row[2] is not None and row[2] <= time.time()):
+            return None, 0
+        return loads(row[0]), row[1]
+
+    def get_version(self, key: str) -> int:
+        row = self._conn().execute(
+            "SELECT version, expires_at FROM state WHERE namespace = ? AND key = ?",
+            (self.namespace, key),
+        ).fetchone()
+        if row is None or (row[1] is not None and row[1] <= time.time()):
+            return 0
+        return row[0]
+
+    def put(self, key: str, value: Any, *, expected_version: Optional[int] = None,
+            ttl_seconds: Optional[float] = None) -> int:
+        raw = dumps(value)
+        conn = self._conn()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT version, expires_at FROM state WHERE namespace = ? AND key = ?",
+                (self.namespace, key),
+            ).fetchone()
+            # Una fila vencida equivale a no existir, pero se conserva su
+            # versión para que la nueva siga siendo mayor
+            stored = row[0] if row else 0
+            alive = row is not None and (row[1] is None or row[1] > now)
+            current = stored if alive else 0
+            if expected_version is not None and expected_version != current:
+                conn.execute("ROLLBACK")
+                raise self._conflict(key, expected_version, current)
+            version = stored + 1
+            conn.execute(
+                "INSERT INTO state (namespace, key, value, version, expires_at) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (namespace, key) DO UPDATE SET "
+                "value = excluded.value, version = excluded.version, expires_at = excluded.expires_at",
+                (self.namespace, key, raw, version, self._expires_at(ttl_seconds)),
+            )
+            conn.execute("COMMIT")
+        except VersionConflict:
+            raise
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        self._maybe_sweep(now)
+        return version
+
+    def delete(self, key: str) -> None:
+        self._conn().execute("DELETE FROM state WHERE namespace = ? AND key = ?", (self.namespace, key))
+
+    def _maybe_sweep(self, now: float) -> None:
+        # Usa el índice state_expires: borra solo filas vencidas
+        if now - self._last_sweep < self.SWEEP_EVERY_SECONDS:
+            return
+        self._last_sweep = now
+        self._conn().execute(
+            "DELETE FROM state WHERE namespace = ? AND expires_at IS NOT NULL AND expires_at <= ?",
+            (self.namespace, now),
+        )
+
+    def items(self) -> List[Tuple[str, Any]]:
+        rows = self._conn().execute(
+            "SELECT key, value FROM state WHERE namespace = ? AND (expires_at IS NULL OR expires_at > ?)",
+            (self.namespace, time.time()),
+        ).fetchall()
+        return [(key, loads(value)) for key, value in rows]
+
+    def count(self) -> Optional[int]:
+        row = self._conn().execute(
+            "SELECT COUNT(*) FROM state WHERE namespace = ? AND (expires_at IS NULL OR expires_at > ?)",
+            (self.namespace, time.time()),
+        ).fetchone()
+        return row[0]
+
+
+# ======================================================
+# Protocolo Redis (RESP)
+# ======================================================
+
+class RespError(Exception):
+    pass
+
+
+class RespConnection:
+    """
+    Cliente RESP2 mínimo (sin dependencia de redis-py): los comandos que
+    usa el backend son GET, GETRANGE, SET, DEL, WATCH, MULTI, EXEC,
+    SCAN y MGET.
+    """
+
+    def __init__(self, host: str, port: int, db: int = 0, password: Optional[str] = None, timeout: float = 5.0):
+        self.sock = socket.create_connection((host, port), timeout=timeout)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.reader = self.sock.makefile("rb")
+        if password:
+            self.command("AUTH", password)
+        if db:
+            self.command("SELECT", str(db))
+
+    def command(self, *args: Any) -> Any:
+        out = [b"*%d\r\n" % len(args)]
+        for arg in args:
+            data = arg if isinstance(arg, bytes) else str(arg).encode("utf-8")
+            out.append(b"$%d\r\n%s\r\n" % (len(data), data))
+        self.sock.sendall(b"".join(out))
+        return self._read()
+
+    def _read(self) -> Any:
+        line = self.reader.readline()
+        if not line:
+            raise ConnectionError("Conexión RESP cerrada")
+        prefix, rest = line[:1], line[1:-2]
+        if prefix == b"+":
+            return rest.decode("utf-8")
+        if prefix == b"-":
+            raise RespError(rest.decode("utf-8"))
+        if prefix == b":":
+            return int(rest)
+        if prefix == b"$":
+            size = int(rest)
+            if size < 0:
+                return None
+            data = self.reader.read(size + 2)
+            return data[:-2]
+        if prefix == b"*":
+            size = int(rest)
+            if size < 0:
+                return None
+            return [self._read() for _ in range(size)]
+        raise RespError(f"Respuesta RESP inválida: {line!r}")
+
+    def close(self) -> None:
+        try:
+            self.sock.close()
+        except OSError:
+            pass
+
+
+class RedisStateBackend(StateBackend):
+    """
+    Valor guardado como "<versión>:<json>" con PX para el TTL. El
+    compare-and-set usa WATCH/MULTI/EXEC: si otro cliente toca la llave
+    entre el WATCH y el EXEC, EXEC regresa nil y se reporta conflicto.
+    """
+
+    kind = "redis"
+
+    def __init__(self, namespace: str, ttl_seconds: Optional[float] = None, *, url: str, prefix: str = "state"):
+        super().__init__(namespace, ttl_seconds)
+        parsed = urlparse(url)
+        self.host = parsed.hostname or "127.0.0.1"
+        self.port = parsed.port or 6379
+        self.db = int((parsed.path or "/0").lstrip("/") or 0)
+        self.password = parsed.password
+        self.prefix = f"{prefix}:{namespace}:"
+        self._local = threading.local()
+
+    def _conn(self) -> RespConnection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = RespConnection(self.host, self.port, self.db, self.password)
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _call(self, fn: Callable[[RespConnection], Any]) -> Any:
+        """Un reintento con conexión nueva si la anterior se cayó."""
+        try:
+            return fn(self._conn())
+        except (ConnectionError, OSError):
+            conn = getattr(self._local, "conn", None)
+            if conn is not None:
+                conn.close()
+            self._local.conn = None
+            return fn(self._conn())
+
+    @staticmethod
+    def _decode(raw: Optional[bytes]) -> Tuple[Any, int]:
+        if raw is None:
+            return None, 0
+        version, _, payload = raw.partition(b":")
+        return loads(payload.decode("utf-8")), int(version)
+
+    def get(self, key: str) -> Tuple[Any, int]:
+        return self._decode(self._call(lambda c: c.command("GET", self.prefix + key)))
+
+    def get_version(self, key: str) -> int:
+        # GETRANGE trae solo el prefijo "<versión>:"
+        raw = self._call(lambda c: c.command("GETRANGE", self.prefix + key, 0, 20))
+        return int(raw.partition(b":")[0]) if raw else 0
+
+    def put(self, key: str, value: Any, *, expected_version: Optional[int] = None,
+            ttl_seconds: Optional[float] = None) -> int:
+        raw = dumps(value)
+        full_key = self.prefix + key
+        ttl = self._ttl(ttl_seconds)
+        ttl_args: List[Any] = []
+        if ttl is not None:
+            ttl_args = ["PX", max(int(ttl * 1000), 1)]
+
+        def cas(conn: RespConnection) -> int:
+            conn.command("WATCH", full_key)
+            _, current = self._decode(conn.command("GET", full_key))
+            if expected_version is not None and expected_version != current:
+                conn.command("UNWATCH")
+                raise self._conflict(key, expected_version, current)
+            version = current + 1
+            conn.command("MULTI")
+            conn.command("SET", full_key, f"{version}:{raw}", *ttl_args)
+            # EXEC libera el WATCH; nil = alguien escribió en medio
+            if conn.command("EXEC") is None:
+                raise self._conflict(key, current, current + 1)
+            return version
+
+        return self._call(cas)
+
+    def delete(self, key: str) -> None:
+        self._call(lambda c: c.command("DEL", self.prefix + key))
+
+    def items(self) -> List[Tuple[str, Any]]:
+        # SCAN por lotes (no bloquea al servidor como KEYS) + MGET por lote
+        found: List[Tuple[str, Any]] = []
+        cursor = b"0"
+        while True:
+            cursor, keys = self._call(
+                lambda c: c.command("SCAN", cursor, "MATCH", self.prefix + "*", "COUNT", 500)
+            )
+            if keys:
+                values = self._call(lambda c: c.command("MGET", *keys))
+                for key, raw in zip(keys, values):
+                    if raw is not None:
+                        found.append((key.decode("utf-8")[len(self.prefix):], self._decode(raw)[0]))
+            if cursor in (b"0", 0, "0"):
+                return found
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": self.kind,
+            "entries": None,
+            "conflicts": self._conflicts,
+            "server": f"{self.host}:{self.port}/{self.db}",
+        }
+
+
+# ======================================================
+# Fábrica
+# ======================================================
+
+def create_state_backend(
+    namespace: str,
+    *,
+    ttl_seconds: Optional[float] = None,
+    max_entries: int = sys.maxsize,
+    max_bytes: int = sys.maxsize,
+    sweep_interval: float = 0.0,
+) -> StateBackend:
+    """
+    Backend para un namespace según settings.STATE_BACKEND. Los
+    presupuestos de entradas/bytes solo aplican al backend en memoria;
+    en los compartidos el crecimiento lo acota el TTL.
+    """
+    from app.config import settings
+
+    kind = (settings.STATE_BACKEND or "memory").lower()
+    if kind == "sqlite":
+        backend: StateBackend = SQLiteStateBackend(namespace, ttl_seconds, path=settings.STATE_SQLITE_PATH)
+    elif kind == "redis":
+        backend = RedisStateBackend(namespace, ttl_seconds, url=settings.STATE_REDIS_URL)
+    else:
+        if kind != "memory":
+            logger.warning("⚠️ STATE_BACKEND desconocido (%s), se usa memory", kind)
+        backend = MemoryStateBackend(
+            namespace,
+            ttl_seconds,
+            max_entries=max_entries,
+            max_bytes=max_bytes,
+            sweep_interval=sweep_interval,
+        )
+    logger.info("🗄️ Estado %s → backend %s", namespace, backend.kind)
+    return backend
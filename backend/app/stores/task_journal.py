@@ -0,0 +1,290 @@
+"""
+Persistencia durable de tareas para el backend de estado en memoria.
+
+Las lecturas siguen en memoria (task_store + sus índices); cada escritura
+se registra como una operación en una cola y un hilo escritor la vuelca
+por lotes (write-behind) a un log de solo-agregar. Así el request no
+espera al disco.
+
+Archivos en settings.TASK_JOURNAL_DIR:
+  tasks-<seq>.log       segmentos JSONL, uno por operación:
+                        {"seq", "op": put|delete|clear, "user_key", ...}
+  tasks.snapshot.json   estado completo hasta "seq" (escritura atómica)
+  journal.lock          flock: un solo proceso escribe el journal
+
+Compactación: cada TASK_JOURNAL_COMPACT_OPS operaciones se abre un
+segmento nuevo, se toma un snapshot y se borran los segmentos cubiertos.
+Las operaciones son idempotentes (put = valor completo de una tarea), así
+que reaplicar de más sobre el snapshot converge al mismo estado.
+
+Arranque: recover() carga el snapshot, reaplica los segmentos con seq
+mayor (tolera una última línea truncada) y regresa user_key → tareas.
+
+Con STATE_BACKEND=sqlite/redis el backend ya es durable y compartido; el
+journal es para el modo memory de un solo worker.
+"""
+from __future__ import annotations
+
+import atexit
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from app.stores.state_backend import dumps, loads
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_NAME = "tasks.snapshot.json"
+LOCK_NAME = "journal.lock"
+
+SnapshotSource = Callable[[], Dict[str, List[Dict[str, Any]]]]
+
+
+def _segment_name(start_seq: int) -> str:
+    return f"tasks-{start_seq:012d}.log"
+
+
+def _segment_start(name: str) -> Optional[int]:
+    if name.startswith("tasks-") and name.endswith(".log"):
+        try:
+            return int(name[len("tasks-"):-len(".log")])
+        except ValueError:
+            return None
+    return None
+
+
+def apply_op(state: Dict[str, Dict[str, Dict[str, Any]]], op: Dict[str, Any]) -> None:
+    """Aplica una operación sobre user_key → {task_id: tarea}."""
+    kind = op.get("op")
+    user_key = op.get("user_key") or ""
+    if kind == "put":
+        task = op["task"]
+        tasks = state.setdefault(user_key, {})
+        tasks.pop(task["id"], None)  # re-agregar la deja al final, como add_task
+        tasks[task["id"]] = task
+    elif kind == "delete":
+        tasks = state.get(user_key)
+        if tasks is not None:
+            tasks.pop(op.get("task_id"), None)
+            if not tasks:
+                state.pop(user_key, None)
+    elif kind == "clear":
+        state.pop(user_key, None)
+
+
+class TaskJournal:
+    def __init__(
+        self,
+        directory: str,
+        *,
+        flush_interval: float = 0.2,
+        compact_ops: int = 10000,
+        fsync: bool = True,
+    ):
+        self.directory = directory
+        self.flush_interval = float(flush_interval)
+        self.compact_ops = int(compact_ops)
+        self.fsync = fsync
+
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._queue: Deque[Dict[str, Any]] = deque()
+        self._seq = 0                  # última seq asignada
+        self._written_seq = 0          # última seq en disco
+        self._ops_since_snapshot = 0
+        self._segment = None
+        self._segment_path: Optional[str] = None
+        self._lock_file = None
+        self._writer: Optional[threading.Thread] = None
+        self._snapshot_source: Optional[SnapshotSource] = None
+        self.stats_counters = {"ops": 0, "flushes": 0, "snapshots": 0, "errors": 0}
+
+    # ------------------------------------------------------
+    # Candado de proceso
+    # ------------------------------------------------------
+
+    def acquire(self) -> bool:
+        """flock no bloqueante: False si otro proceso ya escribe este journal."""
+        import fcntl
+
+        os.makedirs(self.directory, exist_ok=True)
+        self._lock_file = open(os.path.join(self.directory, LOCK_NAME), "a+")
+        try:
+            fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            self._lock_file.close()
+            self._lock_file = None
+            return False
+        return True
+
+    # ------------------------------------------------------
+    # Recuperación
+    # ------------------------------------------------------
+
+    def _segments(self) -> List[Tuple[int, str]]:
+        found = []
+        for name in os.listdir(self.directory):
+            start = _segment_start(name)
+            if start is not None:
+                found.append((start, os.path.join(self.directory, name)))
+        return sorted(found)
+
+    def recover(self) -> Dict[str, List[Dict[str, Any]]]:
+        state: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        snapshot_seq = 0
+        snapshot_path = os.path.join(self.directory, SNAPSHOT_NAME)
+        if os.path.exists(snapshot_path):
+            with open(snapshot_path, "r", encoding="utf-8") as f:
+                snapshot = loads(f.read())
+            snapshot_seq = int(snapshot.get("seq", 0))
+            for user_key, tasks in (snapshot.get("tasks") or {}).items():
+                state[user_key] = {t["id"]: t for t in tasks}
+
+        last_seq = snapshot_seq
+        replayed = 0
+        for _, path in self._segments():
+            with open(path, "rb+") as f:
+                good = 0
+                for line in f:
+                    try:
+                        if not line.endswith(b"\n"):
+                            raise ValueError("sin fin de línea")
+                        op = loads(line)
+                    except ValueError:
+                        # Última línea a medio escribir por una caída: se
+                        # corta para que lo siguiente no quede pegado a ella
+                        logger.warning("⚠️ Línea truncada en %s, se descarta", os.path.basename(path))
+                        f.truncate(good)
+                        break
+                    good += len(line)
+                    seq = int(op.get("seq", 0))
+                    if seq <= snapshot_seq:
+                        continue
+                    apply_op(state, op)
+                    last_seq = max(last_seq, seq)
+                    replayed += 1
+
+        self._seq = self._written_seq = last_seq
+        self._ops_since_snapshot = replayed
+        logger.info(
+            "📒 Journal de tareas recuperado: %s usuarios (snapshot seq=%s, %s ops reaplicadas)",
+            len(state), snapshot_seq, replayed,
+        )
+        return {user_key: list(tasks.values()) for user_key, tasks in state.items()}
+
+    # ------------------------------------------------------
+    # Registro (camino del request: solo encola)
+    # ------------------------------------------------------
+
+    def record(self, op: Dict[str, Any]) -> None:
+        with self._lock:
+            self._seq += 1
+            op["seq"] = self._seq
+            self._queue.append(op)
+        self.stats_counters["ops"] += 1
+
+    def record_put(self, task: Dict[str, Any]) -> None:
+        self.record({"op": "put", "user_key": task.get("user_key") or "", "task": task})
+
+    def record_delete(self, user_key: str, task_id: str) -> None:
+        self.record({"op": "delete", "user_key": user_key, "task_id": task_id})
+
+    def record_clear(self, user_key: str) -> None:
+        self.record({"op": "clear", "user_key": user_key})
+
+    # ------------------------------------------------------
+    # Hilo escritor
+    # ------------------------------------------------------
+
+    def start(self, snapshot_source: SnapshotSource) -> None:
+        self._snapshot_source = snapshot_source
+        self._open_segment(self._seq + 1)
+        self._writer = threading.Thread(target=self._run, name="task-journal", daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+
+    def _open_segment(self, start_seq: int) -> None:
+        if self._segment is not None:
+            self._segment.close()
+        self._segment_path = os.path.join(self.directory, _segment_name(start_seq))
+        self._segment = open(self._segment_path, "a", encoding="utf-8")
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+                if self._ops_since_snapshot >= self.compact_ops:
+                    self.compact()
+            except Exception:
+                self.stats_counters["errors"] += 1
+                logger.exception("Error escribiendo el journal de tareas")
+
+    def flush(self) -> int:
+        with self._lock:
+            batch = list(self._queue)
+            self._queue.clear()
+        if not batch or self._segment is None:
+            return 0
+        self._segment.write("".join(dumps(op) + "\n" for op in batch))
+        self._segment.flush()
+        if self.fsync:
+            os.fsync(self._segment.fileno())
+        self._written_seq = batch[-1]["seq"]
+        self._ops_since_snapshot += len(batch)
+        self.stats_counters["flushes"] += 1
+        return len(batch)
+
+    def compact(self) -> None:
+        """
+        Snapshot + borrado de segmentos viejos. Corre en el hilo escritor
+        (o en close), nunca concurrente con flush.
+        """
+        if self._snapshot_source is None:
+            return
+        self.flush()
+        covered = self._written_seq
+        # Lo que llegue desde aquí va a un segmento nuevo
+        self._open_segment(covered + 1)
+        # Toda op con seq <= covered ya está aplicada en memoria
+        tasks = self._snapshot_source()
+
+        tmp = os.path.join(self.directory, SNAPSHOT_NAME + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(dumps({"seq": covered, "created_at": time.time(), "tasks": tasks}))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, os.path.join(self.directory, SNAPSHOT_NAME))
+
+        for start, path in self._segments():
+            if path != self._segment_path and start <= covered:
+                os.remove(path)
+        self._ops_since_snapshot = 0
+        self.stats_counters["snapshots"] += 1
+        logger.info("🗜️ Journal de tareas compactado hasta seq=%s (%s usuarios)", covered, len(tasks))
+
+    def close(self) -> None:
+        self._stop.set()
+        if self._writer is not None and self._writer is not threading.current_thread():
+            self._writer.join(timeout=5)
+        try:
+            self.flush()
+        finally:
+            if self._segment is not None:
+                self._segment.close()
+                self._segment = None
+            # Cerrar el archivo suelta el flock: otro TaskJournal puede tomarlo
+            if self._lock_file is not None:
+                self._lock_file.close()
+                self._lock_file = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats_counters,
+            "seq": self._seq,
+            "written_seq": self._written_seq,
+            "pending": len(self._queue),
+            "ops_since_snapshot": self._ops_since_snapshot,
+        }
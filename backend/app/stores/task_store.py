@@ -1,38 +1,488 @@
-from typing import Dict, List
-from app.domain.task import Task
+import logging
+import os
+import threading
+import time as time_module
+import uuid
+from bisect import bisect_left, insort
+from datetime import date, time, timedelta
+from collections import OrderedDict
+from heapq import merge
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from app.config import settings
+from app.domain.task import Task, task_from_dict, task_to_dict
+from app.stores.bounded_store import BoundedTTLStore
+from app.stores.state_backend import MemoryStateBackend, create_state_backend
+from app.stores.task_journal import TaskJournal
 
-_TASKS: Dict[str, List[Task]] = {}
+logger = logging.getLogger(__name__)
+
+TASK_TYPES = ("calendar", "reminder", "note")
+
+# user_key → lista de tareas (dicts). Sin TTL: las tareas no vencen.
+# Compartido entre workers según STATE_BACKEND.
+_TASKS = create_state_backend("tasks")
+
+# user_key → epoch del último cambio a su lista (Last-Modified del feed
+# .ics). Aparte de la lista para no cambiar su forma; se escribe antes que
+# ella, así quien lee la lista nueva nunca ve una hora anterior al cambio.
+# Sin valor (datos previos, o memoria tras reiniciar) no hay Last-Modified.
+_MODIFIED = create_state_backend("tasks_modified")
+
+# Journal durable (write-behind) para el backend en memoria; ver
+# init_task_persistence
+_JOURNAL: Optional[TaskJournal] = None
+
+# Callbacks tras add_task (p. ej. el despachador de recordatorios agenda
+# la tarea); ver add_task_listener
+_LISTENERS: List[Callable[[Task], None]] = []
+
+# La versión de la lista de un usuario es la del backend. En memoria se
+# reinicia con el proceso (el journal no guarda versiones), así que el
+# epoch la distingue de una versión igual de un arranque anterior.
+EPOCH = uuid.uuid4().hex[:8] if isinstance(_TASKS, MemoryStateBackend) else _TASKS.kind
+
+# Escrituras del mismo usuario en este proceso: la escritura al backend y
+# su registro en el journal van juntas bajo el candado, así el journal
+# queda en el orden en que se aplicaron (un delete registrado antes que el
+# put que lo precedió reviviría la tarea al recuperar). Candados por
+# franjas de user_key para no crecer con los usuarios.
+_WRITE_LOCKS = [threading.Lock() for _ in range(64)]
+
+
+def _write_lock(user_key: str) -> threading.Lock:
+    return _WRITE_LOCKS[hash(user_key) % len(_WRITE_LOCKS)]
+
+
+# ======================================================
+# Índices por usuario
+# ======================================================
+
+_END_OF_DAY = time(23, 59)
+
+
+def _created_at(task: Task) -> float:
+    try:
+        return float(task.created_at or 0.0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class _UserIndex:
+    """
+    Vista indexada de las tareas de un usuario en una versión del backend.
+
+    - by_id: id → Task (borrado O(1))
+    - by_type: tipo → {id: Task} en orden de inserción
+    - dated: tipo → [(fecha, hora, creada, id)] ordenado con la fecha/hora
+      pre-parseadas de la Task; rangos por bisect
+    - undated: tipo → [(creada, id)] ordenado
+
+    El orden (fechadas por fecha/hora, luego sin fecha por creación) es el
+    mismo que usa la tabla de task_query, así ya no se reordena ahí.
+
+    changes: id → versión en que se agregó/cambió/borró, desde `floor`
+    (la versión con la que se construyó el índice). Con él se arman los
+    deltas de changes_since; se acota a TASK_DELTA_MAX_CHANGES subiendo
+    floor al descartar lo más viejo.
+    """
+
+    def __init__(self, version: int):
+        self.version = version
+        self.floor = version
+        # Último cambio de la lista (Last-Modified del feed .ics); None si
+        # no se conoce
+        self.modified_at: Optional[float] = None
+        self.changes: "OrderedDict[str, int]" = OrderedDict()
+        # Lecturas y cambios en sitio del mismo usuario no se intercalan
+        self.lock = threading.Lock()
+        self.by_id: Dict[str, Task] = {}
+        self.by_type: Dict[str, Dict[str, Task]] = {t: {} for t in TASK_TYPES}
+        self.dated: Dict[str, List[Tuple[date, time, float, str]]] = {t: [] for t in TASK_TYPES}
+        self.undated: Dict[str, List[Tuple[float, str]]] = {t: [] for t in TASK_TYPES}
+
+    @classmethod
+    def build(cls, raw: Any, version: int) -> "_UserIndex":
+        index = cls(version)
+        for item in raw or []:
+            task = task_from_dict(item)
+            index.add(task)
+        return index
+
+    def _keys(self, task: Task) -> Tuple[str, Any]:
+        if task.fecha_date is not None:
+            return "dated", (task.fecha_date, task.hora_time or _END_OF_DAY, _created_at(task), task.id)
+        return "undated", (_created_at(task), task.id)
+
+    def add(self, task: Task) -> None:
+        if task.id in self.by_id:
+            self.remove(task.id)
+        self.by_id[task.id] = task
+        self.by_type.setdefault(task.type, {})[task.id] = task
+        bucket, key = self._keys(task)
+        insort(getattr(self, bucket).setdefault(task.type, []), key)
+
+    def remove(self, task_id: str) -> Optional[Task]:
+        task = self.by_id.pop(task_id, None)
+        if task is None:
+            return None
+        self.by_type.get(task.type, {}).pop(task_id, None)
+        bucket, key = self._keys(task)
+        entries = getattr(self, bucket).get(task.type, [])
+        pos = bisect_left(entries, key)
+        if pos < len(entries) and entries[pos] == key:
+            entries.pop(pos)
+        return task
+
+    def record_change(self, task_id: str, version: int) -> None:
+        self.changes[task_id] = version
+        self.changes.move_to_end(task_id)
+        while len(self.changes) > settings.TASK_DELTA_MAX_CHANGES:
+            _, dropped = self.changes.popitem(last=False)
+            self.floor = max(self.floor, dropped)
+
+    def _ordered_ids(self, ttype: str, start: Optional[date], end: Optional[date]) -> Iterable[Tuple[Any, str]]:
+        dated = self.dated.get(ttype, [])
+        if start is None and end is None:
+            for dt, hora, created, task_id in dated:
+                yield (0, dt, hora, created), task_id
+            for created, task_id in self.undated.get(ttype, []):
+                yield (1, created), task_id
+            return
+        lo = bisect_left(dated, (start,)) if start else 0
+        hi = bisect_left(dated, (end + timedelta(days=1),)) if end else len(dated)
+        for dt, hora, created, task_id in dated[lo:hi]:
+            yield (0, dt, hora, created), task_id
+
+    def query(
+        self,
+        ttype: Optional[str],
+        start: Optional[date],
+        end: Optional[date],
+        limit: Optional[int],
+        offset: int,
+    ) -> List[Task]:
+        types = [ttype] if ttype else list(self.by_type)
+        streams = [self._ordered_ids(t, start, end) for t in types]
+        ordered = streams[0] if len(streams) == 1 else merge(*streams, key=lambda item: item[0])
+        stop = offset + limit if limit is not None else None
+        return [self.by_id[task_id] for _, task_id in islice(ordered, offset, stop)]
+
+    def count(self, ttype: str, start: Optional[date], end: Optional[date]) -> int:
+        if start is None and end is None:
+            return len(self.by_type.get(ttype, {}))
+        dated = self.dated.get(ttype, [])
+        lo = bisect_left(dated, (start,)) if start else 0
+        hi = bisect_left(dated, (end + timedelta(days=1),)) if end else len(dated)
+        return max(hi - lo, 0)
+
+
+# Índices por proceso, validados contra la versión del backend: si otro
+# worker escribió, la versión cambia y el índice se reconstruye.
+_INDEXES = BoundedTTLStore(
+    name="task_index",
+    ttl_seconds=settings.TASK_INDEX_TTL_SECONDS,
+    max_entries=settings.TASK_INDEX_MAX_USERS,
+    max_bytes=2 ** 62,
+    sizeof=lambda index: len(index.by_id),
+)
+_INDEX_LOCK = threading.RLock()
+
+
+def _index(user_key: str) -> _UserIndex:
+    version = _TASKS.get_version(user_key)
+    with _INDEX_LOCK:
+        index = _INDEXES.get(user_key)
+        if index is not None and index.version == version:
+            return index
+    raw, version = _TASKS.get(user_key)
+    index = _UserIndex.build(raw, version)
+    # Después de la lista: _touch escribe antes que ella
+    index.modified_at = _MODIFIED.get(user_key)[0]
+    with _INDEX_LOCK:
+        _INDEXES.set(user_key, index)
+    return index
+
+
+def _touch(user_key: str) -> float:
+    """Marca el cambio de la lista; va antes de escribirla (ver _MODIFIED)."""
+    modified_at = time_module.time()
+    _MODIFIED.put(user_key, modified_at)
+    return modified_at
+
+
+def _after_write(user_key: str, old_version: int, new_version: int, task_id: str, apply,
+                 modified_at: float) -> None:
+    """Aplica el cambio al índice en sitio si estaba al día; si no, se descarta."""
+    with _INDEX_LOCK:
+        index = _INDEXES.get(user_key)
+        if index is None:
+            return
+        if index.version == old_version:
+            with index.lock:
+                apply(index)
+                index.record_change(task_id, new_version)
+                index.version = new_version
+                index.modified_at = modified_at
+        else:
+            _INDEXES.pop(user_key, None)
+
+
+# ======================================================
+# API
+# ======================================================
 
 def add_task(task: Task):
-    _TASKS.setdefault(task.user_key, []).append(task)
+    item = task_to_dict(task)
+
+    def append(current: Any) -> List[Dict[str, Any]]:
+        return [t for t in (current or []) if t.get("id") != item["id"]] + [item]
+
+    with _write_lock(task.user_key):
+        modified_at = _touch(task.user_key)
+        _, new_version = _TASKS.update(task.user_key, append)
+        if _JOURNAL is not None:
+            _JOURNAL.record_put(item)
+    _after_write(task.user_key, new_version - 1, new_version, task.id, lambda index: index.add(task), modified_at)
+    for listener in _LISTENERS:
+        try:
+            listener(task)
+        except Exception:
+            logger.exception("Error en listener de add_task")
+
+
+def add_task_listener(listener: Callable[[Task], None]) -> None:
+    if listener not in _LISTENERS:
+        _LISTENERS.append(listener)
+
 
 def get_tasks(user_key: str) -> List[Task]:
-    return _TASKS.get(user_key, [])
+    index = _index(user_key)
+    with index.lock:
+        return list(index.by_id.values())
+
+def get_task(user_key: str, task_id: str) -> Optional[Task]:
+    index = _index(user_key)
+    with index.lock:
+        return index.by_id.get(task_id)
+
 def get_tasks_grouped(user_key: str) -> Dict[str, List[Task]]:
-    tasks = get_tasks(user_key)
-    return {
-        "calendar": [t for t in tasks if t.type == "calendar"],
-        "reminder": [t for t in tasks if t.type == "reminder"],
-        "note": [t for t in tasks if t.type == "note"],
-    }
+    index = _index(user_key)
+    with index.lock:
+        return {t: list(index.by_type.get(t, {}).values()) for t in TASK_TYPES}
 
 def get_tasks_by_type(user_key: str, ttype: str) -> List[Task]:
-    return [t for t in get_tasks(user_key) if t.type == ttype]
+    index = _index(user_key)
+    with index.lock:
+        return list(index.by_type.get(ttype, {}).values())
 
 def get_active_tasks(user_key: str) -> List[Task]:
     return [t for t in get_tasks(user_key) if t.status == "active"]
 
+
+def query(
+    user_key: str,
+    type: Optional[str] = None,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    limit: Optional[int] = None,
+    offset: int = 0,
+) -> List[Task]:
+    """
+    Tareas del usuario ordenadas por fecha/hora (las sin fecha al final,
+    por día de creación). Con start/end solo entran las fechadas dentro
+    del rango, inclusivo. type=None mezcla todos los tipos en ese orden.
+    """
+    index = _index(user_key)
+    with index.lock:
+        return index.query(type, start, end, limit, offset)
+
+
+def feed_snapshot(user_key: str, types: Iterable[str]) -> Tuple[int, Optional[float], List[Task]]:
+    """(versión, último cambio, tareas de `types` en orden) leídos juntos para el feed .ics."""
+    index = _index(user_key)
+    with index.lock:
+        tasks = [task for task in index.by_id.values() if task.type in types]
+        return index.version, index.modified_at, tasks
+
+
+def get_tasks_version(user_key: str) -> int:
+    """Versión de la lista sin decodificarla (ETag barato)."""
+    return _TASKS.get_version(user_key)
+
+
+def count(user_key: str, type: str, start: Optional[date] = None, end: Optional[date] = None) -> int:
+    index = _index(user_key)
+    with index.lock:
+        return index.count(type, start, end)
+
+
 def delete_task_by_id(task_id: str, user_key: str):
-    tasks = _TASKS.get(user_key, [])
-    filtered = [
-        t for t in tasks
-        if not (t.id == task_id and t.user_key == user_key)
-    ]
-    if filtered:
-        _TASKS[user_key] = filtered
-    else:
-        _TASKS.pop(user_key, None)
+    def drop(current: Any) -> List[Dict[str, Any]]:
+        return [
+            t for t in (current or [])
+            if not (t.get("id") == task_id and t.get("user_key") == user_key)
+        ]
+
+    # La llave no se borra aunque quede vacía: la versión del usuario debe
+    # seguir creciendo para que los deltas no confundan listas distintas
+    with _write_lock(user_key):
+        modified_at = _touch(user_key)
+        _, new_version = _TASKS.update(user_key, drop)
+        if _JOURNAL is not None:
+            _JOURNAL.record_delete(user_key, task_id)
+    _after_write(user_key, new_version - 1, new_version, task_id, lambda index: index.remove(task_id), modified_at)
 
 
 def clear_tasks(user_key: str):
-    _TASKS.pop(user_key, None)
+    with _write_lock(user_key):
+        _touch(user_key)
+        _TASKS.update(user_key, lambda _current: [])
+        if _JOURNAL is not None:
+            _JOURNAL.record_clear(user_key)
+    # Sin índice, el siguiente se construye con floor = versión actual y
+    # cualquier cliente anterior recibe la lista completa
+    with _INDEX_LOCK:
+        _INDEXES.pop(user_key, None)
+
+
+def changes_since(user_key: str, since: Optional[int]) -> Tuple[int, Optional[List[Task]], List[str]]:
+    """
+    (versión actual, tareas agregadas/cambiadas, ids borrados) desde
+    `since`. Si `since` es None, más viejo que lo que cubre el índice o
+    mayor que la versión actual, regresa None en lugar de la lista: el
+    cliente necesita la lista completa.
+    """
+    index = _index(user_key)
+    with index.lock:
+        if since is None or since < index.floor or since > index.version:
+            return index.version, None, []
+        changed: List[Task] = []
+        deleted: List[str] = []
+        for task_id, version in reversed(index.changes.items()):
+            if version <= since:
+                break
+            task = index.by_id.get(task_id)
+            if task is None:
+                deleted.append(task_id)
+            else:
+                changed.append(task)
+        changed.reverse()
+        deleted.reverse()
+        return index.version, changed, deleted
+
+
+def mark_tasks_notified(user_key: str, task_ids: Iterable[str], notified_at: float) -> List[Task]:
+    """
+    Marca notified_at en las tareas que sigan sin marcar, en una sola
+    escritura compare-and-set. Regresa las que marcó esta llamada: si otro
+    worker ya las reclamó (o se borraron) no vienen, así cada aviso sale
+    una sola vez aunque dos despachadores vean la misma tarea.
+    """
+    wanted = set(task_ids)
+    claimed: Dict[str, Dict[str, Any]] = {}
+
+    def mark(current: Any) -> Any:
+        # update() puede reintentar: se recalcula desde cero cada vez
+        claimed.clear()
+        items = list(current or [])
+        for pos, item in enumerate(items):
+            if item.get("id") in wanted and not item.get("notified_at"):
+                items[pos] = claimed[item["id"]] = {**item, "notified_at": notified_at}
+        return items if claimed else current
+
+    index = _index(user_key)
+    with index.lock:
+        pending = [t for t in wanted if t in index.by_id and not index.by_id[t].notified_at]
+    if not pending:
+        return []
+
+    with _write_lock(user_key):
+        modified_at = _touch(user_key)
+        _, new_version = _TASKS.update(user_key, mark)
+        if _JOURNAL is not None:
+            for item in claimed.values():
+                _JOURNAL.record_put(item)
+    if not claimed:
+        # Otro worker las marcó entre la lectura y la escritura; la versión
+        # subió sin cambios, así que el índice se reconstruye
+        with _INDEX_LOCK:
+            _INDEXES.pop(user_key, None)
+        return []
+    tasks = [task_from_dict(item) for item in claimed.values()]
+
+    def apply(index: _UserIndex) -> None:
+        for task in tasks:
+            index.add(task)
+            index.record_change(task.id, new_version)
+
+    _after_write(user_key, new_version - 1, new_version, tasks[0].id, apply, modified_at)
+    return tasks
+
+
+def iter_all_tasks() -> Iterator[Task]:
+    """Todas las tareas de todos los usuarios (recorrido completo; arranque del despachador)."""
+    for _, raw in _TASKS.items():
+        for item in raw or []:
+            yield task_from_dict(item)
+
+
+# ======================================================
+# Persistencia
+# ======================================================
+
+def _snapshot() -> Dict[str, List[Dict[str, Any]]]:
+    return dict(_TASKS.items())
+
+
+# backend/: raíz contra la que se resuelve un TASK_JOURNAL_DIR relativo
+_APP_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _journal_dir() -> str:
+    return os.path.join(_APP_ROOT, settings.TASK_JOURNAL_DIR)
+
+
+def init_task_persistence() -> Optional[TaskJournal]:
+    """
+    Recupera las tareas del journal y arranca su escritor. Solo aplica al
+    backend en memoria (sqlite/redis ya persisten) y a un proceso: si otro
+    worker tiene el candado del journal, este sigue sin persistencia.
+    """
+    global _JOURNAL
+    if _JOURNAL is not None or not settings.TASK_JOURNAL_DIR:
+        return _JOURNAL
+    if not isinstance(_TASKS, MemoryStateBackend):
+        logger.info("📒 Journal de tareas omitido: el backend %s ya es durable", _TASKS.kind)
+        return None
+
+    journal = TaskJournal(
+        _journal_dir(),
+        flush_interval=settings.TASK_JOURNAL_FLUSH_SECONDS,
+        compact_ops=settings.TASK_JOURNAL_COMPACT_OPS,
+        fsync=settings.TASK_JOURNAL_FSYNC,
+    )
+    if not journal.acquire():
+        logger.warning(
+            "⚠️ Journal de tareas en uso por otro proceso (%s); con varios workers usa STATE_BACKEND=sqlite",
+            _journal_dir(),
+        )
+        return None
+
+    for user_key, tasks in journal.recover().items():
+        _TASKS.put(user_key, tasks)
+    # Los índices se reconstruyen desde el backend al primer acceso
+    with _INDEX_LOCK:
+        _INDEXES.clear()
+
+    journal.start(_snapshot)
+    _JOURNAL = journal
+    return journal
+
+
+def get_task_store_stats() -> Dict[str, Any]:
+    return {
+        **_TASKS.stats(),
+        "indexes": len(_INDEXES),
+        "journal": _JOURNAL.stats() if _JOURNAL is not None else None,
+    }
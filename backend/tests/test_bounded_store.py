@@ -0,0 +1,78 @@
+from app.stores.bounded_store import BoundedTTLStore
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def _store(clock, **kwargs):
+    options = {"name": "test", "ttl_seconds": 60, "max_entries": 3, "max_bytes": 10_000, "clock": clock}
+    options.update(kwargs)
+    return BoundedTTLStore(**options)
+
+
+def test_lru_evicts_least_recently_used():
+    store = _store(FakeClock())
+    store.set("a", 1)
+    store.set("b", 2)
+    store.set("c", 3)
+    assert store.get("a") == 1  # "a" pasa al final; "b" queda como el más viejo
+
+    store.set("d", 4)
+
+    assert "b" not in store
+    assert [k for k, _ in store.items()] == ["c", "a", "d"]
+    assert store.stats()["evictions"]["lru"] == 1
+
+
+def test_byte_budget_evicts_but_keeps_newest_entry():
+    store = _store(FakeClock(), max_entries=100, max_bytes=10, sizeof=len)
+    store.set("a", "xxxx")
+    store.set("b", "xxxx")
+    store.set("c", "xxxx")
+
+    assert "a" not in store
+    assert store.stats()["bytes"] == 8
+
+    store.set("big", "x" * 50)
+    assert [k for k, _ in store.items()] == ["big"]
+    assert store.stats()["evictions"]["bytes"] == 3
+
+
+def test_expired_entry_is_a_miss():
+    clock = FakeClock()
+    store = _store(clock)
+    store.set("a", 1)
+    store.set("b", 2, ttl=5)
+
+    clock.now += 10
+    assert store.get("b") is None
+    assert store.get("a") == 1
+
+    clock.now += 60
+    assert "a" not in store
+    assert store.get("a", "default") == "default"
+    stats = store.stats()
+    assert stats["misses"] == 2
+    assert stats["evictions"]["ttl"] == 2
+
+
+def test_set_renews_ttl_and_sweep_skips_renewed_keys():
+    clock = FakeClock()
+    store = _store(clock, max_entries=100)
+    store.set("a", 1)
+    store.set("b", 2)
+    clock.now += 50
+    store.set("a", 1)  # renueva: la tupla vieja del heap queda obsoleta
+
+    clock.now += 20
+    assert store.sweep() == 1
+    assert [k for k, _ in store.items()] == ["a"]
+
+    clock.now += 60
+    assert store.sweep() == 1
+    assert len(store) == 0
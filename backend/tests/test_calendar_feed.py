@@ -0,0 +1,116 @@
+import time
+import uuid
+from dataclasses import replace
+
+import pytest
+from flask import Flask
+from werkzeug.http import parse_date
+
+from app.domain.task import Task
+from app.routers.calendar_routes import calendar_bp
+from app.services import calendar_feed_service
+from app.stores import task_store
+
+
+@pytest.fixture
+def client(monkeypatch):
+    settings = replace(calendar_feed_service.settings, CALENDAR_FEED_SECRET="test-secret")
+    monkeypatch.setattr(calendar_feed_service, "settings", settings)
+    calendar_feed_service._secret.cache_clear()
+    app = Flask(__name__)
+    app.register_blueprint(calendar_bp)
+    yield app.test_client()
+    calendar_feed_service._secret.cache_clear()
+
+
+@pytest.fixture
+def user_key():
+    user_key = f"whatsapp:+52{uuid.uuid4().int % 10**10:010d}"
+    task_store.add_task(Task(user_key=user_key, type="calendar", content="Dentista", fecha="2030-03-02", hora="10:00"))
+    return user_key
+
+
+def _backdate(user_key, seconds=60):
+    """Como si el último cambio a la lista hubiera sido hace `seconds`."""
+    task_store._MODIFIED.put(user_key, time.time() - seconds)
+    task_store._INDEXES.pop(user_key, None)
+
+
+def test_feed_answers_304_while_the_etag_matches(client, user_key):
+    path = calendar_feed_service.feed_path(user_key)
+    first = client.get(path)
+    assert first.status_code == 200
+    assert b"Dentista" in first.data
+    etag = first.headers["ETag"]
+
+    again = client.get(path, headers={"If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.headers["ETag"] == etag
+    assert again.data == b""
+
+    task_store.add_task(Task(user_key=user_key, type="reminder", content="Pagar", fecha="2030-03-03", hora="09:00"))
+    changed = client.get(path, headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+    assert b"Pagar" in changed.data
+
+
+def test_feed_answers_304_on_if_modified_since_without_etag(client, user_key):
+    _backdate(user_key)
+    path = calendar_feed_service.feed_path(user_key)
+    last_modified = client.get(path).headers["Last-Modified"]
+
+    assert client.get(path, headers={"If-Modified-Since": last_modified}).status_code == 304
+    stale = client.get(path, headers={"If-Modified-Since": "Mon, 01 Jan 2001 00:00:00 GMT"})
+    assert stale.status_code == 200
+
+
+def test_no_last_modified_while_the_change_second_is_open(client, user_key):
+    response = client.get(calendar_feed_service.feed_path(user_key))
+
+    assert response.status_code == 200
+    assert "Last-Modified" not in response.headers
+
+
+def test_delete_after_index_rebuild_is_not_answered_304(client, user_key):
+    _backdate(user_key)
+    path = calendar_feed_service.feed_path(user_key)
+    last_modified = client.get(path).headers["Last-Modified"]
+
+    # El índice se descarta (TTL u otro worker) y luego se borra la tarea
+    task_store._INDEXES.pop(user_key, None)
+    task = task_store.get_tasks(user_key)[0]
+    task_store._INDEXES.pop(user_key, None)
+    task_store.delete_task_by_id(task.id, user_key)
+
+    response = client.get(path, headers={"If-Modified-Since": last_modified})
+    assert response.status_code == 200
+    assert b"Dentista" not in response.data
+
+    # Con otra reconstrucción (y el segundo del borrado ya cerrado) el
+    # Last-Modified sigue siendo el del borrado, no retrocede
+    deleted_at = task_store._MODIFIED.get(user_key)[0] - 2
+    _backdate(user_key, time.time() - deleted_at)
+    rebuilt = client.get(path, headers={"If-Modified-Since": last_modified})
+    assert rebuilt.status_code == 200
+    assert rebuilt.last_modified > parse_date(last_modified)
+
+
+def test_single_task_feed_has_its_own_etag(client, user_key):
+    task = task_store.get_tasks(user_key)[0]
+    path = calendar_feed_service.feed_path(user_key, task.id)
+
+    response = client.get(path)
+    assert response.status_code == 200
+    assert response.headers["ETag"].strip('"').endswith(task.id)
+    assert client.get(path, headers={"If-None-Match": response.headers["ETag"]}).status_code == 304
+
+
+def test_forged_or_disabled_token_is_404(client, user_key, monkeypatch):
+    token = calendar_feed_service.feed_token(user_key)
+    forged = token[:-1] + ("A" if token[-1] != "A" else "B")
+    assert client.get(f"/calendar/{forged}.ics").status_code == 404
+
+    settings = replace(calendar_feed_service.settings, CALENDAR_FEED_SECRET="")
+    monkeypatch.setattr(calendar_feed_service, "settings", settings)
+    assert client.get(f"/calendar/{token}.ics").status_code == 404
@@ -0,0 +1,106 @@
+import threading
+import time
+
+import pytest
+
+from app.services.channel_worker_service import KeyedWorkerPool
+
+
+@pytest.fixture
+def pools():
+    created = []
+
+    def make(workers=2, max_pending=100):
+        pool = KeyedWorkerPool("test-worker", workers=workers, max_pending=max_pending)
+        created.append(pool)
+        return pool
+
+    yield make
+    for pool in created:
+        pool.close()
+
+
+def _wait_until(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < deadline:
+        time.sleep(0.005)
+    return predicate()
+
+
+def test_each_key_runs_in_submission_order(pools):
+    pool = pools(workers=4)
+    seen = {"a": [], "b": []}
+
+    def job(key, i):
+        time.sleep(0.001 * (i % 3))
+        seen[key].append(i)
+
+    for i in range(30):
+        assert pool.submit("a", job, "a", i)
+        assert pool.submit("b", job, "b", i)
+
+    assert _wait_until(lambda: pool.stats()["pending"] == 0)
+    assert seen == {"a": list(range(30)), "b": list(range(30))}
+
+
+def test_full_pool_rejects_new_keys_but_queues_busy_ones(pools):
+    pool = pools(workers=1, max_pending=1)
+    gate = threading.Event()
+    seen = []
+
+    assert pool.submit("a", gate.wait, 5)
+    assert _wait_until(lambda: pool.stats()["senders"] == 1)
+    assert pool.submit("a", seen.append, "a2")  # llave con trabajo: pasa del tope
+    assert not pool.submit("b", seen.append, "b1")
+
+    gate.set()
+    assert _wait_until(lambda: pool.stats()["pending"] == 0)
+    stats = pool.stats()
+    assert seen == ["a2"]
+    assert (stats["over_cap"], stats["rejected"]) == (1, 1)
+
+
+def test_submit_during_run_inline_waits_behind_it(pools):
+    pool = pools(workers=2, max_pending=1)
+    gate = threading.Event()
+    inline_started = threading.Event()
+    seen = []
+
+    def inline_job():
+        inline_started.set()
+        gate.wait(5)
+        seen.append("inline")
+        return "respuesta"
+
+    result = {}
+    inline = threading.Thread(target=lambda: result.update(value=pool.run_inline("a", inline_job)))
+    inline.start()
+    assert inline_started.wait(2)
+
+    # El siguiente mensaje del remitente no se adelanta al que corre en línea
+    assert pool.submit("a", seen.append, "queued")
+    time.sleep(0.05)
+    assert seen == []
+
+    gate.set()
+    inline.join(5)
+    assert _wait_until(lambda: pool.stats()["pending"] == 0)
+    assert seen == ["inline", "queued"]
+    assert result["value"] == "respuesta"
+    assert pool.stats()["senders"] == 0
+
+
+def test_run_inline_waits_for_work_already_queued_for_the_key(pools):
+    pool = pools(workers=1)
+    gate = threading.Event()
+    seen = []
+
+    pool.submit("a", lambda: (gate.wait(5), seen.append("queued")))
+    inline = threading.Thread(target=pool.run_inline, args=("a", seen.append, "inline"))
+    inline.start()
+    time.sleep(0.05)
+    assert seen == []
+
+    gate.set()
+    inline.join(5)
+    assert seen == ["queued", "inline"]
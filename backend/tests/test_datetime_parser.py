@@ -0,0 +1,112 @@
+from datetime import date, datetime, time
+
+import pytest
+
+from app.services.datetime_parser import (
+    CONFIDENCE_AMBIGUOUS_HOUR,
+    CONFIDENCE_INVALID,
+    CONFIDENCE_NONE,
+    CONFIDENCE_UNPARSED,
+    TIMEZONE,
+    parse_spanish_datetime,
+)
+
+# Lunes 19 de octubre de 2026, 10:00 en Ciudad de México
+NOW = datetime(2026, 10, 19, 10, 0, tzinfo=TIMEZONE)
+
+
+def _parse(text):
+    return parse_spanish_datetime(text, NOW)
+
+
+@pytest.mark.parametrize("text, fecha, hora", [
+    ("mañana a las 5 de la tarde", date(2026, 10, 20), time(17, 0)),
+    ("pasado mañana a las 17:30", date(2026, 10, 21), time(17, 30)),
+    ("en 2 horas", date(2026, 10, 19), time(12, 0)),
+    ("el próximo viernes", date(2026, 10, 23), None),
+    ("este lunes", date(2026, 10, 19), None),
+    ("15 de noviembre a las 9 am", date(2026, 11, 15), time(9, 0)),
+    ("25/12", date(2026, 12, 25), None),
+])
+def test_common_expressions_are_confident(text, fecha, hora):
+    parsed = _parse(text)
+
+    assert (parsed.fecha, parsed.hora, parsed.confidence) == (fecha, hora, 1.0)
+
+
+def test_weekday_with_day_of_month_is_the_next_date_matching_both():
+    parsed = _parse("el viernes 13 a las 3 pm")
+
+    assert parsed.fecha == date(2026, 11, 13)
+    assert parsed.fecha.weekday() == 4
+    assert parsed.hora == time(15, 0)
+    assert parsed.confidence == 1.0
+
+
+def test_weekday_with_far_away_day_of_month_falls_back_to_llm():
+    parsed = _parse("el lunes 13")
+
+    assert parsed.fecha == date(2027, 9, 13)
+    assert parsed.fecha.weekday() == 0
+    assert parsed.confidence == CONFIDENCE_UNPARSED
+
+
+def test_plain_weekday_said_that_same_day_means_next_week():
+    parsed = _parse("el lunes")
+
+    assert parsed.fecha == date(2026, 10, 26)
+    assert parsed.confidence == 0.8
+
+
+@pytest.mark.parametrize("text, confidence", [
+    ("comprar leche", CONFIDENCE_NONE),
+    ("a las 5", CONFIDENCE_AMBIGUOUS_HOUR),
+    ("la próxima semana", CONFIDENCE_UNPARSED),
+    ("31/02", CONFIDENCE_INVALID),
+])
+def test_confidence_drops_when_the_text_is_not_fully_understood(text, confidence):
+    assert _parse(text).confidence == confidence
+
+
+def test_as_strings_matches_the_extraction_shape():
+    assert _parse("el viernes 13 a las 3 pm").as_strings() == {"fecha": "2026-11-13", "hora": "15:00"}
+    assert _parse("comprar leche").as_strings() == {"fecha": None, "hora": None}
+
+
+@pytest.mark.parametrize("text, clock, fecha, hora", [
+    ("hoy a las 12 de la noche", (22, 30), date(2026, 10, 20), time(0, 0)),
+    ("esta noche a las 12", (22, 30), date(2026, 10, 20), time(0, 0)),
+    ("mañana a las 12 de la noche", (10, 0), date(2026, 10, 21), time(0, 0)),
+])
+def test_midnight_is_the_end_of_the_named_day(text, clock, fecha, hora):
+    parsed = parse_spanish_datetime(text, NOW.replace(hour=clock[0], minute=clock[1]))
+
+    assert (parsed.fecha, parsed.hora, parsed.confidence) == (fecha, hora, 1.0)
+
+
+@pytest.mark.parametrize("text, hora", [
+    ("hoy a las 9", time(21, 0)),
+    ("a las 9", time(21, 0)),
+    ("hoy a las 10:30", time(22, 30)),
+])
+def test_bare_hour_already_past_today_moves_to_the_evening(text, hora):
+    parsed = parse_spanish_datetime(text, NOW.replace(hour=15))
+
+    assert parsed.hora == hora
+    assert parsed.fecha in (None, date(2026, 10, 19))
+
+
+def test_bare_hour_past_in_both_halves_of_the_day_falls_back_to_llm():
+    parsed = parse_spanish_datetime("hoy a las 2", NOW.replace(hour=23))
+
+    assert parsed.confidence == CONFIDENCE_AMBIGUOUS_HOUR
+
+
+@pytest.mark.parametrize("text, hora, confidence", [
+    ("hoy a las 9 am", time(9, 0), 1.0),
+    ("mañana a las 9", time(9, 0), 0.85),
+])
+def test_explicit_meridiem_or_other_day_keeps_the_hour(text, hora, confidence):
+    parsed = parse_spanish_datetime(text, NOW.replace(hour=15))
+
+    assert (parsed.hora, parsed.confidence) == (hora, confidence)
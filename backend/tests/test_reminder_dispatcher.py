@@ -0,0 +1,138 @@
+import uuid
+from dataclasses import replace
+
+import pytest
+
+from app.domain.task import Task
+from app.services import outbound_message_service
+from app.services.outbound_message_service import LocalSender
+from app.services.reminder_dispatcher import ReminderDispatcher, TimingWheel, due_at
+from app.stores import task_store
+
+
+# ------------------------------------------------------
+# TimingWheel
+# ------------------------------------------------------
+
+def test_wheel_releases_items_only_once_their_tick_passes():
+    wheel = TimingWheel(10)
+    wheel.schedule(105, "a")
+    wheel.schedule(109, "b")
+    wheel.schedule(125, "c")
+
+    assert wheel.advance(99) == []
+    assert sorted(wheel.advance(110)) == ["a", "b"]
+    assert len(wheel) == 1
+    assert wheel.advance(125) == ["c"]
+    assert len(wheel) == 0
+
+
+def test_wheel_sends_late_schedules_on_next_advance():
+    wheel = TimingWheel(10)
+    wheel.advance(200)
+    wheel.schedule(150, "tarde")
+
+    assert wheel.advance(201) == ["tarde"]
+
+
+def test_wheel_long_jump_visits_only_occupied_slots():
+    wheel = TimingWheel(1)
+    wheel.advance(0)
+    wheel.schedule(50, "a")
+    wheel.schedule(5_000_000, "b")
+
+    assert wheel.advance(10_000_000) == ["a", "b"]
+
+
+# ------------------------------------------------------
+# Despachador
+# ------------------------------------------------------
+
+@pytest.fixture(autouse=True)
+def whatsapp_number(monkeypatch):
+    settings = replace(outbound_message_service.settings, TWILIO_WHATSAPP_NUMBER="whatsapp:+10000000000")
+    monkeypatch.setattr(outbound_message_service, "settings", settings)
+
+
+def _user():
+    return f"whatsapp:+52{uuid.uuid4().int % 10**10:010d}"
+
+
+def _reminder(user_key, content, hora="09:00"):
+    task = Task(user_key=user_key, type="reminder", content=content, fecha="2030-01-15", hora=hora)
+    task_store.add_task(task)
+    return task
+
+
+def _dispatcher(sender):
+    return ReminderDispatcher(sender, tick_seconds=30, batch_size=10)
+
+
+def test_same_tick_reminders_for_a_user_go_out_as_one_message():
+    user_key = _user()
+    first = _reminder(user_key, "tomar agua", "09:00")
+    second = _reminder(user_key, "llamar a mamá", "09:00")
+    due = due_at(first)
+    sender = LocalSender()
+    dispatcher = _dispatcher(sender)
+    for task in (first, second):
+        assert dispatcher.schedule(task, now=due - 60)
+
+    assert dispatcher.run_once(now=due + 1) == 1
+
+    [message] = sender.outbox
+    assert message.to == user_key
+    assert "tomar agua" in message.body and "llamar a mamá" in message.body
+    assert all(t.notified_at == due + 1 for t in task_store.get_tasks(user_key))
+
+
+def test_notified_at_claim_lets_only_one_dispatcher_send():
+    user_key = _user()
+    task = _reminder(user_key, "pagar la luz")
+    due = due_at(task)
+    senders = [LocalSender(), LocalSender()]
+    dispatchers = [_dispatcher(sender) for sender in senders]
+    for dispatcher in dispatchers:
+        dispatcher.schedule(task, now=due - 60)
+
+    sent = [dispatcher.run_once(now=due + 1) for dispatcher in dispatchers]
+
+    assert sent == [1, 0]
+    assert len(senders[0].outbox) == 1 and len(senders[1].outbox) == 0
+    assert dispatchers[1].stats()["stale"] == 1  # ya avisada: due_at es None
+
+
+def test_deleted_or_rescheduled_task_is_skipped():
+    user_key = _user()
+    deleted = _reminder(user_key, "borrada")
+    moved = _reminder(user_key, "movida")
+    due = due_at(deleted)
+    sender = LocalSender()
+    dispatcher = _dispatcher(sender)
+    dispatcher.schedule(deleted, now=due - 60)
+    dispatcher.schedule(moved, now=due - 60)
+
+    task_store.delete_task_by_id(deleted.id, user_key)
+    task_store.add_task(replace(moved, hora="18:00"))
+
+    assert dispatcher.run_once(now=due + 1) == 0
+    assert dispatcher.stats()["stale"] == 2
+    assert not sender.outbox
+
+
+def test_claim_rejects_a_dispatcher_with_an_outdated_read(monkeypatch):
+    user_key = _user()
+    task = _reminder(user_key, "sacar la basura")
+    due = due_at(task)
+    dispatcher = _dispatcher(LocalSender())
+    dispatcher.schedule(task, now=due - 60)
+
+    # Otro worker ya reclamó el aviso
+    assert [t.id for t in task_store.mark_tasks_notified(user_key, [task.id], due)] == [task.id]
+    # Este despachador leyó la tarea antes del reclamo: solo el
+    # compare-and-set de notified_at evita el segundo envío
+    monkeypatch.setattr(task_store, "get_task", lambda user_key, task_id: task)
+
+    assert dispatcher.run_once(now=due + 1) == 0
+    assert dispatcher.stats()["skipped"] == 1
+    assert not dispatcher.sender.outbox
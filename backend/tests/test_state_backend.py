@@ -0,0 +1,55 @@
+import threading
+
+import pytest
+
+from app.stores.state_backend import MemoryStateBackend, SQLiteStateBackend, VersionConflict
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def backend(request, tmp_path):
+    if request.param == "sqlite":
+        return SQLiteStateBackend("test", path=str(tmp_path / "state.sqlite3"))
+    return MemoryStateBackend("test")
+
+
+def test_versions_start_at_zero_and_increase(backend):
+    assert backend.get("k") == (None, 0)
+    assert backend.put("k", {"n": 1}, expected_version=0) == 1
+    assert backend.put("k", {"n": 2}) == 2
+    assert backend.get("k") == ({"n": 2}, 2)
+    assert backend.get_version("k") == 2
+
+
+def test_stale_expected_version_raises_conflict(backend):
+    backend.put("k", "a", expected_version=0)
+    _, version = backend.get("k")
+    backend.put("k", "b", expected_version=version)
+
+    with pytest.raises(VersionConflict):
+        backend.put("k", "c", expected_version=version)
+
+    assert backend.get("k") == ("b", 2)
+    assert backend.stats()["conflicts"] == 1
+
+
+def test_create_only_put_conflicts_when_key_exists(backend):
+    backend.put("k", "first", expected_version=0)
+    with pytest.raises(VersionConflict):
+        backend.put("k", "second", expected_version=0)
+    assert backend.get("k")[0] == "first"
+
+
+def test_update_retries_until_no_update_is_lost(backend):
+    backend.put("counter", 0)
+
+    def bump():
+        for _ in range(25):
+            backend.update("counter", lambda n: (n or 0) + 1, retries=100)
+
+    threads = [threading.Thread(target=bump) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert backend.get("counter") == (100, 101)
@@ -0,0 +1,84 @@
+import uuid
+
+import pytest
+
+from app.services import cerebro_service, task_analysis_service
+from app.services.task_extraction_service import coerce_extraction
+from app.states.conversationStore import load_state
+
+ZOOM = "https://zoom.us/j/123456789"
+
+
+# ------------------------------------------------------
+# coerce_extraction
+# ------------------------------------------------------
+
+def test_coerce_extraction_nulls_what_does_not_fit_the_schema():
+    extraction = coerce_extraction(
+        {"fecha": "2026-02-31", "hora": "25:00", "meeting_type": "hibrida", "meeting_link": "zoom", "ubicacion": "null"},
+        text="Reunión con el equipo",
+        task_type="calendar",
+    )
+
+    assert extraction["fecha"] is None
+    assert extraction["hora"] is None
+    assert extraction["meeting_type"] is None
+    assert extraction["meeting_link"] is None
+    assert extraction["ubicacion"] is None
+    assert extraction["titulo"] == "Reunión con el equipo"
+
+
+def test_coerce_extraction_recomputes_missing_fields():
+    extraction = coerce_extraction(
+        {"titulo": "Demo", "fecha": "2026-10-20", "hora": "17:00", "missing_fields": []},
+        text=f"demo por zoom mañana a las 5 pm {ZOOM}",
+        task_type="calendar",
+    )
+
+    # El link inválido o ausente se toma del texto; el modelo no decide missing_fields
+    assert extraction["meeting_type"] == "virtual"
+    assert extraction["meeting_link"] == ZOOM
+    assert extraction["missing_fields"] == []
+
+    without_time = coerce_extraction({"fecha": "2026-10-20"}, text="demo por zoom", task_type="calendar")
+    assert without_time["missing_fields"] == ["datetime", "meeting_link"]
+    assert coerce_extraction({}, text="comprar leche", task_type="note")["missing_fields"] == []
+
+
+# ------------------------------------------------------
+# Follow-up de una tarea nueva
+# ------------------------------------------------------
+
+@pytest.fixture
+def quiet_cerebro(monkeypatch):
+    monkeypatch.setattr(cerebro_service, "check_content_safety", lambda text: {"flagged": False})
+    monkeypatch.setattr(cerebro_service, "append_memory", lambda **kwargs: None)
+
+
+def test_followup_state_keeps_meeting_type_and_link(monkeypatch, quiet_cerebro):
+    text = f"Agenda una reunión virtual por zoom con Ana {ZOOM}"
+    monkeypatch.setattr(
+        task_analysis_service,
+        "extract_task",
+        lambda text, task_type: coerce_extraction(
+            {"titulo": "Reunión con Ana", "meeting_type": "virtual", "meeting_link": ZOOM},
+            text=text,
+            task_type=task_type,
+        ),
+    )
+    user_key = f"web:{uuid.uuid4().hex}"
+
+    response = cerebro_service.procesar_chat_web(
+        user_message=text,
+        action="chat",
+        user_key=user_key,
+        macro_intent="task",
+        task_type="calendar",
+    )
+
+    assert response["action"] == "task_followup"
+    state = load_state(user_key)
+    assert state.awaiting_slot == "datetime"
+    assert state.slots["meeting_type"] == "virtual"
+    assert state.slots["meeting_link"] == ZOOM
+    assert state.slots["content"] == "Reunión con Ana"
@@ -0,0 +1,95 @@
+import os
+
+from app.stores.task_journal import SNAPSHOT_NAME, TaskJournal, apply_op
+
+
+class Mirror:
+    """Estado en memoria que el journal respalda (el papel de task_store)."""
+
+    def __init__(self, journal):
+        self.journal = journal
+        self.state = {}
+
+    def put(self, user_key, task_id, content):
+        task = {"id": task_id, "user_key": user_key, "content": content}
+        apply_op(self.state, {"op": "put", "user_key": user_key, "task": task})
+        self.journal.record_put(task)
+
+    def delete(self, user_key, task_id):
+        apply_op(self.state, {"op": "delete", "user_key": user_key, "task_id": task_id})
+        self.journal.record_delete(user_key, task_id)
+
+    def snapshot(self):
+        return {user_key: list(tasks.values()) for user_key, tasks in self.state.items()}
+
+
+def _open(directory):
+    # flush_interval alto: el test decide cuándo se escribe y se compacta
+    journal = TaskJournal(str(directory), flush_interval=3600, compact_ops=10**9, fsync=False)
+    assert journal.acquire()
+    recovered = journal.recover()
+    mirror = Mirror(journal)
+    mirror.state = {user_key: {t["id"]: t for t in tasks} for user_key, tasks in recovered.items()}
+    journal.start(mirror.snapshot)
+    return journal, mirror, recovered
+
+
+def _segments(directory):
+    return sorted(name for name in os.listdir(directory) if name.endswith(".log"))
+
+
+def test_recover_replays_flushed_segments(tmp_path):
+    journal, mirror, recovered = _open(tmp_path)
+    assert recovered == {}
+    mirror.put("a", "1", "uno")
+    mirror.put("a", "2", "dos")
+    mirror.put("b", "3", "tres")
+    mirror.delete("a", "1")
+    mirror.put("a", "2", "dos editada")
+    assert journal.flush() == 5
+    journal.close()
+
+    journal, _, recovered = _open(tmp_path)
+    journal.close()
+
+    assert recovered == mirror.snapshot()
+    assert recovered["a"] == [{"id": "2", "user_key": "a", "content": "dos editada"}]
+
+
+def test_recover_after_compact_uses_snapshot_plus_newer_ops(tmp_path):
+    journal, mirror, _ = _open(tmp_path)
+    for i in range(5):
+        mirror.put("a", str(i), f"tarea {i}")
+    journal.compact()
+    assert os.path.exists(tmp_path / SNAPSHOT_NAME)
+    assert len(_segments(tmp_path)) == 1
+
+    mirror.delete("a", "0")
+    mirror.put("b", "9", "después del snapshot")
+    journal.close()  # close vuelca lo pendiente
+
+    journal, _, recovered = _open(tmp_path)
+    stats = journal.stats()
+    journal.close()
+
+    assert recovered == mirror.snapshot()
+    assert stats["seq"] == 7
+    assert stats["ops_since_snapshot"] == 2
+
+
+def test_recover_drops_truncated_last_line(tmp_path):
+    journal, mirror, _ = _open(tmp_path)
+    mirror.put("a", "1", "uno")
+    journal.close()
+    segment = tmp_path / _segments(tmp_path)[-1]
+    with open(segment, "a", encoding="utf-8") as f:
+        f.write('{"seq": 2, "op": "put", "user_key": "a", "task": {"id": "2"')
+
+    journal, mirror, recovered = _open(tmp_path)
+    mirror.put("a", "3", "tres")  # ya no queda pegada a la línea cortada
+    journal.close()
+
+    assert [t["id"] for t in recovered["a"]] == ["1"]
+    journal, _, recovered = _open(tmp_path)
+    journal.close()
+    assert [t["id"] for t in recovered["a"]] == ["1", "3"]
@@ -0,0 +1,128 @@
+import uuid
+from dataclasses import replace
+from datetime import date
+
+from app.domain.task import Task, task_to_dict
+from app.stores import task_store
+from app.stores.task_store import _UserIndex
+
+
+def _task(ttype, content, fecha=None, hora=None, created_at=0.0):
+    return Task(user_key="u", type=ttype, content=content, fecha=fecha, hora=hora, created_at=created_at)
+
+
+def _index(*tasks):
+    return _UserIndex.build([task_to_dict(t) for t in tasks], version=1)
+
+
+def _contents(tasks):
+    return [t.content for t in tasks]
+
+
+def test_query_orders_dated_by_date_and_time_then_undated_by_creation():
+    index = _index(
+        _task("reminder", "sin fecha 2", created_at=20),
+        _task("reminder", "dia 3 sin hora", fecha="2026-05-03"),
+        _task("reminder", "dia 3 08:00", fecha="2026-05-03", hora="08:00"),
+        _task("reminder", "sin fecha 1", created_at=10),
+        _task("reminder", "dia 1", fecha="2026-05-01", hora="18:00"),
+    )
+
+    assert _contents(index.query("reminder", None, None, None, 0)) == [
+        "dia 1", "dia 3 08:00", "dia 3 sin hora", "sin fecha 1", "sin fecha 2",
+    ]
+
+
+def test_query_range_is_inclusive_and_skips_undated():
+    index = _index(
+        _task("calendar", "abril", fecha="2026-04-30"),
+        _task("calendar", "mayo 1", fecha="2026-05-01"),
+        _task("calendar", "mayo 7", fecha="2026-05-07", hora="23:30"),
+        _task("calendar", "mayo 8", fecha="2026-05-08"),
+        _task("calendar", "sin fecha"),
+    )
+    start, end = date(2026, 5, 1), date(2026, 5, 7)
+
+    assert _contents(index.query("calendar", start, end, None, 0)) == ["mayo 1", "mayo 7"]
+    assert index.count("calendar", start, end) == 2
+    assert index.count("calendar", None, None) == 5
+
+
+def test_query_merges_types_and_pages_with_limit_offset():
+    index = _index(
+        _task("calendar", "c2", fecha="2026-05-02"),
+        _task("reminder", "r1", fecha="2026-05-01"),
+        _task("note", "n", created_at=5),
+        _task("reminder", "r3", fecha="2026-05-03"),
+    )
+
+    assert _contents(index.query(None, None, None, None, 0)) == ["r1", "c2", "r3", "n"]
+    assert _contents(index.query(None, None, None, 2, 1)) == ["c2", "r3"]
+
+
+def test_remove_drops_task_from_every_view():
+    keep = _task("reminder", "keep", fecha="2026-05-01")
+    drop = _task("reminder", "drop", fecha="2026-05-01")
+    index = _index(keep, drop)
+
+    index.remove(drop.id)
+
+    assert _contents(index.query("reminder", None, None, None, 0)) == ["keep"]
+    assert index.count("reminder", date(2026, 5, 1), date(2026, 5, 1)) == 1
+
+
+# ------------------------------------------------------
+# changes_since (deltas de la lista de tareas)
+# ------------------------------------------------------
+
+def _user():
+    return f"test:{uuid.uuid4().hex}"
+
+
+def _add(user_key, content):
+    task = Task(user_key=user_key, type="note", content=content)
+    task_store.add_task(task)
+    return task
+
+
+def test_changes_since_returns_added_and_deleted_since_version():
+    user_key = _user()
+    first = _add(user_key, "uno")
+    version, _, _ = task_store.changes_since(user_key, None)
+    second = _add(user_key, "dos")
+    task_store.delete_task_by_id(first.id, user_key)
+
+    current, changed, deleted = task_store.changes_since(user_key, version)
+
+    assert current == version + 2
+    assert [t.id for t in changed] == [second.id]
+    assert deleted == [first.id]
+    assert task_store.changes_since(user_key, current) == (current, [], [])
+
+
+def test_changes_since_asks_for_full_list_when_delta_is_unknown():
+    user_key = _user()
+    _add(user_key, "uno")
+    version, _, _ = task_store.changes_since(user_key, None)
+
+    assert task_store.changes_since(user_key, None)[1] is None
+    assert task_store.changes_since(user_key, version + 5)[1] is None
+
+    # Otro worker escribe directo al backend: el índice se reconstruye y
+    # ya no conoce los cambios anteriores a su versión
+    raw, backend_version = task_store._TASKS.get(user_key)
+    task_store._TASKS.put(user_key, raw, expected_version=backend_version)
+    assert task_store.changes_since(user_key, version)[1] is None
+
+
+def test_changes_since_falls_back_once_changes_are_trimmed(monkeypatch):
+    monkeypatch.setattr(task_store, "settings", replace(task_store.settings, TASK_DELTA_MAX_CHANGES=2))
+    user_key = _user()
+    _add(user_key, "base")
+    version, _, _ = task_store.changes_since(user_key, None)
+    for content in ("a", "b", "c"):
+        _add(user_key, content)
+
+    assert task_store.changes_since(user_key, version)[1] is None
+    _, changed, _ = task_store.changes_since(user_key, version + 1)
+    assert [t.content for t in changed] == ["b", "c"]
@@ -0,0 +1,122 @@
+import threading
+import time
+import uuid
+from dataclasses import replace
+
+import pytest
+
+from app.services import webhook_idempotency_service as idempotency
+from app.services.webhook_idempotency_service import run_once
+
+TIMEOUT = ("<Response/>", 200, {"X-Timeout": "1"})
+
+
+@pytest.fixture(autouse=True)
+def short_wait(monkeypatch):
+    settings = replace(
+        idempotency.settings,
+        WEBHOOK_IDEMPOTENCY_ENABLED=True,
+        WEBHOOK_IDEMPOTENCY_WAIT_SECONDS=2.0,
+        WEBHOOK_IDEMPOTENCY_STALE_SECONDS=120.0,
+    )
+    monkeypatch.setattr(idempotency, "settings", settings)
+
+
+def _sid():
+    return f"SM{uuid.uuid4().hex}"
+
+
+class Handler:
+    def __init__(self, body="<Response>hola</Response>", gate=None):
+        self.calls = 0
+        self.body = body
+        self.gate = gate
+        self.started = threading.Event()
+
+    def __call__(self):
+        self.calls += 1
+        self.started.set()
+        if self.gate is not None:
+            self.gate.wait(5)
+        return self.body, 200, {"Content-Type": "text/xml"}
+
+
+def test_duplicate_sid_replays_the_stored_response():
+    sid, handler = _sid(), Handler()
+
+    first = run_once(sid, handler, on_timeout=lambda: TIMEOUT)
+    second = run_once(sid, handler, on_timeout=lambda: TIMEOUT)
+
+    assert handler.calls == 1
+    assert second == first
+
+
+def test_in_flight_duplicate_waits_for_the_original():
+    sid, gate = _sid(), threading.Event()
+    handler = Handler(gate=gate)
+    results = {}
+    original = threading.Thread(target=lambda: results.update(original=run_once(sid, handler, lambda: TIMEOUT)))
+    original.start()
+    assert handler.started.wait(2)
+
+    waited = idempotency.get_webhook_idempotency_stats()["waited"]
+    duplicate = threading.Thread(target=lambda: results.update(duplicate=run_once(sid, handler, lambda: TIMEOUT)))
+    duplicate.start()
+    deadline = time.monotonic() + 2
+    while idempotency.get_webhook_idempotency_stats()["waited"] == waited and time.monotonic() < deadline:
+        time.sleep(0.01)
+    gate.set()
+    original.join(5)
+    duplicate.join(5)
+
+    assert idempotency.get_webhook_idempotency_stats()["waited"] == waited + 1
+    assert handler.calls == 1
+    assert results["duplicate"] == results["original"]
+
+
+def test_in_flight_duplicate_gives_up_after_the_wait(monkeypatch):
+    monkeypatch.setattr(idempotency, "settings", replace(idempotency.settings, WEBHOOK_IDEMPOTENCY_WAIT_SECONDS=0.1))
+    sid, gate = _sid(), threading.Event()
+    handler = Handler(gate=gate)
+    original = threading.Thread(target=lambda: run_once(sid, handler, lambda: TIMEOUT))
+    original.start()
+    assert handler.started.wait(2)
+
+    try:
+        assert run_once(sid, handler, on_timeout=lambda: TIMEOUT) == TIMEOUT
+    finally:
+        gate.set()
+        original.join(5)
+    assert handler.calls == 1
+    # El siguiente reintento ya encuentra la respuesta guardada
+    assert run_once(sid, handler, on_timeout=lambda: TIMEOUT)[0] == handler.body
+
+
+def test_failed_processing_is_retried():
+    sid = _sid()
+
+    def boom():
+        raise RuntimeError("pipeline caído")
+
+    with pytest.raises(RuntimeError):
+        run_once(sid, boom, on_timeout=lambda: TIMEOUT)
+
+    handler = Handler()
+    assert run_once(sid, handler, on_timeout=lambda: TIMEOUT)[0] == handler.body
+    assert handler.calls == 1
+
+
+def test_stale_processing_entry_is_reclaimed():
+    sid, handler = _sid(), Handler()
+    # Un worker que murió a medio procesar dejó la entrada "processing"
+    idempotency._MESSAGES.put(sid, {"status": idempotency.PROCESSING, "started_at": time.time() - 3600})
+
+    assert run_once(sid, handler, on_timeout=lambda: TIMEOUT)[0] == handler.body
+    assert handler.calls == 1
+
+
+def test_missing_sid_always_runs():
+    handler = Handler()
+    run_once(None, handler, on_timeout=lambda: TIMEOUT)
+    run_once("", handler, on_timeout=lambda: TIMEOUT)
+    assert handler.calls == 2
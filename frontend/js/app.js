@@ -39,7 +39,11 @@ import { showAlert } from './modules/uiHelpers.js';
 import {
     processTask,
     renderSidebarTasks,
-    normalizeTaskPayload
+    normalizeTaskPayload,
+    getTasksVersion,
+    syncTasksFromBackend,
+    hasTaskICS,
+    downloadTaskICS
 } from './modules/taskManager.js';
 import { taskStore as taskStoreModule, setTaskStore } from './modules/state.js';
 
@@ -681,10 +685,11 @@ function sendMessage(text) {
 
             addMessage('bot', botMessage);
 
-            // 1) Si backend manda tasks agrupadas, refrescar sidebar desde backend
-            if (normalized.tasks) {
+            // 1) Si backend manda tasks agrupadas (o un delta), refrescar sidebar desde backend
+            const syncedTasks = syncTasksFromBackend(data) || normalized.tasks;
+            if (syncedTasks) {
                 try {
-                    renderSidebarTasks(normalized.tasks);
+                    renderSidebarTasks(syncedTasks);
                 } catch (err) {
                     console.warn('No se pudo renderizar sidebar desde backend:', err);
                 }
@@ -791,7 +796,8 @@ async function callAPI(message) {
                 message: message,
                 action: appState.currentMode,
                 macro_intent: detectMacroIntent(message),
-                task_type: detectTaskType(message)
+                task_type: detectTaskType(message),
+                tasks_version: getTasksVersion()
             })
         });
 
@@ -1292,7 +1298,7 @@ function extractPreviewContent(fullContent, taskType) {
     return cleanContent || 'Nota sin contenido';
 }
 function showICSInfoAlert(task) {
-    if (!task?.raw?.ics) return;
+    if (!hasTaskICS(task)) return;
 
     console.log('📣 Mostrando alerta informativa ICS', {
         taskId: task.id,
@@ -1306,7 +1312,7 @@ function showICSInfoAlert(task) {
         actionText: 'Descargar archivo',
         onAction: () => {
             console.log('🖱️ Click desde alerta → descargar ICS');
-            downloadICS(task.raw.ics, task.content || 'evento');
+            downloadTaskICS(task, task.content || 'evento');
         }
     });
 }
@@ -1366,16 +1372,16 @@ function bindICSDownloadButtons() {
             const taskId = btn.dataset.taskId;
             const task = taskStore.find(t => t.id === taskId);
 
-            console.log('🖱️ Click descargar ICS (sidebar)', { taskId, hasICS: !!task?.raw?.ics });
+            console.log('🖱️ Click descargar ICS (sidebar)', { taskId, hasICS: hasTaskICS(task) });
 
-            if (!task || !task.raw || !task.raw.ics) {
+            if (!hasTaskICS(task)) {
                 console.warn('❌ No se encontró ICS para la tarea', taskId);
                 showErrorMessage('No se encontró el archivo .ics para esta tarea.');
                 return;
             }
 
             // Llamada centralizada a la función de descarga (gesto de usuario)
-            downloadICS(task.raw.ics, task.content || 'evento');
+            downloadTaskICS(task, task.content || 'evento');
         });
 
         btn.__icsBound = true;
@@ -1523,7 +1529,7 @@ function showTaskDetailsModal(task) {
     const dateLine = [fecha, hora].filter(Boolean).join(' ');
     const shouldShowLocation = !isNote;
     const locationDisplay = rawLocation ? location : 'No especificado';
-    const hasIcs = !!task.raw?.ics;
+    const hasIcs = hasTaskICS(task);
     const noteContent = escapeHtml(task.content || '');
     const headerIcon = isNote ? 'note' : (task.type === 'reminder' ? 'notifications' : 'event');
     const headerLabel = isNote ? 'Nota' : (task.type === 'reminder' ? 'Recordatorio' : 'Evento');
@@ -1573,7 +1579,7 @@ function showTaskDetailsModal(task) {
 
     if (downloadBtn && hasIcs) {
         downloadBtn.addEventListener('click', () => {
-            downloadICS(task.raw.ics, safeName);
+            downloadTaskICS(task, safeName);
         });
     }
 }
@@ -1687,7 +1693,7 @@ function renderTaskPreview(listType, tasks) {
                 }
                 
                 // Botón para descargar ICS (sin inline JS)
-                if (task.raw && task.raw.ics) {
+                if (hasTaskICS(task)) {
                     actionButtons += `
                         <button
                             class="task-preview-btn download"
@@ -1772,6 +1778,7 @@ async function deleteTask(taskId) {
 
         // 🔁 Reemplazar fuente de verdad
         taskStore = [];
+        syncTasksFromBackend(data);
         hydrateTaskStoreFromBackend(data.tasks);
 
         renderTaskSidebar();
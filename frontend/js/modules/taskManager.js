@@ -80,6 +80,9 @@ export function processTask(userMessage, data) {
     // Extraer ICS string + filename (unificado)
     let icsContent = null;
     let icsFilename = null;
+    // Liga al evento en el feed .ics (el backend ya no manda el .ics completo)
+    let icsUrl = null;
+    let icsSubscribeUrl = null;
 
     if (norm?.ics) {
         if (typeof norm.ics === 'string') {
@@ -87,6 +90,8 @@ export function processTask(userMessage, data) {
         } else if (typeof norm.ics === 'object') {
             icsContent = norm.ics.ics_content || norm.ics.icsContent || null;
             icsFilename = norm.ics.filename || null;
+            icsUrl = norm.ics.feed_url ? `${API_URL}${norm.ics.feed_url}` : null;
+            icsSubscribeUrl = norm.ics.subscribe_url ? `${API_URL}${norm.ics.subscribe_url}` : null;
         }
     }
 
@@ -197,9 +202,20 @@ export function processTask(userMessage, data) {
         if (icsFilename) {
             task.raw.ics_filename = icsFilename;
         }
+    }
+
+    if (icsUrl) {
+        task.raw.ics_url = icsUrl;
+        task.raw.ics_subscribe_url = icsSubscribeUrl;
+        if (icsFilename) {
+            task.raw.ics_filename = icsFilename;
+        }
+    }
 
-        console.log('✅ ICS guardado en task.raw.ics', {
-            len: icsContent.length,
+    if (icsContent || icsUrl) {
+        console.log('✅ ICS guardado en task.raw', {
+            len: (icsContent || '').length,
+            url: icsUrl,
             filename: task.raw.ics_filename || '(none)',
             contract,
             icsSource
@@ -222,13 +238,13 @@ export function processTask(userMessage, data) {
         storeSize: taskStore.length,
         id: task.id,
         type: task.type,
-        hasICS: !!task.raw?.ics
+        hasICS: hasTaskICS(task)
     });
 
     // --------------------------------------------------
     // 7) Mostrar alerta informativa si hay ICS y tipo permitido
     // --------------------------------------------------
-    if (task.raw?.ics && (task.type === 'calendar' || task.type === 'reminder')) {
+    if (hasTaskICS(task) && (task.type === 'calendar' || task.type === 'reminder')) {
         showICSAlert(task);
     }
 
@@ -246,7 +262,7 @@ export function processTask(userMessage, data) {
 
 // ==================== MOSTRAR ALERTA ICS ====================
 function showICSAlert(task) {
-    if (!task?.raw?.ics) return;
+    if (!hasTaskICS(task)) return;
 
     console.log('📣 Mostrando alerta informativa ICS', {
         taskId: task.id,
@@ -262,7 +278,7 @@ function showICSAlert(task) {
             console.log('🖱️ Click desde alerta → descargar ICS');
             const rawName = task.raw?.ics_filename || task.content || 'evento';
 const safeName = rawName.replace(/\.ics$/i, ''); // evita doble .ics
-downloadICS(task.raw.ics, safeName);
+downloadTaskICS(task, safeName);
         }
     });
 }
@@ -432,7 +448,7 @@ function renderTaskPreview(listType, tasks) {
             }
 
             // Botón descargar ICS (solo si existe)
-            if (task.raw && task.raw.ics) {
+            if (hasTaskICS(task)) {
                 actionButtons += `
                     <button class="task-preview-btn download" data-task-id="${task.id}" title="Descargar evento">
                         <span class="material-symbols-outlined">calendar_month</span>
@@ -557,7 +573,7 @@ function setupTaskButtonDelegation() {
         } else if (button.classList.contains('download')) {
             console.log('📥 Click delegado: descargar ICS', taskId);
             const task = taskStore.find(t => t.id === taskId);
-            if (task && task.raw && task.raw.ics) {
+            if (hasTaskICS(task)) {
                 downloadICS
             } else {
                 showErrorMessage('No se encontró el archivo .ics para esta tarea.');
@@ -600,7 +616,7 @@ function showTaskDetailsModal(task) {
     const dateLine = [fecha, hora].filter(Boolean).join(' ');
     const shouldShowLocation = !isNote;
     const locationDisplay = rawLocation ? location : 'No especificado';
-    const hasIcs = !!task.raw?.ics;
+    const hasIcs = hasTaskICS(task);
     const noteContent = escapeHtml(task.content || '');
     const headerIcon = isNote ? 'note' : (task.type === 'reminder' ? 'notifications' : 'event');
     const headerLabel = isNote ? 'Nota' : (task.type === 'reminder' ? 'Recordatorio' : 'Evento');
@@ -650,7 +666,7 @@ function showTaskDetailsModal(task) {
 
     if (downloadBtn && hasIcs) {
         downloadBtn.addEventListener('click', () => {
-            downloadICS(task.raw.ics, safeName);
+            downloadTaskICS(task, safeName);
         });
     }
 }
@@ -673,9 +689,9 @@ function bindICSDownloadButtons() {
             const taskId = btn.dataset.taskId;
             const task = taskStore.find(t => t.id === taskId);
 
-            console.log('🖱️ Click descargar ICS', { taskId, hasICS: !!task?.raw?.ics });
+            console.log('🖱️ Click descargar ICS', { taskId, hasICS: hasTaskICS(task) });
 
-            if (!task || !task.raw || !task.raw.ics) {
+            if (!hasTaskICS(task)) {
                 console.warn('❌ No se encontró ICS para la tarea', taskId);
                 showErrorMessage('No se encontró el archivo .ics para esta tarea.');
                 return;
@@ -683,7 +699,7 @@ function bindICSDownloadButtons() {
 
             const rawName = task.raw?.ics_filename || task.content || 'evento';
             const safeName = rawName.replace(/\.ics$/i, ''); // evita doble .ics
-            downloadICS(task.raw.ics, safeName);
+            downloadTaskICS(task, safeName);
         });
 
         btn.__icsBound = true;
@@ -841,6 +857,30 @@ export function downloadICS(icsContent, filename = 'evento') {
     showSuccessMessage('Evento descargado. Ábrelo para agregarlo a tu calendario.');
 }
 
+export function hasTaskICS(task) {
+    return !!(task?.raw?.ics || task?.raw?.ics_url);
+}
+
+// ICS en línea (backends viejos) o descargado del feed del usuario
+export async function downloadTaskICS(task, filename = 'evento') {
+    if (task?.raw?.ics) {
+        downloadICS(task.raw.ics, filename);
+        return;
+    }
+    if (!task?.raw?.ics_url) {
+        console.warn('❌ downloadTaskICS: la tarea no tiene ICS');
+        return;
+    }
+    try {
+        const res = await fetch(task.raw.ics_url);
+        if (!res.ok) throw new Error(`HTTP ${res.status}`);
+        downloadICS(await res.text(), filename);
+    } catch (err) {
+        console.error('❌ Error descargando ICS del feed:', err);
+        showErrorMessage('No se pudo descargar el evento');
+    }
+}
+
 // ==================== COPIAR NOTA ====================
 async function copyNoteToClipboard(text) {
     try {
@@ -930,6 +970,43 @@ function saveToLocalStorage() {
     }
 }
 
+// ==================== SINCRONIZACIÓN CON BACKEND (deltas) ====================
+// El backend manda la lista completa ("tasks") o solo lo cambiado desde la
+// versión que le enviamos ("tasks_delta"); "tasks_version" es la siguiente.
+let tasksVersion = null;
+let backendTasks = { calendar: [], reminder: [], note: [] };
+
+export function getTasksVersion() {
+    return tasksVersion;
+}
+
+export function syncTasksFromBackend(data) {
+    if (!data?.tasks_version) return null;
+
+    if (data.tasks) {
+        backendTasks = {
+            calendar: [...(data.tasks.calendar || [])],
+            reminder: [...(data.tasks.reminder || [])],
+            note: [...(data.tasks.note || [])]
+        };
+    } else if (data.tasks_delta) {
+        const { changed = [], deleted = [] } = data.tasks_delta;
+        const removed = new Set([...deleted, ...changed.map(t => t.id)]);
+        Object.keys(backendTasks).forEach(type => {
+            backendTasks[type] = backendTasks[type].filter(t => !removed.has(t.id));
+        });
+        changed.forEach(t => {
+            const type = backendTasks[t.type] ? t.type : 'note';
+            backendTasks[type].push(t);
+        });
+    } else {
+        return null;
+    }
+
+    tasksVersion = data.tasks_version;
+    return backendTasks;
+}
+
 // ==================== RENDERIZAR DESDE BACKEND ====================
 export function renderSidebarTasks(tasksByType) {
     setTaskStore([]);
@@ -1,8 +1,12 @@
 import json
 import os
+import sys
 import numpy as np
 from typing import List, Dict
-from openai import OpenAI
+
+# Proveedor de embeddings del backend (EMBEDDING_PROVIDER=openai|local|hashing)
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "backend")))
+from app.services.embedding_provider_service import EmbeddingProvider, build_embedding_provider
 
 # =====================================================
 # CONFIG
@@ -10,7 +14,7 @@ from openai import OpenAI
 
 INPUT_JSON_PATH = "cursos-con-ids.json"             # <-- pon aquí tu archivo real
 OUTPUT_EMB_PATH = "title_embeddings.npz"     # <-- archivo final que copiarás a tu API
-EMBEDDING_MODEL = "text-embedding-3-large"   # excelente calidad/costo
+EMBEDDING_MODEL = "text-embedding-3-large"   # excelente calidad/costo (proveedor openai)
 
 BATCH_SIZE = 100  # OpenAI embeddings permite listas grandes; 100 es seguro
 
@@ -41,7 +45,7 @@ def load_courses(path: str) -> List[Dict]:
 # GENERATE EMBEDDINGS
 # =====================================================
 
-def embed_texts(texts: List[str], client: OpenAI) -> np.ndarray:
+def embed_texts(texts: List[str], provider: EmbeddingProvider) -> np.ndarray:
     """
     Genera embeddings para una lista de textos usando batching.
     Devuelve una matriz NxD.
@@ -51,16 +55,9 @@ def embed_texts(texts: List[str], client: OpenAI) -> np.ndarray:
     for i in range(0, len(texts), BATCH_SIZE):
         batch = texts[i:i + BATCH_SIZE]
         print(f"→ Procesando batch {i} – {i + len(batch)}...")
+        all_embeddings.append(provider.embed(batch))
 
-        resp = client.embeddings.create(
-            model=EMBEDDING_MODEL,
-            input=batch
-        )
-
-        batch_embeddings = [item.embedding for item in resp.data]
-        all_embeddings.extend(batch_embeddings)
-
-    return np.array(all_embeddings, dtype=np.float32)
+    return np.concatenate(all_embeddings).astype(np.float32)
 
 
 # =====================================================
@@ -72,11 +69,10 @@ def main():
     print("   GENERADOR DE EMBEDDINGS DE TÍTULOS  ")
     print("=======================================")
 
-    api_key = ''
-    if not api_key:
-        raise EnvironmentError("Falta la variable OPENAI_API_KEY.")
-
-    client = OpenAI(api_key=api_key)
+    provider = build_embedding_provider(model=EMBEDDING_MODEL) if os.getenv(
+        "EMBEDDING_PROVIDER", "openai"
+    ) == "openai" else build_embedding_provider()
+    print(f"🧠 Proveedor de embeddings: {provider.name} (dim={provider.dim})")
 
     # 1. Cargar cursos
     print(f"\n📄 Leyendo archivo: {INPUT_JSON_PATH}")
@@ -93,7 +89,7 @@ def main():
 
     # 2. Generar embeddings
     print("\n🧠 Generando embeddings para títulos...")
-    embeddings = embed_texts(course_names, client)
+    embeddings = embed_texts(course_names, provider)
 
     print("\n✔ Embeddings generados.")
     print("  → shape:", embeddings.shape)
@@ -1,7 +1,12 @@
+import os
+import sys
+
 import pandas as pd
-from openai import OpenAI
 from tqdm import tqdm
 
+# Proveedor de embeddings del backend (EMBEDDING_PROVIDER=openai|local|hashing)
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "backend")))
+from app.services.embedding_provider_service import build_embedding_provider
 
 
 df = pd.read_pickle("cursos_dataframe_agrupado.pkl")
@@ -9,38 +14,36 @@ df = pd.read_pickle("cursos_dataframe_agrupado.pkl")
 print(f"🟢 Cursos a procesar: {len(df)}")
 
 
-
-
-client = OpenAI(api_key="")   
-
 EMBED_MODEL = "text-embedding-3-large"
 
+provider = (
+    build_embedding_provider(model=EMBED_MODEL)
+    if os.getenv("EMBEDDING_PROVIDER", "openai") == "openai"
+    else build_embedding_provider()
+)
+print(f"🧠 Proveedor de embeddings: {provider.name} (dim={provider.dim})")
 
 
-# FUNCIÓN PARA GENERAR EMBEDDINGS
-
+# FUNCIÓN PARA GENERAR EMBEDDINGS EN LOTES
 
-def get_embedding(text):
-    text = text.replace("\n", " ").strip()
-    response = client.embeddings.create(
-        model=EMBED_MODEL,
-        input=text
-    )
-    return response.data[0].embedding
 
+def get_embeddings(texts):
+    texts = [t.replace("\n", " ").strip() for t in texts]
+    return provider.embed(texts).tolist()
 
 
 embeddings = []
 
 print("\n🔄 Generando embeddings por curso...\n")
 
-for text in tqdm(df["textForEmbedding"], desc="Embedding cursos"):
+texts = list(df["textForEmbedding"])
+for i in tqdm(range(0, len(texts), provider.batch_size), desc="Embedding cursos"):
+    batch = texts[i:i + provider.batch_size]
     try:
-        emb = get_embedding(text)
+        embeddings.extend(get_embeddings(batch))
     except Exception as e:
-        print("❌ Error generando embedding:", e)
-        emb = []
-    embeddings.append(emb)
+        print("❌ Error generando embeddings del lote:", e)
+        embeddings.extend([] for _ in batch)
 
 df["embedding"] = embeddings
 